@@ -0,0 +1,107 @@
+"""
+LNMP Columnar Archive Benchmarks
+
+Compares a columnar archive (lnmp.columnar) with records stored as
+back-to-back binary frames:
+1. size: archive bytes per record and compression ratio for each codec
+2. scan: summing one integer field across all records, columnar
+   (one column inflated) vs. decoding every binary record
+
+Usage:
+    python benchmarks/bench_columnar.py
+    python benchmarks/run_benchmarks.py --suite columnar --json results.json
+"""
+
+import argparse
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import lnmp
+import harness
+
+RECORDS = 50_000
+QUICK_RECORDS = 5_000
+CODECS = ["zlib", "bz2", "lzma"]
+
+
+def make_records(count):
+    """Telemetry-like records: timestamps, small ints, repeated strings, flags."""
+    return [
+        lnmp.core.parse(
+            f"F1={1_700_000_000_000 + i * 250};F2={i % 97};F3=\"region-{i % 12}\";"
+            f"F4={(i % 1000) / 4!r};F5={'true' if i % 3 else 'false'};F6=[admin,developer]"
+        )
+        for i in range(count)
+    ]
+
+
+def _archive(records, codec):
+    buf = io.BytesIO()
+    with lnmp.columnar.ColumnarWriter(buf, codec=codec) as writer:
+        writer.write_many(records)
+    return buf.getvalue()
+
+
+def columnar_suite(args):
+    count = QUICK_RECORDS if args.quick else RECORDS
+    records = make_records(count)
+    frames = [record.encode_binary() for record in records]
+    binary_size = sum(len(frame) for frame in frames)
+    results = []
+
+    for codec in CODECS:
+        name = f"columnar.size[codec={codec}]"
+        if args.filter and args.filter not in name:
+            continue
+        print(f"Running {name}...", end="", flush=True)
+        data = _archive(records, codec)
+        results.append({
+            "name": name,
+            "params": {"codec": codec, "records": count},
+            "bytes_per_record": len(data) / count,
+            "binary_bytes_per_record": binary_size / count,
+            "compression_ratio": binary_size / len(data),
+        })
+        print(f" {results[-1]['compression_ratio']:.1f}x smaller than binary frames")
+
+    reader = lnmp.columnar.ColumnarReader(_archive(records, "zlib"))
+
+    def scan_columnar():
+        return sum(reader.column(2))
+
+    def scan_binary():
+        # Records expose no field accessors, so go through canonical text
+        total = 0
+        for frame in frames:
+            fields = dict(part.split("=", 1) for part in lnmp.core.decode_binary(frame).encode().split(";"))
+            total += int(fields["F2"])
+        return total
+
+    for label, func in (("columnar", scan_columnar), ("binary", scan_binary)):
+        name = f"columnar.scan[{label}]"
+        if args.filter and args.filter not in name:
+            continue
+        print(f"Running {name}...", end="", flush=True)
+        result = {"name": name, "params": {"records": count}}
+        result.update(harness.measure_latency(func, samples=max(5, args.samples // 10)))
+        result["items_sec"] = result["ops_sec"] * count
+        results.append(result)
+        print(f" {int(result['items_sec']):,} records/sec")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LNMP columnar archive benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Fewer records")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this string")
+    parser.add_argument("--samples", type=int, default=100, help="Latency samples (divided by 10 for scans)")
+    args = parser.parse_args(argv)
+    columnar_suite(args)
+
+
+if __name__ == "__main__":
+    main()
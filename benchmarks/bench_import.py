@@ -0,0 +1,139 @@
+"""
+LNMP Import-Time Benchmarks
+
+Cold-start cost of importing the SDK, measured the way serverless runtimes
+pay it: every sample is a fresh interpreter.
+1. wall time of each import statement, timed inside the child process
+   (interpreter start-up itself is excluded)
+2. a `python -X importtime` breakdown of the slowest modules pulled in
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/run_benchmarks.py --suite import --json results.json
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SCENARIOS = [
+    ("lnmp", "import lnmp"),
+    ("lnmp.core", "import lnmp.core"),
+    ("lnmp.core.parse", "import lnmp; lnmp.core.parse('F12=14532')"),
+    ("lnmp.transport", "import lnmp.transport"),
+    ("lnmp.all", "import lnmp; [getattr(lnmp, name) for name in lnmp.__all__]"),
+]
+RUNS = 30
+QUICK_RUNS = 8
+TOP_MODULES = 5
+
+_MARKER = "--lnmp-import-start--"
+
+
+def _run(code, *flags):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    proc = subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return proc.stdout, proc.stderr
+
+
+def measure_wall(statement, runs):
+    """Return per-run import wall times in µs, each from a fresh interpreter."""
+    code = (
+        "import time\n"
+        "start = time.perf_counter_ns()\n"
+        f"{statement}\n"
+        "print((time.perf_counter_ns() - start) / 1000.0)\n"
+    )
+    return [float(_run(code)[0].strip().splitlines()[-1]) for _ in range(runs)]
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output printed after the start marker.
+
+    Returns ``(total_us, modules)`` where ``total_us`` sums the cumulative
+    time of the top-level imports and ``modules`` lists
+    ``(name, self_us, cumulative_us)`` for every module imported.
+    """
+    lines = stderr.splitlines()
+    if _MARKER in lines:
+        lines = lines[lines.index(_MARKER) + 1:]
+    total = 0
+    modules = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not name.startswith("  "):
+            total += int(cumulative_us)
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return total, modules
+
+
+def measure_importtime(statement):
+    """Return the `-X importtime` total and slowest modules for one statement."""
+    code = f"import sys\nsys.stderr.write({_MARKER!r} + '\\n')\n{statement}\n"
+    _, stderr = _run(code, "-X", "importtime")
+    total, modules = parse_importtime(stderr)
+    slowest = sorted(modules, key=lambda module: module[1], reverse=True)[:TOP_MODULES]
+    return total, slowest
+
+
+def import_suite(args):
+    runs = QUICK_RUNS if args.quick else RUNS
+    results = []
+    for label, statement in SCENARIOS:
+        name = f"import.{label}"
+        if getattr(args, "filter", None) and args.filter not in name:
+            continue
+        print(f"Running {name}...", end="", flush=True)
+        timings = sorted(measure_wall(statement, runs))
+        total, slowest = measure_importtime(statement)
+        index = min(len(timings) - 1, int(round(0.99 * (len(timings) - 1))))
+        results.append({
+            "name": name,
+            "params": {"statement": statement, "runs": runs},
+            "p50_us": statistics.median(timings),
+            "p99_us": timings[index],
+            "mean_us": statistics.fmean(timings),
+            "min_us": timings[0],
+            "importtime_us": total,
+            "slowest_modules": [
+                {"module": module, "self_us": self_us, "cumulative_us": cumulative_us}
+                for module, self_us, cumulative_us in slowest
+            ],
+        })
+        print(f" p50 {results[-1]['p50_us'] / 1000:.2f} ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LNMP import-time benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Fewer interpreter runs per scenario")
+    parser.add_argument("--filter", default=None, help="Only run scenarios whose name contains this string")
+    args = parser.parse_args(argv)
+
+    results = import_suite(args)
+
+    print("\n| Import | p50 (ms) | p99 (ms) | -X importtime (ms) | Slowest modules (self ms) |")
+    print("|--------|----------|----------|--------------------|---------------------------|")
+    for r in results:
+        slowest = ", ".join(f"{m['module']} {m['self_us'] / 1000:.2f}" for m in r["slowest_modules"])
+        print(
+            f"| {r['params']['statement']} | {r['p50_us'] / 1000:.2f} | {r['p99_us'] / 1000:.2f} "
+            f"| {r['importtime_us'] / 1000:.2f} | {slowest} |"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+LNMP Transport Middleware Benchmarks
+
+Measures the per-request overhead added by lnmp.transport.asgi.LNMPMiddleware
+and lnmp.transport.wsgi.LNMPMiddleware:
+
+1. ASGI: the app is driven in-process (no sockets), bare vs. wrapped
+2. WSGI: the app is called in-process, bare vs. wrapped
+3. WSGI: end-to-end requests against a local wsgiref server on 127.0.0.1
+
+Usage:
+    python benchmarks/bench_middleware.py
+"""
+
+import asyncio
+import http.client
+import io
+import os
+import sys
+import threading
+import time
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+# Ensure we can import lnmp if running from sdk/python root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import lnmp
+from lnmp.transport import asgi, wsgi
+
+BODY = b"F12=14532;F7=1;F23=[admin,developer]"
+HEADERS = {"x-lnmp-source": "bench", "x-lnmp-trace-id": "bench-trace"}
+
+
+def _per_request_us(func, iterations):
+    func()  # warmup
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+async def _asgi_app(scope, receive, send):
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def bench_asgi(iterations, app):
+    """Per-request cost of an in-process ASGI call (µs)."""
+    headers = [(b"content-type", b"application/lnmp")] + [
+        (k.encode(), v.encode()) for k, v in HEADERS.items()
+    ]
+
+    async def send(message):
+        pass
+
+    async def loop(target):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            messages = [{"type": "http.request", "body": BODY, "more_body": False}]
+
+            async def receive():
+                return messages.pop()
+
+            await target({"type": "http", "headers": headers}, receive, send)
+        return (time.perf_counter() - start) / iterations * 1_000_000
+
+    return asyncio.run(loop(app))
+
+
+def _wsgi_app(environ, start_response):
+    environ["wsgi.input"].read(int(environ.get("CONTENT_LENGTH") or 0))
+    start_response("200 OK", [("Content-Length", "2")])
+    return [b"ok"]
+
+
+def _environ():
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "CONTENT_TYPE": "application/lnmp",
+        "CONTENT_LENGTH": str(len(BODY)),
+        "wsgi.input": io.BytesIO(BODY),
+    }
+    for k, v in HEADERS.items():
+        environ["HTTP_" + k.upper().replace("-", "_")] = v
+    return environ
+
+
+def bench_wsgi(iterations, app):
+    """Per-request cost of an in-process WSGI call (µs)."""
+    return _per_request_us(lambda: app(_environ(), lambda status, headers: None), iterations)
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def bench_wsgi_server(iterations, app):
+    """Per-request round trip against a local wsgiref server (µs)."""
+    server = make_server("127.0.0.1", 0, app, handler_class=_QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    headers = dict(HEADERS, **{"Content-Type": "application/lnmp"})
+
+    def request():
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+        conn.request("POST", "/", body=BODY, headers=headers)
+        conn.getresponse().read()
+        conn.close()
+
+    try:
+        return _per_request_us(request, iterations)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    iterations = 20000
+    rows = []
+
+    asgi_bare = bench_asgi(iterations, _asgi_app)
+    rows.append(("ASGI: bare app (in-process)", asgi_bare, 0.0))
+    for label, options in (
+        ("ASGI: LNMPMiddleware", {}),
+        ("ASGI: LNMPMiddleware (score+route)", {"score": True, "route": True}),
+    ):
+        t = bench_asgi(iterations, asgi.LNMPMiddleware(_asgi_app, **options))
+        rows.append((label, t, t - asgi_bare))
+
+    wsgi_bare = bench_wsgi(iterations, _wsgi_app)
+    rows.append(("WSGI: bare app (in-process)", wsgi_bare, 0.0))
+    for label, options in (
+        ("WSGI: LNMPMiddleware", {}),
+        ("WSGI: LNMPMiddleware (score+route)", {"score": True, "route": True}),
+    ):
+        t = bench_wsgi(iterations, wsgi.LNMPMiddleware(_wsgi_app, **options))
+        rows.append((label, t, t - wsgi_bare))
+
+    server_iterations = 500
+    server_bare = bench_wsgi_server(server_iterations, _wsgi_app)
+    rows.append(("WSGI: bare app (wsgiref, 127.0.0.1)", server_bare, 0.0))
+    t = bench_wsgi_server(server_iterations, wsgi.LNMPMiddleware(_wsgi_app, route=True))
+    rows.append(("WSGI: LNMPMiddleware (wsgiref, 127.0.0.1)", t, t - server_bare))
+
+    print(f"\nlnmp {lnmp.__version__} on {sys.platform}\n")
+    print("| Scenario | µs/request | Overhead (µs) |")
+    print("|----------|------------|---------------|")
+    for label, t, overhead in rows:
+        print(f"| {label} | {t:.2f} | {overhead:+.2f} |")
+
+
+if __name__ == "__main__":
+    main()
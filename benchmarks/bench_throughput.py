@@ -0,0 +1,214 @@
+"""
+LNMP Throughput and Memory-Footprint Benchmarks
+
+Capacity-planning numbers that single-call latency does not show:
+1. concurrency: parse / score / route throughput on thread pools and
+   process pools at increasing worker counts
+2. memory: RSS and tracemalloc footprint of holding N (default 1M)
+   Record and Envelope objects
+
+Each memory measurement runs in a fresh process so peak RSS is not shared
+between scenarios. tracemalloc only sees the Python heap (including the
+native wrapper objects themselves); the RSS delta also covers memory owned
+by the Rust side.
+
+Usage:
+    python benchmarks/bench_throughput.py
+    python benchmarks/run_benchmarks.py --suite concurrency,memory --json results.json
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Ensure we can import lnmp if running from sdk/python root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import lnmp
+
+WORKER_COUNTS = [1, 2, 4, 8, 16]
+QUICK_WORKER_COUNTS = [1, 2, 4]
+OPERATIONS = ("parse", "score", "route")
+THROUGHPUT_ITEMS = 200_000
+QUICK_THROUGHPUT_ITEMS = 20_000
+CHUNK_SIZE = 1_000
+MEMORY_OBJECTS = 1_000_000
+QUICK_MEMORY_OBJECTS = 100_000
+
+SAMPLE_TEXT = "F12=14532;F7=1;F23=[admin,developer];F3=\"hello world\""
+
+
+def _process_chunk(operation, texts):
+    """Run one operation over a chunk of texts; executed inside the worker."""
+    if operation == "parse":
+        for text in texts:
+            lnmp.core.parse(text)
+    elif operation == "score":
+        for text in texts:
+            lnmp.net.context_score(lnmp.envelope.wrap(lnmp.core.parse(text), "bench"))
+    elif operation == "route":
+        for text in texts:
+            lnmp.net.routing_decide(lnmp.envelope.wrap(lnmp.core.parse(text), "bench"))
+    return len(texts)
+
+
+def _worker_counts(quick):
+    cpus = os.cpu_count() or 1
+    counts = [n for n in (QUICK_WORKER_COUNTS if quick else WORKER_COUNTS) if n <= cpus]
+    return counts or [1]
+
+
+def measure_throughput(kind, operation, workers, items):
+    """Return items/sec for ``operation`` on a ``kind`` ("thread"/"process") pool."""
+    chunks = [[SAMPLE_TEXT] * CHUNK_SIZE for _ in range(max(1, items // CHUNK_SIZE))]
+    if kind == "thread":
+        executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    with executor:
+        # Warm every worker (process start-up, imports) outside the timing
+        list(executor.map(_process_chunk, [operation] * workers, [[SAMPLE_TEXT]] * workers))
+        start = time.perf_counter()
+        done = sum(executor.map(_process_chunk, [operation] * len(chunks), chunks))
+        elapsed = time.perf_counter() - start
+    return done / elapsed
+
+
+def concurrency_suite(args):
+    items = QUICK_THROUGHPUT_ITEMS if args.quick else THROUGHPUT_ITEMS
+    results = []
+    for kind in ("thread", "process"):
+        for operation in OPERATIONS:
+            names = {
+                workers: f"concurrency.{kind}.{operation}[workers={workers}]"
+                for workers in _worker_counts(args.quick)
+            }
+            selected = [w for w, name in names.items() if not getattr(args, "filter", None) or args.filter in name]
+            if not selected:
+                continue
+            # Speedup is relative to one worker, even when --filter drops that row
+            single = measure_throughput(kind, operation, 1, items)
+            for workers in selected:
+                name = names[workers]
+                print(f"Running {name}...", end="", flush=True)
+                rate = single if workers == 1 else measure_throughput(kind, operation, workers, items)
+                speedup = rate / single
+                results.append({
+                    "name": name,
+                    "params": {"pool": kind, "operation": operation, "workers": workers, "items": items},
+                    "items_sec": rate,
+                    "speedup": speedup,
+                    "efficiency": speedup / workers,
+                })
+                print(f" {int(rate):,} items/sec ({speedup:.2f}x)")
+    return results
+
+
+def _current_rss():
+    """Resident set size in bytes, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _build(kind, count):
+    parse = lnmp.core.parse
+    if kind == "record":
+        return [parse(f"F12={i};F7=1;F23=[admin,developer]") for i in range(count)]
+    wrap = lnmp.envelope.wrap
+    return [
+        wrap(parse(f"F12={i};F7=1;F23=[admin,developer]"), "bench", timestamp_ms=1_700_000_000_000, trace_id="t")
+        for i in range(count)
+    ]
+
+
+def _measure_footprint(kind, count, traced):
+    """Build ``count`` objects in this (fresh) process and report their footprint."""
+    gc.collect()
+    if traced:
+        tracemalloc.start()
+    rss_before = _current_rss()
+    objects = _build(kind, count)
+    gc.collect()
+    rss_after = _current_rss()
+    result = {"peak_rss_bytes": _peak_rss()}
+    if rss_before is not None and rss_after is not None:
+        result["rss_bytes"] = rss_after - rss_before
+    if traced:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["tracemalloc_bytes"] = current
+        result["tracemalloc_peak_bytes"] = peak
+    del objects
+    return result
+
+
+def memory_suite(args):
+    count = QUICK_MEMORY_OBJECTS if args.quick else getattr(args, "memory_objects", MEMORY_OBJECTS)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for kind in ("record", "envelope"):
+        name = f"memory.{kind}[n={count}]"
+        if getattr(args, "filter", None) and args.filter not in name:
+            continue
+        print(f"Running {name}...", end="", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            untraced = executor.submit(_measure_footprint, kind, count, False).result()
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            traced = executor.submit(_measure_footprint, kind, count, True).result()
+        result = {"name": name, "params": {"kind": kind, "objects": count}}
+        result.update(untraced)
+        result["tracemalloc_bytes"] = traced["tracemalloc_bytes"]
+        result["tracemalloc_peak_bytes"] = traced["tracemalloc_peak_bytes"]
+        result["tracemalloc_bytes_per_object"] = traced["tracemalloc_bytes"] / count
+        if "rss_bytes" in untraced:
+            result["rss_bytes_per_object"] = untraced["rss_bytes"] / count
+        results.append(result)
+        per_object = result.get("rss_bytes_per_object")
+        print(f" {per_object:.0f} B/object RSS" if per_object is not None else " done")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LNMP throughput and memory benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Fewer items, workers and objects")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this string")
+    parser.add_argument("--memory-objects", type=int, default=MEMORY_OBJECTS, help="Objects held by the memory scenarios")
+    args = parser.parse_args(argv)
+
+    throughput = concurrency_suite(args)
+    memory = memory_suite(args)
+
+    print(f"\nlnmp {lnmp.__version__} on {sys.platform}, {os.cpu_count()} CPUs\n")
+    print("| Scenario | Items/Sec | Speedup | Efficiency |")
+    print("|----------|-----------|---------|------------|")
+    for r in throughput:
+        print(f"| {r['name']} | {int(r['items_sec']):,} | {r['speedup']:.2f}x | {r['efficiency']:.0%} |")
+    print("\n| Scenario | RSS/object (B) | tracemalloc/object (B) | Peak RSS (MB) |")
+    print("|----------|----------------|------------------------|---------------|")
+    for r in memory:
+        rss = r.get("rss_bytes_per_object")
+        peak = r.get("peak_rss_bytes")
+        rss_text = f"{rss:.0f}" if rss is not None else "n/a"
+        peak_text = f"{peak / 2**20:.0f}" if peak is not None else "n/a"
+        print(f"| {r['name']} | {rss_text} | {r['tracemalloc_bytes_per_object']:.0f} | {peak_text} |")
+
+
+if __name__ == "__main__":
+    main()
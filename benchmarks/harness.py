@@ -0,0 +1,181 @@
+"""
+Shared measurement helpers for the LNMP benchmark suite.
+
+Latency is sampled in groups of operations sized so that each sample lasts
+at least ``MIN_SAMPLE_NS``; this keeps timer overhead out of sub-microsecond
+results while still producing a distribution for p50/p99.
+
+Allocation figures come from tracemalloc and therefore only cover the Python
+heap (wrapper objects, returned bytes/str/lists), not allocations made inside
+the native extension.
+"""
+
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+MIN_SAMPLE_NS = 20_000
+CALIBRATION_NS = 5_000_000
+HIGHER_IS_BETTER = frozenset(("ops_sec", "items_sec", "speedup", "efficiency"))
+# Records/s of the concurrency rows
+THROUGHPUT_METRIC = "items_sec"
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _ops_per_sample(func):
+    """Estimate how many calls fit in one MIN_SAMPLE_NS sample."""
+    calls = 0
+    start = time.perf_counter_ns()
+    elapsed = 0
+    while elapsed < CALIBRATION_NS:
+        func()
+        calls += 1
+        elapsed = time.perf_counter_ns() - start
+        if calls >= 1000 and elapsed > MIN_SAMPLE_NS:
+            break
+    per_call = elapsed / calls
+    return max(1, int(MIN_SAMPLE_NS / per_call) + 1)
+
+
+def measure_latency(func, samples=200):
+    """Return latency statistics (µs per call) for ``func``."""
+    ops = _ops_per_sample(func)
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(samples):
+            start = time.perf_counter_ns()
+            for _ in range(ops):
+                func()
+            timings.append((time.perf_counter_ns() - start) / ops / 1000.0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    timings.sort()
+    mean = statistics.fmean(timings)
+    return {
+        "p50_us": _percentile(timings, 0.50),
+        "p99_us": _percentile(timings, 0.99),
+        "mean_us": mean,
+        "min_us": timings[0],
+        "max_us": timings[-1],
+        "ops_sec": 1_000_000 / mean if mean else 0.0,
+        "samples": samples,
+        "ops_per_sample": ops,
+    }
+
+
+def measure_allocations(func, calls=50):
+    """Return Python-heap allocation figures per call.
+
+    ``alloc_peak_bytes`` is the largest transient footprint of one call;
+    ``alloc_blocks`` is the number of memory blocks still held per call
+    when every result is kept alive (i.e. the size of the returned objects).
+    """
+    func()  # warm caches so one-time allocations are not counted
+    gc.collect()
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(min(calls, 10)):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+        kept = []
+        before = tracemalloc.take_snapshot()
+        for _ in range(calls):
+            kept.append(func())
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del kept
+    return {
+        "alloc_peak_bytes": int(statistics.median(peaks)),
+        "alloc_blocks": max(0.0, blocks / calls),
+        "alloc_retained_bytes": max(0.0, size / calls),
+    }
+
+
+def environment():
+    """Describe the machine and interpreter the results were taken on."""
+    import lnmp
+
+    return {
+        "lnmp_version": lnmp.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": sys.platform,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "date": time.strftime("%Y-%m-%d"),
+    }
+
+
+def write_json(path, results, env=None):
+    with open(path, "w") as f:
+        json.dump({"environment": env or environment(), "results": results}, f, indent=2)
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold, metric="p50_us"):
+    """Compare results with a baseline run.
+
+    Returns a list of rows ``(name, metric, baseline, current, change,
+    regressed)`` for every benchmark present in both runs. ``change`` is the
+    relative change of ``metric``; a benchmark regresses when it grew by
+    more than ``threshold`` (0.10 = 10%); for throughput metrics
+    (HIGHER_IS_BETTER) ``change`` is expressed as slowdown, so a drop counts
+    as positive. Throughput rows, which have no latency, are compared by
+    THROUGHPUT_METRIC when they lack ``metric``.
+    """
+    previous = {r["name"]: r for r in baseline.get("results", [])}
+    rows = []
+    for result in results:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        key = metric if metric in result else THROUGHPUT_METRIC
+        if key not in old or key not in result or not old[key]:
+            continue
+        if key in HIGHER_IS_BETTER:
+            change = old[key] / result[key] - 1.0 if result[key] else float("inf")
+        else:
+            change = result[key] / old[key] - 1.0
+        rows.append((result["name"], key, old[key], result[key], change, change > threshold))
+    return rows
+
+
+def write_markdown(path, results, env):
+    with open(path, "w") as f:
+        f.write("# LNMP Python SDK Performance Benchmarks\n\n")
+        f.write(f"**Date:** {env['date']}\n")
+        f.write(f"**Platform:** {env['platform']} ({env['machine']}), Python {env['python']}\n\n")
+        f.write("| Benchmark | p50 (µs) | p99 (µs) | Ops/Sec | Alloc blocks/op | Peak alloc (B) |\n")
+        f.write("|-----------|----------|----------|---------|-----------------|----------------|\n")
+        for r in results:
+            if "p50_us" not in r:
+                continue
+            f.write(
+                f"| {r['name']} | {r['p50_us']:.2f} | {r['p99_us']:.2f} | {int(r.get('ops_sec', 0)):,} "
+                f"| {r.get('alloc_blocks', 0):.1f} | {r.get('alloc_peak_bytes', 0):,} |\n"
+            )
@@ -1,129 +1,239 @@
 """
 LNMP Python SDK Benchmark Suite
 
-Measures performance of critical SDK operations:
-1. Core: Parse, Encode, Binary Encode/Decode
-2. Spatial: Encode/Decode
-3. Embedding: Delta computation
+Sweeps the critical SDK operations over payload sizes:
+1. core: Parse, Encode, Binary Encode/Decode, Lenient Parse, Validate,
+   and scoring + routing with and without a RoutingCache, for records of
+   1 to 10k fields (with nested records and arrays)
+2. embedding: Delta, Apply Delta, Quantize for 128 to 4096 dimensions
+3. batch: validate_many / parse_lenient_many vs. a parse() loop,
+   pack_context into an 8k-token budget, and typed Schema.decode_many,
+   for batch sizes 1 to 4096
+4. columnar (opt-in, see bench_columnar.py): archive size per codec and
+   single-column scans vs. decoding binary frames
+5. import: cold-start import time of the package and its submodules,
+   one fresh interpreter per sample (see bench_import.py)
+6. concurrency, memory (opt-in, see bench_throughput.py): thread/process
+   pool throughput and the footprint of holding 1M records/envelopes
+
+Every benchmark reports p50/p99 latency and Python-heap allocations.
+Results can be written as JSON and compared against a stored baseline;
+the run fails (exit code 1) if any benchmark slowed down by more than
+the regression threshold.
 
 Usage:
     python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --quick --suite core,batch
+    python benchmarks/run_benchmarks.py --suite all
+    python benchmarks/run_benchmarks.py --json results.json --save-baseline baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --threshold 0.10
+    python benchmarks/run_benchmarks.py --markdown BENCHMARKS.md
 """
 
-import timeit
-import statistics
-import lnmp
+import argparse
 import os
 import sys
 
 # Ensure we can import lnmp if running from sdk/python root
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import lnmp
+import harness
+from bench_columnar import columnar_suite
+from bench_import import import_suite
+from bench_throughput import MEMORY_OBJECTS, concurrency_suite, memory_suite
+
+FIELD_COUNTS = [1, 10, 100, 1_000, 10_000]
+EMBEDDING_DIMS = [128, 256, 768, 1536, 4096]
+BATCH_SIZES = [1, 16, 256, 4096]
+
+QUICK_FIELD_COUNTS = [1, 100, 1_000]
+QUICK_EMBEDDING_DIMS = [128, 1536]
+QUICK_BATCH_SIZES = [1, 256]
+
+
+def make_record_text(fields, *, nested=True, arrays=True):
+    """Build LNMP text with a realistic mix of value types.
+
+    Every 10th field is a nested record and every 10th (offset by 5) a
+    string array; the rest cycle through ints, floats and strings.
+    """
+    parts = []
+    for fid in range(1, fields + 1):
+        kind = fid % 10
+        if nested and kind == 0:
+            parts.append(f"F{fid}={{F1={fid};F2=nested_{fid}}}")
+        elif arrays and kind == 5:
+            parts.append(f"F{fid}=[alpha,beta,gamma]")
+        elif kind in (1, 4, 7):
+            parts.append(f"F{fid}={fid * 31}")
+        elif kind in (2, 8):
+            parts.append(f"F{fid}={fid}.25")
+        else:
+            parts.append(f'F{fid}="value {fid}"')
+    return ";".join(parts)
+
+
+def make_vectors(dim, changed=0.1):
+    base = [((i * 7919) % 1000) / 1000.0 for i in range(dim)]
+    step = max(1, int(1 / changed))
+    updated = [v + 0.01 if i % step == 0 else v for i, v in enumerate(base)]
+    return base, updated
+
+
+def _bench(args, name, func, **params):
+    """Measure one benchmark and return its result row (None if filtered out)."""
+    if args.filter and args.filter not in name:
+        return None
+    print(f"Running {name}...", end="", flush=True)
+    result = {"name": name, "params": params}
+    result.update(harness.measure_latency(func, samples=args.samples))
+    if not args.no_alloc:
+        result.update(harness.measure_allocations(func))
+    batch = params.get("batch")
+    if batch:
+        result["p50_us_per_item"] = result["p50_us"] / batch
+        result["items_sec"] = result["ops_sec"] * batch
+    print(f" p50 {result['p50_us']:.2f} µs, p99 {result['p99_us']:.2f} µs")
+    return result
+
+
+def core_suite(args):
+    results = []
+    for fields in args.field_counts:
+        text = make_record_text(fields, nested=not args.flat, arrays=not args.flat)
+        record = lnmp.core.parse(text)
+        binary = record.encode_binary()
+        loose = text.replace(";", " ; ")
+        tag = f"[fields={fields}]"
+        results.append(_bench(args, f"core.parse{tag}", lambda: lnmp.core.parse(text), fields=fields, bytes=len(text)))
+        results.append(_bench(args, f"core.encode{tag}", record.encode, fields=fields))
+        results.append(_bench(args, f"core.encode_binary{tag}", record.encode_binary, fields=fields, bytes=len(binary)))
+        results.append(_bench(args, f"core.decode_binary{tag}", lambda: lnmp.core.decode_binary(binary), fields=fields))
+        results.append(_bench(args, f"core.parse_lenient{tag}", lambda: lnmp.core.parse_lenient(loose), fields=fields))
+        results.append(_bench(args, f"core.validate{tag}", lambda: lnmp.core.validate_many([text]), fields=fields))
+        envelope = lnmp.envelope.wrap(record, source="bench")
+        cache = lnmp.net.RoutingCache()
+        route = lambda: (lnmp.net.context_score(envelope), lnmp.net.routing_decide(envelope))
+        results.append(_bench(args, f"net.route{tag}", route, fields=fields))
+        results.append(_bench(args, f"net.route_cached{tag}", lambda: cache.route(envelope), fields=fields))
+    return results
+
 
-def run_benchmark(name, func, setup_func=None, iterations=10000):
-    """Run a single benchmark and return stats."""
-    print(f"Running {name} ({iterations} iterations)...", end="", flush=True)
-    
-    setup_code = "pass"
-    if setup_func:
-        setup_code = setup_func()
-        
-    # Warmup
-    timeit.timeit(func, setup=setup_code, number=iterations // 10, globals=globals())
-    
-    # Measurement
-    times = timeit.repeat(func, setup=setup_code, repeat=5, number=iterations, globals=globals())
-    
-    # Calculate stats (time per operation in microseconds)
-    avg_time_us = (statistics.mean(times) / iterations) * 1_000_000
-    min_time_us = (min(times) / iterations) * 1_000_000
-    max_time_us = (max(times) / iterations) * 1_000_000
-    ops_per_sec = 1_000_000 / avg_time_us
-    
-    print(f" Done. {avg_time_us:.2f} µs/op ({int(ops_per_sec):,} ops/sec)")
-    
-    return {
-        "name": name,
-        "avg_us": avg_time_us,
-        "min_us": min_time_us,
-        "max_us": max_time_us,
-        "ops_sec": ops_per_sec
-    }
-
-def main():
+def embedding_suite(args):
     results = []
-    
-    # --- Core Benchmarks ---
-    
-    # 1. Parse
-    results.append(run_benchmark(
-        "Core: Parse (Small)",
-        lambda: lnmp.core.parse("F12=14532;F7=1"),
-        iterations=50000
-    ))
-    
-    # 2. Encode (Text)
-    record = lnmp.core.parse("F12=14532;F7=1")
-    results.append(run_benchmark(
-        "Core: Encode Text (Small)",
-        lambda: record.encode(),
-        iterations=50000
-    ))
-    
-    # 3. Encode (Binary)
-    results.append(run_benchmark(
-        "Core: Encode Binary (Small)",
-        lambda: record.encode_binary(),
-        iterations=50000
-    ))
-    
-    # 4. Decode (Binary)
-    binary_data = record.encode_binary()
-    results.append(run_benchmark(
-        "Core: Decode Binary (Small)",
-        lambda: lnmp.core.decode_binary(binary_data),
-        iterations=50000
-    ))
-    
-    # --- Spatial Benchmarks ---
-    
-    results.append(run_benchmark(
-        "Spatial: Encode Position3D",
-        lambda: lnmp.spatial.encode_position3d(123.456, 789.012, 345.678),
-        iterations=100000
-    ))
-    
-    encoded_spatial = lnmp.spatial.encode_position3d(123.456, 789.012, 345.678)
-    results.append(run_benchmark(
-        "Spatial: Decode Position3D",
-        lambda: lnmp.spatial.decode_position3d(encoded_spatial),
-        iterations=100000
-    ))
-    
-    # --- Embedding Benchmarks ---
-    
-    base_vec = [0.1 * i for i in range(128)]
-    updated_vec = [0.1 * i + (0.01 if i % 10 == 0 else 0) for i in range(128)]
-    
-    results.append(run_benchmark(
-        "Embedding: Delta (128-dim)",
-        lambda: lnmp.embedding.delta(base_vec, updated_vec),
-        iterations=10000
-    ))
-    
-    # --- Report Generation ---
-    
-    report_path = os.path.join(os.path.dirname(__file__), "..", "BENCHMARKS.md")
-    with open(report_path, "w") as f:
-        f.write("# LNMP Python SDK Performance Benchmarks\n\n")
-        f.write(f"**Date:** {timeit.time.strftime('%Y-%m-%d')}\n")
-        f.write(f"**Platform:** {sys.platform}\n\n")
-        f.write("| Operation | Avg Time (µs) | Ops/Sec | Min (µs) | Max (µs) |\n")
-        f.write("|-----------|---------------|---------|----------|----------|\n")
-        
-        for r in results:
-            f.write(f"| {r['name']} | {r['avg_us']:.2f} | {int(r['ops_sec']):,} | {r['min_us']:.2f} | {r['max_us']:.2f} |\n")
-            
-    print(f"\nBenchmark report generated at: {os.path.abspath(report_path)}")
+    for dim in args.embedding_dims:
+        base, updated = make_vectors(dim)
+        _, delta = lnmp.embedding.delta(base, updated)
+        tag = f"[dim={dim}]"
+        results.append(_bench(args, f"embedding.delta{tag}", lambda: lnmp.embedding.delta(base, updated), dim=dim))
+        results.append(_bench(args, f"embedding.apply_delta{tag}", lambda: lnmp.embedding.apply_delta(base, delta), dim=dim))
+        results.append(_bench(args, f"utils.quantize_qint8{tag}", lambda: lnmp.utils.quantize(updated, "QInt8"), dim=dim))
+    return results
+
+
+def batch_suite(args):
+    results = []
+    text = make_record_text(10, nested=not args.flat, arrays=not args.flat)
+    schema = lnmp.schema.Schema([(1, "a", int), (2, "b", float), (3, "c", str), (4, "d", int), (7, "e", int)])
+    for batch in args.batch_sizes:
+        texts = [text] * batch
+        tag = f"[batch={batch}]"
+        results.append(_bench(args, f"batch.validate_many{tag}", lambda: lnmp.core.validate_many(texts), batch=batch))
+        results.append(_bench(args, f"batch.parse_lenient_many{tag}", lambda: lnmp.core.parse_lenient_many(texts), batch=batch))
+        results.append(_bench(args, f"batch.parse_loop{tag}", lambda: [lnmp.core.parse(t) for t in texts], batch=batch))
+        results.append(_bench(args, f"batch.schema_decode_many{tag}", lambda: schema.decode_many(texts), batch=batch))
+        envelopes = [lnmp.envelope.wrap(lnmp.core.parse(f"{text};F99={i}"), source="bench") for i in range(batch)]
+        results.append(_bench(args, f"batch.pack_context{tag}", lambda: lnmp.llm.pack_context(envelopes, 8000), batch=batch))
+    return results
+
+
+SUITES = {
+    "core": core_suite,
+    "embedding": embedding_suite,
+    "batch": batch_suite,
+    "import": import_suite,
+    "columnar": columnar_suite,
+    "concurrency": concurrency_suite,
+    "memory": memory_suite,
+}
+DEFAULT_SUITES = ["core", "embedding", "batch", "import"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="LNMP Python SDK benchmark suite")
+    parser.add_argument(
+        "--suite",
+        default=",".join(DEFAULT_SUITES),
+        help=f"Comma-separated suites, or 'all' (default: {','.join(DEFAULT_SUITES)}; available: {','.join(SUITES)})",
+    )
+    parser.add_argument("--filter", default=None, help="Only keep benchmarks whose name contains this string")
+    parser.add_argument("--quick", action="store_true", help="Smaller sweep and fewer samples")
+    parser.add_argument("--samples", type=int, default=None, help="Latency samples per benchmark")
+    parser.add_argument("--flat", action="store_true", help="Generate records without nested records and arrays")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip tracemalloc allocation measurements")
+    parser.add_argument("--memory-objects", type=int, default=MEMORY_OBJECTS, help="Objects held by the memory suite")
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON")
+    parser.add_argument("--markdown", metavar="PATH", help="Write a Markdown table (e.g. BENCHMARKS.md)")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a previous --json run")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before failing (default: 0.10)")
+    parser.add_argument(
+        "--metric",
+        default="p50_us",
+        help="Metric compared against the baseline, e.g. p50_us, p99_us, items_sec (default: p50_us); "
+        "throughput rows without it are compared by items_sec",
+    )
+    args = parser.parse_args(argv)
+
+    if args.suite == "all":
+        args.suite = ",".join(SUITES)
+    unknown = set(args.suite.split(",")) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    if args.samples is None:
+        args.samples = 50 if args.quick else 200
+    args.field_counts = QUICK_FIELD_COUNTS if args.quick else FIELD_COUNTS
+    args.embedding_dims = QUICK_EMBEDDING_DIMS if args.quick else EMBEDDING_DIMS
+    args.batch_sizes = QUICK_BATCH_SIZES if args.quick else BATCH_SIZES
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    env = harness.environment()
+
+    results = []
+    for name in args.suite.split(","):
+        results.extend(r for r in SUITES[name](args) if r is not None)
+
+    if args.json:
+        harness.write_json(args.json, results, env)
+        print(f"\nResults written to: {os.path.abspath(args.json)}")
+    if args.save_baseline:
+        harness.write_json(args.save_baseline, results, env)
+        print(f"Baseline written to: {os.path.abspath(args.save_baseline)}")
+    if args.markdown:
+        harness.write_markdown(args.markdown, results, env)
+        print(f"Benchmark report generated at: {os.path.abspath(args.markdown)}")
+
+    if not args.baseline:
+        return 0
+
+    rows = harness.compare(results, harness.load_json(args.baseline), args.threshold, args.metric)
+    print(f"\nComparison with {args.baseline} ({args.metric}, threshold {args.threshold:+.0%}):\n")
+    print("| Benchmark | Metric | Baseline | Current | Change |")
+    print("|-----------|--------|----------|---------|--------|")
+    for name, metric, old, new, change, regressed in rows:
+        flag = " REGRESSION" if regressed else ""
+        print(f"| {name} | {metric} | {old:.2f} | {new:.2f} | {change:+.1%}{flag} |")
+    regressions = [row for row in rows if row[5]]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
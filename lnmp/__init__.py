@@ -7,6 +7,25 @@ LNMP protocol.
 
 __version__ = "0.5.7"
 
-from . import core, envelope, net, llm, embedding, utils, spatial, transport
+from typing import TYPE_CHECKING
 
-__all__ = ["core", "envelope", "net", "llm", "embedding", "utils", "spatial", "transport", "__version__"]
+__all__ = ["core", "envelope", "net", "llm", "embedding", "utils", "spatial", "transport", "metrics", "tracing", "dedup", "columnar", "ipc", "schema", "bench", "aio", "__version__"]
+
+# Submodules are imported on first attribute access so that e.g. a function
+# using only lnmp.core does not pay for transport, tracing or datetime.
+_SUBMODULES = frozenset(__all__) - {"__version__"}
+
+if TYPE_CHECKING:
+    from . import core, envelope, net, llm, embedding, utils, spatial, transport, metrics, tracing, dedup, columnar, ipc, schema, bench, aio
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        from importlib import import_module
+
+        return import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
@@ -0,0 +1,9 @@
+"""Entry point for ``python -m lnmp``; see lnmp.cli."""
+
+import sys
+
+from .cli import main
+
+# Guarded so that spawned worker processes can re-import this module
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+"""Asyncio routing of envelope streams into rate-limited queues.
+
+StreamRouter consumes an async iterator of envelopes, routes each one with
+the native routing_decide() and hands it to the queue registered for its
+decision. Each RateLimitedQueue is bounded, releases envelopes no faster
+than its token-bucket rate, and chooses what to do when full: apply
+backpressure, drop the newest or oldest envelope, or shed the lowest-scored
+one.
+
+Example:
+    >>> router = lnmp.aio.StreamRouter({
+    ...     "SendToLLM": lnmp.aio.RateLimitedQueue(1000, rate=50, policy="shed"),
+    ...     "ProcessLocally": lnmp.aio.RateLimitedQueue(10_000),
+    ... })
+    >>> async def send_worker():
+    ...     async for envelope in router.queues["SendToLLM"]:
+    ...         await send_to_llm(envelope)
+    >>> await asyncio.gather(router.run(envelopes), send_worker(), local_worker())
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterable, Callable, Dict, Mapping, Optional, Union
+
+from . import net
+from .envelope import Envelope
+
+__all__ = ["TokenBucket", "RateLimitedQueue", "QueueClosed", "StreamRouter", "POLICIES"]
+
+DECISIONS = ("SendToLLM", "ProcessLocally", "Drop")
+
+# What a full queue does with a new envelope:
+#   block        wait for space, pausing the router (backpressure)
+#   drop_newest  discard the new envelope
+#   drop_oldest  discard the envelope queued longest
+#   shed         discard the lowest composite score; the queue releases
+#                the highest-scored envelope first
+POLICIES = ("block", "drop_newest", "drop_oldest", "shed")
+
+
+class QueueClosed(Exception):
+    """Raised by get() on a closed, drained queue and by put() after close()."""
+
+
+class TokenBucket:
+    """Token bucket rate limiter.
+
+    Tokens accrue at `rate` per second up to `burst`. reserve() always takes
+    a token, going into debt when none is left, and returns how long the
+    caller must wait; concurrent callers are therefore served in order and
+    never exceed the rate together.
+
+    Args:
+        rate: Tokens per second
+        burst: Bucket capacity (default: max(1, rate), one second's worth)
+        clock: Monotonic time source in seconds
+
+    Raises:
+        ValueError: If rate is not positive or burst is below 1
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, *, clock: Callable[[], float] = time.monotonic):
+        if not rate > 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if burst is None:
+            burst = max(1.0, rate)
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available (negative while in debt)."""
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available."""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before using it."""
+        self._refill()
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self.rate)
+
+
+class RateLimitedQueue:
+    """Bounded asyncio queue of envelopes with a token-bucket release rate.
+
+    get() waits for a token before taking an envelope, so consumers receive
+    at most `rate` envelopes per second (after an initial `burst`). When
+    the queue holds maxsize envelopes, put() follows `policy` (see
+    POLICIES). close() lets consumers drain what is queued, after which
+    get() raises QueueClosed and async iteration ends.
+
+    Like asyncio.Queue, the queue is not thread-safe; use it from a single
+    event loop.
+
+    Args:
+        maxsize: Maximum number of queued envelopes
+        rate: Envelopes per second released by get() (None: unlimited)
+        burst: Token bucket capacity (default: one second's worth)
+        policy: "block", "drop_newest", "drop_oldest" or "shed"
+
+    Raises:
+        ValueError: For a non-positive maxsize or rate, or an unknown policy
+
+    Example:
+        >>> queue = lnmp.aio.RateLimitedQueue(500, rate=20, policy="drop_oldest")
+        >>> await queue.put(envelope)
+        >>> envelope = await queue.get()
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        *,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        policy: str = "block",
+    ):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy!r} (expected one of {', '.join(POLICIES)})")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.bucket = TokenBucket(rate, burst) if rate is not None else None
+        if policy == "shed":
+            self._items = net.PriorityDispatchQueue(maxsize, half_life=None)
+        else:
+            self._items = deque()
+        self._closed = False
+        self._getters: deque = deque()
+        self._putters: deque = deque()
+        self.high_water = 0
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = 0
+        self.blocked_s = 0.0
+        self.throttled_s = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def depth(self) -> int:
+        """Envelopes currently queued."""
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @staticmethod
+    def _wake(waiters: deque) -> None:
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    async def _wait(self, waiters: deque) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await waiter
+        except BaseException:
+            waiter.cancel()
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+            # A wake-up that arrived just before cancellation goes to the next waiter
+            if waiter.done() and not waiter.cancelled():
+                self._wake(waiters)
+            raise
+
+    async def put(self, envelope: Envelope, score: Union[net.ContextScore, float, None] = None) -> Optional[Envelope]:
+        """Queue an envelope, applying the queue's policy when it is full.
+
+        Args:
+            envelope: Envelope to queue
+            score: Composite score or ContextScore, used by the "shed"
+                policy (default: lnmp.net.context_score(envelope))
+
+        Returns:
+            The envelope that was dropped to respect maxsize, or None
+
+        Raises:
+            QueueClosed: If the queue has been closed
+        """
+        if self._closed:
+            raise QueueClosed("put() on a closed queue")
+        dropped = None
+        if self.policy == "shed":
+            dropped = self._items.push(envelope, score)
+        elif len(self._items) < self.maxsize:
+            self._items.append(envelope)
+        elif self.policy == "drop_newest":
+            dropped = envelope
+        elif self.policy == "drop_oldest":
+            dropped = self._items.popleft()
+            self._items.append(envelope)
+        else:
+            started = time.monotonic()
+            while len(self._items) >= self.maxsize:
+                await self._wait(self._putters)
+                if self._closed:
+                    raise QueueClosed("put() on a closed queue")
+            self.blocked_s += time.monotonic() - started
+            self._items.append(envelope)
+
+        if dropped is not None:
+            self.dropped += 1
+        if dropped is not envelope:
+            self.enqueued += 1
+            self.high_water = max(self.high_water, len(self._items))
+            self._wake(self._getters)
+        return dropped
+
+    async def get(self) -> Envelope:
+        """Remove and return the next envelope, waiting for one and for a token.
+
+        Raises:
+            QueueClosed: If the queue is closed and empty
+        """
+        if self._closed and not self._items:
+            raise QueueClosed("get() on a closed, empty queue")
+        if self.bucket is not None:
+            delay = self.bucket.reserve()
+            if delay > 0:
+                self.throttled_s += delay
+                await asyncio.sleep(delay)
+        while not self._items:
+            if self._closed:
+                raise QueueClosed("get() on a closed, empty queue")
+            await self._wait(self._getters)
+        envelope = self._items.pop() if self.policy == "shed" else self._items.popleft()
+        self.dequeued += 1
+        self._wake(self._putters)
+        return envelope
+
+    def close(self) -> None:
+        """Stop accepting envelopes and wake every waiting producer and consumer."""
+        self._closed = True
+        for waiters in (self._getters, self._putters):
+            while waiters:
+                self._wake(waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and counters.
+
+        Returns:
+            Dictionary with depth, maxsize, high_water, enqueued, dequeued,
+            dropped, blocked_s (time put() waited for space) and
+            throttled_s (time get() waited for the rate limit)
+        """
+        return {
+            "depth": len(self._items),
+            "maxsize": self.maxsize,
+            "high_water": self.high_water,
+            "enqueued": self.enqueued,
+            "dequeued": self.dequeued,
+            "dropped": self.dropped,
+            "blocked_s": self.blocked_s,
+            "throttled_s": self.throttled_s,
+        }
+
+    def __aiter__(self) -> "RateLimitedQueue":
+        return self
+
+    async def __anext__(self) -> Envelope:
+        try:
+            return await self.get()
+        except QueueClosed:
+            raise StopAsyncIteration from None
+
+    def __repr__(self) -> str:
+        rate = self.bucket.rate if self.bucket is not None else None
+        return f"RateLimitedQueue(depth={len(self)}, maxsize={self.maxsize}, rate={rate}, policy={self.policy!r})"
+
+
+class StreamRouter:
+    """Route an async stream of envelopes into per-decision queues.
+
+    Envelopes whose decision has no queue (typically Drop) are counted as
+    unrouted and discarded. A "block" queue that fills up pauses the whole
+    stream until its consumer catches up, including envelopes bound for
+    other queues; use a drop or shed policy where that is not acceptable.
+
+    Args:
+        queues: RateLimitedQueue per decision, keyed by RoutingDecision
+            member or name ("SendToLLM", "ProcessLocally", "Drop")
+        cache: RoutingCache to reuse scores and decisions from
+        close_queues: Close every queue when run() finishes, ending the
+            consumers' async iteration
+
+    Raises:
+        ValueError: For a key that is not a routing decision
+
+    Example:
+        >>> router = lnmp.aio.StreamRouter({"SendToLLM": llm_queue, "ProcessLocally": local_queue})
+        >>> await router.run(envelopes)
+        >>> router.stats()["queues"]["SendToLLM"]["depth"]
+    """
+
+    def __init__(
+        self,
+        queues: Mapping[Union[str, net.RoutingDecision], RateLimitedQueue],
+        *,
+        cache: Optional[net.RoutingCache] = None,
+        close_queues: bool = True,
+    ):
+        self.queues: Dict[str, RateLimitedQueue] = {}
+        for key, queue in queues.items():
+            name = str(key)
+            if name not in DECISIONS:
+                raise ValueError(f"Unknown routing decision: {name!r}")
+            self.queues[name] = queue
+        self.cache = cache
+        self.close_queues = close_queues
+        self.received = 0
+        self.unrouted = 0
+
+    def route(self, envelope: Envelope):
+        """Return the queue for an envelope (or None) and its score, if needed."""
+        if self.cache is not None:
+            score, decision = self.cache.route(envelope)
+            return self.queues.get(decision.name), score
+        queue = self.queues.get(net.routing_decide(envelope).name)
+        # Only shedding needs the score, so only then is it computed
+        if queue is not None and queue.policy == "shed":
+            return queue, net.context_score(envelope)
+        return queue, None
+
+    async def run(self, envelopes: AsyncIterable[Envelope]) -> None:
+        """Consume `envelopes` until exhausted, routing each into its queue."""
+        try:
+            async for envelope in envelopes:
+                self.received += 1
+                queue, score = self.route(envelope)
+                if queue is None:
+                    self.unrouted += 1
+                    continue
+                await queue.put(envelope, score)
+        finally:
+            if self.close_queues:
+                for queue in self.queues.values():
+                    queue.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Router counters and the stats() of every queue, keyed by decision."""
+        return {
+            "received": self.received,
+            "unrouted": self.unrouted,
+            "queues": {name: queue.stats() for name, queue in self.queues.items()},
+        }
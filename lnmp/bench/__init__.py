@@ -0,0 +1,10 @@
+"""Load-testing tools for the LNMP SDK.
+
+- replay: capture envelopes routed by lnmp.llm.normalize_and_route() with
+  their arrival times, and replay them as recorded, accelerated or at a
+  constant rate while measuring latency
+"""
+
+from . import replay
+
+__all__ = ["replay"]
@@ -0,0 +1,493 @@
+"""Capture and replay of production envelope traffic.
+
+Capture records every envelope routed by lnmp.llm.normalize_and_route(),
+with its routing threshold and its arrival time, into an archive file::
+
+    with lnmp.bench.replay.capture("traffic.lnmpr"):
+        serve()   # calls lnmp.llm.normalize_and_route(...)
+
+Replay sends the archived envelopes to a target, either the SDK pipeline
+(normalize_and_route on the record text) or an HTTP endpoint. Pacing is one
+of three modes: the recorded inter-arrival times, the same times divided by
+a speed-up factor, or open-loop at a constant rate::
+
+    report = lnmp.bench.replay.replay(lnmp.bench.replay.load("traffic.lnmpr"), speed=10)
+    print(report)
+
+    python -m lnmp.bench.replay traffic.lnmpr --rate 5000 --stub
+
+Every request has an intended start time taken from the schedule. Service
+time runs from the actual start to completion. Response time runs from the
+intended start, so time spent waiting behind a slow request is counted. A
+closed-loop load generator otherwise hides those waits from its
+percentiles (coordinated omission).
+
+Archive layout (little-endian)::
+
+    b"LNRP" | version u8 | capture start, Unix ms u64
+    entries: arrival offset ns u64 | threshold f64 | length u32 | binary envelope
+"""
+
+import argparse
+import http.client
+import json
+import struct
+import sys
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+from .. import llm, transport
+from ..envelope import Envelope, decode_binary
+
+__all__ = ["Recorder", "Entry", "Report", "StubServer", "capture", "load", "replay", "main"]
+
+MAGIC = b"LNRP"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sBQ")  # magic, version, capture start (Unix ms)
+_ENTRY = struct.Struct("<QdI")  # arrival offset ns, threshold, envelope length
+
+PERCENTILES = (0.50, 0.90, 0.99, 0.999)
+
+
+class Entry(NamedTuple):
+    """One captured envelope."""
+    offset_ns: int
+    threshold: float
+    envelope: Envelope
+
+
+class Recorder:
+    """Appends envelopes and their arrival times to a capture archive.
+
+    Thread-safe; arrival offsets are measured on the monotonic clock from
+    the first recorded envelope.
+
+    Args:
+        file: Path or binary file object opened for writing
+    """
+
+    def __init__(self, file: Union[str, BinaryIO]):
+        self._owned = isinstance(file, str)
+        self._file = open(file, "wb") if self._owned else file
+        self._file.write(_HEADER.pack(MAGIC, VERSION, int(time.time() * 1000)))
+        self._lock = threading.Lock()
+        self._start: Optional[int] = None
+        self.count = 0
+
+    def add(self, envelope: Envelope, threshold: float = 0.7) -> None:
+        """Record an envelope arriving now."""
+        data = envelope.encode_binary()
+        with self._lock:
+            # Timestamped under the lock so offsets never go negative and
+            # stay in archive order across threads
+            now = time.perf_counter_ns()
+            if self._start is None:
+                self._start = now
+            self._file.write(_ENTRY.pack(now - self._start, threshold, len(data)))
+            self._file.write(data)
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._owned:
+                self._file.close()
+            else:
+                self._file.flush()
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@contextmanager
+def capture(file: Union[str, BinaryIO]) -> Iterator[Recorder]:
+    """Record every lnmp.llm.normalize_and_route() call made inside the block.
+
+    Args:
+        file: Archive path or binary file object
+
+    Example:
+        >>> with lnmp.bench.replay.capture("traffic.lnmpr") as recorder:
+        ...     for text in requests:
+        ...         lnmp.llm.normalize_and_route(text, source="api")
+        >>> recorder.count
+    """
+    recorder = Recorder(file)
+    previous = llm._recorder
+    llm._recorder = recorder.add
+    try:
+        yield recorder
+    finally:
+        llm._recorder = previous
+        recorder.close()
+
+
+def load(file: Union[str, BinaryIO]) -> List[Entry]:
+    """Read a capture archive.
+
+    Raises:
+        ValueError: If the file is not a capture archive or is truncated
+    """
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            data = f.read()
+    else:
+        data = file.read()
+    if len(data) < _HEADER.size:
+        raise ValueError("Not an LNMP capture archive")
+    magic, version, _ = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an LNMP capture archive")
+    if version != VERSION:
+        raise ValueError(f"Unsupported capture archive version {version}")
+    entries = []
+    pos = _HEADER.size
+    view = memoryview(data)
+    while pos < len(data):
+        if pos + _ENTRY.size > len(data):
+            raise ValueError(f"Truncated capture archive at byte {pos}")
+        offset_ns, threshold, length = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        if pos + length > len(data):
+            raise ValueError(f"Truncated capture archive at byte {pos}")
+        entries.append(Entry(offset_ns, threshold, decode_binary(view[pos:pos + length])))
+        pos += length
+    return entries
+
+
+def _percentiles(values: Sequence[int]) -> Dict[str, float]:
+    """Percentiles in microseconds of nanosecond samples."""
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "p99.9": 0.0, "max": 0.0}
+    out = {}
+    for q in PERCENTILES:
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        out[f"p{q * 100:g}"] = ordered[index] / 1000.0
+    out["max"] = ordered[-1] / 1000.0
+    return out
+
+
+class Report:
+    """Latency and throughput of a replay run.
+
+    Attributes:
+        requests: Requests sent
+        errors: Requests whose target raised (or returned an HTTP error)
+        duration_s: Wall time from the first intended start to the last completion
+        offered_rate: Requests per second the schedule asked for
+        achieved_rate: Requests completed per second
+        service_us: Percentiles of actual start to completion
+        response_us: Percentiles of intended start to completion
+            (coordinated-omission corrected)
+        max_lag_us: Largest delay of an actual start behind its intended start
+    """
+
+    def __init__(self, service_ns: array, response_ns: array, errors: int, duration_ns: int, schedule_ns: int):
+        self.requests = len(service_ns)
+        self.errors = errors
+        self.duration_s = duration_ns / 1e9
+        self.offered_rate = self.requests / (schedule_ns / 1e9) if schedule_ns > 0 else float("inf")
+        self.achieved_rate = self.requests / self.duration_s if duration_ns > 0 else 0.0
+        self.service_us = _percentiles(service_ns)
+        self.response_us = _percentiles(response_ns)
+        self.max_lag_us = max((r - s for r, s in zip(response_ns, service_ns)), default=0) / 1000.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "duration_s": self.duration_s,
+            "offered_rate": self.offered_rate,
+            "achieved_rate": self.achieved_rate,
+            "service_us": self.service_us,
+            "response_us": self.response_us,
+            "max_lag_us": self.max_lag_us,
+        }
+
+    def __str__(self) -> str:
+        offered = "unpaced" if self.offered_rate == float("inf") else f"{self.offered_rate:,.0f} req/s offered"
+        lines = [
+            f"{self.requests:,} requests ({self.errors:,} errors) in {self.duration_s:.2f}s: "
+            f"{self.achieved_rate:,.0f} req/s achieved, {offered}",
+            f"{'latency (µs)':<24}" + "".join(f"{name:>12}" for name in self.service_us),
+        ]
+        for label, values in (("service", self.service_us), ("response (CO-corrected)", self.response_us)):
+            lines.append(f"{label:<24}" + "".join(f"{value:>12,.1f}" for value in values.values()))
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return f"Report(requests={self.requests}, errors={self.errors}, response_p99_us={self.response_us['p99']:.1f})"
+
+
+def _sdk_target(entries: Sequence[Entry]) -> Callable[[int], Any]:
+    # Record text is prepared up front so that replay times the pipeline only
+    args = [(e.envelope.record.encode(), e.envelope.source or "replay", e.envelope.trace_id, e.threshold) for e in entries]
+
+    def send(i: int) -> Any:
+        text, source, trace_id, threshold = args[i]
+        return llm.normalize_and_route(text, source, trace_id=trace_id, threshold=threshold)
+
+    return send
+
+
+def _http_target(url: str, entries: Sequence[Entry], timeout: float) -> Callable[[int], Any]:
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported target URL {url!r}")
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    requests = []
+    for entry in entries:
+        headers = transport.to_http_headers(entry.envelope)
+        headers["Content-Type"] = "text/plain; charset=utf-8"
+        requests.append((entry.envelope.record.encode().encode(), headers))
+    local = threading.local()
+
+    def send(i: int) -> int:
+        body, headers = requests[i]
+        # One keep-alive connection per replay thread
+        connection = getattr(local, "connection", None)
+        if connection is None:
+            connection = local.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        try:
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            local.connection = None
+            raise
+        if response.status >= 400:
+            raise http.client.HTTPException(f"HTTP {response.status}")
+        return response.status
+
+    return send
+
+
+def replay(
+    entries: Sequence[Entry],
+    target: Union[str, Callable[[Envelope], Any]] = "sdk",
+    *,
+    speed: float = 1.0,
+    rate: Optional[float] = None,
+    concurrency: int = 1,
+    limit: Optional[int] = None,
+    timeout: float = 10.0,
+) -> Report:
+    """Replay captured envelopes against a target and measure latency.
+
+    Args:
+        entries: Entries from load()
+        target: "sdk" for lnmp.llm.normalize_and_route() on the record text,
+            an http:// or https:// URL that receives the record text in a
+            POST with X-LNMP-* headers, or a callable taking the Envelope
+        speed: Divide the recorded inter-arrival times by this factor
+            (float("inf") sends as fast as the target allows)
+        rate: Open-loop constant rate in requests per second; overrides speed
+        concurrency: Threads sending requests; a request waits for its
+            intended start time and a free thread
+        limit: Replay at most this many entries (cycling through the trace
+            if it is shorter)
+        timeout: Socket timeout for URL targets, in seconds
+
+    Returns:
+        Report with service and coordinated-omission-corrected response
+        time percentiles
+
+    Raises:
+        ValueError: For an empty trace or invalid pacing arguments
+
+    Example:
+        >>> entries = lnmp.bench.replay.load("traffic.lnmpr")
+        >>> print(lnmp.bench.replay.replay(entries, rate=2000, concurrency=4))
+    """
+    if not entries:
+        raise ValueError("Nothing to replay")
+    if rate is not None and rate <= 0:
+        raise ValueError("rate must be positive")
+    if not speed > 0:
+        raise ValueError("speed must be positive")
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    total = len(entries) if limit is None else limit
+    if total < 1:
+        raise ValueError("limit must be positive")
+
+    # Intended start of each request, relative to the replay start
+    if rate is not None:
+        schedule = [int(i * 1e9 / rate) for i in range(total)]
+    elif speed == float("inf"):
+        schedule = [0] * total
+    else:
+        offsets = [entry.offset_ns - entries[0].offset_ns for entry in entries]
+        # A cycled trace restarts one mean inter-arrival gap after its last entry
+        period = offsets[-1] + offsets[-1] // max(len(offsets) - 1, 1)
+        schedule = [int((i // len(offsets) * period + offsets[i % len(offsets)]) / speed) for i in range(total)]
+    entries = [entries[i % len(entries)] for i in range(total)]
+
+    if target == "sdk":
+        send = _sdk_target(entries)
+    elif isinstance(target, str):
+        send = _http_target(target, entries, timeout)
+    else:
+        envelopes = [entry.envelope for entry in entries]
+
+        def send(i: int) -> Any:
+            return target(envelopes[i])
+
+    service = array("q", bytes(8 * total))
+    response = array("q", bytes(8 * total))
+    errors = [0]
+    lock = threading.Lock()
+    next_index = count()
+    start = time.perf_counter_ns() + 1_000_000
+
+    def run() -> None:
+        failed = 0
+        while True:
+            i = next(next_index)
+            if i >= total:
+                break
+            intended = start + schedule[i]
+            delay = intended - time.perf_counter_ns()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            began = time.perf_counter_ns()
+            try:
+                send(i)
+            except Exception:
+                failed += 1
+            done = time.perf_counter_ns()
+            service[i] = done - began
+            response[i] = done - min(intended, began)
+        with lock:
+            errors[0] += failed
+
+    threads = [threading.Thread(target=run, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    finished = time.perf_counter_ns()
+    return Report(service, response, errors[0], finished - start, schedule[-1])
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server = self.server
+        if server.delay:
+            time.sleep(server.delay)
+        payload = b""
+        if server.route:
+            result = llm.normalize_and_route(body.decode("utf-8"), self.headers.get("x-lnmp-source") or "stub")
+            payload = str(result["decision"]).encode()
+        with server.lock:
+            server.requests += 1
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class StubServer:
+    """Local HTTP endpoint for replay targets, served from a background thread.
+
+    Accepts POSTed LNMP text and answers 200. It can sleep before answering
+    and can run the SDK pipeline on the body, to stand in for a downstream
+    service.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+        delay: Seconds to sleep per request
+        route: Run lnmp.llm.normalize_and_route() on the body and return
+            the routing decision
+
+    Example:
+        >>> with lnmp.bench.replay.StubServer(delay=0.002) as stub:
+        ...     report = lnmp.bench.replay.replay(entries, stub.url, rate=500)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, delay: float = 0.0, route: bool = False):
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.delay = delay
+        self._server.route = route
+        self._server.requests = 0
+        self._server.lock = threading.Lock()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def requests(self) -> int:
+        """Requests answered so far."""
+        return self._server.requests
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Replay an archive from the command line; returns the exit status."""
+    parser = argparse.ArgumentParser(prog="python -m lnmp.bench.replay", description="Replay captured LNMP traffic and report latency.")
+    parser.add_argument("archive", help="Capture archive written by lnmp.bench.replay.capture()")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--speed", type=float, default=1.0, help="Speed-up over the recorded timing (default: 1; 'inf' for unpaced)")
+    pacing.add_argument("--rate", type=float, help="Open-loop constant rate, requests per second")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--target", default="sdk", help="'sdk' (default) or an http(s) URL")
+    target.add_argument("--stub", action="store_true", help="Target a local stub endpoint")
+    parser.add_argument("--stub-delay", type=float, default=0.0, help="Seconds the stub sleeps per request")
+    parser.add_argument("-c", "--concurrency", type=int, default=1, help="Sending threads (default: 1)")
+    parser.add_argument("-n", "--limit", type=int, help="Requests to send (cycles through the trace)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        entries = load(args.archive)
+        kwargs = dict(speed=args.speed, rate=args.rate, concurrency=args.concurrency, limit=args.limit)
+        if args.stub:
+            with StubServer(delay=args.stub_delay) as stub:
+                report = replay(entries, stub.url, **kwargs)
+        else:
+            report = replay(entries, args.target, **kwargs)
+    except (OSError, ValueError) as e:
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
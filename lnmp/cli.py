@@ -0,0 +1,563 @@
+"""Command-line tool for bulk LNMP processing (``python -m lnmp``).
+
+Subcommands::
+
+    python -m lnmp convert dump.lnmp -o dump.lnmpb --to binary
+    python -m lnmp validate logs/*.lnmp --strict
+    python -m lnmp score dump.lnmpb --source backfill -o scores.tsv
+    python -m lnmp stats dump.lnmp --top 10
+
+Input files are memory-mapped and cut into chunks at record boundaries:
+newlines outside strings and brackets (blank lines with --delimiter
+blank_line), found by the same native framer as lnmp.core.StreamParser, or
+batch frame boundaries for binary input. Worker processes map the same
+files and take one chunk at a time, so only byte offsets and results cross
+process boundaries; results are consumed in input order. Throughput goes
+to stderr.
+
+Binary files are a concatenation of the batch frames written by
+lnmp.core.dumps_many() (b"LNRB" | record count | length-prefixed records),
+one frame per converted chunk.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import core, envelope, lnmp_py_core, net, utils
+
+__all__ = ["main"]
+
+RECORDS_MAGIC = b"LNRB"
+DEFAULT_CHUNK_SIZE = 4 << 20
+
+# Files mapped by this process, reused across chunks
+_maps: Dict[str, mmap.mmap] = {}
+_explainers: Dict[Optional[str], utils.Explainer] = {}
+
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while shift < 64:
+        if pos >= len(buf):
+            raise ValueError("Truncated varint")
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+    raise ValueError("Invalid varint")
+
+
+def _frame_end(buf, pos: int) -> int:
+    """End offset of the batch frame starting at pos."""
+    if buf[pos:pos + 4] != RECORDS_MAGIC:
+        raise ValueError(f"No LNMP batch frame at byte {pos}")
+    count, pos = _read_varint(buf, pos + 4)
+    for _ in range(count):
+        length, pos = _read_varint(buf, pos)
+        pos += length
+    if pos > len(buf):
+        raise ValueError("Truncated batch frame")
+    return pos
+
+
+def detect_format(path: str) -> str:
+    """"binary" if the file starts with a batch frame, else "text"."""
+    with open(path, "rb") as f:
+        return "binary" if f.read(4) == RECORDS_MAGIC else "text"
+
+
+def iter_chunks(
+    path: str, fmt: str, delimiter: str = "line", chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) byte ranges of about chunk_size bytes, cut at record boundaries."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            if fmt == "binary":
+                pos = 0
+                while pos < size:
+                    try:
+                        pos = _frame_end(mm, pos)
+                    except ValueError:
+                        # Leave the corrupt tail to a worker, which reports it
+                        break
+                    if pos - start >= chunk_size:
+                        yield start, pos
+                        start = pos
+                if start < size:
+                    yield start, size
+                return
+            # The native framer scans each byte once, from one cut to the
+            # next, so newlines inside strings and brackets are never cut
+            while start < size:
+                end = lnmp_py_core.frame_boundary(mm, delimiter, start, chunk_size)
+                yield start, end
+                start = end
+
+
+def _slice(path: str, start: int, end: int) -> bytes:
+    mm = _maps.get(path)
+    if mm is None:
+        with open(path, "rb") as f:
+            mm = _maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mm[start:end]
+
+
+def _close_maps() -> None:
+    while _maps:
+        _maps.popitem()[1].close()
+
+
+def _records(data: bytes, opts: Dict[str, Any]) -> Tuple[List[core.Record], int]:
+    """Records of a chunk, and the number of invalid ones skipped."""
+    if opts["format"] == "binary":
+        records = []
+        pos = 0
+        while pos < len(data):
+            end = _frame_end(data, pos)
+            records.extend(core.loads_many(data[pos:end]))
+            pos = end
+        return records, 0
+    errors = "skip" if opts["skip_invalid"] else "raise"
+    parser = core.StreamParser(delimiter=opts["delimiter"], errors=errors)
+    parser.feed(data)
+    # Drain before close() so errors are raised in input order
+    records = list(parser)
+    parser.close()
+    records.extend(parser)
+    return records, parser.invalid
+
+
+def _explainer(path: Optional[str]) -> utils.Explainer:
+    explainer = _explainers.get(path)
+    if explainer is None:
+        explainer = utils.Explainer.from_file(path) if path else utils.Explainer({})
+        _explainers[path] = explainer
+    return explainer
+
+
+def _convert(data: bytes, opts: Dict[str, Any]) -> Dict[str, Any]:
+    records, invalid = _records(data, opts)
+    to = opts["to"]
+    if not records:
+        out = b""
+    elif to == "binary":
+        out = core.dumps_many(records)
+    elif to == "explain":
+        explained = _explainer(opts["dictionary"]).explain_many(records)
+        out = "".join(text.rstrip("\n") + "\n\n" for text in explained).encode()
+    else:
+        out = "".join(record.encode() + "\n" for record in records).encode()
+    return {"records": len(records), "invalid": invalid, "output": out}
+
+
+def _validate(data: bytes, opts: Dict[str, Any]) -> Dict[str, Any]:
+    errors = []
+    if opts["format"] == "binary":
+        records = invalid = 0
+        pos = 0
+        while pos < len(data):
+            try:
+                end = _frame_end(data, pos)
+                records += len(core.loads_many(data[pos:end]))
+            except ValueError as e:
+                # A corrupt frame hides where the next one starts
+                errors.append((pos, f"INVALID_FRAME: {e}"))
+                return {"records": records, "invalid": invalid + 1, "errors": errors}
+            pos = end
+        return {"records": records, "invalid": invalid, "errors": errors}
+
+    spans = core.record_spans(data, delimiter=opts["delimiter"])
+    view = memoryview(data)
+    payloads = [view[start:end] for start, end in spans]
+    result = core.validate_many(payloads, strict=opts["strict"])
+    invalid = result.invalid()
+    for i in invalid[:opts["max_errors"]]:
+        status = core.ValidationStatus(result.status[i])
+        errors.append((spans[i][0] + max(result.offset[i], 0), status.name))
+    return {"records": len(payloads), "invalid": len(invalid), "errors": errors}
+
+
+def _score(data: bytes, opts: Dict[str, Any]) -> Dict[str, Any]:
+    records, invalid = _records(data, opts)
+    composites = array("d")
+    decisions = Counter()
+    lines = []
+    for record in records:
+        env = envelope.wrap(record, opts["source"], timestamp_ms=opts["timestamp_ms"])
+        score = net.context_score(env)
+        decision = net.routing_decide(env).name
+        composites.append(score.composite)
+        decisions[decision] += 1
+        if opts["output"]:
+            lines.append(f"{score.composite:.6f}\t{decision}\n")
+    return {
+        "records": len(records),
+        "invalid": invalid,
+        "composites": composites.tobytes(),
+        "decisions": dict(decisions),
+        "output": "".join(lines).encode(),
+    }
+
+
+def _stats(data: bytes, opts: Dict[str, Any]) -> Dict[str, Any]:
+    records, invalid = _records(data, opts)
+    fields = lnmp_py_core.record_fields_many([record._inner for record in records])
+    counts = Counter(fid for record_fields in fields for fid, _, _ in record_fields)
+    sizes = [len(record_fields) for record_fields in fields]
+    return {
+        "records": len(records),
+        "invalid": invalid,
+        "fields": sum(sizes),
+        "min_fields": min(sizes, default=0),
+        "max_fields": max(sizes, default=0),
+        "field_counts": dict(counts),
+    }
+
+
+_COMMANDS = {"convert": _convert, "validate": _validate, "score": _score, "stats": _stats}
+
+
+def _work(task: Tuple[str, str, int, int, Dict[str, Any]]) -> Dict[str, Any]:
+    command, path, start, end, opts = task
+    data = _slice(path, start, end)
+    try:
+        result = _COMMANDS[command](data, opts)
+    except ValueError as e:
+        raise ValueError(f"{path} (chunk at byte {start}): {e}") from None
+    result["bytes"] = len(data)
+    result["start"] = start
+    return result
+
+
+def _run(
+    command: str, inputs: Sequence[Tuple[str, str]], opts: Dict[str, Any], args
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (path, chunk result) in input order, running up to args.workers chunks at once."""
+    tasks = (
+        (command, path, start, end, dict(opts, format=fmt))
+        for path, fmt in inputs
+        for start, end in iter_chunks(path, fmt, opts["delimiter"], args.chunk_size)
+    )
+    if args.workers <= 1:
+        try:
+            for task in tasks:
+                yield task[1], _work(task)
+        finally:
+            _close_maps()
+        return
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # A bounded window keeps memory flat when early chunks are slow
+        pending = deque()
+        for task in tasks:
+            pending.append((task[1], pool.submit(_work, task)))
+            if len(pending) >= args.workers * 2:
+                path, future = pending.popleft()
+                yield path, future.result()
+        while pending:
+            path, future = pending.popleft()
+            yield path, future.result()
+
+
+class _Progress:
+    def __init__(self, command: str, quiet: bool):
+        self.command = command
+        self.quiet = quiet
+        self.records = 0
+        self.invalid = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.records += result["records"]
+        self.invalid += result["invalid"]
+        self.bytes += result["bytes"]
+
+    def report(self) -> None:
+        if self.quiet:
+            return
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        invalid = f", {self.invalid:,} invalid" if self.invalid else ""
+        print(
+            f"{self.command}: {self.records:,} records{invalid}, "
+            f"{self.bytes / 1e6:,.1f} MB in {elapsed:.2f}s "
+            f"({self.records / elapsed:,.0f} records/s, {self.bytes / 1e6 / elapsed:,.1f} MB/s)",
+            file=sys.stderr,
+        )
+
+
+def _open_output(path: Optional[str]):
+    if path is None or path == "-":
+        return sys.stdout.buffer, False
+    return open(path, "wb"), True
+
+
+def _inputs(args) -> List[Tuple[str, str]]:
+    if args.input_format != "auto":
+        return [(path, args.input_format) for path in args.inputs]
+    return [(path, detect_format(path)) for path in args.inputs]
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _print_summary(summary: Dict[str, Any], as_json: bool, lines: List[str]) -> None:
+    if as_json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print("\n".join(lines))
+
+
+def cmd_convert(args, opts: Dict[str, Any]) -> int:
+    opts.update(to=args.to, dictionary=args.dictionary)
+    progress = _Progress("convert", args.quiet)
+    out, close = _open_output(args.output)
+    try:
+        for _, result in _run("convert", _inputs(args), opts, args):
+            out.write(result["output"])
+            progress.add(result)
+    finally:
+        if close:
+            out.close()
+        else:
+            out.flush()
+    progress.report()
+    return 0
+
+
+def cmd_validate(args, opts: Dict[str, Any]) -> int:
+    opts.update(strict=args.strict, max_errors=args.max_errors)
+    progress = _Progress("validate", args.quiet)
+    errors = []
+    for path, result in _run("validate", _inputs(args), opts, args):
+        progress.add(result)
+        for offset, status in result["errors"]:
+            if len(errors) < args.max_errors:
+                errors.append({"file": path, "offset": result["start"] + offset, "status": status})
+    progress.report()
+    summary = {"records": progress.records, "invalid": progress.invalid, "errors": errors}
+    lines = [f"{e['file']}:{e['offset']}: {e['status']}" for e in errors]
+    lines.append(f"{progress.records:,} records, {progress.invalid:,} invalid")
+    _print_summary(summary, args.json, lines)
+    return 1 if progress.invalid else 0
+
+
+def cmd_score(args, opts: Dict[str, Any]) -> int:
+    timestamp_ms = args.timestamp_ms if args.timestamp_ms is not None else int(time.time() * 1000)
+    opts.update(source=args.source, timestamp_ms=timestamp_ms, output=args.output is not None)
+    progress = _Progress("score", args.quiet)
+    composites = array("d")
+    decisions = Counter()
+    out, close = _open_output(args.output) if args.output is not None else (None, False)
+    try:
+        for _, result in _run("score", _inputs(args), opts, args):
+            progress.add(result)
+            composites.frombytes(result["composites"])
+            decisions.update(result["decisions"])
+            if out is not None:
+                out.write(result["output"])
+    finally:
+        if close:
+            out.close()
+    progress.report()
+
+    ordered = sorted(composites)
+    above = sum(1 for value in composites if value >= args.threshold)
+    summary = {
+        "records": progress.records,
+        "invalid": progress.invalid,
+        "decisions": dict(decisions),
+        "above_threshold": above,
+        "composite": {
+            "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+            "p50": _percentile(ordered, 0.50),
+            "p90": _percentile(ordered, 0.90),
+            "p99": _percentile(ordered, 0.99),
+        },
+    }
+    lines = [f"{progress.records:,} records"]
+    lines += [f"  {name}: {count:,}" for name, count in decisions.most_common()]
+    lines.append(f"composite >= {args.threshold}: {above:,}")
+    lines.append("composite " + ", ".join(f"{k} {v:.3f}" for k, v in summary["composite"].items()))
+    # Scores on stdout would interleave with the summary
+    if args.output != "-":
+        _print_summary(summary, args.json, lines)
+    return 0
+
+
+def cmd_stats(args, opts: Dict[str, Any]) -> int:
+    progress = _Progress("stats", args.quiet)
+    counts = Counter()
+    fields = 0
+    min_fields = max_fields = None
+    for _, result in _run("stats", _inputs(args), opts, args):
+        progress.add(result)
+        counts.update(result["field_counts"])
+        fields += result["fields"]
+        if result["records"]:
+            if min_fields is None:
+                min_fields, max_fields = result["min_fields"], result["max_fields"]
+            else:
+                min_fields = min(min_fields, result["min_fields"])
+                max_fields = max(max_fields, result["max_fields"])
+    progress.report()
+
+    records = progress.records
+    top = counts.most_common(args.top)
+    summary = {
+        "records": records,
+        "invalid": progress.invalid,
+        "bytes": progress.bytes,
+        "fields": fields,
+        "fields_per_record": {
+            "mean": fields / records if records else 0.0,
+            "min": min_fields or 0,
+            "max": max_fields or 0,
+        },
+        "distinct_fields": len(counts),
+        "top_fields": [{"fid": fid, "count": count} for fid, count in top],
+    }
+    lines = [
+        f"records: {records:,} ({progress.bytes:,} bytes, {progress.invalid:,} invalid)",
+        f"fields per record: mean {summary['fields_per_record']['mean']:.1f}, "
+        f"min {min_fields or 0}, max {max_fields or 0}",
+        f"distinct field IDs: {len(counts):,}",
+    ]
+    lines += [f"  F{fid}: {count:,} ({count / records:.0%} of records)" for fid, count in top]
+    _print_summary(summary, args.json, lines)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argument parser for ``python -m lnmp``."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("inputs", nargs="+", metavar="INPUT", help="Input files")
+    common.add_argument(
+        "--from",
+        dest="input_format",
+        choices=("auto", "text", "binary"),
+        default="auto",
+        help="Input format (default: detected per file)",
+    )
+    common.add_argument(
+        "--delimiter",
+        choices=("line", "blank_line"),
+        default="line",
+        help="Text record delimiter: one record per line, or records separated by blank lines",
+    )
+    common.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (default: CPU count; 1 runs in-process)",
+    )
+    common.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Approximate bytes per work unit (default: 4 MiB)",
+    )
+    common.add_argument(
+        "--skip-invalid",
+        action="store_true",
+        help="Skip malformed text records instead of failing",
+    )
+    common.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Do not report throughput on stderr",
+    )
+
+    parser = argparse.ArgumentParser(prog="python -m lnmp", description="Bulk LNMP processing.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser(
+        "convert",
+        parents=[common],
+        help="Convert between text, binary and explain formats",
+    )
+    convert.add_argument("-o", "--output", required=True, help="Output file ('-' for stdout)")
+    convert.add_argument(
+        "--to",
+        choices=("text", "binary", "explain"),
+        required=True,
+        help="Output format",
+    )
+    convert.add_argument("--dictionary", help="JSON field-name dictionary for --to explain")
+
+    validate = commands.add_parser(
+        "validate",
+        parents=[common],
+        help="Check records are well-formed; exit status 1 if any are not",
+    )
+    validate.add_argument(
+        "--strict",
+        action="store_true",
+        help="Also run the full parser on records that pass the scan",
+    )
+    validate.add_argument("--max-errors", type=int, default=20, help="Errors to list (default: 20)")
+    validate.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    score = commands.add_parser(
+        "score",
+        parents=[common],
+        help="Score and route records as envelopes",
+    )
+    score.add_argument("--source", default="lnmp-cli", help="Envelope source (default: lnmp-cli)")
+    score.add_argument("--timestamp-ms", type=int, help="Envelope timestamp (default: now)")
+    score.add_argument(
+        "--threshold",
+        type=float,
+        default=0.7,
+        help="Composite score counted as LLM-worthy (default: 0.7)",
+    )
+    score.add_argument("-o", "--output", help="Write one 'composite<TAB>decision' line per record")
+    score.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    stats = commands.add_parser("stats", parents=[common], help="Record and field statistics")
+    stats.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Most frequent field IDs to list (default: 20)",
+    )
+    stats.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the CLI; returns the exit status."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+    opts = {"delimiter": args.delimiter, "skip_invalid": args.skip_invalid}
+    handler = {
+        "convert": cmd_convert,
+        "validate": cmd_validate,
+        "score": cmd_score,
+        "stats": cmd_stats,
+    }[args.command]
+    try:
+        return handler(args, opts)
+    except (OSError, ValueError) as e:
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        return 1
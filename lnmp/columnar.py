@@ -0,0 +1,505 @@
+"""Columnar block format for LNMP archives.
+
+A block holds up to a few thousand records stored column-wise: one column
+per field ID (and type hint). Integer columns are delta-encoded and packed at
+the narrowest width that fits, float columns are stored as raw doubles and
+everything else (strings, booleans, arrays, nested records) is dictionary
+encoded from its canonical LNMP text. Each column is compressed on its own
+with a stdlib codec, so a reader only inflates the columns it asks for.
+
+Block layout (little-endian)::
+
+    b"LNCB" | version u8 | codec u8 | rows u32 | columns u16 | directory_size u32
+    directory: per column  fid u16 | kind u8 | hint_size u8 | hint | payload_size u32
+    payloads:  compressed column bodies, in directory order
+
+An archive is a plain concatenation of blocks.
+"""
+
+import math
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate, compress
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from . import lnmp_py_core
+from .core import Record, parse
+
+MAGIC = b"LNCB"
+VERSION = 1
+
+INT = 1
+FLOAT = 2
+TEXT = 3
+
+CODECS = {"none": 0, "zlib": 1, "bz2": 2, "lzma": 3}
+_CODEC_NAMES = {code: name for name, code in CODECS.items()}
+
+DEFAULT_BLOCK_SIZE = 4096
+
+_HEADER = struct.Struct("<4sBBIHI")
+_COLUMN = struct.Struct("<HBB")
+_SIZE = struct.Struct("<I")
+_INT64 = struct.Struct("<q")
+
+_INT_RANGE = (-(1 << 63), (1 << 63) - 1)
+_WIDTHS = [("b", 1 << 7), ("h", 1 << 15), ("i", 1 << 31), ("q", 1 << 63)]
+_UNSIGNED = [("B", 1 << 8), ("H", 1 << 16), ("I", 1 << 32)]
+_ESCAPES = {'"': '"', "\\": "\\", "n": "\n", "t": "\t", "r": "\r"}
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def _compress(codec: int, data: bytes, level: Optional[int]) -> bytes:
+    if codec == 1:
+        return zlib.compress(data, 6 if level is None else level)
+    if codec == 2:
+        import bz2
+
+        return bz2.compress(data, 9 if level is None else level)
+    if codec == 3:
+        import lzma
+
+        return lzma.compress(data, preset=6 if level is None else level)
+    return data
+
+
+def _decompress(codec: int, data) -> bytes:
+    if codec == 1:
+        return zlib.decompress(data)
+    if codec == 2:
+        import bz2
+
+        return bz2.decompress(data)
+    if codec == 3:
+        import lzma
+
+        return lzma.decompress(data)
+    return bytes(data)
+
+
+def _pack(values: Sequence[int], signed: bool = True) -> bytes:
+    """Typecode byte followed by the values at the narrowest array width."""
+    if signed:
+        low, high = (min(values), max(values)) if values else (0, 0)
+        typecode = next(code for code, limit in _WIDTHS if -limit <= low and high < limit)
+    else:
+        high = max(values) if values else 0
+        typecode = next((code for code, limit in _UNSIGNED if high < limit), "Q")
+    packed = array(typecode, values)
+    if _BIG_ENDIAN:
+        packed.byteswap()
+    return typecode.encode() + packed.tobytes()
+
+
+def _unpack(data: memoryview, offset: int, count: int) -> Tuple[array, int]:
+    packed = array(chr(data[offset]))
+    end = offset + 1 + count * packed.itemsize
+    packed.frombytes(data[offset + 1:end])
+    if _BIG_ENDIAN:
+        packed.byteswap()
+    return packed, end
+
+
+def _unquote(text: str) -> str:
+    if len(text) < 2 or text[0] != '"' or text[-1] != '"':
+        return text
+    body = text[1:-1]
+    if "\\" not in body:
+        return body
+    out = []
+    chars = iter(body)
+    for char in chars:
+        if char == "\\":
+            escaped = next(chars, "")
+            out.append(_ESCAPES.get(escaped, escaped))
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def _classify(values: List[str]) -> int:
+    try:
+        ints = [int(value) for value in values]
+    except ValueError:
+        pass
+    else:
+        if all(str(i) == value for i, value in zip(ints, values)) and (
+            not ints or (_INT_RANGE[0] <= min(ints) and max(ints) <= _INT_RANGE[1])
+        ):
+            return INT
+        return TEXT
+    try:
+        floats = [float(value) for value in values]
+    except ValueError:
+        return TEXT
+    # repr() turns "inf" and "nan" back into themselves, but those are bare
+    # tokens, not numbers
+    if all(math.isfinite(f) and repr(f) == value for f, value in zip(floats, values)):
+        return FLOAT
+    return TEXT
+
+
+def _encode_column(rows: int, cells: Dict[int, str]) -> Tuple[int, bytes]:
+    values = list(cells.values())
+    body = bytearray()
+    if len(cells) == rows:
+        body.append(0)
+    else:
+        body.append(1)
+        bitmap = bytearray((rows + 7) // 8)
+        for row in cells:
+            bitmap[row >> 3] |= 1 << (row & 7)
+        body += bitmap
+
+    kind = _classify(values)
+    if kind == INT:
+        ints = [int(value) for value in values]
+        deltas = [b - a for a, b in zip(ints, ints[1:])]
+        if all(_INT_RANGE[0] <= d <= _INT_RANGE[1] for d in deltas):
+            body += _INT64.pack(ints[0] if ints else 0)
+            body += _pack(deltas)
+            return kind, bytes(body)
+        kind = TEXT
+    if kind == FLOAT:
+        packed = array("d", [float(value) for value in values])
+        if _BIG_ENDIAN:
+            packed.byteswap()
+        body += packed.tobytes()
+        return kind, bytes(body)
+
+    dictionary: Dict[str, int] = {}
+    indices = [dictionary.setdefault(value, len(dictionary)) for value in values]
+    encoded = [value.encode("utf-8") for value in dictionary]
+    body += _SIZE.pack(len(encoded))
+    body += _pack([len(value) for value in encoded], signed=False)
+    body += b"".join(encoded)
+    body += _pack(indices, signed=False)
+    return TEXT, bytes(body)
+
+
+def encode_block(
+    records: Sequence[Record],
+    *,
+    codec: str = "zlib",
+    level: Optional[int] = None,
+) -> bytes:
+    """Encode records into one columnar block.
+
+    Args:
+        records: Records to store (typically up to a few thousand)
+        codec: "zlib", "bz2", "lzma" or "none"
+        level: Compression level for the codec (default: codec-specific)
+
+    Returns:
+        Encoded block
+
+    Raises:
+        ValueError: If the codec is unknown or a record repeats a field ID
+
+    Example:
+        >>> block = lnmp.columnar.encode_block(records, codec="lzma")
+        >>> lnmp.columnar.decode_block(block).column(12)
+        [14532, 14533, ...]
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec {codec!r}; expected one of {', '.join(CODECS)}")
+    codec_id = CODECS[codec]
+    fields = lnmp_py_core.record_fields_many([record._inner for record in records])
+
+    columns: Dict[Tuple[int, str], Dict[int, str]] = {}
+    for row, record_fields in enumerate(fields):
+        for fid, hint, value in record_fields:
+            cells = columns.setdefault((fid, hint), {})
+            if row in cells:
+                raise ValueError(f"Record {row} repeats field F{fid}")
+            cells[row] = value
+
+    directory = bytearray()
+    payloads = []
+    for (fid, hint), cells in sorted(columns.items()):
+        kind, body = _encode_column(len(fields), cells)
+        payload = _compress(codec_id, body, level)
+        hint_bytes = hint.encode("ascii")
+        directory += _COLUMN.pack(fid, kind, len(hint_bytes)) + hint_bytes + _SIZE.pack(len(payload))
+        payloads.append(payload)
+
+    header = _HEADER.pack(MAGIC, VERSION, codec_id, len(fields), len(payloads), len(directory))
+    return b"".join([header, bytes(directory)] + payloads)
+
+
+class Column:
+    """Directory entry of one column inside a block."""
+
+    __slots__ = ("fid", "hint", "kind", "_payload")
+
+    def __init__(self, fid: int, hint: str, kind: int, payload: memoryview):
+        self.fid = fid
+        self.hint = hint
+        self.kind = kind
+        self._payload = payload
+
+    def __repr__(self) -> str:
+        kind = {INT: "int", FLOAT: "float", TEXT: "text"}.get(self.kind, "?")
+        return f"Column(fid={self.fid}, hint={self.hint!r}, kind={kind})"
+
+
+class Block:
+    """Lazily decoded columnar block; see decode_block()."""
+
+    __slots__ = ("rows", "codec", "size", "columns")
+
+    def __init__(self, rows: int, codec: str, size: int, columns: List[Column]):
+        self.rows = rows
+        self.codec = codec
+        self.size = size
+        self.columns = columns
+
+    @property
+    def fids(self) -> List[int]:
+        """Field IDs present in the block, sorted."""
+        return sorted({column.fid for column in self.columns})
+
+    def _decode(self, column: Column, raw: bool) -> List[Any]:
+        data = memoryview(_decompress(CODECS[self.codec], column._payload))
+        rows = self.rows
+        offset = 1
+        present = None
+        if data[0]:
+            size = (rows + 7) // 8
+            bitmap = data[offset:offset + size]
+            offset += size
+            present = [bool(bitmap[row >> 3] & (1 << (row & 7))) for row in range(rows)]
+        count = rows if present is None else sum(present)
+
+        if column.kind == INT:
+            (first,) = _INT64.unpack_from(data, offset)
+            deltas, _ = _unpack(data, offset + _INT64.size, max(0, count - 1))
+            values: List[Any] = list(accumulate(deltas, initial=first)) if count else []
+            if raw:
+                values = [str(value) for value in values]
+        elif column.kind == FLOAT:
+            packed = array("d")
+            packed.frombytes(data[offset:offset + 8 * count])
+            if _BIG_ENDIAN:
+                packed.byteswap()
+            values = [repr(value) for value in packed] if raw else packed.tolist()
+        else:
+            (size,) = _SIZE.unpack_from(data, offset)
+            lengths, offset = _unpack(data, offset + _SIZE.size, size)
+            dictionary = []
+            for length in lengths:
+                dictionary.append(str(data[offset:offset + length], "utf-8"))
+                offset += length
+            if not raw:
+                dictionary = [_unquote(value) for value in dictionary]
+            indices, _ = _unpack(data, offset, count)
+            values = [dictionary[index] for index in indices]
+
+        if present is None:
+            return values
+        result: List[Any] = [None] * rows
+        for row, value in zip(compress(range(rows), present), values):
+            result[row] = value
+        return result
+
+    def column(self, fid: int, *, raw: bool = False) -> List[Any]:
+        """Decode one field across all rows; only that column is inflated.
+
+        Args:
+            fid: Field ID
+            raw: Return canonical LNMP value text instead of Python values
+
+        Returns:
+            One value per row (None where the field is missing). Integer and
+            float columns give int/float, quoted strings are unquoted and
+            other values (booleans, arrays, nested records) keep their LNMP
+            text.
+        """
+        result: List[Any] = [None] * self.rows
+        for column in self.columns:
+            if column.fid != fid:
+                continue
+            for row, value in enumerate(self._decode(column, raw)):
+                if value is not None:
+                    result[row] = value
+        return result
+
+    def records(self, fids: Optional[Iterable[int]] = None) -> List[Record]:
+        """Rebuild records, optionally keeping only the given field IDs.
+
+        Fields come back in field ID order.
+        """
+        wanted = None if fids is None else set(fids)
+        parts: List[List[str]] = [[] for _ in range(self.rows)]
+        for column in self.columns:
+            if wanted is not None and column.fid not in wanted:
+                continue
+            prefix = f"F{column.fid}:{column.hint}=" if column.hint else f"F{column.fid}="
+            for row_parts, value in zip(parts, self._decode(column, raw=True)):
+                if value is not None:
+                    row_parts.append(prefix + value)
+        return [parse(";".join(row_parts)) for row_parts in parts]
+
+
+def decode_block(data, offset: int = 0) -> Block:
+    """Read a block's directory; column data is decoded on demand.
+
+    Args:
+        data: Bytes-like object holding the block
+        offset: Byte offset of the block inside data
+
+    Raises:
+        ValueError: If the data is not a valid block
+    """
+    view = memoryview(data)
+    if len(view) - offset < _HEADER.size:
+        raise ValueError(f"Truncated LNMP columnar block at byte {offset}")
+    magic, version, codec, rows, count, directory_size = _HEADER.unpack_from(view, offset)
+    if magic != MAGIC:
+        raise ValueError(f"Not an LNMP columnar block at byte {offset}")
+    if version != VERSION or codec not in _CODEC_NAMES:
+        raise ValueError(f"Unsupported LNMP columnar block (version {version}, codec {codec})")
+
+    pos = offset + _HEADER.size
+    end_of_directory = pos + directory_size
+    entries = []
+    for _ in range(count):
+        fid, kind, hint_size = _COLUMN.unpack_from(view, pos)
+        pos += _COLUMN.size
+        hint = str(view[pos:pos + hint_size], "ascii")
+        pos += hint_size
+        (size,) = _SIZE.unpack_from(view, pos)
+        pos += _SIZE.size
+        entries.append((fid, hint, kind, size))
+    if pos != end_of_directory:
+        raise ValueError(f"Corrupt LNMP columnar directory at byte {offset}")
+
+    columns = []
+    for fid, hint, kind, size in entries:
+        if pos + size > len(view):
+            raise ValueError(f"Truncated LNMP columnar block at byte {offset}")
+        columns.append(Column(fid, hint, kind, view[pos:pos + size]))
+        pos += size
+    return Block(rows, _CODEC_NAMES[codec], pos - offset, columns)
+
+
+def iter_blocks(data) -> Iterator[Block]:
+    """Iterate over the blocks of an archive held in a bytes-like object."""
+    offset = 0
+    size = len(data)
+    while offset < size:
+        block = decode_block(data, offset)
+        offset += block.size
+        yield block
+
+
+class ColumnarWriter:
+    """Write records to a file as a sequence of columnar blocks.
+
+    Args:
+        fileobj: Binary file object to write to
+        block_size: Records per block
+        codec: "zlib", "bz2", "lzma" or "none"
+        level: Compression level for the codec
+
+    Example:
+        >>> with open("archive.lnmpc", "wb") as f, lnmp.columnar.ColumnarWriter(f) as writer:
+        ...     writer.write_many(records)
+    """
+
+    def __init__(
+        self,
+        fileobj: IO[bytes],
+        *,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        codec: str = "zlib",
+        level: Optional[int] = None,
+    ):
+        if block_size <= 0:
+            raise ValueError(f"block_size must be positive, got {block_size}")
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec!r}; expected one of {', '.join(CODECS)}")
+        self._file = fileobj
+        self.block_size = block_size
+        self.codec = codec
+        self.level = level
+        self._pending: List[Record] = []
+
+    def write(self, record: Record) -> None:
+        """Buffer one record, writing a block when block_size is reached."""
+        self._pending.append(record)
+        if len(self._pending) >= self.block_size:
+            self.flush()
+
+    def write_many(self, records: Iterable[Record]) -> None:
+        """Buffer many records."""
+        for record in records:
+            self.write(record)
+
+    def flush(self) -> None:
+        """Write buffered records as a (possibly short) block."""
+        if self._pending:
+            self._file.write(encode_block(self._pending, codec=self.codec, level=self.level))
+            self._pending = []
+
+    def close(self) -> None:
+        """Flush the last block. The file object is left open."""
+        self.flush()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ColumnarReader:
+    """Read a columnar archive from memory or a memory-mapped file.
+
+    Example:
+        >>> reader = lnmp.columnar.ColumnarReader.open("archive.lnmpc")
+        >>> total = sum(v for v in reader.column(12) if v is not None)
+    """
+
+    def __init__(self, data):
+        self._data = data
+        self._blocks = list(iter_blocks(data))
+
+    @classmethod
+    def open(cls, path: str) -> "ColumnarReader":
+        """Memory-map an archive file."""
+        with open(path, "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                data = b""
+        return cls(data)
+
+    def __len__(self) -> int:
+        return sum(block.rows for block in self._blocks)
+
+    @property
+    def blocks(self) -> List[Block]:
+        return self._blocks
+
+    def column(self, fid: int, *, raw: bool = False) -> Iterator[Any]:
+        """Yield one field across all records, block by block."""
+        for block in self._blocks:
+            yield from block.column(fid, raw=raw)
+
+    def columns(self, fids: Iterable[int], *, raw: bool = False) -> Dict[int, List[Any]]:
+        """Decode several fields; other columns are never inflated."""
+        result: Dict[int, List[Any]] = {fid: [] for fid in fids}
+        for block in self._blocks:
+            for fid, values in result.items():
+                values.extend(block.column(fid, raw=raw))
+        return result
+
+    def records(self, fids: Optional[Iterable[int]] = None) -> Iterator[Record]:
+        """Yield records, optionally projected to the given field IDs."""
+        wanted = None if fids is None else list(fids)
+        for block in self._blocks:
+            yield from block.records(wanted)
@@ -1,11 +1,16 @@
 """Core LNMP parsing and encoding functionality."""
 
-from typing import Union
+from array import array
+from enum import IntEnum
+from typing import Hashable, Iterator, List, Optional, Sequence, Tuple, Union
 from . import lnmp_py_core
+from .utils import SanitizationConfig
 
 class Record:
     """High-level wrapper for LNMP records."""
     
+    __slots__ = ("_inner",)
+    
     def __init__(self, _inner=None):
         if _inner is None:
             raise ValueError("Use parse() to create Record instances")
@@ -19,6 +24,25 @@ class Record:
         """Encode record to binary LNMP format."""
         return lnmp_py_core.encode_binary(self._inner)
     
+    def fingerprint(self) -> int:
+        """Return a stable 128-bit fingerprint of the record.
+        
+        The fingerprint hashes the canonical binary form, so records with the
+        same fields and values match regardless of how their text was written.
+        It equals ``fingerprint_binary([record.encode_binary()])[0]``.
+        """
+        return lnmp_py_core.record_fingerprint(self._inner)
+    
+    def __getstate__(self) -> bytes:
+        return lnmp_py_core.encode_binary(self._inner)
+    
+    def __setstate__(self, state: bytes) -> None:
+        self._inner = lnmp_py_core.decode_binary(state)
+    
+    def __reduce__(self):
+        # Pickles as the binary encoding, so records can cross process boundaries
+        return (decode_binary, (self.__getstate__(),))
+    
     def __repr__(self) -> str:
         return f"Record({self.encode()!r})"
 
@@ -50,3 +74,457 @@ def decode_binary(data: bytes) -> Record:
         Record instance
     """
     return Record(_inner=lnmp_py_core.decode_binary(data))
+
+
+def dumps_many(records: Sequence[Record]) -> bytes:
+    """Serialize a batch of records into one buffer.
+    
+    The records are binary-encoded natively with the GIL released and
+    length-prefixed in a single bytes object, which is much cheaper to send
+    to a worker process than pickling each record separately.
+    
+    Args:
+        records: Records to serialize
+    
+    Returns:
+        Buffer for loads_many()
+    
+    Example:
+        >>> with ProcessPoolExecutor() as pool:
+        ...     scores = pool.map(score_batch, [lnmp.core.dumps_many(chunk) for chunk in chunks])
+    """
+    return lnmp_py_core.records_dumps([record._inner for record in records])
+
+
+def loads_many(data: Union[bytes, bytearray, memoryview]) -> List[Record]:
+    """Deserialize records written by dumps_many().
+    
+    Raises:
+        ValueError: If the buffer is truncated or corrupt
+    """
+    return [Record(_inner=inner) for inner in lnmp_py_core.records_loads(bytes(data))]
+
+
+def fingerprint_many(records: Sequence[Record]) -> List[int]:
+    """Fingerprint a batch of records in one native call.
+    
+    Args:
+        records: Records to fingerprint
+    
+    Returns:
+        List of 128-bit fingerprints, as returned by Record.fingerprint()
+    """
+    return lnmp_py_core.fingerprint_many([record._inner for record in records])
+
+
+def fingerprint_binary(frames: Sequence[Union[bytes, bytearray, memoryview]]) -> List[int]:
+    """Fingerprint a batch of binary frames without decoding them.
+    
+    Frames produced by Record.encode_binary() get the same fingerprint as
+    the record they encode.
+    
+    Args:
+        frames: Binary LNMP frames
+    
+    Returns:
+        List of 128-bit fingerprints
+    """
+    return lnmp_py_core.fingerprint_binary_many(
+        [frame if isinstance(frame, bytes) else bytes(frame) for frame in frames]
+    )
+
+
+def parse_lenient(text: str, config: Optional[SanitizationConfig] = None) -> Record:
+    """Sanitize and parse LNMP text in a single native call.
+    
+    Equivalent to parse(lnmp.utils.sanitize(text, config)) without copying
+    the sanitized text back into Python.
+    
+    Args:
+        text: Raw, possibly malformed LNMP text
+        config: Sanitization options (defaults to the native defaults)
+    
+    Returns:
+        Record instance
+    
+    Example:
+        >>> record = lnmp.core.parse_lenient("F12= 14532 ; F7=1")
+        >>> "F12=14532" in record.encode()
+        True
+    """
+    return Record(_inner=lnmp_py_core.parse_lenient(text, config._inner if config is not None else None))
+
+
+def parse_lenient_many(texts: List[str], config: Optional[SanitizationConfig] = None) -> List[Record]:
+    """Sanitize and parse a batch of LNMP texts.
+    
+    The whole batch is processed natively with the GIL released.
+    
+    Args:
+        texts: Raw, possibly malformed LNMP texts
+        config: Sanitization options (defaults to the native defaults)
+    
+    Returns:
+        List of Record instances, in input order
+    
+    Raises:
+        ValueError: If any text cannot be parsed (the message names its index)
+    """
+    inners = lnmp_py_core.parse_lenient_many(texts, config._inner if config is not None else None)
+    return [Record(_inner=inner) for inner in inners]
+
+
+class ValidationStatus(IntEnum):
+    """Status codes reported by validate_many()."""
+    
+    OK = 0
+    EMPTY = 1
+    INVALID_UTF8 = 2
+    EXPECTED_FIELD = 3
+    INVALID_FIELD_ID = 4
+    INVALID_TYPE_HINT = 5
+    EXPECTED_EQUALS = 6
+    EXPECTED_VALUE = 7
+    UNTERMINATED_STRING = 8
+    UNBALANCED_BRACKET = 9
+    UNEXPECTED_CHARACTER = 10
+    TOO_DEEP = 11
+    TYPE_MISMATCH = 12
+    PARSE_ERROR = 255
+
+
+class ValidationResult:
+    """Compact result of validate_many().
+    
+    Attributes:
+        status: array('B') of ValidationStatus codes, one per input
+        offset: array('q') of byte offsets of the first error (0 for valid
+            inputs, -1 when the position is unknown)
+    """
+    
+    __slots__ = ("status", "offset")
+    
+    def __init__(self, status: array, offset: array):
+        self.status = status
+        self.offset = offset
+    
+    def __len__(self) -> int:
+        return len(self.status)
+    
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.status, self.offset)
+    
+    @property
+    def all_valid(self) -> bool:
+        """True if every input is well-formed."""
+        return self.status.count(ValidationStatus.OK) == len(self.status)
+    
+    def invalid(self) -> List[int]:
+        """Indices of the malformed inputs."""
+        return [i for i, status in enumerate(self.status) if status != ValidationStatus.OK]
+    
+    def __repr__(self) -> str:
+        return f"ValidationResult({len(self)} inputs, {len(self) - self.status.count(0)} invalid)"
+
+
+def validate_many(
+    texts_or_buffers: Sequence[Union[str, bytes, bytearray, memoryview]],
+    *,
+    strict: bool = False,
+) -> ValidationResult:
+    """Check that LNMP payloads are well-formed without building records.
+    
+    Each input is scanned once natively, with the GIL released and without
+    allocating, stopping at the first syntax error. All inputs are read in
+    place; bytes-like inputs are checked for valid UTF-8 first.
+    
+    The scan checks the parser's text grammar: field IDs, known type hints
+    and values of the hinted shape, quoting, brackets, and single-token
+    unquoted values. With strict=True, inputs that pass the scan are additionally
+    run through the full parser, and rejections are reported as
+    ValidationStatus.PARSE_ERROR with offset -1.
+    
+    Args:
+        texts_or_buffers: LNMP payloads as str or bytes-like objects
+        strict: Also run the full parser on inputs that pass the scan
+    
+    Returns:
+        ValidationResult with per-input status codes and byte offsets
+    
+    Example:
+        >>> result = lnmp.core.validate_many([b"F12=14532", b"F12 14532"])
+        >>> list(result)
+        [(0, 0), (6, 4)]
+        >>> result.invalid()
+        [1]
+    """
+    if not isinstance(texts_or_buffers, list):
+        texts_or_buffers = list(texts_or_buffers)
+    raw_status, raw_offset = lnmp_py_core.validate_many(texts_or_buffers, strict)
+    status = array("B")
+    status.frombytes(raw_status)
+    offset = array("q")
+    offset.frombytes(raw_offset)
+    return ValidationResult(status, offset)
+
+
+def diff(old: Record, new: Record) -> bytes:
+    """Compute a field-level patch that turns one record into another.
+    
+    Fields are compared natively by field ID on their parsed values. The
+    patch lists removed field IDs and carries changed or added fields as a
+    binary partial record. It is pinned to `old` by fingerprint, so patch()
+    refuses to apply it to any other base.
+    
+    Args:
+        old: Base record
+        new: Target record
+    
+    Returns:
+        Binary patch; compact when few fields changed
+    
+    Example:
+        >>> old = lnmp.core.parse("F1=1;F2=\"idle\";F3=7")
+        >>> new = lnmp.core.parse("F1=1;F2=\"busy\"")
+        >>> lnmp.core.patch(old, lnmp.core.diff(old, new)).encode()
+        'F1=1;F2="busy"'
+    """
+    return lnmp_py_core.record_diff(old._inner, new._inner)
+
+
+def patch(record: Record, delta: bytes) -> Record:
+    """Apply a patch produced by diff().
+    
+    Args:
+        record: The base record the patch was computed against
+        delta: Patch bytes
+    
+    Returns:
+        New Record; the base record is not modified
+    
+    Raises:
+        ValueError: If the patch is malformed or was made against a
+            different base record
+    """
+    return Record(_inner=lnmp_py_core.record_patch(record._inner, bytes(delta)))
+
+
+_SYNC_FULL = 0
+_SYNC_PATCH = 1
+
+
+class SyncEncoder:
+    """Stateful sender for incremental record sync.
+    
+    For each key, encode() remembers the last record sent and emits either
+    a full binary record or a diff() against it, whichever is smaller. Each
+    frame starts with a one-byte tag and is decoded by SyncDecoder.
+    
+    Args:
+        full_every: Force a full record after this many consecutive patches
+            for a key, so that receivers joining late or after a lost frame
+            resynchronise (None never forces one)
+    
+    Example:
+        >>> encoder, decoder = lnmp.core.SyncEncoder(), lnmp.core.SyncDecoder()
+        >>> for text in ("F1=1;F2=\"idle\"", "F1=1;F2=\"busy\""):
+        ...     record = decoder.decode(encoder.encode(lnmp.core.parse(text), key="dev-1"), key="dev-1")
+        >>> record.encode()
+        'F1=1;F2="busy"'
+    """
+    
+    def __init__(self, *, full_every: Optional[int] = None):
+        if full_every is not None and full_every < 1:
+            raise ValueError("full_every must be positive")
+        self.full_every = full_every
+        self._last = {}
+        self.full_frames = 0
+        self.patch_frames = 0
+    
+    def encode(self, record: Record, key: Hashable = None) -> bytes:
+        """Encode the next record for a key.
+        
+        Args:
+            record: Record to send
+            key: Stream key, e.g. a device or entity ID
+        
+        Returns:
+            Tagged frame for SyncDecoder.decode()
+        """
+        full = lnmp_py_core.encode_binary(record._inner)
+        # Fingerprinting the encoding just made spares encoding the record
+        # again when it is the base of the next diff
+        fingerprint = lnmp_py_core.fingerprint_binary_many([full])[0]
+        state = self._last.get(key)
+        if state is not None and (self.full_every is None or state[1] < self.full_every):
+            delta = lnmp_py_core.record_diff(state[0]._inner, record._inner, state[2])
+            if len(delta) < len(full):
+                self._last[key] = (record, state[1] + 1, fingerprint)
+                self.patch_frames += 1
+                return bytes((_SYNC_PATCH,)) + delta
+        self._last[key] = (record, 0, fingerprint)
+        self.full_frames += 1
+        return bytes((_SYNC_FULL,)) + full
+    
+    def reset(self, key: Hashable = None) -> None:
+        """Forget the last record for a key, so the next frame is full."""
+        self._last.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._last)
+
+
+class SyncDecoder:
+    """Receiver for frames produced by SyncEncoder."""
+    
+    def __init__(self):
+        self._last = {}
+    
+    def decode(self, frame: bytes, key: Hashable = None) -> Record:
+        """Decode the next frame for a key.
+        
+        Args:
+            frame: Tagged frame from SyncEncoder.encode()
+            key: Stream key the frame was encoded under
+        
+        Returns:
+            The reconstructed record
+        
+        Raises:
+            ValueError: If the frame is malformed, or is a patch with no
+                matching base record for the key
+        """
+        if not frame:
+            raise ValueError("Empty sync frame")
+        tag, body = frame[0], bytes(frame[1:])
+        if tag == _SYNC_FULL:
+            record = Record(_inner=lnmp_py_core.decode_binary(body))
+        elif tag == _SYNC_PATCH:
+            base = self._last.get(key)
+            if base is None:
+                raise ValueError(f"Patch frame for key {key!r} without a base record")
+            record = Record(_inner=lnmp_py_core.record_patch(base._inner, body))
+        else:
+            raise ValueError(f"Unknown sync frame tag {tag}")
+        self._last[key] = record
+        return record
+    
+    def reset(self, key: Hashable = None) -> None:
+        """Forget the last record for a key."""
+        self._last.pop(key, None)
+
+
+class StreamParser:
+    """Incremental parser for LNMP text arriving in arbitrary chunks.
+    
+    Bytes are buffered natively. Each fed byte is scanned once for record
+    boundaries (newlines outside strings and brackets by default), and
+    completed records are parsed straight away, so the cost of feed() is
+    proportional to the new bytes. Chunks may split records and multi-byte
+    characters anywhere.
+    
+    Args:
+        delimiter: "line" (one record per line) or "blank_line" (records
+            span lines and are separated by empty lines)
+        errors: "raise" to raise ValueError from iteration when a record
+            fails to parse, or "skip" to drop it (counted in `invalid`)
+        max_record_size: Raise ValueError from feed() once a record exceeds
+            this many bytes; the record is dropped (counted in `invalid`),
+            including any part of it that arrives in later chunks
+    
+    Example:
+        >>> parser = lnmp.core.StreamParser()
+        >>> parser.feed(b"F1=1\\nF1=")
+        1
+        >>> parser.feed(b"2\\n")
+        2
+        >>> [record.encode() for record in parser]
+        ['F1=1', 'F1=2']
+    """
+    
+    __slots__ = ("_inner",)
+    
+    def __init__(
+        self,
+        *,
+        delimiter: str = "line",
+        errors: str = "raise",
+        max_record_size: Optional[int] = None,
+    ):
+        if errors not in ("raise", "skip"):
+            raise ValueError(f"Unknown errors mode: {errors}")
+        self._inner = lnmp_py_core.StreamParser(delimiter, errors == "skip", max_record_size)
+    
+    def feed(self, chunk: Union[bytes, bytearray, memoryview]) -> int:
+        """Feed a chunk of input.
+        
+        Returns:
+            Number of completed records ready to be iterated
+        """
+        return self._inner.feed(chunk)
+    
+    def close(self) -> int:
+        """Signal end of input, completing a final record without a trailing newline.
+        
+        Returns:
+            Number of completed records ready to be iterated
+        
+        Raises:
+            ValueError: If the input ended inside a string or bracket
+        """
+        return self._inner.close()
+    
+    def __iter__(self) -> "StreamParser":
+        return self
+    
+    def __next__(self) -> Record:
+        inner = self._inner.next_record()
+        if inner is None:
+            raise StopIteration
+        return Record(_inner=inner)
+    
+    @property
+    def pending(self) -> int:
+        """Bytes buffered for the record still being received."""
+        return self._inner.pending
+    
+    @property
+    def ready(self) -> int:
+        """Completed records not yet iterated."""
+        return self._inner.ready
+    
+    @property
+    def records(self) -> int:
+        """Records completed so far, including invalid ones."""
+        return self._inner.records
+    
+    @property
+    def invalid(self) -> int:
+        """Records that failed to parse."""
+        return self._inner.invalid
+
+
+def record_spans(
+    data: Union[bytes, bytearray, memoryview],
+    *,
+    delimiter: str = "line",
+) -> List[Tuple[int, int]]:
+    """Find the records in complete LNMP text without parsing them.
+    
+    Boundaries are found with the same native scan StreamParser uses, so a
+    newline inside a string or brackets does not end a record. The data is
+    read in place with the GIL released.
+    
+    Args:
+        data: LNMP text as a bytes-like object
+        delimiter: "line" or "blank_line", as for StreamParser
+    
+    Returns:
+        (start, end) byte offsets of each record, delimiter excluded; a
+        final record without a delimiter is included even if truncated
+    
+    Example:
+        >>> lnmp.core.record_spans(b'F1="a\\nb"\\n\\nF2=[1,\\n2]')
+        [(0, 8), (10, 19)]
+    """
+    return lnmp_py_core.frame_spans(data, delimiter)
@@ -0,0 +1,235 @@
+"""LNMP record deduplication.
+
+Records are identified by their native 128-bit fingerprint (see
+Record.fingerprint()), computed for a whole batch in one call. Binary frames
+are fingerprinted without decoding.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, List, Optional
+
+from . import lnmp_py_core
+from .core import Record
+from .envelope import Envelope
+
+EXACT = "exact"
+BLOOM = "bloom"
+
+_MASK64 = (1 << 64) - 1
+
+
+def fingerprints(items: Iterable[Any]) -> List[int]:
+    """Fingerprint a mixed batch of records, envelopes, binary frames and ints.
+
+    Records and envelopes (by their record) are fingerprinted in one native
+    call, binary frames in another; ints are taken as fingerprints already.
+
+    Raises:
+        TypeError: If an item has an unsupported type
+    """
+    items = list(items)
+    result: List[Optional[int]] = [None] * len(items)
+    records, record_slots = [], []
+    frames, frame_slots = [], []
+    for i, item in enumerate(items):
+        if isinstance(item, Record):
+            records.append(item._inner)
+            record_slots.append(i)
+        elif isinstance(item, Envelope):
+            records.append(item._inner.record)
+            record_slots.append(i)
+        elif isinstance(item, bytes):
+            frames.append(item)
+            frame_slots.append(i)
+        elif isinstance(item, (bytearray, memoryview)):
+            frames.append(bytes(item))
+            frame_slots.append(i)
+        elif isinstance(item, int):
+            result[i] = item
+        else:
+            raise TypeError(f"Cannot fingerprint {type(item).__name__}")
+    if records:
+        for i, fp in zip(record_slots, lnmp_py_core.fingerprint_many(records)):
+            result[i] = fp
+    if frames:
+        for i, fp in zip(frame_slots, lnmp_py_core.fingerprint_binary_many(frames)):
+            result[i] = fp
+    return result  # type: ignore[return-value]
+
+
+class Deduplicator:
+    """Streaming duplicate filter for records, envelopes and binary frames.
+
+    Two modes are available:
+
+    * ``"exact"``: remembers up to ``capacity`` fingerprints in LRU order;
+      with ``ttl`` an entry is forgotten ``ttl`` seconds after it was last
+      seen. Never reports a false duplicate.
+    * ``"bloom"``: fixed memory of two Bloom filters sized for ``capacity``
+      items at ``false_positive_rate``. The filters rotate when the newer one
+      is full (or ``ttl`` seconds old), so an item is remembered for at least
+      one generation. May drop a unique item with about that probability.
+
+    Args:
+        capacity: Items remembered (per generation in bloom mode)
+        mode: "exact" or "bloom"
+        ttl: Seconds an item is remembered (None: until evicted)
+        false_positive_rate: Target false-positive rate in bloom mode
+        clock: Time source in seconds (default: time.monotonic)
+
+    Raises:
+        ValueError: If an argument is out of range
+
+    Example:
+        >>> dedup = lnmp.dedup.Deduplicator(capacity=1_000_000, ttl=300)
+        >>> fresh = dedup.filter(records)
+        >>> dedup.filter(frames)  # binary frames work the same way
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1_000_000,
+        *,
+        mode: str = EXACT,
+        ttl: Optional[float] = None,
+        false_positive_rate: float = 0.001,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        if mode not in (EXACT, BLOOM):
+            raise ValueError(f"mode must be {EXACT!r} or {BLOOM!r}, got {mode!r}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl must be positive, got {ttl}")
+        if not 0.0 < false_positive_rate < 1.0:
+            raise ValueError(f"false_positive_rate must be between 0 and 1, got {false_positive_rate}")
+        self.capacity = capacity
+        self.mode = mode
+        self.ttl = ttl
+        self._clock = clock
+        if mode == EXACT:
+            self._seen: "OrderedDict[int, float]" = OrderedDict()
+        else:
+            bits = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+            self._bits = max(8, bits)
+            self._hashes = max(1, round(self._bits / capacity * math.log(2)))
+            self._current = bytearray((self._bits + 7) // 8)
+            self._previous = bytearray(len(self._current))
+            self._count = 0
+            self._generation_start = clock()
+
+    def __len__(self) -> int:
+        """Number of remembered items (newest generation in bloom mode)."""
+        return len(self._seen) if self.mode == EXACT else self._count
+
+    def __contains__(self, item: Any) -> bool:
+        """Return True if the item was seen before, without recording it."""
+        (fp,) = fingerprints([item])
+        if self.mode == EXACT:
+            self._expire(self._clock())
+            return fp in self._seen
+        positions = self._positions(fp)
+        return self._test(self._current, positions) or self._test(self._previous, positions)
+
+    def check(self, items: Iterable[Any]) -> List[bool]:
+        """Record a batch and flag duplicates.
+
+        Args:
+            items: Records, envelopes, binary frames or fingerprints
+
+        Returns:
+            One bool per item: True if it was seen before, including earlier
+            in the same batch
+        """
+        fps = fingerprints(items)
+        now = self._clock()
+        if self.mode == EXACT:
+            return self._check_exact(fps, now)
+        return self._check_bloom(fps, now)
+
+    def filter(self, items: Iterable[Any]) -> List[Any]:
+        """Record a batch and return the items not seen before, in order."""
+        items = list(items)
+        return [item for item, duplicate in zip(items, self.check(items)) if not duplicate]
+
+    def seen(self, item: Any) -> bool:
+        """Record one item; return True if it is a duplicate."""
+        return self.check([item])[0]
+
+    def clear(self) -> None:
+        """Forget everything."""
+        if self.mode == EXACT:
+            self._seen.clear()
+        else:
+            self._current = bytearray(len(self._current))
+            self._previous = bytearray(len(self._current))
+            self._count = 0
+            self._generation_start = self._clock()
+
+    # Exact mode
+
+    def _expire(self, now: float) -> None:
+        # Entries are in last-seen order, so expired ones are at the front
+        seen = self._seen
+        if self.ttl is None:
+            return
+        while seen:
+            fp, expires = next(iter(seen.items()))
+            if expires > now:
+                break
+            del seen[fp]
+
+    def _check_exact(self, fps: List[int], now: float) -> List[bool]:
+        self._expire(now)
+        seen = self._seen
+        expires = now + self.ttl if self.ttl is not None else math.inf
+        duplicates = []
+        for fp in fps:
+            if fp in seen:
+                seen.move_to_end(fp)
+                duplicates.append(True)
+            else:
+                duplicates.append(False)
+                if len(seen) >= self.capacity:
+                    seen.popitem(last=False)
+            seen[fp] = expires
+        return duplicates
+
+    # Bloom mode
+
+    def _positions(self, fp: int) -> List[int]:
+        # Double hashing over the two 64-bit halves of the fingerprint
+        h1 = fp & _MASK64
+        h2 = (fp >> 64) | 1
+        bits = self._bits
+        return [(h1 + i * h2) % bits for i in range(self._hashes)]
+
+    @staticmethod
+    def _test(bitmap: bytearray, positions: List[int]) -> bool:
+        for pos in positions:
+            if not bitmap[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def _check_bloom(self, fps: List[int], now: float) -> List[bool]:
+        duplicates = []
+        for fp in fps:
+            if self._count >= self.capacity or (
+                self.ttl is not None and now - self._generation_start >= self.ttl
+            ):
+                self._previous = self._current
+                self._current = bytearray(len(self._previous))
+                self._count = 0
+                self._generation_start = now
+            positions = self._positions(fp)
+            current = self._current
+            if self._test(current, positions):
+                duplicates.append(True)
+                continue
+            duplicates.append(self._test(self._previous, positions))
+            for pos in positions:
+                current[pos >> 3] |= 1 << (pos & 7)
+            self._count += 1
+        return duplicates
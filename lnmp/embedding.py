@@ -1,7 +1,11 @@
 """LNMP embedding vector operations."""
 
 from . import lnmp_py_core
-from typing import List, Tuple
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+_FULL = 0
+_DELTA = 1
+_QUANTIZED = 2
 
 
 def delta(base: List[float], updated: List[float]) -> Tuple[int, bytes]:
@@ -40,3 +44,154 @@ def apply_delta(base: List[float], delta: bytes) -> List[float]:
         >>> updated = lnmp.embedding.apply_delta(base, delta)
     """
     return lnmp_py_core.embedding_apply_delta(base, delta)
+
+
+def encode_update(
+    vector: Sequence[float],
+    reference: Optional[Sequence[float]] = None,
+    *,
+    epsilon: float = 0.0,
+    top_k: Optional[int] = None,
+) -> bytes:
+    """Encode a vector update in the smallest form within a tolerance.
+    
+    The candidates are the full float32 vector, a sparse delta against
+    reference (the dimensions that moved by more than epsilon, stored as
+    their new values), and the full vector quantized to 8 bits. Their sizes
+    are computed up front and the smallest one whose decoded values are all
+    within epsilon of vector is built. The first byte of the result tags
+    the form for decode_update().
+    
+    Args:
+        vector: The new vector
+        reference: The vector the receiver already holds (None if none)
+        epsilon: Largest absolute error allowed per dimension
+        top_k: Put at most this many dimensions in a delta, the largest
+            changes first; the others may then exceed epsilon
+    
+    Returns:
+        Tagged update bytes
+    
+    Raises:
+        ValueError: If epsilon is negative
+    
+    Example:
+        >>> data = lnmp.embedding.encode_update(updated, base, epsilon=1e-3)
+        >>> restored = lnmp.embedding.decode_update(data, base)
+    """
+    _, data, _ = lnmp_py_core.embedding_update_encode(reference, vector, epsilon, top_k)
+    return data
+
+
+def decode_update(data: bytes, reference: Optional[Sequence[float]] = None) -> List[float]:
+    """Decode bytes from encode_update().
+    
+    Args:
+        data: Tagged update bytes
+        reference: The vector the update was encoded against; required
+            for deltas
+    
+    Returns:
+        The updated vector
+    
+    Raises:
+        ValueError: If the data is malformed, or is a delta without a
+            reference of the same dimension
+    """
+    return lnmp_py_core.embedding_update_decode(reference, data)
+
+
+class UpdateEncoder:
+    """Stateful sender for embedding updates.
+    
+    For each key, encode() tracks the vector the receiver reconstructs and
+    encodes the next one against it with encode_update(). Because deltas
+    are relative to what the receiver holds rather than to the last exact
+    vector, small changes skipped under epsilon or top_k do not drift: they
+    are sent once they add up.
+    
+    Args:
+        epsilon: Largest absolute error allowed per dimension
+        top_k: Put at most this many dimensions in a delta (None for no limit)
+    
+    Example:
+        >>> encoder = lnmp.embedding.UpdateEncoder(epsilon=1e-3)
+        >>> decoder = lnmp.embedding.UpdateDecoder()
+        >>> for vector in updates:
+        ...     restored = decoder.decode(encoder.encode(vector, key="doc-7"), key="doc-7")
+    """
+    
+    def __init__(self, epsilon: float = 0.0, *, top_k: Optional[int] = None):
+        if not epsilon >= 0:
+            raise ValueError("epsilon must be non-negative")
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k must be positive")
+        self.epsilon = epsilon
+        self.top_k = top_k
+        self._last = {}
+        self.full_frames = 0
+        self.delta_frames = 0
+        self.quantized_frames = 0
+        self.last_error = 0.0
+    
+    def encode(self, vector: Sequence[float], key: Hashable = None) -> bytes:
+        """Encode the next vector for a key.
+        
+        Args:
+            vector: The new vector
+            key: Stream key, e.g. a document or entity ID
+        
+        Returns:
+            Tagged update for UpdateDecoder.decode(); the largest error of
+            the receiver's copy is left in last_error
+        """
+        reference = self._last.get(key)
+        tag, data, self.last_error = lnmp_py_core.embedding_update_encode(
+            reference, vector, self.epsilon, self.top_k
+        )
+        if tag == _FULL:
+            self.full_frames += 1
+            self._last[key] = list(vector)
+        else:
+            if tag == _DELTA:
+                self.delta_frames += 1
+            else:
+                self.quantized_frames += 1
+            self._last[key] = lnmp_py_core.embedding_update_decode(reference, data)
+        return data
+    
+    def reset(self, key: Hashable = None) -> None:
+        """Forget the receiver's vector for a key, so the next update is not a delta."""
+        self._last.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._last)
+
+
+class UpdateDecoder:
+    """Receiver for updates produced by UpdateEncoder."""
+    
+    def __init__(self):
+        self._last = {}
+    
+    def decode(self, data: bytes, key: Hashable = None) -> List[float]:
+        """Decode the next update for a key.
+        
+        Args:
+            data: Tagged update from UpdateEncoder.encode()
+            key: Stream key the update was encoded under
+        
+        Returns:
+            The reconstructed vector
+        
+        Raises:
+            ValueError: If the update is malformed, or is a delta with no
+                matching vector for the key
+        """
+        vector = lnmp_py_core.embedding_update_decode(self._last.get(key), data)
+        self._last[key] = vector
+        return vector
+    
+    def reset(self, key: Hashable = None) -> None:
+        """Forget the vector for a key."""
+        self._last.pop(key, None)
@@ -1,14 +1,16 @@
 """LNMP envelope functionality for message metadata."""
 
-from typing import Optional
-from datetime import datetime
-from . import lnmp_py_core
+import time
+from typing import List, Optional, Sequence, Union
+from . import lnmp_py_core, tracing
 from .core import Record
 
 
 class Envelope:
     """High-level wrapper for LNMP envelopes."""
     
+    __slots__ = ("_inner",)
+    
     def __init__(self, _inner=None):
         if _inner is None:
             raise ValueError("Use wrap() to create Envelope instances")
@@ -29,6 +31,60 @@ class Envelope:
         """Get the timestamp."""
         return self._inner.timestamp
 
+    @property
+    def record(self) -> Record:
+        """Get the wrapped record."""
+        return Record(_inner=self._inner.record)
+
+    def encode_binary(self) -> bytes:
+        """Encode the envelope metadata and binary record into one frame."""
+        return lnmp_py_core.envelope_encode_binary(self._inner)
+
+    def __getstate__(self) -> bytes:
+        return lnmp_py_core.envelope_encode_binary(self._inner)
+
+    def __setstate__(self, state: bytes) -> None:
+        self._inner = lnmp_py_core.envelope_decode_binary(state)
+
+    def __reduce__(self):
+        return (decode_binary, (self.__getstate__(),))
+
+
+def decode_binary(data: Union[bytes, bytearray, memoryview]) -> Envelope:
+    """Decode a frame produced by Envelope.encode_binary().
+
+    Any contiguous buffer (bytes, bytearray, memoryview, mmap) is decoded in
+    place without copying it first.
+
+    Raises:
+        ValueError: If the frame is truncated or corrupt
+    """
+    return Envelope(_inner=lnmp_py_core.envelope_decode_binary(data))
+
+
+def dumps_many(envelopes: Sequence[Envelope]) -> bytes:
+    """Serialize a batch of envelopes into one buffer.
+
+    Like lnmp.core.dumps_many(), with each envelope's source, timestamp and
+    trace ID kept alongside its binary record.
+
+    Args:
+        envelopes: Envelopes to serialize
+
+    Returns:
+        Buffer for loads_many()
+    """
+    return lnmp_py_core.envelopes_dumps([envelope._inner for envelope in envelopes])
+
+
+def loads_many(data: Union[bytes, bytearray, memoryview]) -> List[Envelope]:
+    """Deserialize envelopes written by dumps_many().
+
+    Raises:
+        ValueError: If the buffer is truncated or corrupt
+    """
+    return [Envelope(_inner=inner) for inner in lnmp_py_core.envelopes_loads(bytes(data))]
+
 
 def wrap(
     record: Record,
@@ -57,8 +113,12 @@ def wrap(
         ... )
     """
     if timestamp_ms is None:
-        timestamp_ms = int(datetime.now().timestamp() * 1000)
-    
+        timestamp_ms = int(time.time() * 1000)
+
+    if tracing._tracer is not None:
+        with tracing.span("lnmp.envelope.wrap", trace_id, source=source):
+            return Envelope(_inner=lnmp_py_core.envelope_wrap(record._inner, source, timestamp_ms, trace_id))
+
     return Envelope(
         _inner=lnmp_py_core.envelope_wrap(
             record._inner,
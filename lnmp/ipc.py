@@ -0,0 +1,264 @@
+"""Cross-process envelope passing over shared memory.
+
+SharedRing is a byte ring in a multiprocessing.shared_memory block. Each
+frame is an 8-byte header (payload length, state) followed by the binary
+envelope, padded to 8 bytes. A frame that would straddle the end of the
+ring is preceded by a padding frame, so every payload is contiguous and can
+be handed to the native decoder as a memoryview of the shared block.
+
+Three monotonic byte counters in the block header track the ring:
+
+- head: end of the last reserved frame (producers)
+- claim: next frame to hand to a consumer
+- tail: start of the oldest frame still in use; space before it is free
+
+Only these counters and frame states are updated under the lock. Producers
+copy payloads and consumers decode them outside it, so several of each can
+work on different frames at once. Consumers receive frames in order; a
+frame still being written holds back the ones behind it.
+"""
+
+import multiprocessing
+import struct
+import time
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from queue import Empty, Full
+from typing import Iterator, Optional, Union
+
+from .envelope import Envelope, decode_binary
+
+__all__ = ["SharedRing", "Empty", "Full"]
+
+_HEADER = struct.Struct("<QQQQ")  # head, claim, tail, capacity
+_DATA = 64
+_FRAME = struct.Struct("<II")  # payload length, state
+
+_WRITING = 0
+_READY = 1
+_CLAIMED = 2
+_DONE = 3
+_PAD = 4
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class SharedRing:
+    """Multi-producer, multi-consumer ring of binary envelopes in shared memory.
+
+    Create the ring in the parent process and pass it to workers as a
+    multiprocessing.Process argument (or let them inherit it on fork); the
+    shared block is attached by name and the lock travels with it. Like
+    multiprocessing.Queue, the ring cannot be sent through a Pool's task
+    queue.
+
+    Args:
+        size: Ring capacity in bytes (rounded up to a multiple of 8); one
+            frame takes its payload plus 8 to 15 bytes
+        name: Shared memory block name (random by default)
+        context: multiprocessing context for the lock (default context if None)
+
+    Example:
+        >>> ring = lnmp.ipc.SharedRing(1 << 24)
+        >>> workers = [multiprocessing.Process(target=score_worker, args=(ring,)) for _ in range(4)]
+        >>> ring.put(envelope)               # blocks while the ring is full
+        >>> envelope = ring.get(timeout=1.0) # in a worker; raises lnmp.ipc.Empty on timeout
+    """
+
+    def __init__(self, size: int = 1 << 20, *, name: Optional[str] = None, context=None):
+        if size < _FRAME.size * 2:
+            raise ValueError(f"size must be at least {_FRAME.size * 2} bytes")
+        capacity = _align(size)
+        ctx = context if context is not None else multiprocessing.get_context()
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=_DATA + capacity)
+        self._buf = self._shm.buf
+        self._capacity = capacity
+        self._cond = ctx.Condition(ctx.Lock())
+        self._owner = True
+        _HEADER.pack_into(self._buf, 0, 0, 0, 0, capacity)
+
+    def __getstate__(self):
+        return (self._shm.name, self._capacity, self._cond)
+
+    def __setstate__(self, state):
+        name, self._capacity, self._cond = state
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._buf = self._shm.buf
+        self._owner = False
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory block."""
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        """Ring size in bytes."""
+        return self._capacity
+
+    @property
+    def used(self) -> int:
+        """Bytes held by frames not yet released by their consumers."""
+        with self._cond:
+            head, _, tail, _ = _HEADER.unpack_from(self._buf, 0)
+        return head - tail
+
+    def _wait(self, deadline: Optional[float], error: type) -> None:
+        if deadline is None:
+            self._cond.wait()
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise error
+        self._cond.wait(remaining)
+
+    def put(self, item: Union[Envelope, Buffer], block: bool = True, timeout: Optional[float] = None) -> None:
+        """Write an envelope, or a frame from Envelope.encode_binary().
+
+        Args:
+            item: Envelope or pre-encoded binary envelope
+            block: Wait for space if the ring is full
+            timeout: Seconds to wait before raising Full (None waits forever)
+
+        Raises:
+            Full: If there is no space (immediately when block is False)
+            ValueError: If the frame is larger than the ring
+        """
+        data = memoryview(item.encode_binary() if isinstance(item, Envelope) else item).cast("B")
+        n = data.nbytes
+        need = _FRAME.size + _align(n)
+        cap = self._capacity
+        if need > cap:
+            raise ValueError(f"Frame of {n} bytes does not fit in a ring of {cap} bytes")
+        deadline = None if not block or timeout is None else time.monotonic() + timeout
+        buf = self._buf
+
+        with self._cond:
+            while True:
+                head, claim, tail, _ = _HEADER.unpack_from(buf, 0)
+                if head == tail and head % cap:
+                    # Nothing is in use: restart at offset 0 so that any frame
+                    # up to the full capacity fits
+                    head = claim = tail = head + cap - head % cap
+                    _HEADER.pack_into(buf, 0, head, claim, tail, cap)
+                offset = head % cap
+                gap = cap - offset
+                # A frame that does not fit before the end wraps to offset 0
+                total = need if need <= gap else gap + need
+                if head + total - tail <= cap:
+                    break
+                if not block:
+                    raise Full
+                self._wait(deadline, Full)
+            if need > gap:
+                _FRAME.pack_into(buf, _DATA + offset, gap - _FRAME.size, _PAD)
+                head += gap
+                offset = 0
+            _FRAME.pack_into(buf, _DATA + offset, n, _WRITING)
+            _HEADER.pack_into(buf, 0, head + need, claim, tail, cap)
+
+        start = _DATA + offset + _FRAME.size
+        buf[start:start + n] = data
+
+        with self._cond:
+            _FRAME.pack_into(buf, _DATA + offset, n, _READY)
+            self._cond.notify_all()
+
+    def _claim(self, block: bool, timeout: Optional[float]):
+        deadline = None if not block or timeout is None else time.monotonic() + timeout
+        buf = self._buf
+        cap = self._capacity
+        with self._cond:
+            while True:
+                head, claim, tail, _ = _HEADER.unpack_from(buf, 0)
+                state = None
+                while claim < head:
+                    length, state = _FRAME.unpack_from(buf, _DATA + claim % cap)
+                    if state != _PAD:
+                        break
+                    claim += _FRAME.size + length
+                if claim < head and state == _READY:
+                    _FRAME.pack_into(buf, _DATA + claim % cap, length, _CLAIMED)
+                    _HEADER.pack_into(buf, 0, head, claim + _FRAME.size + _align(length), tail, cap)
+                    return claim, length
+                _HEADER.pack_into(buf, 0, head, claim, tail, cap)
+                if not block:
+                    raise Empty
+                self._wait(deadline, Empty)
+
+    def _release(self, position: int) -> None:
+        buf = self._buf
+        cap = self._capacity
+        with self._cond:
+            length, _ = _FRAME.unpack_from(buf, _DATA + position % cap)
+            _FRAME.pack_into(buf, _DATA + position % cap, length, _DONE)
+            head, claim, tail, _ = _HEADER.unpack_from(buf, 0)
+            # Frames may be released out of order; free the contiguous done prefix
+            while tail < claim:
+                length, state = _FRAME.unpack_from(buf, _DATA + tail % cap)
+                if state != _DONE and state != _PAD:
+                    break
+                tail += _FRAME.size + _align(length)
+            _HEADER.pack_into(buf, 0, head, claim, tail, cap)
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self, block: bool = True, timeout: Optional[float] = None) -> Iterator[memoryview]:
+        """Borrow the next frame as a read-only view of the shared block.
+
+        The frame stays reserved until the with-block exits; the view is
+        released then and must not be used afterwards.
+
+        Example:
+            >>> with ring.read() as view:
+            ...     envelope = lnmp.envelope.decode_binary(view)
+
+        Raises:
+            Empty: If no frame is ready (immediately when block is False)
+        """
+        position, length = self._claim(block, timeout)
+        start = _DATA + position % self._capacity + _FRAME.size
+        view = self._buf[start:start + length].toreadonly()
+        try:
+            yield view
+        finally:
+            try:
+                view.release()
+            finally:
+                self._release(position)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Envelope:
+        """Take the next envelope, decoding it in place from shared memory.
+
+        Args:
+            block: Wait for a frame if none is ready
+            timeout: Seconds to wait before raising Empty (None waits forever)
+
+        Raises:
+            Empty: If no frame is ready (immediately when block is False)
+            ValueError: If the frame is not a binary envelope
+        """
+        with self.read(block, timeout) as view:
+            return decode_binary(view)
+
+    def close(self) -> None:
+        """Detach from the shared block in this process."""
+        if self._buf is not None:
+            self._buf = None
+            self._shm.close()
+
+    def unlink(self) -> None:
+        """Destroy the shared block; call once, from the creating process."""
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedRing":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        if self._owner:
+            self.unlink()
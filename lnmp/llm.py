@@ -1,7 +1,11 @@
 """High-level LLM workflow utilities."""
 
-from typing import Dict, Any, Optional
-from . import core, envelope, net
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from . import core, envelope, lnmp_py_core, net
+
+# Set by lnmp.bench.replay.capture(); called with each routed envelope and
+# its threshold. None keeps normalize_and_route() free of capture overhead.
+_recorder: Optional[Callable[[envelope.Envelope, float], None]] = None
 
 
 def normalize_and_route(
@@ -10,6 +14,7 @@ def normalize_and_route(
     *,
     trace_id: Optional[str] = None,
     threshold: float = 0.7,
+    cache: Optional[net.RoutingCache] = None,
 ) -> Dict[str, Any]:
     """Complete workflow: parse, wrap, score, and route.
     
@@ -21,13 +26,15 @@ def normalize_and_route(
         source: Source identifier
         trace_id: Optional trace ID
         threshold: LLM routing threshold
+        cache: Reuse scores and decisions from this RoutingCache instead of
+            scoring every envelope
     
     Returns:
         Dictionary containing:
             - record: Parsed Record
             - envelope: Wrapped Envelope
             - score: ContextScore
-            - decision: Routing decision string
+            - decision: RoutingDecision
             - send_to_llm: Boolean indicating LLM routing
     
     Example:
@@ -41,9 +48,14 @@ def normalize_and_route(
     """
     record = core.parse(text)
     env = envelope.wrap(record, source, trace_id=trace_id)
-    score = net.context_score(env)
-    decision = net.routing_decide(env)
+    if cache is not None:
+        score, decision = cache.route(env)
+    else:
+        score = net.context_score(env)
+        decision = net.routing_decide(env)
     send_to_llm = score.composite >= threshold
+    if _recorder is not None:
+        _recorder(env, threshold)
     
     return {
         "record": record,
@@ -52,3 +64,93 @@ def normalize_and_route(
         "decision": decision,
         "send_to_llm": send_to_llm,
     }
+
+
+Candidate = Union[envelope.Envelope, Dict[str, Any]]
+
+
+def _select(
+    candidates: Sequence[Candidate],
+    token_budget: int,
+    estimator: Union[str, Callable[[str], int]],
+    method: str,
+) -> Tuple[str, List[int]]:
+    if token_budget < 0:
+        raise ValueError("token_budget must be non-negative")
+    inners = []
+    scores = []
+    for item in candidates:
+        if isinstance(item, dict):
+            # normalize_and_route() results carry their score already
+            inners.append(item["envelope"]._inner)
+            scores.append(item["score"].composite)
+        else:
+            inners.append(item._inner)
+    if len(scores) != len(inners):
+        scores = None
+    
+    costs = None
+    if callable(estimator):
+        # Separator newline counts as one token, as for the native estimators
+        costs = [int(estimator(lnmp_py_core.encode(inner.record))) + 1 for inner in inners]
+        estimator = "lnmp"
+    return lnmp_py_core.context_pack(inners, token_budget, scores, costs, estimator, method)
+
+
+def pack_context(
+    candidates: Sequence[Candidate],
+    token_budget: int,
+    *,
+    estimator: Union[str, Callable[[str], int]] = "lnmp",
+    method: str = "greedy",
+) -> str:
+    """Pack the highest-scoring envelopes into a token budget.
+    
+    Token costs and composite scores are computed natively in one call with
+    the GIL released, then the subset with the largest total composite
+    score that fits the budget is selected:
+    
+    - "greedy" takes envelopes in order of score per token, skipping those
+      that no longer fit, and keeps the single best envelope instead if it
+      scores higher. O(n log n); suited to tens of thousands of candidates.
+    - "knapsack" solves the 0/1 knapsack exactly in O(n * token_budget)
+      time and raises ValueError when that table would exceed 2**26
+      cells (candidates times token_budget + 1).
+    
+    Args:
+        candidates: Envelopes, or result dicts from normalize_and_route()
+            (whose precomputed scores are reused)
+        token_budget: Maximum estimated tokens of the packed text
+        estimator: "lnmp" (punctuation-aware estimate of BPE tokens),
+            "chars" (four characters per token), or a callable mapping
+            encoded LNMP text to a token count (e.g. a real tokenizer)
+        method: "greedy" or "knapsack"
+    
+    Returns:
+        Encoded LNMP text of the selected records, one per line, in
+        candidate order
+    
+    Example:
+        >>> results = [lnmp.llm.normalize_and_route(t, source="svc") for t in texts]
+        >>> prompt = lnmp.llm.pack_context(
+        ...     [r for r in results if r["send_to_llm"]], token_budget=4000
+        ... )
+    """
+    return _select(candidates, token_budget, estimator, method)[0]
+
+
+def select_context(
+    candidates: Sequence[Candidate],
+    token_budget: int,
+    *,
+    estimator: Union[str, Callable[[str], int]] = "lnmp",
+    method: str = "greedy",
+) -> List[int]:
+    """Return the candidate indices pack_context() would select.
+    
+    Takes the same arguments as pack_context().
+    
+    Returns:
+        Sorted indices into `candidates`
+    """
+    return _select(candidates, token_budget, estimator, method)[1]
@@ -0,0 +1,125 @@
+"""LNMP hot-path metrics.
+
+Counters and latency histograms are kept by the native extension for each
+instrumented entry point (parse, encode, encode_binary, context_score,
+routing_decide, ...), together with a count of every routing decision.
+Metrics are off by default; while disabled an instrumented call costs a
+single atomic load.
+"""
+
+from typing import Any, Dict, List
+
+from . import lnmp_py_core
+
+
+def enable() -> None:
+    """Start recording metrics for all instrumented entry points.
+
+    Example:
+        >>> from lnmp import metrics
+        >>> metrics.enable()
+    """
+    lnmp_py_core.metrics_set_enabled(True)
+
+
+def disable() -> None:
+    """Stop recording metrics. Already collected values are kept."""
+    lnmp_py_core.metrics_set_enabled(False)
+
+
+def is_enabled() -> bool:
+    """Return True if metrics are currently being recorded."""
+    return lnmp_py_core.metrics_is_enabled()
+
+
+def reset() -> None:
+    """Zero all counters and histograms."""
+    lnmp_py_core.metrics_reset()
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return the current metrics as a plain dict.
+
+    Only operations that have been called at least once are included.
+    Histogram buckets are ``(upper_bound_seconds, count)`` pairs and are not
+    cumulative; the last bound is ``float("inf")``.
+
+    Returns:
+        Dict with ``enabled``, ``operations`` and ``decisions`` keys
+
+    Example:
+        >>> metrics.snapshot()["operations"]["parse"]["calls"]
+        1
+    """
+    operations, decisions, bounds_ns = lnmp_py_core.metrics_snapshot()
+    bounds = [bound / 1e9 for bound in bounds_ns] + [float("inf")]
+    ops: Dict[str, Dict[str, Any]] = {}
+    for name, calls, errors, sum_ns, buckets in operations:
+        if not calls:
+            continue
+        ops[name] = {
+            "calls": calls,
+            "errors": errors,
+            "sum_seconds": sum_ns / 1e9,
+            "buckets": list(zip(bounds, buckets)),
+        }
+    return {
+        "enabled": is_enabled(),
+        "operations": ops,
+        "decisions": dict(decisions),
+    }
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def to_prometheus(prefix: str = "lnmp") -> str:
+    """Render the current metrics in the Prometheus text exposition format.
+
+    Args:
+        prefix: Metric name prefix (default: ``"lnmp"``)
+
+    Returns:
+        Exposition text with ``<prefix>_calls_total``,
+        ``<prefix>_errors_total``, ``<prefix>_latency_seconds`` (histogram)
+        and ``<prefix>_routing_decisions_total``
+
+    Example:
+        >>> print(metrics.to_prometheus())
+        # TYPE lnmp_calls_total counter
+        lnmp_calls_total{op="parse"} 1
+        ...
+    """
+    data = snapshot()
+    operations = data["operations"]
+    lines: List[str] = []
+
+    lines.append(f"# HELP {prefix}_calls_total Calls per LNMP operation.")
+    lines.append(f"# TYPE {prefix}_calls_total counter")
+    for name, stats in operations.items():
+        lines.append(f'{prefix}_calls_total{{op="{name}"}} {stats["calls"]}')
+
+    lines.append(f"# HELP {prefix}_errors_total Failed calls per LNMP operation.")
+    lines.append(f"# TYPE {prefix}_errors_total counter")
+    for name, stats in operations.items():
+        lines.append(f'{prefix}_errors_total{{op="{name}"}} {stats["errors"]}')
+
+    lines.append(f"# HELP {prefix}_latency_seconds Latency of LNMP operations.")
+    lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+    for name, stats in operations.items():
+        cumulative = 0
+        for bound, count in stats["buckets"]:
+            cumulative += count
+            lines.append(
+                f'{prefix}_latency_seconds_bucket{{op="{name}",le="{_format_bound(bound)}"}} {cumulative}'
+            )
+        lines.append(f'{prefix}_latency_seconds_sum{{op="{name}"}} {stats["sum_seconds"]!r}')
+        lines.append(f'{prefix}_latency_seconds_count{{op="{name}"}} {stats["calls"]}')
+
+    lines.append(f"# HELP {prefix}_routing_decisions_total Routing decisions by outcome.")
+    lines.append(f"# TYPE {prefix}_routing_decisions_total counter")
+    for decision, count in data["decisions"].items():
+        lines.append(f'{prefix}_routing_decisions_total{{decision="{decision}"}} {count}')
+
+    return "\n".join(lines) + "\n"
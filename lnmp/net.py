@@ -1,28 +1,18 @@
 """LNMP network routing and context scoring."""
 
-from typing import Dict
-from . import lnmp_py_core
+import heapq
+import math
+import time
+from typing import Callable, List, Optional, Tuple, Union
+from . import lnmp_py_core, tracing
 from .envelope import Envelope
 
-
-class ContextScore:
-    """Context scoring result."""
-    
-    def __init__(self, data: Dict[str, float]):
-        self.composite = data.get("composite", 0.0)
-        self.freshness = data.get("freshness", 0.0)
-        self.importance = data.get("importance", 0.0)
-        self.risk = data.get("risk", 0.0)
-        self.confidence = data.get("confidence", 0.0)
-    
-    def __repr__(self) -> str:
-        return (
-            f"ContextScore(composite={self.composite:.3f}, "
-            f"freshness={self.freshness:.3f}, "
-            f"importance={self.importance:.3f}, "
-            f"risk={self.risk:.3f}, "
-            f"confidence={self.confidence:.3f})"
-        )
+# Native result types: immutable, hashable and without a per-instance dict.
+# ContextScore has composite/freshness/importance/risk/confidence attributes
+# and to_dict(); RoutingDecision members are SendToLLM, ProcessLocally and
+# Drop, with .name and str() giving the member name.
+ContextScore = lnmp_py_core.ContextScore
+RoutingDecision = lnmp_py_core.RoutingDecision
 
 
 def context_score(envelope: Envelope) -> ContextScore:
@@ -34,19 +24,35 @@ def context_score(envelope: Envelope) -> ContextScore:
     Returns:
         ContextScore with composite and component scores
     """
-    data = lnmp_py_core.context_score(envelope._inner)
-    return ContextScore(data)
+    if tracing._tracer is not None:
+        with tracing.span("lnmp.net.context_score", envelope.trace_id, source=envelope.source) as span:
+            score = lnmp_py_core.context_score(envelope._inner)
+            span.set_attribute("lnmp.score.composite", score.composite)
+            return score
+
+    return lnmp_py_core.context_score(envelope._inner)
 
 
-def routing_decide(envelope: Envelope) -> str:
+def routing_decide(envelope: Envelope) -> RoutingDecision:
     """Decide routing for an envelope.
     
     Args:
         envelope: Envelope to route
     
     Returns:
-        Routing decision ("SendToLLM", "Drop", "ProcessLocally", etc.)
+        RoutingDecision member (SendToLLM, ProcessLocally or Drop); it
+        also compares equal to its name, e.g. "SendToLLM"
+    
+    Example:
+        >>> if lnmp.net.routing_decide(env) == lnmp.net.RoutingDecision.SendToLLM:
+        ...     send_to_llm(env)
     """
+    if tracing._tracer is not None:
+        with tracing.span("lnmp.net.routing_decide", envelope.trace_id, source=envelope.source) as span:
+            decision = lnmp_py_core.routing_decide(envelope._inner)
+            span.set_attribute("lnmp.decision", decision.name)
+            return decision
+
     return lnmp_py_core.routing_decide(envelope._inner)
 
 
@@ -68,3 +74,300 @@ def should_send_to_llm(envelope: Envelope, *, threshold: float = 0.7) -> bool:
     """
     score = context_score(envelope)
     return score.composite >= threshold
+
+
+class RoutingCache:
+    """Memoized context scoring and routing for repetitive traffic.
+
+    Envelopes from the same source carrying the same record differ in their
+    score only through freshness, which depends on the envelope's age. The
+    cache keeps the native score and decision per (source, record, age
+    bucket) with LRU eviction, so a repeat within the same age bucket skips
+    scoring and the next bucket re-scores with the new freshness.
+
+    Lookups run natively while holding the GIL, so one cache can be shared
+    between threads.
+
+    Args:
+        maxsize: Maximum number of cached results
+        bucket_ms: Width of the age buckets in milliseconds; freshness is
+            exact to within this age
+        key: "content" to key records by their canonical binary encoding, or
+            "shape" to key them by field IDs and value types only (for
+            traffic whose scores do not depend on field values)
+
+    Raises:
+        ValueError: For a non-positive maxsize or bucket_ms, or an unknown key
+
+    Example:
+        >>> cache = lnmp.net.RoutingCache(maxsize=10_000, bucket_ms=500)
+        >>> score, decision = cache.route(env)
+        >>> cache.invalidate()  # after changing the scoring or routing policy
+    """
+
+    __slots__ = ("_inner",)
+
+    def __init__(self, maxsize: int = 4096, *, bucket_ms: int = 1000, key: str = "content"):
+        self._inner = lnmp_py_core.RoutingCache(maxsize, bucket_ms, key)
+
+    def route(self, envelope: Envelope) -> Tuple[ContextScore, RoutingDecision]:
+        """Return the context score and routing decision for an envelope."""
+        if tracing._tracer is not None:
+            with tracing.span("lnmp.net.route_cached", envelope.trace_id, source=envelope.source) as span:
+                score, decision, hit = self._inner.route(envelope._inner)
+                span.set_attribute("lnmp.decision", decision.name)
+                span.set_attribute("lnmp.cache.hit", hit)
+                return score, decision
+
+        score, decision, _ = self._inner.route(envelope._inner)
+        return score, decision
+
+    def context_score(self, envelope: Envelope) -> ContextScore:
+        """Cached equivalent of lnmp.net.context_score()."""
+        return self.route(envelope)[0]
+
+    def routing_decide(self, envelope: Envelope) -> RoutingDecision:
+        """Cached equivalent of lnmp.net.routing_decide()."""
+        return self.route(envelope)[1]
+
+    def should_send_to_llm(self, envelope: Envelope, *, threshold: float = 0.7) -> bool:
+        """Cached equivalent of lnmp.net.should_send_to_llm()."""
+        return self.route(envelope)[0].composite >= threshold
+
+    def invalidate(self, source: Optional[str] = None) -> int:
+        """Drop cached results for one source, or all of them.
+
+        Call with no source whenever the scoring or routing policy changes.
+
+        Returns:
+            Number of entries dropped
+        """
+        return self._inner.invalidate(source)
+
+    @property
+    def maxsize(self) -> int:
+        return self._inner.maxsize
+
+    @property
+    def bucket_ms(self) -> int:
+        return self._inner.bucket_ms
+
+    @property
+    def hits(self) -> int:
+        return self._inner.hits
+
+    @property
+    def misses(self) -> int:
+        return self._inner.misses
+
+    @property
+    def evictions(self) -> int:
+        return self._inner.evictions
+
+    def __len__(self) -> int:
+        return len(self._inner)
+
+    def __repr__(self) -> str:
+        return (
+            f"RoutingCache(size={len(self)}, maxsize={self.maxsize}, "
+            f"hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+        )
+
+
+class _QueueItem:
+    __slots__ = ("envelope", "composite", "pushed_at", "deadline", "key", "seq", "alive")
+
+    def __init__(self, envelope, composite, pushed_at, deadline, key, seq):
+        self.envelope = envelope
+        self.composite = composite
+        self.pushed_at = pushed_at
+        self.deadline = deadline
+        self.key = key
+        self.seq = seq
+        self.alive = True
+
+
+class PriorityDispatchQueue:
+    """Bounded queue that releases the highest-value envelopes first.
+    
+    Each envelope is ranked by its composite context score, which decays
+    with a fixed half-life while the envelope waits. Because every entry
+    decays at the same rate the relative order never changes, so decayed
+    scores are only computed when read and push/pop stay O(log n).
+    
+    When the queue is full, expired entries are dropped first; otherwise
+    the lowest-value entry is evicted (or the new envelope is rejected if
+    it is worth less than everything queued).
+    
+    The queue is not thread-safe; guard it with a lock when it is shared
+    between threads.
+    
+    Args:
+        maxsize: Maximum number of queued envelopes
+        half_life: Seconds after which a queued envelope's score halves
+            (None disables decay)
+        max_age: Seconds after the envelope timestamp at which an entry
+            expires (None: never)
+        clock: Time source in seconds since the epoch (default: time.time)
+    
+    Example:
+        >>> queue = lnmp.net.PriorityDispatchQueue(maxsize=100_000, half_life=30.0, max_age=300.0)
+        >>> queue.push(envelope)
+        >>> for env in queue.pop_batch(64):
+        ...     send_to_llm(env)
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 100_000,
+        *,
+        half_life: Optional[float] = 60.0,
+        max_age: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        if half_life is not None and half_life <= 0:
+            raise ValueError(f"half_life must be positive, got {half_life}")
+        self.maxsize = maxsize
+        self.half_life = half_life
+        self.max_age = max_age
+        self._clock = clock
+        # Keys are taken relative to this epoch to keep float precision
+        self._epoch = clock()
+        self._decay = math.log(2) / half_life if half_life else 0.0
+        self._seq = 0
+        self._size = 0
+        self._high: List[tuple] = []  # (-key, seq, item): best first
+        self._low: List[tuple] = []  # (key, -seq, item): eviction candidate first
+        self._deadlines: List[tuple] = []  # (deadline, seq, item)
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def push(
+        self,
+        envelope: Envelope,
+        score: Union[ContextScore, float, None] = None,
+    ) -> Optional[Envelope]:
+        """Queue an envelope.
+        
+        Args:
+            envelope: Envelope to queue
+            score: Composite score or ContextScore (default: context_score(envelope))
+        
+        Returns:
+            The envelope that was evicted or rejected to respect maxsize,
+            or None if nothing was dropped
+        """
+        if score is None:
+            score = context_score(envelope)
+        composite = float(getattr(score, "composite", score))
+        now = self._clock()
+        deadline = math.inf
+        if self.max_age is not None:
+            timestamp = envelope.timestamp
+            origin = timestamp / 1000.0 if timestamp is not None else now
+            deadline = origin + self.max_age
+            if deadline <= now:
+                self.expired += 1
+                return envelope
+
+        # log(score at push) + decay * push time orders entries by their
+        # decayed score at any later instant.
+        key = math.log(max(composite, 1e-300)) + self._decay * (now - self._epoch)
+        dropped = None
+        if self._size >= self.maxsize:
+            self.expire(now)
+        if self._size >= self.maxsize:
+            lowest = self._peek(self._low)
+            if (key, -self._seq) <= (lowest.key, -lowest.seq):
+                self.evicted += 1
+                return envelope
+            self._remove(lowest)
+            self.evicted += 1
+            dropped = lowest.envelope
+
+        seq = self._seq
+        self._seq += 1
+        item = _QueueItem(envelope, composite, now, deadline, key, seq)
+        heapq.heappush(self._high, (-key, seq, item))
+        heapq.heappush(self._low, (key, -seq, item))
+        if deadline != math.inf:
+            heapq.heappush(self._deadlines, (deadline, seq, item))
+        self._size += 1
+        return dropped
+
+    def pop(self) -> Envelope:
+        """Remove and return the highest-value envelope.
+        
+        Raises:
+            IndexError: If the queue is empty
+        """
+        self.expire()
+        if not self._size:
+            raise IndexError("pop from an empty PriorityDispatchQueue")
+        item = self._peek(self._high)
+        self._remove(item)
+        return item.envelope
+
+    def pop_batch(self, n: int) -> List[Envelope]:
+        """Remove and return up to n envelopes, best first."""
+        self.expire()
+        batch = []
+        while self._size and len(batch) < n:
+            item = self._peek(self._high)
+            self._remove(item)
+            batch.append(item.envelope)
+        return batch
+
+    def peek(self) -> Optional[Envelope]:
+        """Return the highest-value envelope without removing it."""
+        self.expire()
+        if not self._size:
+            return None
+        return self._peek(self._high).envelope
+
+    def peek_score(self) -> Optional[float]:
+        """Return the current (decayed) composite score of the best entry."""
+        self.expire()
+        if not self._size:
+            return None
+        item = self._peek(self._high)
+        return item.composite * math.exp(-self._decay * (self._clock() - item.pushed_at))
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop entries past max_age and return how many were dropped."""
+        deadlines = self._deadlines
+        if not deadlines:
+            return 0
+        if now is None:
+            now = self._clock()
+        count = 0
+        while deadlines and deadlines[0][0] <= now:
+            item = heapq.heappop(deadlines)[2]
+            if item.alive:
+                self._remove(item)
+                count += 1
+        self.expired += count
+        return count
+
+    def _peek(self, heap: List[tuple]) -> _QueueItem:
+        # Entries removed through another heap are discarded lazily
+        while not heap[0][2].alive:
+            heapq.heappop(heap)
+        return heap[0][2]
+
+    def _remove(self, item: _QueueItem) -> None:
+        item.alive = False
+        self._size -= 1
+        # Rebuild once dead entries dominate so memory stays O(maxsize)
+        for heap in (self._high, self._low, self._deadlines):
+            if len(heap) > 2 * self._size + 64:
+                heap[:] = [entry for entry in heap if entry[2].alive]
+                heapq.heapify(heap)
@@ -0,0 +1,172 @@
+"""LNMP tracing hooks.
+
+Register a tracer to get spans around envelope wrapping, context scoring,
+routing and transport conversions. Every span is parented on the envelope's
+``trace_id`` so SDK work shows up inside the trace that produced the message.
+
+When no tracer is registered the instrumented functions skip tracing after a
+single attribute check.
+"""
+
+import random
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, ContextManager, Dict, Iterator, Optional
+
+_tracer: Optional["Tracer"] = None
+_sample_rate = 1.0
+
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+class Span:
+    """Span handed to instrumented code; the no-op base ignores everything."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach an attribute to the span."""
+
+
+_NOOP_SPAN = Span()
+
+
+class Tracer(ABC):
+    """Interface for tracing backends.
+
+    Subclasses implement :meth:`start_span`, returning a context manager that
+    yields an object with ``set_attribute(key, value)``. Exceptions raised
+    inside the span propagate through the context manager's ``__exit__``.
+
+    Example:
+        >>> class PrintTracer(lnmp.tracing.Tracer):
+        ...     @contextmanager
+        ...     def start_span(self, name, trace_id, attributes):
+        ...         print("start", name, trace_id)
+        ...         yield lnmp.tracing.Span()
+        >>> lnmp.tracing.set_tracer(PrintTracer())
+    """
+
+    @abstractmethod
+    def start_span(
+        self,
+        name: str,
+        trace_id: Optional[str],
+        attributes: Dict[str, Any],
+    ) -> ContextManager[Span]:
+        """Start a span.
+
+        Args:
+            name: Span name (e.g., "lnmp.net.routing_decide")
+            trace_id: Envelope trace ID to parent the span on, if any
+            attributes: Initial span attributes
+
+        Returns:
+            Context manager yielding the span
+        """
+
+
+class OpenTelemetryTracer(Tracer):
+    """Tracer backed by OpenTelemetry (requires ``opentelemetry-api``).
+
+    If the current OpenTelemetry span already belongs to the envelope's trace
+    the new span becomes its child. Otherwise a W3C trace ID (32 lowercase
+    hex characters) is used as a remote parent so the span joins that trace;
+    other trace IDs are only recorded as the ``lnmp.trace_id`` attribute.
+
+    Args:
+        tracer: OpenTelemetry tracer to use (default: ``trace.get_tracer("lnmp")``)
+
+    Example:
+        >>> lnmp.tracing.set_tracer(lnmp.tracing.OpenTelemetryTracer(), sample_rate=0.1)
+    """
+
+    def __init__(self, tracer: Any = None):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryTracer requires opentelemetry-api: pip install opentelemetry-api"
+            ) from e
+        self._trace = trace
+        self._tracer = tracer if tracer is not None else trace.get_tracer("lnmp")
+
+    def start_span(
+        self,
+        name: str,
+        trace_id: Optional[str],
+        attributes: Dict[str, Any],
+    ) -> ContextManager[Span]:
+        trace = self._trace
+        context = None
+        if trace_id and len(trace_id) == 32 and _HEX_DIGITS.issuperset(trace_id):
+            wanted = int(trace_id, 16)
+            current = trace.get_current_span().get_span_context()
+            if not (current.is_valid and current.trace_id == wanted):
+                parent = trace.SpanContext(
+                    trace_id=wanted,
+                    span_id=random.getrandbits(64) or 1,
+                    is_remote=True,
+                    trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+                )
+                context = trace.set_span_in_context(trace.NonRecordingSpan(parent))
+        return self._tracer.start_as_current_span(name, context=context, attributes=attributes)
+
+
+def set_tracer(tracer: Optional[Tracer], *, sample_rate: float = 1.0) -> None:
+    """Register the tracer used by the SDK, or remove it with ``None``.
+
+    Sampling is decided per trace ID, so either all spans of a trace are
+    recorded or none are. Spans without a trace ID are sampled at random.
+
+    Args:
+        tracer: Tracer instance, or None to disable tracing
+        sample_rate: Fraction of traces to record (0.0-1.0)
+
+    Raises:
+        ValueError: If sample_rate is outside 0.0-1.0
+    """
+    global _tracer, _sample_rate
+    if not 0.0 <= sample_rate <= 1.0:
+        raise ValueError(f"sample_rate must be between 0.0 and 1.0, got {sample_rate}")
+    _sample_rate = sample_rate
+    _tracer = tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Return the registered tracer, or None."""
+    return _tracer
+
+
+def _sampled(trace_id: Optional[str]) -> bool:
+    if _sample_rate >= 1.0:
+        return True
+    if trace_id:
+        return zlib.crc32(trace_id.encode()) / 0x1_0000_0000 < _sample_rate
+    return random.random() < _sample_rate
+
+
+@contextmanager
+def span(name: str, trace_id: Optional[str], **attributes: Any) -> Iterator[Span]:
+    """Open a span on the registered tracer.
+
+    Yields a no-op span when no tracer is registered or the trace is not
+    sampled. Instrumented SDK functions check ``tracing._tracer`` before
+    calling this, so untraced calls never reach it.
+
+    Args:
+        name: Span name
+        trace_id: Envelope trace ID, if any
+        **attributes: Initial span attributes, recorded as ``lnmp.<name>``
+            (None values are dropped)
+    """
+    tracer = _tracer
+    if tracer is None or not _sampled(trace_id):
+        yield _NOOP_SPAN
+        return
+    attrs = {f"lnmp.{key}": value for key, value in attributes.items() if value is not None}
+    if trace_id:
+        attrs["lnmp.trace_id"] = trace_id
+    with tracer.start_span(name, trace_id, attrs) as active:
+        yield active
@@ -0,0 +1,312 @@
+"""LNMP Transport bindings.
+
+This module provides helpers to map LNMP Envelopes to and from transport-specific
+metadata formats (e.g., HTTP headers).
+"""
+
+import struct
+from .. import lnmp_py_core, tracing
+from typing import Dict, List, Optional
+from ..envelope import Envelope
+
+def to_http_headers(envelope: Envelope) -> Dict[str, str]:
+    """Convert an LNMP Envelope to HTTP headers.
+    
+    Maps envelope metadata to standard X-LNMP-* headers and W3C Trace Context.
+    
+    Args:
+        envelope: The LNMP envelope to convert.
+        
+    Returns:
+        Dictionary of HTTP headers.
+        
+    Example:
+        >>> headers = lnmp.transport.to_http_headers(envelope)
+        >>> headers['x-lnmp-source']
+        'my-service'
+    """
+    if tracing._tracer is not None:
+        with tracing.span("lnmp.transport.to_http_headers", envelope.trace_id, source=envelope.source):
+            return lnmp_py_core.transport_to_http_headers(envelope._inner)
+    return lnmp_py_core.transport_to_http_headers(envelope._inner)
+
+def from_http_headers(headers: Dict[str, str]) -> Envelope:
+    """Create an LNMP Envelope from HTTP headers.
+    
+    Extracts metadata from X-LNMP-* headers and W3C Trace Context.
+    Note: The returned envelope contains an empty record. You should typically
+    parse the body separately and combine it with the metadata.
+    
+    Args:
+        headers: Dictionary of HTTP headers.
+        
+    Returns:
+        LNMP Envelope with extracted metadata.
+        
+    Example:
+        >>> envelope = lnmp.transport.from_http_headers(request.headers)
+        >>> envelope.source
+        'my-service'
+    """
+    if tracing._tracer is not None:
+        with tracing.span("lnmp.transport.from_http_headers", _header_trace_id(headers)):
+            return Envelope(_inner=lnmp_py_core.transport_from_http_headers(headers))
+
+    # Create internal envelope from headers
+    inner = lnmp_py_core.transport_from_http_headers(headers)
+    return Envelope(_inner=inner)
+
+
+def _header_trace_id(headers: Dict[str, str]) -> Optional[str]:
+    """Trace ID carried by X-LNMP-Trace-ID or a W3C traceparent header."""
+    traceparent = None
+    for name, value in headers.items():
+        name = name.lower()
+        if name == "x-lnmp-trace-id":
+            return value
+        if name == "traceparent":
+            traceparent = value
+    if traceparent:
+        parts = traceparent.split("-")
+        if len(parts) >= 2:
+            return parts[1]
+    return None
+
+
+TEXT_CONTENT_TYPE = "application/lnmp"
+BINARY_CONTENT_TYPE = "application/lnmp-binary"
+
+# Headers consumed by from_http_headers(); everything else is ignored when
+# collecting metadata from a request.
+_METADATA_HEADER_PREFIX = "x-lnmp-"
+_TRACE_CONTEXT_HEADERS = ("traceparent", "tracestate")
+
+
+def is_lnmp_content_type(content_type: Optional[str]) -> bool:
+    """Return True if a Content-Type header denotes an LNMP body."""
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in (TEXT_CONTENT_TYPE, BINARY_CONTENT_TYPE)
+
+
+def is_metadata_header(name: str) -> bool:
+    """Return True if a (lower-case) header name carries envelope metadata."""
+    return name.startswith(_METADATA_HEADER_PREFIX) or name in _TRACE_CONTEXT_HEADERS
+
+
+def from_http_request(
+    headers: Dict[str, str],
+    body: bytes,
+    *,
+    content_type: Optional[str] = None,
+) -> Envelope:
+    """Create an LNMP Envelope from HTTP headers and an LNMP request body.
+    
+    Unlike from_http_headers(), the returned envelope carries the record
+    decoded from the body. Binary bodies are used when the content type is
+    BINARY_CONTENT_TYPE; anything else is parsed as LNMP text.
+    
+    Args:
+        headers: Dictionary of HTTP headers (lower-case names).
+        body: Raw request body.
+        content_type: Content-Type of the body (defaults to headers['content-type']).
+        
+    Returns:
+        LNMP Envelope with the decoded record and extracted metadata.
+        
+    Raises:
+        ValueError: If the body or the metadata headers are malformed.
+        
+    Example:
+        >>> envelope = lnmp.transport.from_http_request(headers, b"F12=14532")
+        >>> envelope.source
+        'my-service'
+    """
+    if content_type is None:
+        content_type = headers.get("content-type")
+    decoder = BodyDecoder(content_type)
+    decoder.feed(body)
+    if tracing._tracer is not None:
+        with tracing.span("lnmp.transport.from_http_request", _header_trace_id(headers), body_size=len(body)):
+            return decoder.finish(headers)
+    return decoder.finish(headers)
+
+
+class BodyDecoder:
+    """Incremental decoder for LNMP request bodies.
+    
+    Text bodies are fed to the native StreamParser chunk by chunk, so UTF-8
+    checks and parsing happen as the body arrives and finish() only
+    completes the final record. Binary records cannot be decoded from a
+    prefix and are decoded natively in finish(). Either way the chunks are
+    also appended to one growable buffer, so body() can replay the request.
+    
+    Example:
+        >>> decoder = lnmp.transport.BodyDecoder("application/lnmp")
+        >>> for chunk in chunks:
+        ...     decoder.feed(chunk)
+        >>> envelope = decoder.finish(headers)
+    """
+
+    __slots__ = ("binary", "max_size", "_buffer", "_parser", "_records", "_error")
+
+    def __init__(self, content_type: Optional[str] = None, *, max_size: Optional[int] = None):
+        media_type = (content_type or "").split(";", 1)[0].strip().lower()
+        self.binary = media_type == BINARY_CONTENT_TYPE
+        self.max_size = max_size
+        self._buffer = bytearray()
+        # A body holds one record whose fields may span lines, so only blank
+        # lines delimit records
+        self._parser = None if self.binary else lnmp_py_core.StreamParser("blank_line", False, None)
+        self._records: List = []
+        self._error: Optional[ValueError] = None
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, chunk: bytes) -> None:
+        """Append a body chunk, parsing any text it completes.
+        
+        Malformed text is reported by finish(), once the whole body is in.
+        
+        Raises:
+            ValueError: If the body grows beyond max_size.
+        """
+        self._buffer += chunk
+        if self.max_size is not None and len(self._buffer) > self.max_size:
+            raise ValueError(f"LNMP body exceeds {self.max_size} bytes")
+        if self._parser is not None and self._error is None:
+            try:
+                if self._parser.feed(chunk):
+                    self._drain()
+            except ValueError as e:
+                self._error = e
+
+    def _drain(self) -> None:
+        while True:
+            record = self._parser.next_record()
+            if record is None:
+                return
+            self._records.append(record)
+
+    def body(self) -> bytes:
+        """Return the bytes fed so far."""
+        return bytes(self._buffer)
+
+    def finish(self, headers: Dict[str, str]) -> Envelope:
+        """Decode the rest of the body and combine it with header metadata.
+        
+        Args:
+            headers: Dictionary of HTTP headers (lower-case names).
+            
+        Returns:
+            LNMP Envelope with the decoded record.
+            
+        Raises:
+            ValueError: If the body or the metadata headers are malformed.
+        """
+        if self.binary:
+            record = lnmp_py_core.decode_binary(bytes(self._buffer))
+        else:
+            if self._error is None:
+                try:
+                    self._parser.close()
+                    self._drain()
+                except ValueError as e:
+                    self._error = e
+            if self._error is not None:
+                raise ValueError(f"Invalid LNMP text body: {self._error}") from None
+            if len(self._records) == 1:
+                record = self._records[0]
+            else:
+                # Empty, or blank lines between fields: parse the body whole
+                record = lnmp_py_core.parse(self._buffer.decode("utf-8"))
+        metadata = {k: v for k, v in headers.items() if is_metadata_header(k)}
+        return Envelope(_inner=lnmp_py_core.transport_from_http(metadata, record))
+
+
+BATCH_CONTENT_TYPE = "application/lnmp-batch"
+
+_FRAME_LENGTH = struct.Struct(">I")
+
+
+def encode_frame(envelope: Envelope) -> bytes:
+    """Encode an envelope as one frame of a batch body.
+    
+    A frame is the envelope's to_http_headers() block followed by the binary
+    record, each prefixed with its length as a big-endian u32:
+    
+        [u32 len][name: value\\r\\n ...][u32 len][binary record]
+    
+    Args:
+        envelope: Envelope to encode.
+        
+    Returns:
+        Frame bytes, ready to be concatenated with other frames.
+    """
+    record = lnmp_py_core.encode_binary(envelope._inner.record)
+    return _frame(to_http_headers(envelope), record)
+
+
+def _frame(headers: Dict[str, str], record: bytes) -> bytes:
+    header_block = "".join(f"{name}: {value}\r\n" for name, value in headers.items()).encode("latin-1")
+    return b"".join((
+        _FRAME_LENGTH.pack(len(header_block)),
+        header_block,
+        _FRAME_LENGTH.pack(len(record)),
+        record,
+    ))
+
+
+def encode_batch(envelopes: List[Envelope]) -> bytes:
+    """Encode envelopes as a BATCH_CONTENT_TYPE body (concatenated frames)."""
+    return b"".join(encode_frame(envelope) for envelope in envelopes)
+
+
+def decode_batch(data: bytes) -> List[Envelope]:
+    """Decode a BATCH_CONTENT_TYPE body produced by encode_batch().
+    
+    Args:
+        data: Batch body.
+        
+    Returns:
+        List of Envelopes, in frame order.
+        
+    Raises:
+        ValueError: If a frame is truncated or malformed.
+    """
+    view = memoryview(data)
+    envelopes = []
+    offset = 0
+    while offset < len(view):
+        header_block, offset = _read_chunk(view, offset)
+        record_bytes, offset = _read_chunk(view, offset)
+        headers = {}
+        for line in bytes(header_block).decode("latin-1").split("\r\n"):
+            if line:
+                name, _, value = line.partition(": ")
+                headers[name] = value
+        record = lnmp_py_core.decode_binary(bytes(record_bytes))
+        envelopes.append(Envelope(_inner=lnmp_py_core.transport_from_http(headers, record)))
+    return envelopes
+
+
+def _read_chunk(view: memoryview, offset: int):
+    end = offset + _FRAME_LENGTH.size
+    if end > len(view):
+        raise ValueError(f"Truncated LNMP batch frame at byte {offset}")
+    (length,) = _FRAME_LENGTH.unpack(view[offset:end])
+    if end + length > len(view):
+        raise ValueError(f"Truncated LNMP batch frame at byte {offset}")
+    return view[end:end + length], end + length
+
+
+def __getattr__(name):
+    # The dispatcher pulls in http.client, threading and concurrent.futures;
+    # only load it for callers that actually forward envelopes.
+    if name in ("Dispatcher", "DispatchError"):
+        from . import dispatch
+
+        return getattr(dispatch, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
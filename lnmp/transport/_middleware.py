@@ -0,0 +1,23 @@
+"""Shared helpers for the ASGI and WSGI middleware."""
+
+from typing import Any, Dict, Optional
+from .. import net
+from ..envelope import Envelope
+
+ENVELOPE_KEY = "lnmp.envelope"
+SCORE_KEY = "lnmp.score"
+DECISION_KEY = "lnmp.decision"
+
+BAD_REQUEST = (400, "Bad Request")
+PAYLOAD_TOO_LARGE = (413, "Payload Too Large")
+
+
+def annotations(envelope: Optional[Envelope], score: bool, route: bool) -> Dict[str, Any]:
+    """Build the scope/environ entries attached to a decoded request."""
+    result: Dict[str, Any] = {ENVELOPE_KEY: envelope}
+    if envelope is not None:
+        if score:
+            result[SCORE_KEY] = net.context_score(envelope)
+        if route:
+            result[DECISION_KEY] = net.routing_decide(envelope)
+    return result
@@ -0,0 +1,126 @@
+"""ASGI middleware that decodes LNMP request bodies into Envelopes.
+
+Example:
+    >>> from lnmp.transport.asgi import LNMPMiddleware
+    >>> app = LNMPMiddleware(app, score=True, route=True)
+    
+    # Inside the wrapped application:
+    >>> envelope = scope["lnmp.envelope"]
+    >>> decision = scope["lnmp.decision"]
+"""
+
+from typing import Any, Awaitable, Callable, Dict, MutableMapping, Optional
+from . import BodyDecoder, is_lnmp_content_type
+from ._middleware import BAD_REQUEST, PAYLOAD_TOO_LARGE, annotations
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class LNMPMiddleware:
+    """Decode LNMP request bodies before the wrapped ASGI app runs.
+    
+    Requests whose Content-Type is application/lnmp (text) or
+    application/lnmp-binary are consumed chunk by chunk, decoded natively
+    and combined with their x-lnmp-* / traceparent headers. The resulting
+    Envelope is stored in the scope under "lnmp.envelope"; with score/route
+    enabled, "lnmp.score" and "lnmp.decision" are filled in as well. The
+    body is replayed to the application unchanged.
+    
+    Other requests are passed straight through.
+    
+    Args:
+        app: ASGI application to wrap.
+        score: Attach lnmp.net.context_score() as "lnmp.score".
+        route: Attach lnmp.net.routing_decide() as "lnmp.decision".
+        max_body_size: Reject bodies larger than this many bytes with 413.
+        reject_invalid: Answer malformed bodies with 400 instead of calling
+            the app with "lnmp.envelope" set to None.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        score: bool = False,
+        route: bool = False,
+        max_body_size: Optional[int] = None,
+        reject_invalid: bool = True,
+    ):
+        self.app = app
+        self.score = score
+        self.route = route
+        self.max_body_size = max_body_size
+        self.reject_invalid = reject_invalid
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_type = None
+        headers: Dict[str, str] = {}
+        for raw_name, raw_value in scope.get("headers", ()):
+            if raw_name == b"content-type":
+                content_type = raw_value.decode("latin-1")
+            elif raw_name.startswith(b"x-lnmp-") or raw_name in (b"traceparent", b"tracestate"):
+                headers[raw_name.decode("latin-1")] = raw_value.decode("latin-1")
+
+        if not is_lnmp_content_type(content_type):
+            await self.app(scope, receive, send)
+            return
+
+        decoder = BodyDecoder(content_type, max_size=self.max_body_size)
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            try:
+                decoder.feed(message.get("body", b""))
+            except ValueError:
+                await _respond(send, PAYLOAD_TOO_LARGE)
+                return
+            more_body = message.get("more_body", False)
+
+        try:
+            envelope = decoder.finish(headers)
+        except ValueError:
+            if self.reject_invalid:
+                await _respond(send, BAD_REQUEST)
+                return
+            envelope = None
+
+        scope = {**scope, **annotations(envelope, self.score, self.route)}
+        await self.app(scope, _replay(decoder.body(), receive), send)
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    """Return a receive callable that yields the consumed body once."""
+    pending = True
+
+    async def replay() -> Message:
+        nonlocal pending
+        if pending:
+            pending = False
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+async def _respond(send: Send, status: tuple) -> None:
+    code, reason = status
+    body = reason.encode("ascii")
+    await send({
+        "type": "http.response.start",
+        "status": code,
+        "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,245 @@
+"""Pooled, batching HTTP dispatch of envelopes.
+
+Example:
+    >>> with lnmp.transport.Dispatcher("http://llm-gateway:8080/ingest") as dispatcher:
+    ...     if lnmp.net.routing_decide(env) == lnmp.net.RoutingDecision.SendToLLM:
+    ...         dispatcher.submit(env)
+"""
+
+import http.client
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from ..envelope import Envelope
+from . import BATCH_CONTENT_TYPE, BINARY_CONTENT_TYPE, _frame, to_http_headers
+from .. import lnmp_py_core
+
+# Responses worth retrying; any other non-2xx status fails the batch.
+_RETRY_STATUSES = frozenset((408, 429, 500, 502, 503, 504))
+
+_STOP = object()
+
+
+class DispatchError(Exception):
+    """A batch could not be delivered."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class Dispatcher:
+    """Forward envelopes to an HTTP endpoint in coalesced batches.
+    
+    Envelopes passed to submit() are encoded immediately on the calling
+    thread and queued. A background thread coalesces them into batches of up
+    to max_batch_size, waiting at most max_linger_ms after the first envelope
+    of a batch arrives. Batches are POSTed over a pool of keep-alive
+    connections with at most max_in_flight requests outstanding.
+    
+    A batch of one is sent exactly like a single request: to_http_headers()
+    as HTTP headers and the binary record as an application/lnmp-binary
+    body. Larger batches are sent as application/lnmp-batch, one
+    encode_frame() per envelope (see decode_batch()).
+    
+    Connection errors and 408/429/5xx responses are retried up to
+    max_retries times with full-jitter exponential backoff.
+    
+    Args:
+        url: Endpoint URL (http:// or https://).
+        max_batch_size: Maximum number of envelopes per POST.
+        max_linger_ms: Maximum time to wait for a batch to fill.
+        max_in_flight: Maximum number of concurrent POSTs (and pooled connections).
+        max_pending: Maximum number of queued envelopes; submit() blocks
+            when the queue is full.
+        max_retries: Retries per batch after the first attempt.
+        backoff_base: Base backoff in seconds.
+        backoff_max: Cap on a single backoff sleep in seconds.
+        timeout: Socket timeout in seconds.
+        headers: Extra headers sent with every request.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        max_batch_size: int = 64,
+        max_linger_ms: float = 5.0,
+        max_in_flight: int = 4,
+        max_pending: int = 10_000,
+        max_retries: int = 3,
+        backoff_base: float = 0.05,
+        backoff_max: float = 2.0,
+        timeout: float = 10.0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        parts = urlsplit(url)
+        if parts.scheme == "http":
+            self._connection_class = http.client.HTTPConnection
+        elif parts.scheme == "https":
+            self._connection_class = http.client.HTTPSConnection
+        else:
+            raise ValueError(f"Unsupported URL scheme: {parts.scheme!r}")
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        self.max_batch_size = max_batch_size
+        self.max_linger = max_linger_ms / 1000.0
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._connections: "queue.LifoQueue" = queue.LifoQueue()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="lnmp-dispatch")
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._closed = False
+        self._batcher = threading.Thread(target=self._run, name="lnmp-dispatch-batcher", daemon=True)
+        self._batcher.start()
+
+    def __enter__(self) -> "Dispatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(self, envelope: Envelope) -> "Future[int]":
+        """Queue an envelope for delivery.
+        
+        Args:
+            envelope: Envelope to send.
+            
+        Returns:
+            Future resolving to the HTTP status of the batch the envelope was
+            delivered in, or raising DispatchError.
+        """
+        if self._closed:
+            raise RuntimeError("Dispatcher is closed")
+        item = (to_http_headers(envelope), lnmp_py_core.encode_binary(envelope._inner.record))
+        future: "Future[int]" = Future()
+        with self._idle:
+            self._pending += 1
+        future.add_done_callback(self._done)
+        self._queue.put((item, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted envelope has been delivered or failed.
+        
+        Returns:
+            False if the timeout expired first.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self) -> None:
+        """Deliver queued envelopes, then stop the dispatcher and close connections."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._batcher.join()
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _done(self, _future: Future) -> None:
+        with self._idle:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_linger
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._in_flight.acquire()
+            self._executor.submit(self._deliver, batch)
+
+    def _deliver(self, batch: List[Tuple[Tuple[Dict[str, str], bytes], Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                envelope_headers, record = batch[0][0]
+                headers = dict(self.headers, **envelope_headers)
+                headers["content-type"] = BINARY_CONTENT_TYPE
+                body = record
+            else:
+                headers = dict(self.headers)
+                headers["content-type"] = BATCH_CONTENT_TYPE
+                headers["x-lnmp-batch-count"] = str(len(batch))
+                body = b"".join(_frame(*item) for item, _ in batch)
+            status = self._post_with_retries(body, headers)
+        except BaseException as e:
+            error = e if isinstance(e, DispatchError) else DispatchError(str(e))
+            for _, future in batch:
+                future.set_exception(error)
+        else:
+            for _, future in batch:
+                future.set_result(status)
+        finally:
+            self._in_flight.release()
+
+    def _post_with_retries(self, body: bytes, headers: Dict[str, str]) -> int:
+        attempt = 0
+        while True:
+            try:
+                status = self._post(body, headers)
+            except (OSError, http.client.HTTPException) as e:
+                if attempt >= self.max_retries:
+                    raise DispatchError(f"POST {self._path} failed: {e}") from e
+            else:
+                if 200 <= status < 300:
+                    return status
+                if status not in _RETRY_STATUSES or attempt >= self.max_retries:
+                    raise DispatchError(f"POST {self._path} returned HTTP {status}", status)
+            time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt))))
+            attempt += 1
+
+    def _post(self, body: bytes, headers: Dict[str, str]) -> int:
+        try:
+            conn = self._connections.get_nowait()
+        except queue.Empty:
+            conn = self._connection_class(self._host, self._port, timeout=self.timeout)
+        try:
+            conn.request("POST", self._path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except BaseException:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._connections.put(conn)
+        return response.status
@@ -0,0 +1,117 @@
+"""WSGI middleware that decodes LNMP request bodies into Envelopes.
+
+Example:
+    >>> from lnmp.transport.wsgi import LNMPMiddleware
+    >>> app = LNMPMiddleware(app, score=True, route=True)
+    
+    # Inside the wrapped application:
+    >>> envelope = environ["lnmp.envelope"]
+    >>> decision = environ["lnmp.decision"]
+"""
+
+import io
+from typing import Any, Callable, Dict, Iterable, Optional
+from . import BodyDecoder, is_lnmp_content_type, is_metadata_header
+from ._middleware import BAD_REQUEST, PAYLOAD_TOO_LARGE, annotations
+
+WSGIApp = Callable[[Dict[str, Any], Callable[..., Any]], Iterable[bytes]]
+
+
+class LNMPMiddleware:
+    """Decode LNMP request bodies before the wrapped WSGI app runs.
+    
+    The WSGI counterpart of lnmp.transport.asgi.LNMPMiddleware. The body is
+    read from wsgi.input in chunk_size pieces, decoded natively and stored in
+    the environ under "lnmp.envelope" (plus "lnmp.score" / "lnmp.decision"
+    when enabled). When the server sets wsgi.input_terminated (e.g. for a
+    chunked request) the body is read until EOF; otherwise a missing
+    CONTENT_LENGTH means an empty body, as in PEP 3333. wsgi.input is
+    replaced with an in-memory copy of the body so the application can
+    still read it.
+    
+    Args:
+        app: WSGI application to wrap.
+        score: Attach lnmp.net.context_score() as "lnmp.score".
+        route: Attach lnmp.net.routing_decide() as "lnmp.decision".
+        max_body_size: Reject bodies larger than this many bytes with 413.
+        reject_invalid: Answer malformed bodies with 400 instead of calling
+            the app with "lnmp.envelope" set to None.
+        chunk_size: Number of bytes read from wsgi.input at a time.
+    """
+
+    def __init__(
+        self,
+        app: WSGIApp,
+        *,
+        score: bool = False,
+        route: bool = False,
+        max_body_size: Optional[int] = None,
+        reject_invalid: bool = True,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.app = app
+        self.score = score
+        self.route = route
+        self.max_body_size = max_body_size
+        self.reject_invalid = reject_invalid
+        self.chunk_size = chunk_size
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable[..., Any]) -> Iterable[bytes]:
+        content_type = environ.get("CONTENT_TYPE")
+        if not is_lnmp_content_type(content_type):
+            return self.app(environ, start_response)
+
+        # A terminated input (e.g. a chunked request) is read up to EOF. Any
+        # other input may be the raw socket, so only CONTENT_LENGTH bytes
+        # are read from it, none when the length is missing
+        remaining = None
+        if not environ.get("wsgi.input_terminated"):
+            try:
+                remaining = int(environ.get("CONTENT_LENGTH") or 0)
+            except ValueError:
+                return _respond(start_response, BAD_REQUEST)
+            if self.max_body_size is not None and remaining > self.max_body_size:
+                return _respond(start_response, PAYLOAD_TOO_LARGE)
+
+        headers: Dict[str, str] = {}
+        for key, value in environ.items():
+            if key.startswith("HTTP_"):
+                name = key[5:].replace("_", "-").lower()
+                if is_metadata_header(name):
+                    headers[name] = value
+
+        decoder = BodyDecoder(content_type, max_size=self.max_body_size)
+        stream = environ["wsgi.input"]
+        while remaining is None or remaining > 0:
+            chunk = stream.read(self.chunk_size if remaining is None else min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            try:
+                decoder.feed(chunk)
+            except ValueError:
+                return _respond(start_response, PAYLOAD_TOO_LARGE)
+            if remaining is not None:
+                remaining -= len(chunk)
+
+        try:
+            envelope = decoder.finish(headers)
+        except ValueError:
+            if self.reject_invalid:
+                return _respond(start_response, BAD_REQUEST)
+            envelope = None
+
+        body = decoder.body()
+        environ["wsgi.input"] = io.BytesIO(body)
+        environ["CONTENT_LENGTH"] = str(len(body))
+        environ.update(annotations(envelope, self.score, self.route))
+        return self.app(environ, start_response)
+
+
+def _respond(start_response: Callable[..., Any], status: tuple) -> Iterable[bytes]:
+    code, reason = status
+    body = reason.encode("ascii")
+    start_response(f"{code} {reason}", [
+        ("Content-Type", "text/plain; charset=utf-8"),
+        ("Content-Length", str(len(body))),
+    ])
+    return [body]
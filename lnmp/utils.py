@@ -1,7 +1,48 @@
 """LNMP utility functions (quant, sanitize, debug, etc.)."""
 
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Sequence, Union
 from . import lnmp_py_core
 
+if TYPE_CHECKING:
+    from .core import Record
+
+
+class SanitizationConfig:
+    """Options for lenient LNMP text repair.
+    
+    Options left as None keep the defaults of the native sanitizer. The
+    native config is built once, so a single instance can be reused across
+    calls to sanitize() and lnmp.core.parse_lenient().
+    
+    Args:
+        level: "minimal", "normal" or "aggressive"
+        auto_quote_strings: Quote bare string values that need it
+        auto_escape_quotes: Escape stray quotes inside strings
+        normalize_booleans: Rewrite true/false/yes/no as 1/0
+        normalize_numbers: Canonicalize numeric literals
+    
+    Example:
+        >>> config = lnmp.utils.SanitizationConfig(level="aggressive")
+        >>> record = lnmp.core.parse_lenient(raw, config=config)
+    """
+    
+    def __init__(
+        self,
+        level: Optional[str] = None,
+        *,
+        auto_quote_strings: Optional[bool] = None,
+        auto_escape_quotes: Optional[bool] = None,
+        normalize_booleans: Optional[bool] = None,
+        normalize_numbers: Optional[bool] = None,
+    ):
+        self._inner = lnmp_py_core.PySanitizationConfig(
+            level,
+            auto_quote_strings,
+            auto_escape_quotes,
+            normalize_booleans,
+            normalize_numbers,
+        )
+
 
 def quantize(vector: list[float], scheme: str = "QInt8") -> bytes:
     """Quantize embedding vector to compressed format.
@@ -20,11 +61,12 @@ def quantize(vector: list[float], scheme: str = "QInt8") -> bytes:
     return lnmp_py_core.quantize(vector, scheme)
 
 
-def sanitize(text: str) -> str:
+def sanitize(text: str, config: Optional[SanitizationConfig] = None) -> str:
     """Sanitize LNMP text input.
     
     Args:
         text: Raw LNMP text
+        config: Sanitization options (defaults to the native defaults)
     
     Returns:
         Sanitized LNMP text
@@ -35,7 +77,7 @@ def sanitize(text: str) -> str:
         >>> clean
         'F12=14532;F7=1'
     """
-    return lnmp_py_core.sanitize(text)
+    return lnmp_py_core.sanitize(text, config._inner if config is not None else None)
 
 
 def debug_explain(text: str) -> str:
@@ -53,3 +95,82 @@ def debug_explain(text: str) -> str:
         F12:i=14532
     """
     return lnmp_py_core.debug_explain(text)
+
+
+class Explainer:
+    """Explain-mode encoder with a semantic dictionary loaded once.
+    
+    Unlike debug_explain(), which re-parses its input and uses an empty
+    dictionary on every call, an Explainer keeps its native encoder and
+    dictionary alive, so explanations carry field names and explaining an
+    already parsed Record involves no text round trip.
+    
+    Args:
+        field_names: Mapping of field ID to field name
+    
+    Example:
+        >>> explainer = lnmp.utils.Explainer.from_file("fields.json")
+        >>> print(explainer.explain(record))
+    """
+    
+    def __init__(self, field_names: Mapping[int, str]):
+        self.field_names: Dict[int, str] = {int(fid): str(name) for fid, name in field_names.items()}
+        self._inner = lnmp_py_core.PyExplainer(self.field_names)
+    
+    @classmethod
+    def from_file(cls, path: str) -> "Explainer":
+        """Load a semantic dictionary from a JSON file.
+        
+        The file holds an object mapping field IDs to names; keys may be
+        written as "12" or "F12", optionally nested under a "fields" key:
+        
+            {"fields": {"F12": "user_id", "F7": "is_active"}}
+        
+        Args:
+            path: Path to the JSON dictionary
+        
+        Returns:
+            Explainer instance
+        
+        Raises:
+            ValueError: If the file is not a valid dictionary
+        """
+        import json
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get("fields"), dict):
+            data = data["fields"]
+        if not isinstance(data, dict):
+            raise ValueError(f"Semantic dictionary {path!r} must be a JSON object")
+        field_names = {}
+        for key, name in data.items():
+            fid = key[1:] if key[:1] in ("F", "f") else key
+            if not fid.isdigit():
+                raise ValueError(f"Invalid field ID {key!r} in {path!r}")
+            field_names[int(fid)] = name
+        return cls(field_names)
+    
+    def explain(self, record: Union["Record", str]) -> str:
+        """Explain a Record, or LNMP text.
+        
+        Args:
+            record: Parsed Record (explained directly) or LNMP text
+        
+        Returns:
+            Explained LNMP with annotations
+        """
+        if isinstance(record, str):
+            return self._inner.explain_text(record)
+        return self._inner.explain(record._inner)
+    
+    def explain_many(self, records: Sequence["Record"]) -> List[str]:
+        """Explain a batch of Records in one native call.
+        
+        Args:
+            records: Parsed Records
+        
+        Returns:
+            Explanations, in input order
+        """
+        return self._inner.explain_many([record._inner for record in records])
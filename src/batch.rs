@@ -0,0 +1,225 @@
+//! Compact binary frames for pickling and batch transfer.
+//!
+//! ```text
+//! envelope       : b"LNEV" | envelope item
+//! record batch   : b"LNRB" | count varint | (len varint | binary record)...
+//! envelope batch : b"LNEB" | count varint | envelope item...
+//!
+//! envelope item  : flags u8 (1 = source, 2 = timestamp, 4 = trace id)
+//!                | [timestamp u64 LE] | [len varint | source]
+//!                | [len varint | trace id] | len varint | binary record
+//! ```
+//!
+//! Decoding borrows from the input; nothing is copied until the records
+//! themselves are decoded.
+
+use crate::varint;
+
+pub const ENVELOPE_MAGIC: &[u8; 4] = b"LNEV";
+pub const RECORDS_MAGIC: &[u8; 4] = b"LNRB";
+pub const ENVELOPES_MAGIC: &[u8; 4] = b"LNEB";
+
+const HAS_SOURCE: u8 = 1;
+const HAS_TIMESTAMP: u8 = 2;
+const HAS_TRACE_ID: u8 = 4;
+
+#[derive(Debug, PartialEq, Eq)]
+pub struct EnvelopeParts<'a> {
+    pub source: Option<&'a str>,
+    pub timestamp: Option<u64>,
+    pub trace_id: Option<&'a str>,
+    pub record: &'a [u8],
+}
+
+fn write_bytes(out: &mut Vec<u8>, data: &[u8]) {
+    varint::write(out, data.len() as u64);
+    out.extend_from_slice(data);
+}
+
+fn read_bytes<'a>(data: &'a [u8], pos: &mut usize) -> Result<&'a [u8], String> {
+    let len = varint::read(data, pos)? as usize;
+    let end = pos
+        .checked_add(len)
+        .filter(|&end| end <= data.len())
+        .ok_or_else(|| "Truncated batch frame".to_string())?;
+    let bytes = &data[*pos..end];
+    *pos = end;
+    Ok(bytes)
+}
+
+fn read_str<'a>(data: &'a [u8], pos: &mut usize) -> Result<&'a str, String> {
+    std::str::from_utf8(read_bytes(data, pos)?).map_err(|e| e.to_string())
+}
+
+pub fn write_envelope(out: &mut Vec<u8>, parts: &EnvelopeParts) {
+    let mut flags = 0;
+    if parts.source.is_some() {
+        flags |= HAS_SOURCE;
+    }
+    if parts.timestamp.is_some() {
+        flags |= HAS_TIMESTAMP;
+    }
+    if parts.trace_id.is_some() {
+        flags |= HAS_TRACE_ID;
+    }
+    out.push(flags);
+    if let Some(timestamp) = parts.timestamp {
+        out.extend_from_slice(&timestamp.to_le_bytes());
+    }
+    if let Some(source) = parts.source {
+        write_bytes(out, source.as_bytes());
+    }
+    if let Some(trace_id) = parts.trace_id {
+        write_bytes(out, trace_id.as_bytes());
+    }
+    write_bytes(out, parts.record);
+}
+
+pub fn read_envelope<'a>(data: &'a [u8], pos: &mut usize) -> Result<EnvelopeParts<'a>, String> {
+    let flags = *data
+        .get(*pos)
+        .ok_or_else(|| "Truncated batch frame".to_string())?;
+    *pos += 1;
+    let timestamp = if flags & HAS_TIMESTAMP != 0 {
+        let bytes = data
+            .get(*pos..*pos + 8)
+            .ok_or_else(|| "Truncated batch frame".to_string())?;
+        *pos += 8;
+        Some(u64::from_le_bytes(bytes.try_into().unwrap()))
+    } else {
+        None
+    };
+    let source = if flags & HAS_SOURCE != 0 {
+        Some(read_str(data, pos)?)
+    } else {
+        None
+    };
+    let trace_id = if flags & HAS_TRACE_ID != 0 {
+        Some(read_str(data, pos)?)
+    } else {
+        None
+    };
+    Ok(EnvelopeParts {
+        source,
+        timestamp,
+        trace_id,
+        record: read_bytes(data, pos)?,
+    })
+}
+
+/// Start a frame: magic plus, for batches, the item count.
+pub fn header(magic: &[u8; 4], count: Option<usize>) -> Vec<u8> {
+    let mut out = Vec::with_capacity(64);
+    out.extend_from_slice(magic);
+    if let Some(count) = count {
+        varint::write(&mut out, count as u64);
+    }
+    out
+}
+
+fn check_magic(data: &[u8], magic: &[u8; 4]) -> Result<usize, String> {
+    if data.len() < 4 || &data[..4] != magic {
+        return Err(format!(
+            "Not an LNMP {} frame",
+            String::from_utf8_lossy(magic)
+        ));
+    }
+    Ok(4)
+}
+
+fn check_end(data: &[u8], pos: usize) -> Result<(), String> {
+    if pos != data.len() {
+        return Err(format!(
+            "{} trailing bytes after batch frame",
+            data.len() - pos
+        ));
+    }
+    Ok(())
+}
+
+pub fn push_record(out: &mut Vec<u8>, record: &[u8]) {
+    write_bytes(out, record);
+}
+
+pub fn read_records(data: &[u8]) -> Result<Vec<&[u8]>, String> {
+    let mut pos = check_magic(data, RECORDS_MAGIC)?;
+    let count = varint::read(data, &mut pos)? as usize;
+    // Every item takes at least one byte, which bounds a corrupt count
+    let mut records = Vec::with_capacity(count.min(data.len()));
+    for _ in 0..count {
+        records.push(read_bytes(data, &mut pos)?);
+    }
+    check_end(data, pos)?;
+    Ok(records)
+}
+
+pub fn read_single_envelope(data: &[u8]) -> Result<EnvelopeParts<'_>, String> {
+    let mut pos = check_magic(data, ENVELOPE_MAGIC)?;
+    let parts = read_envelope(data, &mut pos)?;
+    check_end(data, pos)?;
+    Ok(parts)
+}
+
+pub fn read_envelopes(data: &[u8]) -> Result<Vec<EnvelopeParts<'_>>, String> {
+    let mut pos = check_magic(data, ENVELOPES_MAGIC)?;
+    let count = varint::read(data, &mut pos)? as usize;
+    let mut envelopes = Vec::with_capacity(count.min(data.len()));
+    for _ in 0..count {
+        envelopes.push(read_envelope(data, &mut pos)?);
+    }
+    check_end(data, pos)?;
+    Ok(envelopes)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn roundtrips_record_batches() {
+        let mut out = header(RECORDS_MAGIC, Some(3));
+        for record in [&b"\x01\x02"[..], b"", b"\x03"] {
+            push_record(&mut out, record);
+        }
+        assert_eq!(
+            read_records(&out).unwrap(),
+            vec![&b"\x01\x02"[..], b"", b"\x03"]
+        );
+        assert!(read_records(&out[..out.len() - 1]).is_err());
+        assert!(read_records(&[&out[..], b"x"].concat()).is_err());
+        assert!(read_envelopes(&out).is_err());
+    }
+
+    #[test]
+    fn roundtrips_envelopes() {
+        let full = EnvelopeParts {
+            source: Some("svc"),
+            timestamp: Some(1_700_000_000_000),
+            trace_id: Some("trace-1"),
+            record: b"\x01",
+        };
+        let bare = EnvelopeParts {
+            source: None,
+            timestamp: None,
+            trace_id: None,
+            record: b"\x02\x03",
+        };
+
+        let mut single = header(ENVELOPE_MAGIC, None);
+        write_envelope(&mut single, &full);
+        assert_eq!(read_single_envelope(&single).unwrap(), full);
+
+        let mut batch = header(ENVELOPES_MAGIC, Some(2));
+        write_envelope(&mut batch, &full);
+        write_envelope(&mut batch, &bare);
+        assert_eq!(read_envelopes(&batch).unwrap(), vec![full, bare]);
+        assert!(read_envelopes(&batch[..batch.len() - 2]).is_err());
+    }
+
+    #[test]
+    fn rejects_corrupt_counts() {
+        let mut out = header(RECORDS_MAGIC, Some(usize::MAX >> 8));
+        push_record(&mut out, b"\x01");
+        assert!(read_records(&out).is_err());
+    }
+}
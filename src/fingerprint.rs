@@ -0,0 +1,128 @@
+//! Stable 128-bit fingerprints of canonical binary records.
+//!
+//! The fingerprint is two XXH64 digests of the same bytes with different
+//! seeds. XXH64 is specified independently of the Rust toolchain, so values
+//! can be stored and compared across processes, machines and releases.
+
+const PRIME64_1: u64 = 0x9E37_79B1_85EB_CA87;
+const PRIME64_2: u64 = 0xC2B2_AE3D_27D4_EB4F;
+const PRIME64_3: u64 = 0x1656_67B1_9E37_79F9;
+const PRIME64_4: u64 = 0x85EB_CA77_C2B2_AE63;
+const PRIME64_5: u64 = 0x27D4_EB2F_1656_67C5;
+
+const HIGH_SEED: u64 = 0x4C4E_4D50_4650_5231; // "LNMPFPR1"
+
+/// 128-bit fingerprint of `data`.
+pub fn fingerprint(data: &[u8]) -> u128 {
+    (u128::from(xxh64(data, HIGH_SEED)) << 64) | u128::from(xxh64(data, 0))
+}
+
+fn read_u64(data: &[u8], at: usize) -> u64 {
+    let mut bytes = [0u8; 8];
+    bytes.copy_from_slice(&data[at..at + 8]);
+    u64::from_le_bytes(bytes)
+}
+
+fn read_u32(data: &[u8], at: usize) -> u32 {
+    let mut bytes = [0u8; 4];
+    bytes.copy_from_slice(&data[at..at + 4]);
+    u32::from_le_bytes(bytes)
+}
+
+fn round(acc: u64, input: u64) -> u64 {
+    acc.wrapping_add(input.wrapping_mul(PRIME64_2))
+        .rotate_left(31)
+        .wrapping_mul(PRIME64_1)
+}
+
+fn merge_round(acc: u64, val: u64) -> u64 {
+    (acc ^ round(0, val))
+        .wrapping_mul(PRIME64_1)
+        .wrapping_add(PRIME64_4)
+}
+
+/// XXH64 as specified at <https://github.com/Cyan4973/xxHash>.
+pub fn xxh64(data: &[u8], seed: u64) -> u64 {
+    let len = data.len();
+    let mut pos = 0;
+    let mut hash;
+
+    if len >= 32 {
+        let mut v1 = seed.wrapping_add(PRIME64_1).wrapping_add(PRIME64_2);
+        let mut v2 = seed.wrapping_add(PRIME64_2);
+        let mut v3 = seed;
+        let mut v4 = seed.wrapping_sub(PRIME64_1);
+        while pos + 32 <= len {
+            v1 = round(v1, read_u64(data, pos));
+            v2 = round(v2, read_u64(data, pos + 8));
+            v3 = round(v3, read_u64(data, pos + 16));
+            v4 = round(v4, read_u64(data, pos + 24));
+            pos += 32;
+        }
+        hash = v1
+            .rotate_left(1)
+            .wrapping_add(v2.rotate_left(7))
+            .wrapping_add(v3.rotate_left(12))
+            .wrapping_add(v4.rotate_left(18));
+        hash = merge_round(hash, v1);
+        hash = merge_round(hash, v2);
+        hash = merge_round(hash, v3);
+        hash = merge_round(hash, v4);
+    } else {
+        hash = seed.wrapping_add(PRIME64_5);
+    }
+
+    hash = hash.wrapping_add(len as u64);
+
+    while pos + 8 <= len {
+        hash ^= round(0, read_u64(data, pos));
+        hash = hash
+            .rotate_left(27)
+            .wrapping_mul(PRIME64_1)
+            .wrapping_add(PRIME64_4);
+        pos += 8;
+    }
+    if pos + 4 <= len {
+        hash ^= u64::from(read_u32(data, pos)).wrapping_mul(PRIME64_1);
+        hash = hash
+            .rotate_left(23)
+            .wrapping_mul(PRIME64_2)
+            .wrapping_add(PRIME64_3);
+        pos += 4;
+    }
+    for &byte in &data[pos..] {
+        hash ^= u64::from(byte).wrapping_mul(PRIME64_5);
+        hash = hash.rotate_left(11).wrapping_mul(PRIME64_1);
+    }
+
+    hash ^= hash >> 33;
+    hash = hash.wrapping_mul(PRIME64_2);
+    hash ^= hash >> 29;
+    hash = hash.wrapping_mul(PRIME64_3);
+    hash ^= hash >> 32;
+    hash
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn matches_reference_vectors() {
+        assert_eq!(xxh64(b"", 0), 0xEF46_DB37_51D8_E999);
+        assert_eq!(xxh64(b"a", 0), 0xD24E_C4F1_A98C_6E5B);
+        assert_eq!(xxh64(b"abc", 0), 0x44BC_2CF5_AD77_0999);
+        assert_eq!(
+            xxh64(b"Nobody inspects the spammish repetition", 0),
+            0xFBCE_A83C_8A37_8BF1
+        );
+    }
+
+    #[test]
+    fn fingerprint_halves_use_different_seeds() {
+        let fp = fingerprint(b"F12=14532");
+        assert_eq!(fp as u64, xxh64(b"F12=14532", 0));
+        assert_ne!((fp >> 64) as u64, fp as u64);
+        assert_ne!(fingerprint(b"F12=14532"), fingerprint(b"F12=14533"));
+    }
+}
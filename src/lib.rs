@@ -1,5 +1,7 @@
+use pyo3::basic::CompareOp;
+use pyo3::buffer::PyBuffer;
 use pyo3::prelude::*;
-use std::collections::HashMap;
+use std::collections::{HashMap, VecDeque};
 use std::time::{SystemTime, UNIX_EPOCH};
 
 use lnmp::codec::{Encoder, Parser};
@@ -7,11 +9,25 @@ use lnmp::core::LnmpRecord;
 use lnmp::embedding::{Vector, VectorDelta};
 use lnmp::envelope::{EnvelopeBuilder, LnmpEnvelope};
 use lnmp::llb::{ExplainEncoder, SemanticDictionary};
-use lnmp::net::{MessageKind, NetMessage, RoutingPolicy};
+use lnmp::net::{MessageKind, NetMessage, RoutingDecision, RoutingPolicy};
 use lnmp::quant::{quantize_embedding, QuantScheme};
-use lnmp::sanitize::sanitize_lnmp_text;
+use lnmp::sanitize::{sanitize_lnmp_text, SanitizationConfig, SanitizationLevel};
 use lnmp::sfe::ContextScorer;
 
+mod batch;
+mod fingerprint;
+mod lru;
+mod metrics;
+mod pack;
+mod patch;
+mod schema;
+mod stream;
+mod update;
+mod validate;
+mod varint;
+
+use metrics::Op;
+
 // Core types
 #[pyclass]
 struct PyLnmpRecord {
@@ -23,6 +39,177 @@ struct PyLnmpEnvelope {
     inner: LnmpEnvelope,
 }
 
+#[pyclass]
+struct PySanitizationConfig {
+    inner: SanitizationConfig,
+}
+
+#[pymethods]
+impl PySanitizationConfig {
+    #[new]
+    #[pyo3(signature = (level=None, auto_quote_strings=None, auto_escape_quotes=None, normalize_booleans=None, normalize_numbers=None))]
+    fn new(
+        level: Option<&str>,
+        auto_quote_strings: Option<bool>,
+        auto_escape_quotes: Option<bool>,
+        normalize_booleans: Option<bool>,
+        normalize_numbers: Option<bool>,
+    ) -> PyResult<Self> {
+        // Unset options keep the crate defaults
+        let mut inner = SanitizationConfig::default();
+        if let Some(level) = level {
+            inner.level = match level {
+                "minimal" => SanitizationLevel::Minimal,
+                "normal" => SanitizationLevel::Normal,
+                "aggressive" => SanitizationLevel::Aggressive,
+                _ => {
+                    return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
+                        "Invalid sanitization level",
+                    ))
+                }
+            };
+        }
+        if let Some(v) = auto_quote_strings {
+            inner.auto_quote_strings = v;
+        }
+        if let Some(v) = auto_escape_quotes {
+            inner.auto_escape_quotes = v;
+        }
+        if let Some(v) = normalize_booleans {
+            inner.normalize_booleans = v;
+        }
+        if let Some(v) = normalize_numbers {
+            inner.normalize_numbers = v;
+        }
+        Ok(PySanitizationConfig { inner })
+    }
+}
+
+/// Context scoring result with plain f64 attributes.
+#[pyclass(name = "ContextScore", frozen)]
+#[derive(Clone, PartialEq)]
+struct PyContextScore {
+    #[pyo3(get)]
+    composite: f64,
+    #[pyo3(get)]
+    freshness: f64,
+    #[pyo3(get)]
+    importance: f64,
+    #[pyo3(get)]
+    risk: f64,
+    #[pyo3(get)]
+    confidence: f64,
+}
+
+#[pymethods]
+impl PyContextScore {
+    #[new]
+    #[pyo3(signature = (composite=0.0, freshness=0.0, importance=0.0, risk=0.0, confidence=0.0))]
+    fn new(composite: f64, freshness: f64, importance: f64, risk: f64, confidence: f64) -> Self {
+        PyContextScore {
+            composite,
+            freshness,
+            importance,
+            risk,
+            confidence,
+        }
+    }
+
+    fn to_dict(&self) -> HashMap<&'static str, f64> {
+        HashMap::from([
+            ("composite", self.composite),
+            ("freshness", self.freshness),
+            ("importance", self.importance),
+            ("risk", self.risk),
+            ("confidence", self.confidence),
+        ])
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "ContextScore(composite={:.3}, freshness={:.3}, importance={:.3}, risk={:.3}, confidence={:.3})",
+            self.composite, self.freshness, self.importance, self.risk, self.confidence
+        )
+    }
+
+    fn __richcmp__(&self, other: &Self, op: CompareOp, py: Python) -> PyObject {
+        match op {
+            CompareOp::Eq => (self == other).into_py(py),
+            CompareOp::Ne => (self != other).into_py(py),
+            _ => py.NotImplemented(),
+        }
+    }
+
+    fn __hash__(&self) -> u64 {
+        use std::hash::{Hash, Hasher};
+
+        let mut hasher = std::collections::hash_map::DefaultHasher::new();
+        for value in [
+            self.composite,
+            self.freshness,
+            self.importance,
+            self.risk,
+            self.confidence,
+        ] {
+            // +0.0 and -0.0 compare equal, so they must hash equal too
+            (value + 0.0).to_bits().hash(&mut hasher);
+        }
+        hasher.finish()
+    }
+}
+
+/// Routing decision; the discriminants index `metrics::DECISION_NAMES`.
+#[pyclass(name = "RoutingDecision")]
+#[derive(Clone, Copy, PartialEq, Eq)]
+enum PyRoutingDecision {
+    SendToLLM = 0,
+    ProcessLocally = 1,
+    Drop = 2,
+}
+
+impl From<RoutingDecision> for PyRoutingDecision {
+    fn from(decision: RoutingDecision) -> Self {
+        match decision {
+            RoutingDecision::SendToLLM => PyRoutingDecision::SendToLLM,
+            RoutingDecision::ProcessLocally => PyRoutingDecision::ProcessLocally,
+            RoutingDecision::Drop => PyRoutingDecision::Drop,
+        }
+    }
+}
+
+#[pymethods]
+impl PyRoutingDecision {
+    #[getter]
+    fn name(&self) -> &'static str {
+        metrics::DECISION_NAMES[*self as usize]
+    }
+
+    fn __str__(&self) -> &'static str {
+        self.name()
+    }
+
+    /// Members also equal their name, as routing_decide() used to return it.
+    fn __richcmp__(&self, other: &Bound<'_, PyAny>, op: CompareOp, py: Python) -> PyObject {
+        let equal = if let Ok(other) = other.extract::<PyRoutingDecision>() {
+            *self == other
+        } else if let Ok(name) = other.extract::<&str>() {
+            self.name() == name
+        } else {
+            return py.NotImplemented();
+        };
+        match op {
+            CompareOp::Eq => equal.into_py(py),
+            CompareOp::Ne => (!equal).into_py(py),
+            _ => py.NotImplemented(),
+        }
+    }
+
+    /// The hash of the name, consistent with equality to it.
+    fn __hash__(&self, py: Python) -> PyResult<isize> {
+        pyo3::types::PyString::new_bound(py, self.name()).hash()
+    }
+}
+
 #[pymethods]
 impl PyLnmpEnvelope {
     #[getter]
@@ -39,23 +226,169 @@ impl PyLnmpEnvelope {
     fn timestamp(&self) -> Option<u64> {
         self.inner.metadata.timestamp
     }
+
+    #[getter]
+    fn record(&self) -> PyLnmpRecord {
+        PyLnmpRecord {
+            inner: self.inner.record.clone(),
+        }
+    }
 }
 
 // Core functions
+fn parse_text(text: &str) -> Result<LnmpRecord, String> {
+    let mut parser = Parser::new(text).map_err(|e| e.to_string())?;
+    parser.parse_record().map_err(|e| e.to_string())
+}
+
+fn parse_text_lenient(text: &str, config: &SanitizationConfig) -> Result<LnmpRecord, String> {
+    // The sanitized text never leaves Rust; it is borrowed when no repair was needed
+    let sanitized = sanitize_lnmp_text(text, config);
+    parse_text(&sanitized)
+}
+
 #[pyfunction]
 fn parse(text: &str) -> PyResult<PyLnmpRecord> {
-    let mut parser = Parser::new(text)
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
-    let record = parser
-        .parse_record()
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
+    let timer = metrics::start(Op::Parse);
+    let record = timer
+        .finish_result(parse_text(text))
+        .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
     Ok(PyLnmpRecord { inner: record })
 }
 
+#[pyfunction]
+#[pyo3(signature = (text, config=None))]
+fn parse_lenient(text: &str, config: Option<&PySanitizationConfig>) -> PyResult<PyLnmpRecord> {
+    let timer = metrics::start(Op::ParseLenient);
+    let default_config;
+    let config = match config {
+        Some(c) => &c.inner,
+        None => {
+            default_config = SanitizationConfig::default();
+            &default_config
+        }
+    };
+    let record = timer
+        .finish_result(parse_text_lenient(text, config))
+        .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
+    Ok(PyLnmpRecord { inner: record })
+}
+
+#[pyfunction]
+#[pyo3(signature = (texts, config=None))]
+fn parse_lenient_many(
+    py: Python,
+    texts: Vec<String>,
+    config: Option<&PySanitizationConfig>,
+) -> PyResult<Vec<PyLnmpRecord>> {
+    let default_config;
+    let config = match config {
+        Some(c) => &c.inner,
+        None => {
+            default_config = SanitizationConfig::default();
+            &default_config
+        }
+    };
+
+    let records = py.allow_threads(|| {
+        texts
+            .iter()
+            .enumerate()
+            .map(|(i, text)| {
+                parse_text_lenient(text, config).map_err(|e| format!("record {}: {}", i, e))
+            })
+            .collect::<Result<Vec<_>, String>>()
+    });
+
+    records
+        .map(|records| {
+            records
+                .into_iter()
+                .map(|inner| PyLnmpRecord { inner })
+                .collect()
+        })
+        .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)
+}
+
+#[pyfunction]
+#[pyo3(signature = (items, strict=false))]
+fn validate_many(
+    py: Python,
+    items: Vec<Bound<'_, PyAny>>,
+    strict: bool,
+) -> PyResult<(Py<pyo3::types::PyBytes>, Py<pyo3::types::PyBytes>)> {
+    use pyo3::types::{PyBytes, PyString};
+
+    let timer = metrics::start(Op::ValidateMany);
+
+    // Every input is read in place: str and bytes directly, other objects
+    // (bytearray, memoryview, ...) through the buffer protocol
+    let buffers = items
+        .iter()
+        .map(|item| {
+            if item.is_instance_of::<PyString>() || item.is_instance_of::<PyBytes>() {
+                Ok(None)
+            } else {
+                item.extract::<PyBuffer<u8>>().map(Some)
+            }
+        })
+        .collect::<PyResult<Vec<_>>>()?;
+
+    // (data, needs UTF-8 check); None marks a str that is not valid UTF-8
+    let mut inputs: Vec<(Option<&[u8]>, bool)> = Vec::with_capacity(items.len());
+    for (item, buffer) in items.iter().zip(buffers.iter()) {
+        if let Some(buffer) = buffer {
+            inputs.push((Some(buffer_slice(buffer)?), true));
+        } else if let Ok(text) = item.downcast::<PyString>() {
+            inputs.push((text.to_str().ok().map(str::as_bytes), false));
+        } else {
+            inputs.push((Some(item.downcast::<PyBytes>()?.as_bytes()), true));
+        }
+    }
+
+    let results: Vec<(u8, i64)> = py.allow_threads(|| {
+        inputs
+            .iter()
+            .map(|(data, check_utf8)| {
+                let data = match data {
+                    Some(data) => *data,
+                    None => return (validate::INVALID_UTF8, 0),
+                };
+                let (status, offset) = if *check_utf8 {
+                    validate::validate_bytes(data)
+                } else {
+                    validate::validate(data)
+                };
+                if strict && status == validate::OK {
+                    let text = std::str::from_utf8(data).unwrap_or_default();
+                    if parse_text(text).is_err() {
+                        return (validate::PARSE_ERROR, -1);
+                    }
+                }
+                (status, offset as i64)
+            })
+            .collect()
+    });
+
+    let statuses: Vec<u8> = results.iter().map(|(status, _)| *status).collect();
+    let offsets: Vec<u8> = results
+        .iter()
+        .flat_map(|(_, offset)| offset.to_ne_bytes())
+        .collect();
+    timer.finish(true);
+
+    Ok((
+        PyBytes::new_bound(py, &statuses).into(),
+        PyBytes::new_bound(py, &offsets).into(),
+    ))
+}
+
 #[pyfunction]
 fn encode(record: &PyLnmpRecord) -> PyResult<String> {
+    let timer = metrics::start(Op::Encode);
     let encoder = Encoder::new();
     let text = encoder.encode(&record.inner);
+    timer.finish(true);
     Ok(text)
 }
 
@@ -63,26 +396,458 @@ fn encode(record: &PyLnmpRecord) -> PyResult<String> {
 fn encode_binary(py: Python, record: &PyLnmpRecord) -> PyResult<Py<pyo3::types::PyBytes>> {
     use lnmp::codec::binary::BinaryEncoder;
 
+    let timer = metrics::start(Op::EncodeBinary);
     let encoder = BinaryEncoder::new();
-    let binary = encoder
-        .encode(&record.inner)
+    let binary = timer
+        .finish_result(encoder.encode(&record.inner))
         .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
 
     Ok(pyo3::types::PyBytes::new_bound(py, &binary).into())
 }
 
+fn fingerprint_record(record: &LnmpRecord) -> PyResult<u128> {
+    use lnmp::codec::binary::BinaryEncoder;
+
+    // BinaryEncoder writes fields in FID order, so the bytes are canonical
+    let binary = BinaryEncoder::new()
+        .encode(record)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
+    Ok(fingerprint::fingerprint(&binary))
+}
+
+#[pyfunction]
+fn record_fingerprint(record: &PyLnmpRecord) -> PyResult<u128> {
+    fingerprint_record(&record.inner)
+}
+
+#[pyfunction]
+fn fingerprint_many(py: Python, records: Vec<PyRef<'_, PyLnmpRecord>>) -> PyResult<Vec<u128>> {
+    let inner: Vec<&LnmpRecord> = records.iter().map(|record| &record.inner).collect();
+    py.allow_threads(|| inner.into_iter().map(fingerprint_record).collect())
+}
+
+#[pyfunction]
+fn fingerprint_binary_many(py: Python, frames: Vec<&[u8]>) -> Vec<u128> {
+    py.allow_threads(|| frames.into_iter().map(fingerprint::fingerprint).collect())
+}
+
+/// Canonical text of each top-level field as `(fid, type hint, value)`.
+#[pyfunction]
+#[allow(clippy::type_complexity)]
+fn record_fields_many(
+    py: Python,
+    records: Vec<PyRef<'_, PyLnmpRecord>>,
+) -> PyResult<Vec<Vec<(u16, String, String)>>> {
+    let inner: Vec<&LnmpRecord> = records.iter().map(|record| &record.inner).collect();
+    py.allow_threads(|| {
+        let encoder = Encoder::new();
+        inner
+            .into_iter()
+            .map(|record| {
+                let text = encoder.encode(record);
+                let spans = validate::split_fields(text.as_bytes()).map_err(|(_, offset)| {
+                    PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                        "Cannot split encoded record at byte {}",
+                        offset
+                    ))
+                })?;
+                Ok(spans
+                    .into_iter()
+                    .map(|span| {
+                        (
+                            span.fid,
+                            text[span.hint].to_string(),
+                            text[span.value].to_string(),
+                        )
+                    })
+                    .collect())
+            })
+            .collect()
+    })
+}
+
+fn to_value_error(message: String) -> PyErr {
+    PyErr::new::<pyo3::exceptions::PyValueError, _>(message)
+}
+
+/// Field-level patch turning `old` into `new` (see src/patch.rs).
+///
+/// `base` is the fingerprint of `old` when the caller already has it.
+#[pyfunction]
+#[pyo3(signature = (old, new, base=None))]
+fn record_diff(
+    py: Python,
+    old: &PyLnmpRecord,
+    new: &PyLnmpRecord,
+    base: Option<u128>,
+) -> PyResult<Py<pyo3::types::PyBytes>> {
+    let (removed, upserts) = patch::diff(old.inner.fields(), new.inner.fields(), |field| field.fid);
+    let upserts = if upserts.is_empty() {
+        Vec::new()
+    } else {
+        let mut partial = LnmpRecord::new();
+        for field in upserts {
+            partial.add_field(field.clone());
+        }
+        binary_of(&partial)?
+    };
+    // The low half of the fingerprint pins the patch to its base record
+    let base = match base {
+        Some(base) => base,
+        None => fingerprint_record(&old.inner)?,
+    } as u64;
+    Ok(pyo3::types::PyBytes::new_bound(py, &patch::encode_patch(base, &removed, &upserts)).into())
+}
+
+#[pyfunction]
+fn record_patch(record: &PyLnmpRecord, delta: &[u8]) -> PyResult<PyLnmpRecord> {
+    let delta = patch::decode_patch(delta).map_err(to_value_error)?;
+    if fingerprint_record(&record.inner)? as u64 != delta.base {
+        return Err(to_value_error(
+            "Patch was made against a different base record".to_string(),
+        ));
+    }
+    let upserts = if delta.upserts.is_empty() {
+        LnmpRecord::new()
+    } else {
+        record_of(delta.upserts)?
+    };
+    let mut inner = LnmpRecord::new();
+    for field in patch::apply(
+        record.inner.fields(),
+        &delta.removed,
+        upserts.fields(),
+        |field| field.fid,
+    ) {
+        inner.add_field(field);
+    }
+    Ok(PyLnmpRecord { inner })
+}
+
+/// Borrow the bytes of a C-contiguous buffer without copying.
+fn buffer_slice(buffer: &PyBuffer<u8>) -> PyResult<&[u8]> {
+    if !buffer.is_c_contiguous() {
+        return Err(to_value_error("Buffer must be C-contiguous".to_string()));
+    }
+    // SAFETY: the buffer stays acquired, and its memory valid, for as long as
+    // `buffer` is borrowed; u8 has no invalid bit patterns
+    Ok(unsafe { std::slice::from_raw_parts(buffer.buf_ptr() as *const u8, buffer.len_bytes()) })
+}
+
+fn binary_of(record: &LnmpRecord) -> PyResult<Vec<u8>> {
+    use lnmp::codec::binary::BinaryEncoder;
+
+    BinaryEncoder::new()
+        .encode(record)
+        .map_err(|e| to_value_error(e.to_string()))
+}
+
+fn record_of(data: &[u8]) -> PyResult<LnmpRecord> {
+    use lnmp::codec::binary::BinaryDecoder;
+
+    BinaryDecoder::new()
+        .decode(data)
+        .map_err(|e| to_value_error(e.to_string()))
+}
+
+/// Encode records into one length-prefixed buffer (see src/batch.rs).
+#[pyfunction]
+fn records_dumps(
+    py: Python,
+    records: Vec<PyRef<'_, PyLnmpRecord>>,
+) -> PyResult<Py<pyo3::types::PyBytes>> {
+    let inner: Vec<&LnmpRecord> = records.iter().map(|record| &record.inner).collect();
+    let out = py.allow_threads(|| -> PyResult<Vec<u8>> {
+        let mut out = batch::header(batch::RECORDS_MAGIC, Some(inner.len()));
+        for record in inner {
+            batch::push_record(&mut out, &binary_of(record)?);
+        }
+        Ok(out)
+    })?;
+    Ok(pyo3::types::PyBytes::new_bound(py, &out).into())
+}
+
+#[pyfunction]
+fn records_loads(py: Python, data: &[u8]) -> PyResult<Vec<PyLnmpRecord>> {
+    py.allow_threads(|| {
+        batch::read_records(data)
+            .map_err(to_value_error)?
+            .into_iter()
+            .map(|frame| {
+                Ok(PyLnmpRecord {
+                    inner: record_of(frame)?,
+                })
+            })
+            .collect()
+    })
+}
+
+fn envelope_parts<'a>(envelope: &'a LnmpEnvelope, record: &'a [u8]) -> batch::EnvelopeParts<'a> {
+    batch::EnvelopeParts {
+        source: envelope.metadata.source.as_deref(),
+        timestamp: envelope.metadata.timestamp,
+        trace_id: envelope.metadata.trace_id.as_deref(),
+        record,
+    }
+}
+
+fn envelope_from_parts(parts: batch::EnvelopeParts) -> PyResult<PyLnmpEnvelope> {
+    let mut builder = EnvelopeBuilder::new(record_of(parts.record)?);
+    if let Some(source) = parts.source {
+        builder = builder.source(source.to_string());
+    }
+    if let Some(timestamp) = parts.timestamp {
+        builder = builder.timestamp(timestamp);
+    }
+    if let Some(trace_id) = parts.trace_id {
+        builder = builder.trace_id(trace_id.to_string());
+    }
+    Ok(PyLnmpEnvelope {
+        inner: builder.build(),
+    })
+}
+
+/// Binary form of an envelope: its metadata plus the binary record.
+#[pyfunction]
+fn envelope_encode_binary(
+    py: Python,
+    envelope: &PyLnmpEnvelope,
+) -> PyResult<Py<pyo3::types::PyBytes>> {
+    let record = binary_of(&envelope.inner.record)?;
+    let mut out = batch::header(batch::ENVELOPE_MAGIC, None);
+    batch::write_envelope(&mut out, &envelope_parts(&envelope.inner, &record));
+    Ok(pyo3::types::PyBytes::new_bound(py, &out).into())
+}
+
+#[pyfunction]
+fn envelope_decode_binary(data: PyBuffer<u8>) -> PyResult<PyLnmpEnvelope> {
+    // Any contiguous buffer is read in place, e.g. a slot of lnmp.ipc.SharedRing
+    envelope_from_parts(batch::read_single_envelope(buffer_slice(&data)?).map_err(to_value_error)?)
+}
+
+#[pyfunction]
+fn envelopes_dumps(
+    py: Python,
+    envelopes: Vec<PyRef<'_, PyLnmpEnvelope>>,
+) -> PyResult<Py<pyo3::types::PyBytes>> {
+    let inner: Vec<&LnmpEnvelope> = envelopes.iter().map(|envelope| &envelope.inner).collect();
+    let out = py.allow_threads(|| -> PyResult<Vec<u8>> {
+        let mut out = batch::header(batch::ENVELOPES_MAGIC, Some(inner.len()));
+        for envelope in inner {
+            let record = binary_of(&envelope.record)?;
+            batch::write_envelope(&mut out, &envelope_parts(envelope, &record));
+        }
+        Ok(out)
+    })?;
+    Ok(pyo3::types::PyBytes::new_bound(py, &out).into())
+}
+
+#[pyfunction]
+fn envelopes_loads(py: Python, data: &[u8]) -> PyResult<Vec<PyLnmpEnvelope>> {
+    py.allow_threads(|| {
+        batch::read_envelopes(data)
+            .map_err(to_value_error)?
+            .into_iter()
+            .map(envelope_from_parts)
+            .collect()
+    })
+}
+
 #[pyfunction]
 fn decode_binary(data: &[u8]) -> PyResult<PyLnmpRecord> {
     use lnmp::codec::binary::BinaryDecoder;
 
+    let timer = metrics::start(Op::DecodeBinary);
     let decoder = BinaryDecoder::new();
-    let record = decoder
-        .decode(data)
+    let record = timer
+        .finish_result(decoder.decode(data))
         .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
 
     Ok(PyLnmpRecord { inner: record })
 }
 
+/// Parsed records waiting to be taken from a `PyStreamParser`.
+struct RecordQueue {
+    ready: VecDeque<Result<LnmpRecord, String>>,
+    skip_invalid: bool,
+    records: usize,
+    invalid: usize,
+    max_size: Option<usize>,
+    /// Index of the first complete record dropped for exceeding `max_size`
+    /// since the last call to `take_oversized`.
+    oversized: Option<usize>,
+}
+
+impl RecordQueue {
+    fn push(&mut self, data: &[u8]) {
+        let index = self.records;
+        self.records += 1;
+        if matches!(self.max_size, Some(limit) if data.len() > limit) {
+            self.invalid += 1;
+            self.oversized.get_or_insert(index);
+            return;
+        }
+        let parsed = std::str::from_utf8(data)
+            .map_err(|e| e.to_string())
+            .and_then(parse_text)
+            .map_err(|e| format!("record {}: {}", index, e));
+        if parsed.is_err() {
+            self.invalid += 1;
+            if self.skip_invalid {
+                return;
+            }
+        }
+        self.ready.push_back(parsed);
+    }
+
+    fn take_oversized(&mut self) -> PyResult<()> {
+        match (self.oversized.take(), self.max_size) {
+            (Some(index), Some(limit)) => Err(oversized_error(index, limit)),
+            _ => Ok(()),
+        }
+    }
+}
+
+fn oversized_error(index: usize, limit: usize) -> PyErr {
+    to_value_error(format!(
+        "record {}: exceeds max_record_size of {} bytes",
+        index, limit
+    ))
+}
+
+fn delimiter_of(name: &str) -> PyResult<stream::Delimiter> {
+    match name {
+        "line" => Ok(stream::Delimiter::Line),
+        "blank_line" => Ok(stream::Delimiter::BlankLine),
+        _ => Err(to_value_error(format!("Unknown delimiter: {}", name))),
+    }
+}
+
+/// (start, end) byte ranges of the records in a complete text input.
+#[pyfunction]
+#[pyo3(signature = (data, delimiter="line"))]
+fn frame_spans(py: Python, data: PyBuffer<u8>, delimiter: &str) -> PyResult<Vec<(usize, usize)>> {
+    let delimiter = delimiter_of(delimiter)?;
+    let data = buffer_slice(&data)?;
+    Ok(py.allow_threads(|| stream::spans(data, delimiter)))
+}
+
+/// Offset just past the first record boundary at least `min_size` bytes
+/// after `start`, which must itself be a record boundary.
+#[pyfunction]
+#[pyo3(signature = (data, delimiter="line", start=0, min_size=0))]
+fn frame_boundary(
+    py: Python,
+    data: PyBuffer<u8>,
+    delimiter: &str,
+    start: usize,
+    min_size: usize,
+) -> PyResult<usize> {
+    let delimiter = delimiter_of(delimiter)?;
+    let data = buffer_slice(&data)?;
+    if start > data.len() {
+        return Err(to_value_error(format!(
+            "start {} is past the end of the data",
+            start
+        )));
+    }
+    Ok(start + py.allow_threads(|| stream::boundary(&data[start..], delimiter, min_size)))
+}
+
+/// Push parser for chunked LNMP text; see src/stream.rs for framing.
+#[pyclass(name = "StreamParser")]
+struct PyStreamParser {
+    framer: stream::Framer,
+    queue: RecordQueue,
+}
+
+#[pymethods]
+impl PyStreamParser {
+    #[new]
+    #[pyo3(signature = (delimiter="line", skip_invalid=false, max_record_size=None))]
+    fn new(delimiter: &str, skip_invalid: bool, max_record_size: Option<usize>) -> PyResult<Self> {
+        Ok(PyStreamParser {
+            framer: stream::Framer::new(delimiter_of(delimiter)?),
+            queue: RecordQueue {
+                ready: VecDeque::new(),
+                skip_invalid,
+                records: 0,
+                invalid: 0,
+                max_size: max_record_size,
+                oversized: None,
+            },
+        })
+    }
+
+    /// Frame and parse a chunk; returns the number of records ready.
+    fn feed(&mut self, py: Python, chunk: PyBuffer<u8>) -> PyResult<usize> {
+        let chunk = buffer_slice(&chunk)?;
+        let framer = &mut self.framer;
+        let queue = &mut self.queue;
+        // Complete records over the limit are dropped as they are framed;
+        // the records around them stay queued
+        py.allow_threads(|| framer.feed(chunk, |data| queue.push(data)));
+        if let Some(limit) = self.queue.max_size {
+            if self.framer.pending() > limit {
+                // Drop the oversized record, including any part of it still
+                // to come, and resume framing after its end
+                self.framer.discard();
+                self.queue.invalid += 1;
+                self.queue.oversized.get_or_insert(self.queue.records);
+                self.queue.records += 1;
+            }
+        }
+        self.queue.take_oversized()?;
+        Ok(self.queue.ready.len())
+    }
+
+    /// End of input: parse the unterminated final record, if any.
+    fn close(&mut self) -> PyResult<usize> {
+        match self.framer.finish() {
+            Ok(Some(data)) => self.queue.push(&data),
+            Ok(None) => {}
+            Err(message) => {
+                let index = self.queue.records;
+                self.queue.records += 1;
+                self.queue.invalid += 1;
+                if !self.queue.skip_invalid {
+                    return Err(to_value_error(format!("record {}: {}", index, message)));
+                }
+            }
+        }
+        self.queue.take_oversized()?;
+        Ok(self.queue.ready.len())
+    }
+
+    fn next_record(&mut self) -> PyResult<Option<PyLnmpRecord>> {
+        match self.queue.ready.pop_front() {
+            Some(Ok(inner)) => Ok(Some(PyLnmpRecord { inner })),
+            Some(Err(message)) => Err(to_value_error(message)),
+            None => Ok(None),
+        }
+    }
+
+    #[getter]
+    fn pending(&self) -> usize {
+        self.framer.pending()
+    }
+
+    #[getter]
+    fn ready(&self) -> usize {
+        self.queue.ready.len()
+    }
+
+    #[getter]
+    fn records(&self) -> usize {
+        self.queue.records
+    }
+
+    #[getter]
+    fn invalid(&self) -> usize {
+        self.queue.invalid
+    }
+}
+
 // Envelope functions
 #[pyfunction]
 #[pyo3(signature = (record, source, timestamp_ms=None, trace_id=None))]
@@ -92,6 +857,7 @@ fn envelope_wrap(
     timestamp_ms: Option<u64>,
     trace_id: Option<String>,
 ) -> PyResult<PyLnmpEnvelope> {
+    let timer = metrics::start(Op::EnvelopeWrap);
     let mut builder = EnvelopeBuilder::new(record.inner.clone()).source(source);
 
     if let Some(ts) = timestamp_ms {
@@ -110,44 +876,262 @@ fn envelope_wrap(
     }
 
     let envelope = builder.build();
+    timer.finish(true);
     Ok(PyLnmpEnvelope { inner: envelope })
 }
 
 // Network functions
-#[pyfunction]
-fn routing_decide(envelope: &PyLnmpEnvelope) -> PyResult<String> {
-    let policy = RoutingPolicy::default();
-    let msg = NetMessage::new(envelope.inner.clone(), MessageKind::Event);
-    let now = SystemTime::now()
+fn now_ms() -> u64 {
+    SystemTime::now()
         .duration_since(UNIX_EPOCH)
         .expect("SystemTime before UNIX_EPOCH!")
-        .as_millis() as u64;
+        .as_millis() as u64
+}
 
-    let decision = policy
-        .decide(&msg, now)
+fn decide_at(envelope: &LnmpEnvelope, now: u64) -> PyResult<PyRoutingDecision> {
+    let timer = metrics::start(Op::RoutingDecide);
+    let policy = RoutingPolicy::default();
+    let msg = NetMessage::new(envelope.clone(), MessageKind::Event);
+
+    let decision = timer
+        .finish_result(policy.decide(&msg, now))
         .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
 
-    Ok(format!("{:?}", decision))
+    Ok(PyRoutingDecision::from(decision))
 }
 
-#[pyfunction]
-fn context_score(envelope: &PyLnmpEnvelope) -> PyResult<HashMap<String, f64>> {
+fn score_at(envelope: &LnmpEnvelope, now: u64) -> PyContextScore {
+    let timer = metrics::start(Op::ContextScore);
     let scorer = ContextScorer::default();
-    let now = SystemTime::now()
-        .duration_since(UNIX_EPOCH)
-        .expect("SystemTime before UNIX_EPOCH!")
-        .as_millis() as u64;
 
-    let profile = scorer.score_envelope(&envelope.inner, now);
+    let profile = scorer.score_envelope(envelope, now);
+
+    let score = PyContextScore {
+        composite: profile.composite_score(),
+        freshness: profile.freshness_score,
+        importance: profile.importance as f64 / 255.0,
+        risk: profile.risk_level.as_u8() as f64,
+        confidence: profile.confidence,
+    };
+
+    timer.finish(true);
+    score
+}
+
+#[pyfunction]
+fn routing_decide(envelope: &PyLnmpEnvelope) -> PyResult<PyRoutingDecision> {
+    let decision = decide_at(&envelope.inner, now_ms())?;
+    metrics::count_decision(decision as usize);
+    Ok(decision)
+}
 
-    let mut scores = HashMap::new();
-    scores.insert("composite".to_string(), profile.composite_score());
-    scores.insert("freshness".to_string(), profile.freshness_score);
-    scores.insert("importance".to_string(), profile.importance as f64 / 255.0);
-    scores.insert("confidence".to_string(), profile.confidence);
-    scores.insert("risk".to_string(), profile.risk_level.as_u8() as f64);
+#[pyfunction]
+fn context_score(envelope: &PyLnmpEnvelope) -> PyResult<PyContextScore> {
+    Ok(score_at(&envelope.inner, now_ms()))
+}
 
-    Ok(scores)
+/// Source, record key and age bucket of a cached routing result.
+type RouteKey = (Option<String>, u64, u64);
+
+/// LRU cache of context scores and routing decisions.
+///
+/// Scoring depends on the envelope source, the record and the age of the
+/// envelope timestamp; freshness is the only time-dependent term. Entries are
+/// keyed by source, a hash of the record (its canonical binary form, or only
+/// its field IDs and value types with `key="shape"`) and the age in
+/// `bucket_ms` buckets, so a cached result is reused only while the age it
+/// was scored at falls in the same bucket, and a new bucket re-scores.
+#[pyclass(name = "RoutingCache")]
+struct PyRoutingCache {
+    entries: lru::Lru<RouteKey, (PyContextScore, PyRoutingDecision)>,
+    bucket_ms: u64,
+    by_shape: bool,
+    #[pyo3(get)]
+    hits: u64,
+    #[pyo3(get)]
+    misses: u64,
+    #[pyo3(get)]
+    evictions: u64,
+}
+
+impl PyRoutingCache {
+    fn record_key(&self, record: &LnmpRecord) -> Option<u64> {
+        use std::hash::{Hash, Hasher};
+
+        if self.by_shape {
+            let mut hasher = std::collections::hash_map::DefaultHasher::new();
+            for field in record.fields() {
+                field.fid.hash(&mut hasher);
+                std::mem::discriminant(&field.value).hash(&mut hasher);
+            }
+            return Some(hasher.finish());
+        }
+        // Records the binary codec cannot encode are scored without caching
+        binary_of(record)
+            .ok()
+            .map(|binary| fingerprint::xxh64(&binary, 0))
+    }
+}
+
+#[pymethods]
+impl PyRoutingCache {
+    #[new]
+    #[pyo3(signature = (maxsize=4096, bucket_ms=1000, key="content"))]
+    fn new(maxsize: usize, bucket_ms: u64, key: &str) -> PyResult<Self> {
+        if maxsize == 0 {
+            return Err(to_value_error("maxsize must be positive".to_string()));
+        }
+        if bucket_ms == 0 {
+            return Err(to_value_error("bucket_ms must be positive".to_string()));
+        }
+        let by_shape = match key {
+            "content" => false,
+            "shape" => true,
+            _ => return Err(to_value_error(format!("Unknown cache key: {}", key))),
+        };
+        Ok(PyRoutingCache {
+            entries: lru::Lru::new(maxsize),
+            bucket_ms,
+            by_shape,
+            hits: 0,
+            misses: 0,
+            evictions: 0,
+        })
+    }
+
+    /// Score and route an envelope; returns `(score, decision, cache_hit)`.
+    fn route(
+        &mut self,
+        envelope: &PyLnmpEnvelope,
+    ) -> PyResult<(PyContextScore, PyRoutingDecision, bool)> {
+        let env = &envelope.inner;
+        let now = now_ms();
+        let key = self.record_key(&env.record).map(|record_key| {
+            // Envelopes without a timestamp share one bucket
+            let bucket = env
+                .metadata
+                .timestamp
+                .map_or(u64::MAX, |ts| now.saturating_sub(ts) / self.bucket_ms);
+            (env.metadata.source.clone(), record_key, bucket)
+        });
+
+        if let Some(&(ref score, decision)) = key.as_ref().and_then(|key| self.entries.get(key)) {
+            self.hits += 1;
+            metrics::count_decision(decision as usize);
+            return Ok((score.clone(), decision, true));
+        }
+        self.misses += 1;
+        let score = score_at(env, now);
+        let decision = decide_at(env, now)?;
+        metrics::count_decision(decision as usize);
+        if let Some(key) = key {
+            if self.entries.insert(key, (score.clone(), decision)) {
+                self.evictions += 1;
+            }
+        }
+        Ok((score, decision, false))
+    }
+
+    /// Drop the entries for `source`, or every entry; returns how many.
+    #[pyo3(signature = (source=None))]
+    fn invalidate(&mut self, source: Option<&str>) -> usize {
+        match source {
+            Some(source) => self
+                .entries
+                .retain(|(cached, _, _)| cached.as_deref() != Some(source)),
+            None => self.entries.clear(),
+        }
+    }
+
+    #[getter]
+    fn maxsize(&self) -> usize {
+        self.entries.capacity()
+    }
+
+    #[getter]
+    fn bucket_ms(&self) -> u64 {
+        self.bucket_ms
+    }
+
+    #[getter]
+    fn key(&self) -> &'static str {
+        if self.by_shape {
+            "shape"
+        } else {
+            "content"
+        }
+    }
+
+    fn __len__(&self) -> usize {
+        self.entries.len()
+    }
+}
+
+/// Select envelopes for a token budget and encode them, one record per line.
+///
+/// `scores` and `costs` override the native composite score and token
+/// estimate. Returns the packed text and the selected indices.
+#[pyfunction]
+#[pyo3(signature = (envelopes, token_budget, scores=None, costs=None, estimator="lnmp", method="greedy"))]
+fn context_pack(
+    py: Python,
+    envelopes: Vec<PyRef<'_, PyLnmpEnvelope>>,
+    token_budget: usize,
+    scores: Option<Vec<f64>>,
+    costs: Option<Vec<usize>>,
+    estimator: &str,
+    method: &str,
+) -> PyResult<(String, Vec<usize>)> {
+    let estimate: fn(&str) -> usize = match estimator {
+        "lnmp" => pack::estimate_tokens,
+        "chars" => pack::estimate_chars,
+        _ => return Err(to_value_error(format!("Unknown estimator: {}", estimator))),
+    };
+    let select: fn(&[f64], &[usize], usize) -> Result<Vec<usize>, String> = match method {
+        "greedy" => |values, costs, budget| Ok(pack::select_greedy(values, costs, budget)),
+        "knapsack" => pack::select_knapsack,
+        _ => return Err(to_value_error(format!("Unknown method: {}", method))),
+    };
+    for (name, len) in [
+        ("scores", scores.as_ref().map(Vec::len)),
+        ("costs", costs.as_ref().map(Vec::len)),
+    ] {
+        if len.is_some_and(|len| len != envelopes.len()) {
+            return Err(to_value_error(format!(
+                "{} has {} entries for {} envelopes",
+                name,
+                len.unwrap_or(0),
+                envelopes.len()
+            )));
+        }
+    }
+
+    let inner: Vec<&LnmpEnvelope> = envelopes.iter().map(|envelope| &envelope.inner).collect();
+    py.allow_threads(|| {
+        let encoder = Encoder::new();
+        let texts: Vec<String> = inner
+            .iter()
+            .map(|env| encoder.encode(&env.record))
+            .collect();
+        let values = scores.unwrap_or_else(|| {
+            let scorer = ContextScorer::default();
+            let now = now_ms();
+            inner
+                .iter()
+                .map(|env| scorer.score_envelope(env, now).composite_score())
+                .collect()
+        });
+        // One extra token per record for the separating newline
+        let costs = costs.unwrap_or_else(|| texts.iter().map(|text| estimate(text) + 1).collect());
+
+        let chosen = select(&values, &costs, token_budget).map_err(to_value_error)?;
+        let mut packed = String::with_capacity(chosen.iter().map(|&i| texts[i].len() + 1).sum());
+        for &i in &chosen {
+            packed.push_str(&texts[i]);
+            packed.push('\n');
+        }
+        Ok((packed, chosen))
+    })
 }
 
 // Embedding functions
@@ -161,7 +1145,9 @@ fn embedding_delta(
     let updated_vec = Vector::from_f32(updated);
 
     // Compute delta using from_vectors
-    let delta = VectorDelta::from_vectors(&base_vec, &updated_vec, 0)
+    let timer = metrics::start(Op::EmbeddingDelta);
+    let delta = timer
+        .finish_result(VectorDelta::from_vectors(&base_vec, &updated_vec, 0))
         .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
 
     let change_count = delta.changes.len();
@@ -194,6 +1180,41 @@ fn embedding_apply_delta(base: Vec<f32>, delta_bytes: &[u8]) -> PyResult<Vec<f32
         .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)
 }
 
+#[pyfunction]
+#[pyo3(signature = (reference, target, epsilon=0.0, top_k=None))]
+fn embedding_update_encode(
+    py: Python,
+    reference: Option<Vec<f32>>,
+    target: Vec<f32>,
+    epsilon: f32,
+    top_k: Option<usize>,
+) -> PyResult<(u8, Py<pyo3::types::PyBytes>, f32)> {
+    if epsilon.is_nan() || epsilon < 0.0 {
+        return Err(to_value_error(format!(
+            "epsilon must be non-negative, got {}",
+            epsilon
+        )));
+    }
+    let encoded =
+        py.allow_threads(|| update::encode(reference.as_deref(), &target, epsilon, top_k));
+    Ok((
+        encoded.tag,
+        pyo3::types::PyBytes::new_bound(py, &encoded.data).into(),
+        encoded.error,
+    ))
+}
+
+#[pyfunction]
+fn embedding_update_decode(
+    py: Python,
+    reference: Option<Vec<f32>>,
+    data: PyBuffer<u8>,
+) -> PyResult<Vec<f32>> {
+    let data = buffer_slice(&data)?;
+    py.allow_threads(|| update::decode(reference.as_deref(), data))
+        .map_err(to_value_error)
+}
+
 // Spatial functions
 #[pyfunction]
 fn spatial_encode_position3d(
@@ -239,11 +1260,7 @@ fn spatial_decode_position3d(data: &[u8]) -> PyResult<(f64, f64, f64)> {
 #[pyfunction]
 fn debug_explain(text: &str) -> PyResult<String> {
     // Use ExplainEncoder to explain the record
-    let mut parser = Parser::new(text)
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
-    let record = parser
-        .parse_record()
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
+    let record = parse_text(text).map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
 
     let dict = SemanticDictionary::new(); // Empty dict for now
     let encoder = ExplainEncoder::new(dict);
@@ -252,6 +1269,42 @@ fn debug_explain(text: &str) -> PyResult<String> {
     Ok(output)
 }
 
+#[pyclass]
+struct PyExplainer {
+    encoder: ExplainEncoder,
+}
+
+#[pymethods]
+impl PyExplainer {
+    #[new]
+    fn new(field_names: HashMap<u16, String>) -> Self {
+        // Build the dictionary once; every explain call reuses it
+        let mut dict = SemanticDictionary::new();
+        for (fid, name) in field_names {
+            dict.add_field_name(fid, name);
+        }
+        PyExplainer {
+            encoder: ExplainEncoder::new(dict),
+        }
+    }
+
+    fn explain(&self, record: &PyLnmpRecord) -> String {
+        self.encoder.encode_with_explanation(&record.inner)
+    }
+
+    fn explain_text(&self, text: &str) -> PyResult<String> {
+        let record = parse_text(text).map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
+        Ok(self.encoder.encode_with_explanation(&record))
+    }
+
+    fn explain_many(&self, records: Vec<PyRef<PyLnmpRecord>>) -> Vec<String> {
+        records
+            .iter()
+            .map(|record| self.encoder.encode_with_explanation(&record.inner))
+            .collect()
+    }
+}
+
 // Quantization functions
 #[pyfunction]
 fn quantize(py: Python, vector: Vec<f32>, scheme: &str) -> PyResult<Py<pyo3::types::PyBytes>> {
@@ -275,11 +1328,13 @@ fn quantize(py: Python, vector: Vec<f32>, scheme: &str) -> PyResult<Py<pyo3::typ
 
 // Sanitize functions
 #[pyfunction]
-fn sanitize(text: &str) -> PyResult<String> {
-    use lnmp::sanitize::SanitizationConfig;
-    let config = SanitizationConfig::default();
-    let sanitized = sanitize_lnmp_text(text, &config);
-    Ok(sanitized.to_string())
+#[pyo3(signature = (text, config=None))]
+fn sanitize(text: &str, config: Option<&PySanitizationConfig>) -> PyResult<String> {
+    let sanitized = match config {
+        Some(c) => sanitize_lnmp_text(text, &c.inner).to_string(),
+        None => sanitize_lnmp_text(text, &SanitizationConfig::default()).to_string(),
+    };
+    Ok(sanitized)
 }
 
 // Transport functions
@@ -287,7 +1342,9 @@ fn sanitize(text: &str) -> PyResult<String> {
 fn transport_to_http_headers(envelope: &PyLnmpEnvelope) -> PyResult<HashMap<String, String>> {
     use lnmp::transport::http::envelope_to_headers;
 
-    let headers = envelope_to_headers(&envelope.inner)
+    let timer = metrics::start(Op::ToHttpHeaders);
+    let headers = timer
+        .finish_result(envelope_to_headers(&envelope.inner))
         .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
 
     let mut result = HashMap::new();
@@ -302,8 +1359,10 @@ fn transport_to_http_headers(envelope: &PyLnmpEnvelope) -> PyResult<HashMap<Stri
     Ok(result)
 }
 
-#[pyfunction]
-fn transport_from_http_headers(headers: HashMap<String, String>) -> PyResult<PyLnmpEnvelope> {
+fn envelope_from_headers(
+    headers: HashMap<String, String>,
+    record: LnmpRecord,
+) -> PyResult<LnmpEnvelope> {
     use http::{HeaderMap, HeaderName, HeaderValue};
     use lnmp::transport::http::headers_to_envelope_metadata;
     use std::str::FromStr;
@@ -320,47 +1379,318 @@ fn transport_from_http_headers(headers: HashMap<String, String>) -> PyResult<PyL
     let metadata = headers_to_envelope_metadata(&map)
         .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
 
-    // Create a dummy record for the envelope since we only have metadata
-    // In a real scenario, we would parse the body separately
-    use lnmp::core::LnmpRecord;
-    let record = LnmpRecord::default();
+    Ok(LnmpEnvelope { record, metadata })
+}
 
-    use lnmp::envelope::LnmpEnvelope;
-    let envelope = LnmpEnvelope { record, metadata };
+#[pyfunction]
+fn transport_from_http_headers(headers: HashMap<String, String>) -> PyResult<PyLnmpEnvelope> {
+    // Create a dummy record for the envelope since we only have metadata
+    let timer = metrics::start(Op::FromHttpHeaders);
+    let envelope = timer.finish_result(envelope_from_headers(headers, LnmpRecord::default()))?;
+    Ok(PyLnmpEnvelope { inner: envelope })
+}
 
+#[pyfunction]
+fn transport_from_http(
+    headers: HashMap<String, String>,
+    record: &PyLnmpRecord,
+) -> PyResult<PyLnmpEnvelope> {
+    let timer = metrics::start(Op::FromHttpHeaders);
+    let envelope = timer.finish_result(envelope_from_headers(headers, record.inner.clone()))?;
     Ok(PyLnmpEnvelope { inner: envelope })
 }
 
+// Metrics functions
+#[pyfunction]
+fn metrics_set_enabled(enabled: bool) {
+    metrics::set_enabled(enabled);
+}
+
+#[pyfunction]
+fn metrics_is_enabled() -> bool {
+    metrics::is_enabled()
+}
+
+#[pyfunction]
+fn metrics_reset() {
+    metrics::reset();
+}
+
+#[pyfunction]
+#[allow(clippy::type_complexity)]
+fn metrics_snapshot() -> (Vec<metrics::OpSnapshot>, Vec<(&'static str, u64)>, Vec<u64>) {
+    let (ops, decisions) = metrics::snapshot();
+    (ops, decisions, metrics::BUCKET_BOUNDS_NS.to_vec())
+}
+
 // Schema functions
+/// Compiled field table for typed decoding; see src/schema.rs.
+#[pyclass(name = "Schema")]
+struct PySchema {
+    inner: schema::Schema,
+    /// Value of each optional field when a record lacks it
+    defaults: Vec<PyObject>,
+}
+
+enum SchemaInput<'a> {
+    Text(&'a str),
+    Binary(&'a [u8]),
+    Record(&'a LnmpRecord),
+}
+
+impl PySchema {
+    /// Decode items to cells, without the GIL. str is LNMP text, records are
+    /// used as-is and any other buffer is a binary record. Records, decoded
+    /// or given, are encoded to text holding only the declared fields, so
+    /// undeclared fields cost neither encoding nor scanning.
+    fn cells(&self, py: Python, items: &[Bound<'_, PyAny>]) -> PyResult<Vec<Vec<schema::Cell>>> {
+        use pyo3::types::{PyBytes, PyString};
+
+        // str, bytes and records are borrowed in place; other buffers are copied once
+        let mut copies = Vec::new();
+        let mut records = Vec::new();
+        for item in items {
+            if let Ok(record) = item.downcast::<PyLnmpRecord>() {
+                records.push(record.borrow());
+            } else if !item.is_instance_of::<PyString>() && !item.is_instance_of::<PyBytes>() {
+                copies.push(item.extract::<Vec<u8>>()?);
+            }
+        }
+        let (mut copies_iter, mut records_iter) = (copies.iter(), records.iter());
+        let mut inputs = Vec::with_capacity(items.len());
+        for item in items {
+            inputs.push(if let Ok(text) = item.downcast::<PyString>() {
+                SchemaInput::Text(text.to_str()?)
+            } else if let Ok(data) = item.downcast::<PyBytes>() {
+                SchemaInput::Binary(data.as_bytes())
+            } else if item.is_instance_of::<PyLnmpRecord>() {
+                SchemaInput::Record(&records_iter.next().unwrap().inner)
+            } else {
+                SchemaInput::Binary(copies_iter.next().unwrap())
+            });
+        }
+
+        let schema = &self.inner;
+        py.allow_threads(|| {
+            let encoder = Encoder::new();
+            inputs
+                .iter()
+                .enumerate()
+                .map(|(i, input)| {
+                    let declared = |record: &LnmpRecord| {
+                        let mut partial = LnmpRecord::new();
+                        for field in record.fields() {
+                            if schema.declares(field.fid) {
+                                partial.add_field(field.clone());
+                            }
+                        }
+                        schema.decode(&encoder.encode(&partial))
+                    };
+                    let decoded = match input {
+                        SchemaInput::Text(text) => schema.decode(text),
+                        SchemaInput::Record(record) => declared(record),
+                        SchemaInput::Binary(data) => {
+                            let record = record_of(data)
+                                .map_err(|_| format!("record {}: invalid binary record", i))
+                                .map_err(to_value_error)?;
+                            declared(&record)
+                        }
+                    };
+                    decoded.map_err(|e| to_value_error(format!("record {}: {}", i, e)))
+                })
+                .collect()
+        })
+    }
+
+    fn cell_to_py(&self, py: Python, slot: usize, cell: schema::Cell) -> PyObject {
+        use schema::Cell;
+
+        match cell {
+            Cell::Missing => self.defaults[slot].clone_ref(py),
+            Cell::Int(v) => v.into_py(py),
+            Cell::Float(v) => v.into_py(py),
+            Cell::Bool(v) => v.into_py(py),
+            Cell::Str(v) => v.into_py(py),
+            Cell::Ints(v) => v.into_py(py),
+            Cell::Floats(v) => v.into_py(py),
+            Cell::Strs(v) => v.into_py(py),
+        }
+    }
+}
+
+#[pymethods]
+impl PySchema {
+    /// `fields` holds `(fid, name, type, required, default)` per field.
+    #[new]
+    fn new(fields: Vec<(u16, String, String, bool, PyObject)>) -> PyResult<Self> {
+        let mut compiled = Vec::with_capacity(fields.len());
+        let mut defaults = Vec::with_capacity(fields.len());
+        for (fid, name, kind, required, default) in fields {
+            let kind = schema::Kind::from_name(&kind).ok_or_else(|| {
+                to_value_error(format!("Unknown field type '{}' for '{}'", kind, name))
+            })?;
+            compiled.push(schema::Field {
+                fid,
+                name,
+                kind,
+                required,
+            });
+            defaults.push(default);
+        }
+        Ok(PySchema {
+            inner: schema::Schema::new(compiled).map_err(to_value_error)?,
+            defaults,
+        })
+    }
+
+    fn describe(&self) -> String {
+        self.inner.describe()
+    }
+
+    /// One tuple per item, or `factory(*values)` when a factory is given.
+    #[pyo3(signature = (items, factory=None))]
+    fn rows(
+        &self,
+        py: Python,
+        items: Vec<Bound<'_, PyAny>>,
+        factory: Option<Bound<'_, PyAny>>,
+    ) -> PyResult<Vec<PyObject>> {
+        self.cells(py, &items)?
+            .into_iter()
+            .map(|cells| {
+                let values = cells
+                    .into_iter()
+                    .enumerate()
+                    .map(|(slot, cell)| self.cell_to_py(py, slot, cell));
+                let row = pyo3::types::PyTuple::new_bound(py, values);
+                match &factory {
+                    Some(factory) => factory.call1(row).map(Bound::unbind),
+                    None => Ok(row.into_any().unbind()),
+                }
+            })
+            .collect()
+    }
+
+    /// One column per field, as `(typecode, data)`.
+    ///
+    /// int, float and bool columns that never hold None are native-endian
+    /// `q`, `d` or `B` buffers for array.array; the others are lists
+    /// (typecode "").
+    fn columns(
+        &self,
+        py: Python,
+        items: Vec<Bound<'_, PyAny>>,
+    ) -> PyResult<Vec<(&'static str, PyObject)>> {
+        use schema::{Cell, Kind};
+
+        let rows = self.cells(py, &items)?;
+        let mut columns = Vec::with_capacity(self.defaults.len());
+        for (slot, field) in self.inner.fields().iter().enumerate() {
+            let default = self.defaults[slot].bind(py);
+            let packed = matches!(field.kind, Kind::Int | Kind::Float | Kind::Bool)
+                && (field.required || !default.is_none());
+            if !packed {
+                let values: Vec<PyObject> = rows
+                    .iter()
+                    .map(|cells| match &cells[slot] {
+                        Cell::Missing => self.defaults[slot].clone_ref(py),
+                        Cell::Str(v) => v.to_object(py),
+                        Cell::Ints(v) => v.to_object(py),
+                        Cell::Floats(v) => v.to_object(py),
+                        Cell::Strs(v) => v.to_object(py),
+                        Cell::Int(v) => v.to_object(py),
+                        Cell::Float(v) => v.to_object(py),
+                        Cell::Bool(v) => v.to_object(py),
+                    })
+                    .collect();
+                columns.push(("", values.into_py(py)));
+                continue;
+            }
+            let (typecode, width) = match field.kind {
+                Kind::Int => ("q", 8),
+                Kind::Float => ("d", 8),
+                _ => ("B", 1),
+            };
+            let mut data = Vec::with_capacity(rows.len() * width);
+            for cells in &rows {
+                match (&cells[slot], field.kind) {
+                    (Cell::Int(v), _) => data.extend_from_slice(&v.to_ne_bytes()),
+                    (Cell::Float(v), _) => data.extend_from_slice(&v.to_ne_bytes()),
+                    (Cell::Bool(v), _) => data.push(u8::from(*v)),
+                    (_, Kind::Int) => {
+                        data.extend_from_slice(&default.extract::<i64>()?.to_ne_bytes())
+                    }
+                    (_, Kind::Float) => {
+                        data.extend_from_slice(&default.extract::<f64>()?.to_ne_bytes())
+                    }
+                    _ => data.push(u8::from(default.extract::<bool>()?)),
+                }
+            }
+            columns.push((
+                typecode,
+                pyo3::types::PyBytes::new_bound(py, &data).into_py(py),
+            ));
+        }
+        Ok(columns)
+    }
+}
+
+/// One line per field of a compiled schema.
 #[pyfunction]
-fn schema_describe() -> PyResult<String> {
-    Ok("LNMP Schema Description".to_string())
+fn schema_describe(schema: &PySchema) -> String {
+    schema.inner.describe()
 }
 
 #[pymodule]
 fn lnmp_py_core(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<PyLnmpRecord>()?;
     m.add_class::<PyLnmpEnvelope>()?;
-    // m.add_class::<PyContextScore>()?; // PyContextScore is not defined in the provided code
+    m.add_class::<PySanitizationConfig>()?;
+    m.add_class::<PyExplainer>()?;
+    m.add_class::<PyContextScore>()?;
+    m.add_class::<PySchema>()?;
+    m.add_class::<PyRoutingDecision>()?;
+    m.add_class::<PyRoutingCache>()?;
+    m.add_class::<PyStreamParser>()?;
 
     // Core
     m.add_function(wrap_pyfunction!(parse, m)?)?;
+    m.add_function(wrap_pyfunction!(parse_lenient, m)?)?;
+    m.add_function(wrap_pyfunction!(parse_lenient_many, m)?)?;
+    m.add_function(wrap_pyfunction!(validate_many, m)?)?;
     m.add_function(wrap_pyfunction!(encode, m)?)?;
     m.add_function(wrap_pyfunction!(encode_binary, m)?)?;
     m.add_function(wrap_pyfunction!(decode_binary, m)?)?;
+    m.add_function(wrap_pyfunction!(record_fingerprint, m)?)?;
+    m.add_function(wrap_pyfunction!(fingerprint_many, m)?)?;
+    m.add_function(wrap_pyfunction!(fingerprint_binary_many, m)?)?;
+    m.add_function(wrap_pyfunction!(record_fields_many, m)?)?;
+    m.add_function(wrap_pyfunction!(record_diff, m)?)?;
+    m.add_function(wrap_pyfunction!(record_patch, m)?)?;
+    m.add_function(wrap_pyfunction!(records_dumps, m)?)?;
+    m.add_function(wrap_pyfunction!(records_loads, m)?)?;
+    m.add_function(wrap_pyfunction!(frame_spans, m)?)?;
+    m.add_function(wrap_pyfunction!(frame_boundary, m)?)?;
 
     // Envelope
     m.add_function(wrap_pyfunction!(envelope_wrap, m)?)?;
+    m.add_function(wrap_pyfunction!(envelope_encode_binary, m)?)?;
+    m.add_function(wrap_pyfunction!(envelope_decode_binary, m)?)?;
+    m.add_function(wrap_pyfunction!(envelopes_dumps, m)?)?;
+    m.add_function(wrap_pyfunction!(envelopes_loads, m)?)?;
 
     // Net
     m.add_function(wrap_pyfunction!(routing_decide, m)?)?;
     m.add_function(wrap_pyfunction!(context_score, m)?)?;
+    m.add_function(wrap_pyfunction!(context_pack, m)?)?;
     // m.add_function(wrap_pyfunction!(network_importance, m)?)?; // network_importance is not defined
     // m.add_function(wrap_pyfunction!(network_decide, m)?)?; // network_decide is not defined
 
     // Embedding
     m.add_function(wrap_pyfunction!(embedding_delta, m)?)?;
     m.add_function(wrap_pyfunction!(embedding_apply_delta, m)?)?;
+    m.add_function(wrap_pyfunction!(embedding_update_encode, m)?)?;
+    m.add_function(wrap_pyfunction!(embedding_update_decode, m)?)?;
 
     // Spatial
     m.add_function(wrap_pyfunction!(spatial_encode_position3d, m)?)?;
@@ -378,6 +1708,13 @@ fn lnmp_py_core(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
     // Transport
     m.add_function(wrap_pyfunction!(transport_to_http_headers, m)?)?;
     m.add_function(wrap_pyfunction!(transport_from_http_headers, m)?)?;
+    m.add_function(wrap_pyfunction!(transport_from_http, m)?)?;
+
+    // Metrics
+    m.add_function(wrap_pyfunction!(metrics_set_enabled, m)?)?;
+    m.add_function(wrap_pyfunction!(metrics_is_enabled, m)?)?;
+    m.add_function(wrap_pyfunction!(metrics_reset, m)?)?;
+    m.add_function(wrap_pyfunction!(metrics_snapshot, m)?)?;
 
     // Schema
     m.add_function(wrap_pyfunction!(schema_describe, m)?)?;
@@ -0,0 +1,118 @@
+//! Bounded map with least-recently-used eviction.
+//!
+//! Each entry carries the tick of its last use, and `order` maps ticks back
+//! to keys, so lookups are a hash probe plus an O(log n) reorder and the
+//! eviction candidate is always the first entry of `order`.
+
+use std::collections::{BTreeMap, HashMap};
+use std::hash::Hash;
+
+pub struct Lru<K, V> {
+    capacity: usize,
+    entries: HashMap<K, (V, u64)>,
+    order: BTreeMap<u64, K>,
+    tick: u64,
+}
+
+impl<K: Hash + Eq + Clone, V> Lru<K, V> {
+    pub fn new(capacity: usize) -> Self {
+        Lru {
+            capacity,
+            entries: HashMap::new(),
+            order: BTreeMap::new(),
+            tick: 0,
+        }
+    }
+
+    pub fn capacity(&self) -> usize {
+        self.capacity
+    }
+
+    pub fn len(&self) -> usize {
+        self.entries.len()
+    }
+
+    /// Look up `key` and mark it most recently used.
+    pub fn get(&mut self, key: &K) -> Option<&V> {
+        let (value, used) = self.entries.get_mut(key)?;
+        self.tick += 1;
+        let key = self.order.remove(used).expect("every entry is ordered");
+        self.order.insert(self.tick, key);
+        *used = self.tick;
+        Some(value)
+    }
+
+    /// Insert or replace `key`; returns true if the oldest entry was evicted.
+    pub fn insert(&mut self, key: K, value: V) -> bool {
+        self.tick += 1;
+        if let Some((_, used)) = self.entries.insert(key.clone(), (value, self.tick)) {
+            self.order.remove(&used);
+        }
+        self.order.insert(self.tick, key);
+        if self.entries.len() <= self.capacity {
+            return false;
+        }
+        if let Some((_, oldest)) = self.order.pop_first() {
+            self.entries.remove(&oldest);
+        }
+        true
+    }
+
+    /// Drop the entries whose key fails `keep`; returns how many were dropped.
+    pub fn retain(&mut self, mut keep: impl FnMut(&K) -> bool) -> usize {
+        let before = self.entries.len();
+        let order = &mut self.order;
+        self.entries.retain(|key, (_, used)| {
+            let kept = keep(key);
+            if !kept {
+                order.remove(used);
+            }
+            kept
+        });
+        before - self.entries.len()
+    }
+
+    pub fn clear(&mut self) -> usize {
+        let count = self.entries.len();
+        self.entries.clear();
+        self.order.clear();
+        count
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn evicts_least_recently_used() {
+        let mut lru = Lru::new(2);
+        assert!(!lru.insert("a", 1));
+        assert!(!lru.insert("b", 2));
+        assert_eq!(lru.get(&"a"), Some(&1));
+        assert!(lru.insert("c", 3));
+        assert_eq!(lru.get(&"b"), None);
+        assert_eq!(lru.get(&"a"), Some(&1));
+        assert_eq!(lru.get(&"c"), Some(&3));
+        assert_eq!(lru.len(), 2);
+    }
+
+    #[test]
+    fn replaces_and_retains() {
+        let mut lru = Lru::new(3);
+        lru.insert(1, "x");
+        lru.insert(2, "y");
+        assert!(!lru.insert(1, "z"));
+        assert_eq!(lru.len(), 2);
+        assert_eq!(lru.get(&1), Some(&"z"));
+        lru.insert(3, "w");
+        assert_eq!(lru.retain(|key| key % 2 == 1), 1);
+        assert_eq!(lru.get(&2), None);
+        // Retained entries keep their order: 1 was used before 3
+        lru.insert(4, "v");
+        lru.insert(5, "u");
+        assert_eq!(lru.get(&1), None);
+        assert_eq!(lru.clear(), 3);
+        assert_eq!(lru.len(), 0);
+    }
+}
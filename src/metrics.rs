@@ -0,0 +1,219 @@
+//! Opt-in hot-path metrics: per-operation call/error counters, fixed-bucket
+//! latency histograms and routing decision counts.
+//!
+//! Everything lives in static atomics. While metrics are disabled an
+//! instrumented call costs one relaxed atomic load; while enabled it adds
+//! two clock reads and a handful of relaxed `fetch_add`s.
+
+use std::sync::atomic::{AtomicBool, AtomicU64, Ordering};
+use std::time::Instant;
+
+static ENABLED: AtomicBool = AtomicBool::new(false);
+
+#[derive(Clone, Copy)]
+pub enum Op {
+    Parse,
+    ParseLenient,
+    ValidateMany,
+    Encode,
+    EncodeBinary,
+    DecodeBinary,
+    EnvelopeWrap,
+    ContextScore,
+    RoutingDecide,
+    ToHttpHeaders,
+    FromHttpHeaders,
+    EmbeddingDelta,
+}
+
+pub const OP_NAMES: [&str; 12] = [
+    "parse",
+    "parse_lenient",
+    "validate_many",
+    "encode",
+    "encode_binary",
+    "decode_binary",
+    "envelope_wrap",
+    "context_score",
+    "routing_decide",
+    "to_http_headers",
+    "from_http_headers",
+    "embedding_delta",
+];
+
+/// Histogram bucket upper bounds in nanoseconds; the last bucket is +Inf.
+pub const BUCKET_BOUNDS_NS: [u64; 15] = [
+    250, 500, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000,
+    2_500_000, 5_000_000, 10_000_000,
+];
+const BUCKETS: usize = BUCKET_BOUNDS_NS.len() + 1;
+
+/// Indexed by the `RoutingDecision` pyclass discriminant.
+pub const DECISION_NAMES: [&str; 3] = ["SendToLLM", "ProcessLocally", "Drop"];
+
+struct OpStats {
+    calls: AtomicU64,
+    errors: AtomicU64,
+    sum_ns: AtomicU64,
+    buckets: [AtomicU64; BUCKETS],
+}
+
+#[allow(clippy::declare_interior_mutable_const)]
+const ZERO: AtomicU64 = AtomicU64::new(0);
+#[allow(clippy::declare_interior_mutable_const)]
+const EMPTY: OpStats = OpStats {
+    calls: ZERO,
+    errors: ZERO,
+    sum_ns: ZERO,
+    buckets: [ZERO; BUCKETS],
+};
+
+static STATS: [OpStats; OP_NAMES.len()] = [EMPTY; OP_NAMES.len()];
+static DECISIONS: [AtomicU64; DECISION_NAMES.len()] = [ZERO; DECISION_NAMES.len()];
+
+/// Per-operation snapshot: (name, calls, errors, sum_ns, per-bucket counts).
+pub type OpSnapshot = (&'static str, u64, u64, u64, Vec<u64>);
+
+pub fn set_enabled(enabled: bool) {
+    ENABLED.store(enabled, Ordering::Relaxed);
+}
+
+pub fn is_enabled() -> bool {
+    ENABLED.load(Ordering::Relaxed)
+}
+
+/// Latency timer for one call; does nothing when metrics are disabled.
+pub struct Timer {
+    op: Op,
+    start: Option<Instant>,
+}
+
+pub fn start(op: Op) -> Timer {
+    Timer {
+        op,
+        start: if is_enabled() {
+            Some(Instant::now())
+        } else {
+            None
+        },
+    }
+}
+
+impl Timer {
+    pub fn finish(self, ok: bool) {
+        if let Some(start) = self.start {
+            record(self.op, start.elapsed().as_nanos() as u64, ok);
+        }
+    }
+
+    /// Record the outcome of `result` and pass it through.
+    pub fn finish_result<T, E>(self, result: Result<T, E>) -> Result<T, E> {
+        self.finish(result.is_ok());
+        result
+    }
+}
+
+fn record(op: Op, elapsed_ns: u64, ok: bool) {
+    let stats = &STATS[op as usize];
+    stats.calls.fetch_add(1, Ordering::Relaxed);
+    if !ok {
+        stats.errors.fetch_add(1, Ordering::Relaxed);
+    }
+    stats.sum_ns.fetch_add(elapsed_ns, Ordering::Relaxed);
+    let bucket = BUCKET_BOUNDS_NS
+        .iter()
+        .position(|&bound| elapsed_ns <= bound)
+        .unwrap_or(BUCKETS - 1);
+    stats.buckets[bucket].fetch_add(1, Ordering::Relaxed);
+}
+
+/// Count a routing decision by its index in `DECISION_NAMES`.
+pub fn count_decision(index: usize) {
+    if is_enabled() {
+        DECISIONS[index].fetch_add(1, Ordering::Relaxed);
+    }
+}
+
+pub fn snapshot() -> (Vec<OpSnapshot>, Vec<(&'static str, u64)>) {
+    let ops = OP_NAMES
+        .iter()
+        .zip(STATS.iter())
+        .map(|(&name, stats)| {
+            (
+                name,
+                stats.calls.load(Ordering::Relaxed),
+                stats.errors.load(Ordering::Relaxed),
+                stats.sum_ns.load(Ordering::Relaxed),
+                stats
+                    .buckets
+                    .iter()
+                    .map(|b| b.load(Ordering::Relaxed))
+                    .collect(),
+            )
+        })
+        .collect();
+    let decisions = DECISION_NAMES
+        .iter()
+        .zip(DECISIONS.iter())
+        .map(|(&name, count)| (name, count.load(Ordering::Relaxed)))
+        .collect();
+    (ops, decisions)
+}
+
+pub fn reset() {
+    for stats in STATS.iter() {
+        stats.calls.store(0, Ordering::Relaxed);
+        stats.errors.store(0, Ordering::Relaxed);
+        stats.sum_ns.store(0, Ordering::Relaxed);
+        for bucket in stats.buckets.iter() {
+            bucket.store(0, Ordering::Relaxed);
+        }
+    }
+    for count in DECISIONS.iter() {
+        count.store(0, Ordering::Relaxed);
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    // The counters are process-global, so everything is checked in one test.
+    #[test]
+    fn records_only_while_enabled() {
+        reset();
+        set_enabled(false);
+        start(Op::Parse).finish(true);
+        count_decision(0);
+        let (ops, decisions) = snapshot();
+        assert_eq!(ops[Op::Parse as usize].1, 0);
+        assert_eq!(decisions[0].1, 0);
+
+        set_enabled(true);
+        start(Op::Parse).finish(true);
+        let _ = start(Op::Parse).finish_result::<(), &str>(Err("bad"));
+        record(Op::ContextScore, 300, true);
+        record(Op::ContextScore, 20_000_000, true);
+        count_decision(0);
+        count_decision(2);
+        set_enabled(false);
+
+        let (ops, decisions) = snapshot();
+        let (name, calls, errors, _, buckets) = &ops[Op::Parse as usize];
+        assert_eq!((*name, *calls, *errors), ("parse", 2, 1));
+        assert_eq!(buckets.iter().sum::<u64>(), 2);
+
+        let (_, calls, _, sum_ns, buckets) = &ops[Op::ContextScore as usize];
+        assert_eq!((*calls, *sum_ns), (2, 20_000_300));
+        assert_eq!(buckets[1], 1); // 300ns <= 500ns
+        assert_eq!(buckets[BUCKETS - 1], 1); // +Inf
+
+        assert_eq!(
+            decisions,
+            vec![("SendToLLM", 1), ("ProcessLocally", 0), ("Drop", 1)]
+        );
+
+        reset();
+        assert_eq!(snapshot().0[Op::Parse as usize].1, 0);
+    }
+}
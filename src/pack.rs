@@ -0,0 +1,173 @@
+//! Token-budgeted context packing.
+//!
+//! Chooses the subset of candidates with the highest total score whose
+//! estimated token cost fits a budget: a density-ordered greedy pass, or an
+//! exact 0/1 knapsack when the problem is small enough.
+
+/// Largest `candidates * (budget + 1)` table the exact knapsack will build:
+/// an 8 MiB bitset and well under a second of work.
+pub const KNAPSACK_MAX_CELLS: usize = 1 << 26;
+
+/// Approximate BPE token count of LNMP text.
+///
+/// Every punctuation character is its own token, alphanumeric runs cost
+/// one token per four characters, and whitespace is free. This tracks
+/// common tokenizers on LNMP text far more closely than a flat
+/// characters-per-token ratio, which undercounts the separators.
+pub fn estimate_tokens(text: &str) -> usize {
+    let mut tokens = 0;
+    let mut run: usize = 0;
+    for c in text.chars() {
+        if c.is_alphanumeric() || c == '_' {
+            run += 1;
+            continue;
+        }
+        tokens += run.div_ceil(4);
+        run = 0;
+        if !c.is_whitespace() {
+            tokens += 1;
+        }
+    }
+    tokens + run.div_ceil(4)
+}
+
+/// Flat estimate of four characters per token.
+pub fn estimate_chars(text: &str) -> usize {
+    text.chars().count().div_ceil(4)
+}
+
+fn useful(values: &[f64], costs: &[usize], budget: usize) -> Vec<usize> {
+    (0..values.len())
+        .filter(|&i| values[i] > 0.0 && costs[i] <= budget)
+        .collect()
+}
+
+/// Greedy selection by score per token.
+///
+/// Items are taken in decreasing density while they fit, skipping those
+/// that do not. The result is compared with the single best item, which
+/// bounds it to at least half the optimum. Returns sorted indices.
+pub fn select_greedy(values: &[f64], costs: &[usize], budget: usize) -> Vec<usize> {
+    let mut order = useful(values, costs, budget);
+    // Zero-cost items get infinite density and sort first
+    order.sort_by(|&a, &b| {
+        let da = values[a] / costs[a] as f64;
+        let db = values[b] / costs[b] as f64;
+        db.total_cmp(&da).then(a.cmp(&b))
+    });
+
+    let mut chosen = Vec::new();
+    let mut total = 0.0;
+    let mut remaining = budget;
+    for &i in &order {
+        if costs[i] <= remaining {
+            remaining -= costs[i];
+            total += values[i];
+            chosen.push(i);
+        }
+    }
+
+    if let Some(&best) = order
+        .iter()
+        .max_by(|&&a, &&b| values[a].total_cmp(&values[b]).then(b.cmp(&a)))
+    {
+        if values[best] > total {
+            return vec![best];
+        }
+    }
+    chosen.sort_unstable();
+    chosen
+}
+
+/// Exact 0/1 knapsack over integer token costs. Returns sorted indices.
+pub fn select_knapsack(
+    values: &[f64],
+    costs: &[usize],
+    budget: usize,
+) -> Result<Vec<usize>, String> {
+    let items = useful(values, costs, budget);
+    let budget = budget.min(items.iter().map(|&i| costs[i]).sum());
+    let width = budget + 1;
+    if items.len().saturating_mul(width) > KNAPSACK_MAX_CELLS {
+        return Err(format!(
+            "{} candidates with a budget of {} tokens is too large for the exact knapsack; use the greedy method",
+            items.len(),
+            budget
+        ));
+    }
+
+    let mut best = vec![0.0f64; width];
+    let mut taken = vec![0u64; (items.len() * width).div_ceil(64)];
+    for (row, &i) in items.iter().enumerate() {
+        let cost = costs[i];
+        for w in (cost..width).rev() {
+            let candidate = best[w - cost] + values[i];
+            if candidate > best[w] {
+                best[w] = candidate;
+                let bit = row * width + w;
+                taken[bit / 64] |= 1 << (bit % 64);
+            }
+        }
+    }
+
+    let mut chosen = Vec::new();
+    let mut w = budget;
+    for (row, &i) in items.iter().enumerate().rev() {
+        let bit = row * width + w;
+        if taken[bit / 64] & (1 << (bit % 64)) != 0 {
+            chosen.push(i);
+            w -= costs[i];
+        }
+    }
+    chosen.sort_unstable();
+    Ok(chosen)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn estimates_lnmp_tokens() {
+        assert_eq!(estimate_tokens(""), 0);
+        assert_eq!(estimate_tokens("F12=14532;F7=1"), 8);
+        assert_eq!(estimate_tokens("F1=\"hello world\""), 8);
+        assert_eq!(estimate_chars("F12=14532;F7=1"), 4);
+    }
+
+    #[test]
+    fn greedy_prefers_density_and_fills_gaps() {
+        let values = [0.9, 0.5, 0.4, 0.0];
+        let costs = [10, 4, 4, 1];
+        assert_eq!(select_greedy(&values, &costs, 12), vec![1, 2]);
+        assert_eq!(select_greedy(&values, &costs, 18), vec![0, 1, 2]);
+        assert_eq!(select_greedy(&values, &costs, 3), Vec::<usize>::new());
+    }
+
+    #[test]
+    fn greedy_falls_back_to_best_single_item() {
+        let values = [0.1, 1.0];
+        let costs = [1, 10];
+        assert_eq!(select_greedy(&values, &costs, 10), vec![1]);
+    }
+
+    #[test]
+    fn knapsack_is_exact() {
+        // Greedy takes the densest item 0 and then cannot fit 1 or 2
+        let values = [0.7, 0.5, 0.5];
+        let costs = [6, 5, 5];
+        assert_eq!(select_greedy(&values, &costs, 10), vec![0]);
+        assert_eq!(select_knapsack(&values, &costs, 10).unwrap(), vec![1, 2]);
+        assert_eq!(
+            select_knapsack(&values, &costs, 4).unwrap(),
+            Vec::<usize>::new()
+        );
+    }
+
+    #[test]
+    fn knapsack_rejects_oversized_tables() {
+        let values = vec![1.0; 1 << 16];
+        let costs = vec![1 << 16; 1 << 16];
+        assert!(select_knapsack(&values, &costs, usize::MAX / 2).is_err());
+    }
+}
@@ -0,0 +1,170 @@
+//! Field-level record diffs.
+//!
+//! Records are compared field by field on their parsed values, matched by
+//! field ID. A patch lists the removed field IDs plus the changed or added
+//! fields; the changed fields travel as a binary-encoded partial record
+//! (see `record_diff` in lib.rs).
+//!
+//! Patch frame (little-endian):
+//!
+//! ```text
+//! b"LP" | version u8 | flags u8 | base fingerprint u64 | removed count varint
+//!       | removed fids varint... | upserted fields (binary record, may be empty)
+//! ```
+
+use std::collections::{HashMap, HashSet};
+
+use crate::varint;
+
+const MAGIC: &[u8; 2] = b"LP";
+const VERSION: u8 = 1;
+const HEADER_LEN: usize = 12;
+
+pub struct Patch<'a> {
+    pub base: u64,
+    pub removed: Vec<u16>,
+    pub upserts: &'a [u8],
+}
+
+/// Index fields by ID; the first field wins when an ID repeats.
+fn by_fid<F>(fields: &[F], fid: impl Fn(&F) -> u16) -> HashMap<u16, &F> {
+    let mut index = HashMap::with_capacity(fields.len());
+    for field in fields {
+        index.entry(fid(field)).or_insert(field);
+    }
+    index
+}
+
+/// Compare two records' fields by field ID.
+///
+/// Returns the field IDs present in `old` but not in `new`, and every field
+/// of `new` that is missing from `old` or differs from it.
+pub fn diff<'a, F: PartialEq>(
+    old: &[F],
+    new: &'a [F],
+    fid: impl Fn(&F) -> u16,
+) -> (Vec<u16>, Vec<&'a F>) {
+    let old_index = by_fid(old, &fid);
+    let new_index = by_fid(new, &fid);
+    let removed = old
+        .iter()
+        .map(&fid)
+        .filter(|id| !new_index.contains_key(id))
+        .collect();
+    let upserts = new
+        .iter()
+        .filter(|field| old_index.get(&fid(field)) != Some(field))
+        .collect();
+    (removed, upserts)
+}
+
+/// Apply removals and upserts to a record's fields.
+///
+/// Replaced fields keep their position; new fields are appended.
+pub fn apply<F: Clone>(
+    base: &[F],
+    removed: &[u16],
+    upserts: &[F],
+    fid: impl Fn(&F) -> u16,
+) -> Vec<F> {
+    let removed: HashSet<u16> = removed.iter().copied().collect();
+    let upsert_index = by_fid(upserts, &fid);
+    let base_ids: HashSet<u16> = base.iter().map(&fid).collect();
+    let mut fields = Vec::with_capacity(base.len() + upserts.len());
+    for field in base {
+        let id = fid(field);
+        if removed.contains(&id) {
+            continue;
+        }
+        match upsert_index.get(&id) {
+            Some(upsert) => fields.push((*upsert).clone()),
+            None => fields.push(field.clone()),
+        }
+    }
+    for upsert in upserts {
+        if !base_ids.contains(&fid(upsert)) {
+            fields.push(upsert.clone());
+        }
+    }
+    fields
+}
+
+pub fn encode_patch(base: u64, removed: &[u16], upserts: &[u8]) -> Vec<u8> {
+    let mut out = Vec::with_capacity(HEADER_LEN + 1 + removed.len() * 2 + upserts.len());
+    out.extend_from_slice(MAGIC);
+    out.push(VERSION);
+    out.push(0);
+    out.extend_from_slice(&base.to_le_bytes());
+    varint::write(&mut out, removed.len() as u64);
+    for fid in removed {
+        varint::write(&mut out, u64::from(*fid));
+    }
+    out.extend_from_slice(upserts);
+    out
+}
+
+pub fn decode_patch(data: &[u8]) -> Result<Patch<'_>, String> {
+    if data.len() < HEADER_LEN || &data[..2] != MAGIC {
+        return Err("Not an LNMP record patch".to_string());
+    }
+    if data[2] != VERSION {
+        return Err(format!("Unsupported record patch version {}", data[2]));
+    }
+    let mut base = [0u8; 8];
+    base.copy_from_slice(&data[4..HEADER_LEN]);
+
+    let mut pos = HEADER_LEN;
+    let count = varint::read(data, &mut pos)?;
+    let mut removed = Vec::new();
+    for _ in 0..count {
+        let fid = varint::read(data, &mut pos)?;
+        let fid = u16::try_from(fid).map_err(|_| format!("Invalid field ID {} in patch", fid))?;
+        removed.push(fid);
+    }
+    Ok(Patch {
+        base: u64::from_le_bytes(base),
+        removed,
+        upserts: &data[pos..],
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn fid(field: &(u16, &str)) -> u16 {
+        field.0
+    }
+
+    #[test]
+    fn diffs_changed_added_and_removed_fields() {
+        let old = [(1, "1"), (2, "\"a;b\""), (3, "[x,y]"), (4, "{F1=1}")];
+        let new = [(1, "1"), (2, "\"a;c\""), (4, "{F1=1}"), (5, "9")];
+        let (removed, upserts) = diff(&old, &new, fid);
+        assert_eq!(removed, vec![3]);
+        let upserts: Vec<(u16, &str)> = upserts.into_iter().copied().collect();
+        assert_eq!(upserts, vec![(2, "\"a;c\""), (5, "9")]);
+        assert_eq!(apply(&old, &removed, &upserts, fid), new);
+    }
+
+    #[test]
+    fn identical_records_give_empty_diff() {
+        let fields = [(1, "1"), (2, "2")];
+        let (removed, upserts) = diff(&fields, &fields, fid);
+        assert!(removed.is_empty());
+        assert!(upserts.is_empty());
+        assert_eq!(apply(&fields, &[], &[], fid), fields);
+    }
+
+    #[test]
+    fn roundtrips_patch_frames() {
+        let frame = encode_patch(0xDEAD_BEEF, &[3, 300], b"\x01\x02");
+        let patch = decode_patch(&frame).unwrap();
+        assert_eq!(patch.base, 0xDEAD_BEEF);
+        assert_eq!(patch.removed, vec![3, 300]);
+        assert_eq!(patch.upserts, b"\x01\x02");
+
+        assert!(decode_patch(b"XX").is_err());
+        assert!(decode_patch(&frame[..13]).is_err());
+    }
+}
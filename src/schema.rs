@@ -0,0 +1,327 @@
+//! Typed decoding of LNMP text against a declared schema.
+//!
+//! A schema is compiled once into a lookup table indexed by field ID. Each
+//! record is then split with `validate::split_fields` and only the declared
+//! fields have their values converted, straight from the text, into typed
+//! cells. Fields the schema does not declare are skipped unparsed.
+
+use crate::validate;
+
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum Kind {
+    Int,
+    Float,
+    Bool,
+    Str,
+    IntArray,
+    FloatArray,
+    StrArray,
+    /// Canonical LNMP text of the value, e.g. a nested record
+    Raw,
+}
+
+const KINDS: [(&str, Kind); 8] = [
+    ("int", Kind::Int),
+    ("float", Kind::Float),
+    ("bool", Kind::Bool),
+    ("str", Kind::Str),
+    ("int[]", Kind::IntArray),
+    ("float[]", Kind::FloatArray),
+    ("str[]", Kind::StrArray),
+    ("raw", Kind::Raw),
+];
+
+impl Kind {
+    pub fn from_name(name: &str) -> Option<Kind> {
+        KINDS
+            .iter()
+            .find(|(n, _)| *n == name)
+            .map(|(_, kind)| *kind)
+    }
+
+    pub fn name(self) -> &'static str {
+        KINDS.iter().find(|(_, k)| *k == self).unwrap().0
+    }
+}
+
+#[derive(Clone, Debug)]
+pub struct Field {
+    pub fid: u16,
+    pub name: String,
+    pub kind: Kind,
+    pub required: bool,
+}
+
+#[derive(Debug, PartialEq)]
+pub enum Cell {
+    Missing,
+    Int(i64),
+    Float(f64),
+    Bool(bool),
+    Str(String),
+    Ints(Vec<i64>),
+    Floats(Vec<f64>),
+    Strs(Vec<String>),
+}
+
+const NO_SLOT: u16 = u16::MAX;
+
+pub struct Schema {
+    fields: Vec<Field>,
+    /// Slot of each field ID, or NO_SLOT; sized to the largest declared ID
+    slots: Vec<u16>,
+}
+
+impl Schema {
+    pub fn new(fields: Vec<Field>) -> Result<Schema, String> {
+        if fields.len() >= NO_SLOT as usize {
+            return Err(format!("Too many fields: {}", fields.len()));
+        }
+        let size = fields.iter().map(|f| f.fid as usize + 1).max().unwrap_or(0);
+        let mut slots = vec![NO_SLOT; size];
+        for (slot, field) in fields.iter().enumerate() {
+            if slots[field.fid as usize] != NO_SLOT {
+                return Err(format!("Duplicate field ID F{}", field.fid));
+            }
+            if fields[..slot].iter().any(|f| f.name == field.name) {
+                return Err(format!("Duplicate field name '{}'", field.name));
+            }
+            slots[field.fid as usize] = slot as u16;
+        }
+        Ok(Schema { fields, slots })
+    }
+
+    pub fn fields(&self) -> &[Field] {
+        &self.fields
+    }
+
+    pub fn declares(&self, fid: u16) -> bool {
+        matches!(self.slots.get(fid as usize), Some(&slot) if slot != NO_SLOT)
+    }
+
+    /// One line per field: `F<fid> <name>: <type>[?]`, `?` marking optional fields.
+    pub fn describe(&self) -> String {
+        self.fields
+            .iter()
+            .map(|f| {
+                let optional = if f.required { "" } else { "?" };
+                format!("F{} {}: {}{}\n", f.fid, f.name, f.kind.name(), optional)
+            })
+            .collect()
+    }
+
+    /// Decode one record's text into a cell per schema field.
+    pub fn decode(&self, text: &str) -> Result<Vec<Cell>, String> {
+        let spans = validate::split_fields(text.as_bytes()).map_err(|(code, offset)| {
+            format!("invalid LNMP text (status {}) at byte {}", code, offset)
+        })?;
+        let mut cells: Vec<Cell> = self.fields.iter().map(|_| Cell::Missing).collect();
+        for span in spans {
+            let slot = match self.slots.get(span.fid as usize) {
+                Some(&slot) if slot != NO_SLOT => slot as usize,
+                _ => continue,
+            };
+            let field = &self.fields[slot];
+            let value = &text[span.value];
+            cells[slot] = parse_cell(field.kind, value).ok_or_else(|| {
+                format!(
+                    "field '{}' (F{}): expected {}, got {}",
+                    field.name,
+                    field.fid,
+                    field.kind.name(),
+                    value
+                )
+            })?;
+        }
+        for (cell, field) in cells.iter().zip(&self.fields) {
+            if field.required && *cell == Cell::Missing {
+                return Err(format!(
+                    "missing required field '{}' (F{})",
+                    field.name, field.fid
+                ));
+            }
+        }
+        Ok(cells)
+    }
+}
+
+fn parse_bool(value: &str) -> Option<bool> {
+    match value {
+        "1" | "true" => Some(true),
+        "0" | "false" => Some(false),
+        _ => None,
+    }
+}
+
+/// A string scalar: quoted with escapes, or a bare token.
+fn parse_str(value: &str) -> Option<String> {
+    let body = match value.strip_prefix('"') {
+        Some(rest) => rest.strip_suffix('"')?,
+        None if value.starts_with(['[', '{']) => return None,
+        None => return Some(value.to_string()),
+    };
+    if !body.contains('\\') {
+        return Some(body.to_string());
+    }
+    let mut out = String::with_capacity(body.len());
+    let mut chars = body.chars();
+    while let Some(c) = chars.next() {
+        if c != '\\' {
+            out.push(c);
+            continue;
+        }
+        match chars.next()? {
+            'n' => out.push('\n'),
+            't' => out.push('\t'),
+            'r' => out.push('\r'),
+            other => out.push(other),
+        }
+    }
+    Some(out)
+}
+
+/// Top-level items of `[a, "b,c", d]`; None if the value is not a flat array.
+fn split_array(value: &str) -> Option<Vec<&str>> {
+    let body = value.strip_prefix('[')?.strip_suffix(']')?;
+    let mut items = Vec::new();
+    if body.trim().is_empty() {
+        return Some(items);
+    }
+    let bytes = body.as_bytes();
+    let (mut start, mut quoted, mut escaped) = (0, false, false);
+    for (i, &b) in bytes.iter().enumerate() {
+        if quoted {
+            match (escaped, b) {
+                (true, _) => escaped = false,
+                (false, b'\\') => escaped = true,
+                (false, b'"') => quoted = false,
+                _ => {}
+            }
+            continue;
+        }
+        match b {
+            b'"' => quoted = true,
+            b'[' | b'{' => return None,
+            b',' => {
+                items.push(body[start..i].trim());
+                start = i + 1;
+            }
+            _ => {}
+        }
+    }
+    items.push(body[start..].trim());
+    Some(items)
+}
+
+fn parse_cell(kind: Kind, value: &str) -> Option<Cell> {
+    Some(match kind {
+        Kind::Int => Cell::Int(value.parse().ok()?),
+        Kind::Float => Cell::Float(value.parse().ok()?),
+        Kind::Bool => Cell::Bool(parse_bool(value)?),
+        Kind::Str => Cell::Str(parse_str(value)?),
+        Kind::Raw => Cell::Str(value.to_string()),
+        Kind::IntArray => Cell::Ints(
+            split_array(value)?
+                .into_iter()
+                .map(|item| item.parse().ok())
+                .collect::<Option<_>>()?,
+        ),
+        Kind::FloatArray => Cell::Floats(
+            split_array(value)?
+                .into_iter()
+                .map(|item| item.parse().ok())
+                .collect::<Option<_>>()?,
+        ),
+        Kind::StrArray => Cell::Strs(
+            split_array(value)?
+                .into_iter()
+                .map(parse_str)
+                .collect::<Option<_>>()?,
+        ),
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn field(fid: u16, name: &str, kind: Kind, required: bool) -> Field {
+        Field {
+            fid,
+            name: name.to_string(),
+            kind,
+            required,
+        }
+    }
+
+    fn schema() -> Schema {
+        Schema::new(vec![
+            field(12, "user_id", Kind::Int, true),
+            field(7, "active", Kind::Bool, true),
+            field(3, "name", Kind::Str, false),
+            field(23, "roles", Kind::StrArray, false),
+            field(5, "scores", Kind::FloatArray, false),
+            field(50, "meta", Kind::Raw, false),
+        ])
+        .unwrap()
+    }
+
+    #[test]
+    fn decodes_typed_cells() {
+        let cells = schema()
+            .decode("F12=14532;F7=1;F3=\"a \\\"b\\\"\\n\";F23=[admin, \"x,y\"];F5=[1,2.5];F50={F1=1};F99=ignored")
+            .unwrap();
+        assert_eq!(
+            cells,
+            vec![
+                Cell::Int(14532),
+                Cell::Bool(true),
+                Cell::Str("a \"b\"\n".to_string()),
+                Cell::Strs(vec!["admin".to_string(), "x,y".to_string()]),
+                Cell::Floats(vec![1.0, 2.5]),
+                Cell::Str("{F1=1}".to_string()),
+            ]
+        );
+        let cells = schema().decode("F7=false\nF12=-1\nF23=[]").unwrap();
+        assert_eq!(cells[0], Cell::Int(-1));
+        assert_eq!(cells[2], Cell::Missing);
+        assert_eq!(cells[3], Cell::Strs(vec![]));
+    }
+
+    #[test]
+    fn declares_only_schema_fields() {
+        let schema = schema();
+        assert!(schema.declares(12) && schema.declares(50));
+        assert!(!schema.declares(1) && !schema.declares(99));
+    }
+
+    #[test]
+    fn reports_type_errors() {
+        let schema = schema();
+        let err = schema.decode("F12=1.5;F7=1").unwrap_err();
+        assert_eq!(err, "field 'user_id' (F12): expected int, got 1.5");
+        assert!(schema.decode("F12=1").unwrap_err().contains("'active'"));
+        assert!(schema.decode("F12=1;F7=2").is_err());
+        assert!(schema.decode("F12=1;F7=1;F3=[a]").is_err());
+        assert!(schema.decode("F12=1;F7=1;F5=[1,x]").is_err());
+        assert!(schema.decode("F12=1;F7=1;F23=[{F1=1}]").is_err());
+        assert!(schema.decode("F12=1;F7=").is_err());
+    }
+
+    #[test]
+    fn rejects_duplicate_fields() {
+        assert!(Schema::new(vec![
+            field(1, "a", Kind::Int, true),
+            field(1, "b", Kind::Int, true)
+        ])
+        .is_err());
+        assert!(Schema::new(vec![
+            field(1, "a", Kind::Int, true),
+            field(2, "a", Kind::Int, true)
+        ])
+        .is_err());
+        assert_eq!(Kind::from_name("str[]"), Some(Kind::StrArray));
+        assert_eq!(Kind::from_name("list"), None);
+        assert_eq!(schema().describe().lines().nth(2), Some("F3 name: str?"));
+    }
+}
@@ -0,0 +1,322 @@
+//! Incremental record framing for chunked LNMP text.
+//!
+//! `Framer` buffers the bytes fed to it and finds record boundaries with a
+//! small state machine (string, escape, comment, bracket depth) that is
+//! saved between chunks, so every byte is inspected exactly once no matter
+//! how the input is split. Completed records are handed out as byte slices
+//! for parsing; only the unfinished tail is kept.
+
+/// What ends a record.
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum Delimiter {
+    /// A newline outside strings and brackets.
+    Line,
+    /// An empty (whitespace-only) line, so records may span lines.
+    BlankLine,
+}
+
+/// The stream ended inside a string or an open bracket.
+pub const TRUNCATED: &str = "Stream ended inside an unterminated record";
+
+/// Record-boundary state machine, advanced one byte at a time.
+#[derive(Clone, Copy)]
+struct Scanner {
+    delimiter: Delimiter,
+    depth: u32,
+    string: bool,
+    escaped: bool,
+    comment: bool,
+    line_blank: bool,
+    content: bool,
+}
+
+impl Scanner {
+    fn new(delimiter: Delimiter) -> Self {
+        Scanner {
+            delimiter,
+            depth: 0,
+            string: false,
+            escaped: false,
+            comment: false,
+            line_blank: true,
+            content: false,
+        }
+    }
+
+    /// Advance over `b`; at a record delimiter returns whether the record
+    /// it ends has content (as opposed to only blanks or comments).
+    #[inline]
+    fn step(&mut self, b: u8) -> Option<bool> {
+        if self.string {
+            if self.escaped {
+                self.escaped = false;
+            } else if b == b'\\' {
+                self.escaped = true;
+            } else if b == b'"' {
+                self.string = false;
+            }
+            return None;
+        }
+        if self.comment && b != b'\n' {
+            return None;
+        }
+        match b {
+            b'\n' => {
+                self.comment = false;
+                if self.depth > 0 {
+                    return None;
+                }
+                let end = self.delimiter == Delimiter::Line || self.line_blank;
+                self.line_blank = true;
+                if end {
+                    return Some(std::mem::replace(&mut self.content, false));
+                }
+            }
+            b' ' | b'\t' | b'\r' | b';' => {}
+            b'#' if self.depth == 0 => self.comment = true,
+            _ => {
+                match b {
+                    b'"' => self.string = true,
+                    b'[' | b'{' => self.depth += 1,
+                    b']' | b'}' => self.depth = self.depth.saturating_sub(1),
+                    _ => {}
+                }
+                self.line_blank = false;
+                self.content = true;
+            }
+        }
+        None
+    }
+
+    fn truncated(&self) -> bool {
+        self.string || self.depth > 0
+    }
+}
+
+/// Byte ranges of the records in a complete input, delimiters excluded.
+///
+/// Records holding only blanks, separators or comments are skipped. A
+/// final record without a delimiter is included even when it is truncated,
+/// so that parsing it reports the error.
+pub fn spans(data: &[u8], delimiter: Delimiter) -> Vec<(usize, usize)> {
+    let mut scanner = Scanner::new(delimiter);
+    let mut out = Vec::new();
+    let mut start = 0;
+    for (i, &b) in data.iter().enumerate() {
+        if let Some(content) = scanner.step(b) {
+            if content {
+                out.push((start, i));
+            }
+            start = i + 1;
+        }
+    }
+    if scanner.content {
+        out.push((start, data.len()));
+    }
+    out
+}
+
+/// Offset just past the first record delimiter at or after `min`, or
+/// `data.len()` if the input ends first. `data` must start at a record
+/// boundary; the bytes before `min` are scanned but cannot end the cut.
+pub fn boundary(data: &[u8], delimiter: Delimiter, min: usize) -> usize {
+    let mut scanner = Scanner::new(delimiter);
+    for (i, &b) in data.iter().enumerate() {
+        if scanner.step(b).is_some() && i >= min {
+            return i + 1;
+        }
+    }
+    data.len()
+}
+
+pub struct Framer {
+    buf: Vec<u8>,
+    /// Start of the unfinished record in `buf`.
+    start: usize,
+    /// Bytes of `buf` already scanned.
+    pos: usize,
+    scanner: Scanner,
+    /// Drop the record being scanned instead of emitting it.
+    discarding: bool,
+}
+
+impl Framer {
+    pub fn new(delimiter: Delimiter) -> Self {
+        Framer {
+            buf: Vec::new(),
+            start: 0,
+            pos: 0,
+            scanner: Scanner::new(delimiter),
+            discarding: false,
+        }
+    }
+
+    /// Bytes buffered for the unfinished record.
+    pub fn pending(&self) -> usize {
+        self.buf.len() - self.start
+    }
+
+    /// Append a chunk and call `emit` with every record it completes.
+    ///
+    /// Records holding only blanks, separators or comments are skipped.
+    pub fn feed<F: FnMut(&[u8])>(&mut self, chunk: &[u8], mut emit: F) {
+        self.buf.extend_from_slice(chunk);
+
+        for i in self.pos..self.buf.len() {
+            if let Some(content) = self.scanner.step(self.buf[i]) {
+                if content && !self.discarding {
+                    emit(&self.buf[self.start..i]);
+                }
+                self.start = i + 1;
+                self.discarding = false;
+            }
+        }
+        self.pos = self.buf.len();
+        if self.discarding {
+            self.start = self.buf.len();
+        }
+
+        // What is left is the tail of this chunk (or an unfinished record
+        // that spans chunks, in which case nothing was consumed)
+        if self.start > 0 {
+            self.buf.drain(..self.start);
+            self.pos -= self.start;
+            self.start = 0;
+        }
+    }
+
+    /// Drop the unfinished record, along with the rest of it as it arrives.
+    ///
+    /// The scanning state is kept, so strings and brackets inside the
+    /// dropped bytes are still honoured and framing resumes after the
+    /// record's real end.
+    pub fn discard(&mut self) {
+        self.buf.truncate(self.start);
+        self.pos = self.start;
+        self.discarding = true;
+    }
+
+    /// End of input: return the final unterminated record, if any, and
+    /// reset the framer.
+    pub fn finish(&mut self) -> Result<Option<Vec<u8>>, &'static str> {
+        let scanner = self.scanner;
+        let discarding = self.discarding;
+        let tail = self.buf.split_off(self.start);
+        *self = Framer::new(scanner.delimiter);
+        if discarding {
+            Ok(None)
+        } else if scanner.truncated() {
+            Err(TRUNCATED)
+        } else if scanner.content {
+            Ok(Some(tail))
+        } else {
+            Ok(None)
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn frame(delimiter: Delimiter, chunks: &[&[u8]]) -> Vec<String> {
+        let mut framer = Framer::new(delimiter);
+        let mut out = Vec::new();
+        for chunk in chunks {
+            framer.feed(chunk, |record| {
+                out.push(String::from_utf8(record.to_vec()).unwrap())
+            });
+        }
+        if let Some(tail) = framer.finish().unwrap() {
+            out.push(String::from_utf8(tail).unwrap());
+        }
+        out
+    }
+
+    #[test]
+    fn splits_lines_across_any_chunking() {
+        let input = b"F1=1;F2=\"a\\\"\nb\"\nF3={F1=1\nF2=2}\n\n# note\nF4=[x,y]";
+        let expected = vec![
+            "F1=1;F2=\"a\\\"\nb\"".to_string(),
+            "F3={F1=1\nF2=2}".to_string(),
+            "F4=[x,y]".to_string(),
+        ];
+        assert_eq!(frame(Delimiter::Line, &[input]), expected);
+        for size in 1..input.len() {
+            let chunks: Vec<&[u8]> = input.chunks(size).collect();
+            assert_eq!(
+                frame(Delimiter::Line, &chunks),
+                expected,
+                "chunk size {}",
+                size
+            );
+        }
+    }
+
+    #[test]
+    fn blank_lines_delimit_multiline_records() {
+        let input: &[u8] = b"F1=1\nF2=2\n  \nF1=3\r\n\r\n\n\nF1=4 # \"x\n";
+        assert_eq!(
+            frame(Delimiter::BlankLine, &[input]),
+            vec!["F1=1\nF2=2\n  ", "F1=3\r\n\r", "F1=4 # \"x\n"]
+        );
+    }
+
+    #[test]
+    fn keeps_only_the_unfinished_tail() {
+        let mut framer = Framer::new(Delimiter::Line);
+        let mut count = 0;
+        framer.feed(b"F1=1\nF1=", |_| count += 1);
+        assert_eq!((count, framer.pending()), (1, 3));
+        framer.feed(b"2", |_| count += 1);
+        assert_eq!((count, framer.pending()), (1, 4));
+        framer.feed(b"\n", |record| assert_eq!(record, b"F1=2"));
+        assert_eq!(framer.pending(), 0);
+    }
+
+    #[test]
+    fn discards_the_rest_of_a_record_across_chunks() {
+        let mut framer = Framer::new(Delimiter::Line);
+        let mut out = Vec::new();
+        framer.feed(b"F1=1\nF2=\"long", |r| out.push(r.to_vec()));
+        framer.discard();
+        assert_eq!(framer.pending(), 0);
+        // The dropped record goes on with a newline inside its string and
+        // an unbalanced bracket, neither of which may end a record
+        framer.feed(b" [\nstill\" ;F3=[1,", |r| out.push(r.to_vec()));
+        assert_eq!(framer.pending(), 0);
+        framer.feed(b"2]\nF4=\"[\"\nF5=5", |r| out.push(r.to_vec()));
+        assert_eq!(framer.finish(), Ok(Some(b"F5=5".to_vec())));
+        assert_eq!(out, vec![b"F1=1".to_vec(), b"F4=\"[\"".to_vec()]);
+
+        framer.feed(b"F1=[", |_| panic!("no record expected"));
+        framer.discard();
+        assert_eq!(framer.finish(), Ok(None));
+    }
+
+    #[test]
+    fn spans_and_boundaries_follow_the_framer() {
+        let input: &[u8] = b"F1=\"a\nb\"\n\nF2={F1=1\n}\n# x\nF3=[1";
+        let records: Vec<&[u8]> = spans(input, Delimiter::Line)
+            .into_iter()
+            .map(|(start, end)| &input[start..end])
+            .collect();
+        assert_eq!(records, vec![&b"F1=\"a\nb\""[..], b"F2={F1=1\n}", b"F3=[1"]);
+        // Cuts never fall inside the string or the braces
+        assert_eq!(boundary(input, Delimiter::Line, 0), 9);
+        assert_eq!(boundary(input, Delimiter::Line, 4), 9);
+        assert_eq!(boundary(input, Delimiter::Line, 9), 10);
+        assert_eq!(boundary(input, Delimiter::Line, 10), 21);
+        assert_eq!(boundary(input, Delimiter::Line, 22), 25);
+        assert_eq!(boundary(input, Delimiter::Line, 26), input.len());
+    }
+
+    #[test]
+    fn reports_truncated_input() {
+        let mut framer = Framer::new(Delimiter::Line);
+        framer.feed(b"F1=\"open", |_| panic!("no record expected"));
+        assert_eq!(framer.finish(), Err(TRUNCATED));
+        assert_eq!(framer.pending(), 0);
+        assert_eq!(framer.finish(), Ok(None));
+    }
+}
@@ -0,0 +1,312 @@
+//! Adaptive embedding update encoding.
+//!
+//! An update is encoded as whichever of three forms is smallest while
+//! keeping every dimension of the decoded vector within `epsilon` of the
+//! target:
+//!
+//! ```text
+//! FULL   : tag 0 | dim varint | f32 LE * dim
+//! DELTA  : tag 1 | dim varint | count varint | index gaps varint * count
+//!                | f32 LE * count                 (new values, not differences)
+//! QUANT8 : tag 2 | dim varint | min f32 | step f32 | u8 * dim
+//! ```
+//!
+//! Sizes are computed arithmetically; only the chosen form is built.
+//! A delta is relative to the receiver's current vector and carries the
+//! dimensions that moved by more than `epsilon`. With `top_k`, it carries
+//! at most the `top_k` largest of those, and the rest stay off by more
+//! than `epsilon` until a later update picks them up.
+
+use crate::varint;
+
+pub const FULL: u8 = 0;
+pub const DELTA: u8 = 1;
+pub const QUANT8: u8 = 2;
+
+pub struct Update {
+    pub tag: u8,
+    pub data: Vec<u8>,
+    /// Largest absolute error of the decoded vector against the target.
+    pub error: f32,
+}
+
+fn varint_len(mut value: u64) -> usize {
+    let mut len = 1;
+    while value >= 0x80 {
+        value >>= 7;
+        len += 1;
+    }
+    len
+}
+
+fn max_error(a: &[f32], b: &[f32]) -> f32 {
+    a.iter()
+        .zip(b)
+        .map(|(x, y)| (x - y).abs())
+        .fold(0.0, f32::max)
+}
+
+fn header(tag: u8, dim: usize, capacity: usize) -> Vec<u8> {
+    let mut out = Vec::with_capacity(capacity);
+    out.push(tag);
+    varint::write(&mut out, dim as u64);
+    out
+}
+
+/// Linear 8-bit quantization: `(min, step, codes)`.
+fn quantize(target: &[f32]) -> (f32, f32, Vec<u8>) {
+    let min = target.iter().copied().fold(f32::INFINITY, f32::min);
+    let max = target.iter().copied().fold(f32::NEG_INFINITY, f32::max);
+    let step = if max > min { (max - min) / 255.0 } else { 0.0 };
+    let codes = target
+        .iter()
+        .map(|v| {
+            if step > 0.0 {
+                ((v - min) / step).round().clamp(0.0, 255.0) as u8
+            } else {
+                0
+            }
+        })
+        .collect();
+    (min, step, codes)
+}
+
+fn dequantize(min: f32, step: f32, codes: &[u8]) -> Vec<f32> {
+    codes.iter().map(|&q| min + f32::from(q) * step).collect()
+}
+
+/// Encode `target` for a receiver holding `reference` (None if it holds nothing).
+pub fn encode(
+    reference: Option<&[f32]>,
+    target: &[f32],
+    epsilon: f32,
+    top_k: Option<usize>,
+) -> Update {
+    let dim = target.len();
+    let head = 1 + varint_len(dim as u64);
+    let full_size = head + 4 * dim;
+
+    // (size, tag); FULL is always valid and exact
+    let mut best = (full_size, FULL);
+
+    let mut changed: Vec<usize> = Vec::new();
+    if let Some(reference) = reference.filter(|r| r.len() == dim) {
+        changed = (0..dim)
+            .filter(|&i| (target[i] - reference[i]).abs() > epsilon)
+            .collect();
+        if let Some(k) = top_k.filter(|&k| k < changed.len()) {
+            changed.sort_by(|&a, &b| {
+                let da = (target[a] - reference[a]).abs();
+                let db = (target[b] - reference[b]).abs();
+                db.total_cmp(&da).then(a.cmp(&b))
+            });
+            changed.truncate(k);
+            changed.sort_unstable();
+        }
+        let mut previous = 0;
+        let gaps: usize = changed
+            .iter()
+            .map(|&i| {
+                let gap = varint_len((i - previous) as u64);
+                previous = i;
+                gap
+            })
+            .sum();
+        let delta_size = head + varint_len(changed.len() as u64) + gaps + 4 * changed.len();
+        if delta_size < best.0 {
+            best = (delta_size, DELTA);
+        }
+    }
+
+    let quant_size = head + 8 + dim;
+    let mut quantized = None;
+    if quant_size < best.0 {
+        let (min, step, codes) = quantize(target);
+        if max_error(&dequantize(min, step, &codes), target) <= epsilon {
+            best = (quant_size, QUANT8);
+            quantized = Some((min, step, codes));
+        }
+    }
+
+    let mut data = header(best.1, dim, best.0);
+    let error = match best.1 {
+        DELTA => {
+            let reference = reference.unwrap();
+            varint::write(&mut data, changed.len() as u64);
+            let mut previous = 0;
+            for &i in &changed {
+                varint::write(&mut data, (i - previous) as u64);
+                previous = i;
+            }
+            for &i in &changed {
+                data.extend_from_slice(&target[i].to_le_bytes());
+            }
+            let mut decoded = reference.to_vec();
+            for &i in &changed {
+                decoded[i] = target[i];
+            }
+            max_error(&decoded, target)
+        }
+        QUANT8 => {
+            let (min, step, codes) = quantized.unwrap();
+            data.extend_from_slice(&min.to_le_bytes());
+            data.extend_from_slice(&step.to_le_bytes());
+            data.extend_from_slice(&codes);
+            max_error(&dequantize(min, step, &codes), target)
+        }
+        _ => {
+            for v in target {
+                data.extend_from_slice(&v.to_le_bytes());
+            }
+            0.0
+        }
+    };
+    Update {
+        tag: best.1,
+        data,
+        error,
+    }
+}
+
+fn read_f32(data: &[u8], pos: &mut usize) -> Result<f32, String> {
+    let bytes = data
+        .get(*pos..*pos + 4)
+        .ok_or_else(|| "Truncated embedding update".to_string())?;
+    *pos += 4;
+    Ok(f32::from_le_bytes(bytes.try_into().unwrap()))
+}
+
+/// Decode an update for a receiver holding `reference`.
+pub fn decode(reference: Option<&[f32]>, data: &[u8]) -> Result<Vec<f32>, String> {
+    let tag = *data
+        .first()
+        .ok_or_else(|| "Empty embedding update".to_string())?;
+    let mut pos = 1;
+    let dim = varint::read(data, &mut pos)? as usize;
+    // Each dimension takes at least one byte in FULL and QUANT8
+    if tag != DELTA && dim > data.len() {
+        return Err("Truncated embedding update".to_string());
+    }
+
+    let vector = match tag {
+        FULL => (0..dim)
+            .map(|_| read_f32(data, &mut pos))
+            .collect::<Result<_, _>>()?,
+        QUANT8 => {
+            let min = read_f32(data, &mut pos)?;
+            let step = read_f32(data, &mut pos)?;
+            let codes = data
+                .get(pos..pos + dim)
+                .ok_or_else(|| "Truncated embedding update".to_string())?;
+            pos += dim;
+            dequantize(min, step, codes)
+        }
+        DELTA => {
+            let mut vector = match reference {
+                Some(reference) if reference.len() == dim => reference.to_vec(),
+                Some(reference) => {
+                    return Err(format!(
+                        "Delta for {} dimensions applied to a vector of {}",
+                        dim,
+                        reference.len()
+                    ))
+                }
+                None => return Err("Delta update without a base vector".to_string()),
+            };
+            let count = varint::read(data, &mut pos)? as usize;
+            let mut indices = Vec::with_capacity(count.min(dim));
+            let mut index = 0usize;
+            for n in 0..count {
+                let gap = varint::read(data, &mut pos)? as usize;
+                index = index.saturating_add(gap);
+                if index >= dim || (n > 0 && gap == 0) {
+                    return Err("Invalid index in embedding delta".to_string());
+                }
+                indices.push(index);
+            }
+            for i in indices {
+                vector[i] = read_f32(data, &mut pos)?;
+            }
+            vector
+        }
+        _ => return Err(format!("Unknown embedding update tag {}", tag)),
+    };
+    if pos != data.len() {
+        return Err("Trailing bytes after embedding update".to_string());
+    }
+    Ok(vector)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn vector(dim: usize, seed: f32) -> Vec<f32> {
+        (0..dim).map(|i| ((i as f32 + seed) * 0.37).sin()).collect()
+    }
+
+    #[test]
+    fn first_update_is_full_or_quantized() {
+        let target = vector(256, 1.0);
+        let exact = encode(None, &target, 0.0, None);
+        assert_eq!(exact.tag, FULL);
+        assert_eq!(decode(None, &exact.data).unwrap(), target);
+
+        let lossy = encode(None, &target, 0.01, None);
+        assert_eq!(lossy.tag, QUANT8);
+        assert!(lossy.data.len() < exact.data.len() / 3);
+        let decoded = decode(None, &lossy.data).unwrap();
+        assert!(max_error(&decoded, &target) <= 0.01);
+        assert_eq!(lossy.error, max_error(&decoded, &target));
+    }
+
+    #[test]
+    fn sparse_changes_become_deltas() {
+        let base = vector(256, 1.0);
+        let mut target = base.clone();
+        target[3] += 0.5;
+        target[200] -= 0.25;
+        target[7] += 0.0001;
+
+        let update = encode(Some(&base), &target, 0.001, None);
+        assert_eq!(update.tag, DELTA);
+        let decoded = decode(Some(&base), &update.data).unwrap();
+        assert!(max_error(&decoded, &target) <= 0.001);
+        assert_eq!(decoded[3], target[3]);
+        assert_eq!(decoded[7], base[7]);
+    }
+
+    #[test]
+    fn dense_changes_fall_back_to_full() {
+        let base = vector(64, 1.0);
+        let target = vector(64, 2.0);
+        let update = encode(Some(&base), &target, 0.0, None);
+        assert_eq!(update.tag, FULL);
+        assert_eq!(update.error, 0.0);
+    }
+
+    #[test]
+    fn top_k_limits_delta() {
+        let base = vec![0.0; 100];
+        let mut target = base.clone();
+        for (i, v) in [(10, 0.1), (20, 0.5), (30, 0.3)] {
+            target[i] = v;
+        }
+        let update = encode(Some(&base), &target, 0.0, Some(2));
+        assert_eq!(update.tag, DELTA);
+        let decoded = decode(Some(&base), &update.data).unwrap();
+        assert_eq!((decoded[10], decoded[20], decoded[30]), (0.0, 0.5, 0.3));
+        assert_eq!(update.error, 0.1);
+    }
+
+    #[test]
+    fn rejects_invalid_updates() {
+        let base = vec![0.0; 4];
+        let update = encode(Some(&base), &[0.0, 1.0, 0.0, 0.0], 0.0, None);
+        assert!(decode(None, &update.data).is_err());
+        assert!(decode(Some(&[0.0; 3]), &update.data).is_err());
+        assert!(decode(Some(&base), &update.data[..update.data.len() - 1]).is_err());
+        assert!(decode(None, &[9, 0]).is_err());
+        assert!(decode(None, &[FULL, 0x80, 0x80, 0x80, 0x01]).is_err());
+    }
+}
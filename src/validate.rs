@@ -0,0 +1,409 @@
+//! Allocation-free syntax check for LNMP text.
+//!
+//! `validate` walks the input once and reports the first error as a status
+//! code plus the byte offset where it was found. It never builds a record,
+//! so it can be used to reject malformed payloads before paying for a full
+//! parse. `split_fields` reuses the same scanner to locate the top-level
+//! fields of a record without decoding their values.
+
+pub const OK: u8 = 0;
+pub const EMPTY: u8 = 1;
+pub const INVALID_UTF8: u8 = 2;
+pub const EXPECTED_FIELD: u8 = 3;
+pub const INVALID_FIELD_ID: u8 = 4;
+pub const INVALID_TYPE_HINT: u8 = 5;
+pub const EXPECTED_EQUALS: u8 = 6;
+pub const EXPECTED_VALUE: u8 = 7;
+pub const UNTERMINATED_STRING: u8 = 8;
+pub const UNBALANCED_BRACKET: u8 = 9;
+pub const UNEXPECTED_CHARACTER: u8 = 10;
+pub const TOO_DEEP: u8 = 11;
+pub const TYPE_MISMATCH: u8 = 12;
+pub const PARSE_ERROR: u8 = 255;
+
+const MAX_DEPTH: usize = 64;
+
+/// Type hints known to the parser.
+const HINTS: [&[u8]; 11] = [
+    b"i", b"f", b"b", b"s", b"sa", b"ia", b"fa", b"ba", b"r", b"ra", b"v",
+];
+
+fn is_int(token: &[u8]) -> bool {
+    let digits = token.strip_prefix(b"-").unwrap_or(token);
+    !digits.is_empty() && digits.iter().all(u8::is_ascii_digit)
+}
+
+fn is_float(token: &[u8]) -> bool {
+    let (mantissa, exponent) = match token.iter().position(|&c| c == b'e' || c == b'E') {
+        Some(at) => (&token[..at], Some(&token[at + 1..])),
+        None => (token, None),
+    };
+    let mantissa = mantissa.strip_prefix(b"-").unwrap_or(mantissa);
+    let (whole, fraction) = match mantissa.iter().position(|&c| c == b'.') {
+        Some(at) => (&mantissa[..at], &mantissa[at + 1..]),
+        None => (mantissa, &b""[..]),
+    };
+    let digits = |part: &[u8]| part.iter().all(u8::is_ascii_digit);
+    !whole.is_empty()
+        && digits(whole)
+        && digits(fraction)
+        && exponent.map_or(true, |e| is_int(e.strip_prefix(b"+").unwrap_or(e)))
+}
+
+/// Whether a value's shape fits its type hint.
+fn hint_accepts(hint: &[u8], value: &[u8]) -> bool {
+    match hint {
+        b"i" => is_int(value),
+        b"f" => is_float(value),
+        b"b" => matches!(value, b"0" | b"1" | b"true" | b"false"),
+        b"s" => !matches!(value.first(), Some(b'[' | b'{')),
+        b"r" => value.first() == Some(&b'{'),
+        b"sa" | b"ia" | b"fa" | b"ba" | b"ra" => value.first() == Some(&b'['),
+        _ => true,
+    }
+}
+
+type ScanResult = Result<(), (u8, usize)>;
+
+/// Byte ranges of one top-level field: `F<fid>[:<hint>]=<value>`.
+#[derive(Debug, PartialEq, Eq)]
+pub struct FieldSpan {
+    pub fid: u16,
+    pub hint: std::ops::Range<usize>,
+    pub value: std::ops::Range<usize>,
+}
+
+/// Validate raw bytes, checking UTF-8 first.
+pub fn validate_bytes(data: &[u8]) -> (u8, usize) {
+    match std::str::from_utf8(data) {
+        Ok(_) => validate(data),
+        Err(e) => (INVALID_UTF8, e.valid_up_to()),
+    }
+}
+
+/// Validate UTF-8 LNMP text, returning `(status, byte offset)`.
+pub fn validate(data: &[u8]) -> (u8, usize) {
+    if data.iter().all(|b| b.is_ascii_whitespace() || *b == b';') {
+        return (EMPTY, 0);
+    }
+    let mut scanner = Scanner { data, pos: 0 };
+    match scanner.record(0, None, None) {
+        Ok(()) => (OK, 0),
+        Err(err) => err,
+    }
+}
+
+/// Locate the top-level fields of UTF-8 LNMP text, in order of appearance.
+pub fn split_fields(data: &[u8]) -> Result<Vec<FieldSpan>, (u8, usize)> {
+    let mut spans = Vec::new();
+    let mut scanner = Scanner { data, pos: 0 };
+    scanner.record(0, None, Some(&mut spans))?;
+    Ok(spans)
+}
+
+struct Scanner<'a> {
+    data: &'a [u8],
+    pos: usize,
+}
+
+impl Scanner<'_> {
+    fn peek(&self) -> Option<u8> {
+        self.data.get(self.pos).copied()
+    }
+
+    fn skip_blanks(&mut self) {
+        while let Some(b' ' | b'\t' | b'\r') = self.peek() {
+            self.pos += 1;
+        }
+    }
+
+    fn skip_until_separator(&mut self) {
+        while let Some(c) = self.peek() {
+            if c == b';' || c == b'\n' {
+                break;
+            }
+            self.pos += 1;
+        }
+    }
+
+    /// Fields separated by `;` or newlines, up to EOF or `closing`.
+    fn record(
+        &mut self,
+        depth: usize,
+        closing: Option<u8>,
+        mut spans: Option<&mut Vec<FieldSpan>>,
+    ) -> ScanResult {
+        loop {
+            while let Some(b' ' | b'\t' | b'\r' | b'\n' | b';') = self.peek() {
+                self.pos += 1;
+            }
+            let c = match self.peek() {
+                None if closing.is_none() => return Ok(()),
+                None => return Err((UNBALANCED_BRACKET, self.pos)),
+                Some(c) => c,
+            };
+            if Some(c) == closing {
+                return Ok(());
+            }
+            if c == b'#' && closing.is_none() {
+                // Comment line
+                self.skip_until_separator();
+                continue;
+            }
+
+            let span = self.field(depth)?;
+            if let Some(spans) = spans.as_deref_mut() {
+                spans.push(span);
+            }
+
+            self.skip_blanks();
+            match self.peek() {
+                None | Some(b';' | b'\n') => {}
+                Some(c) if Some(c) == closing => {}
+                // Trailing checksum / comment
+                Some(b'#') => self.skip_until_separator(),
+                Some(_) => return Err((UNEXPECTED_CHARACTER, self.pos)),
+            }
+        }
+    }
+
+    /// `F<id>[:<type>]=<value>`
+    fn field(&mut self, depth: usize) -> Result<FieldSpan, (u8, usize)> {
+        if self.peek() != Some(b'F') {
+            return Err((EXPECTED_FIELD, self.pos));
+        }
+        self.pos += 1;
+
+        let start = self.pos;
+        let mut fid: u32 = 0;
+        while let Some(c @ b'0'..=b'9') = self.peek() {
+            fid = fid * 10 + u32::from(c - b'0');
+            if fid > u32::from(u16::MAX) {
+                return Err((INVALID_FIELD_ID, start));
+            }
+            self.pos += 1;
+        }
+        if self.pos == start {
+            return Err((INVALID_FIELD_ID, start));
+        }
+
+        let mut hint = self.pos..self.pos;
+        if self.peek() == Some(b':') {
+            self.pos += 1;
+            let start = self.pos;
+            while let Some(b'a'..=b'z' | b'A'..=b'Z') = self.peek() {
+                self.pos += 1;
+            }
+            if !HINTS.contains(&&self.data[start..self.pos]) {
+                return Err((INVALID_TYPE_HINT, start));
+            }
+            hint = start..self.pos;
+        }
+
+        self.skip_blanks();
+        if self.peek() != Some(b'=') {
+            return Err((EXPECTED_EQUALS, self.pos));
+        }
+        self.pos += 1;
+        self.skip_blanks();
+        let start = self.pos;
+        self.value(depth)?;
+        let end = self.pos;
+        if !hint.is_empty() && !hint_accepts(&self.data[hint.clone()], &self.data[start..end]) {
+            return Err((TYPE_MISMATCH, start));
+        }
+        Ok(FieldSpan {
+            fid: fid as u16,
+            hint,
+            value: start..end,
+        })
+    }
+
+    fn value(&mut self, depth: usize) -> ScanResult {
+        match self.peek() {
+            None | Some(b';' | b'\n' | b'#') => Err((EXPECTED_VALUE, self.pos)),
+            Some(b'"') => self.string(),
+            Some(b'[') => self.array(depth + 1),
+            Some(b'{') => self.nested(depth + 1),
+            Some(_) => self.bare(false),
+        }
+    }
+
+    fn string(&mut self) -> ScanResult {
+        let start = self.pos;
+        self.pos += 1;
+        loop {
+            match self.peek() {
+                None => return Err((UNTERMINATED_STRING, start)),
+                Some(b'\\') => self.pos += 2,
+                Some(b'"') => {
+                    self.pos += 1;
+                    return Ok(());
+                }
+                Some(_) => self.pos += 1,
+            }
+        }
+    }
+
+    /// Unquoted scalar: a single token, so blanks end it; inside arrays
+    /// `,` also ends it.
+    fn bare(&mut self, in_array: bool) -> ScanResult {
+        let start = self.pos;
+        while let Some(c) = self.peek() {
+            match c {
+                b';' | b'\n' | b'#' | b']' | b'}' | b' ' | b'\t' | b'\r' => break,
+                b',' if in_array => break,
+                b'"' | b'[' | b'{' | b'=' => return Err((UNEXPECTED_CHARACTER, self.pos)),
+                _ => self.pos += 1,
+            }
+        }
+        if self.pos == start {
+            return Err((EXPECTED_VALUE, start));
+        }
+        Ok(())
+    }
+
+    fn nested(&mut self, depth: usize) -> ScanResult {
+        if depth > MAX_DEPTH {
+            return Err((TOO_DEEP, self.pos));
+        }
+        let start = self.pos;
+        self.pos += 1;
+        self.record(depth, Some(b'}'), None)
+            .map_err(|(code, pos)| match code {
+                UNBALANCED_BRACKET => (code, start),
+                _ => (code, pos),
+            })?;
+        self.pos += 1;
+        Ok(())
+    }
+
+    fn array(&mut self, depth: usize) -> ScanResult {
+        if depth > MAX_DEPTH {
+            return Err((TOO_DEEP, self.pos));
+        }
+        let start = self.pos;
+        self.pos += 1;
+        loop {
+            while let Some(b' ' | b'\t' | b'\r' | b'\n') = self.peek() {
+                self.pos += 1;
+            }
+            match self.peek() {
+                None => return Err((UNBALANCED_BRACKET, start)),
+                Some(b']') => {
+                    self.pos += 1;
+                    return Ok(());
+                }
+                Some(b'"') => self.string()?,
+                Some(b'{') => self.nested(depth + 1)?,
+                Some(_) => self.bare(true)?,
+            }
+            self.skip_blanks();
+            match self.peek() {
+                Some(b',') => self.pos += 1,
+                Some(b']') => {}
+                None => return Err((UNBALANCED_BRACKET, start)),
+                Some(_) => return Err((UNEXPECTED_CHARACTER, self.pos)),
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn accepts_valid_records() {
+        for text in [
+            "F12=14532",
+            "F12=14532;F7=1",
+            "F12=14532\nF7=1\n",
+            "F12:i=14532;F3:s=\"hello world\"",
+            "F23=[admin,developer]",
+            "F23=[\"a,b\", \"c\"]",
+            "F23=[]",
+            "F50={F1=1;F2=[x,y]}",
+            "F60=[{F1=1},{F1=2}]",
+            "F3=\"escaped \\\" quote\"",
+            "F1=-3.5e2;F2=true",
+            "F1:f=-3.5e+2;F2:b=1;F3:i=-7;F4:sa=[a,b];F5:r={F1=1};F6:ra=[{F1=1}]",
+            "F1=1 ;F2=x\t",
+            "# comment\nF1=1",
+            "F1=1#36AAE667",
+        ] {
+            assert_eq!(validate(text.as_bytes()), (OK, 0), "{}", text);
+        }
+    }
+
+    #[test]
+    fn reports_error_positions() {
+        let cases: [(&str, (u8, usize)); 18] = [
+            ("", (EMPTY, 0)),
+            (" ; ", (EMPTY, 0)),
+            ("invalid format without equals", (EXPECTED_FIELD, 0)),
+            ("F12=1;X7=1", (EXPECTED_FIELD, 6)),
+            ("F=1", (INVALID_FIELD_ID, 1)),
+            ("F70000=1", (INVALID_FIELD_ID, 1)),
+            ("F1:=1", (INVALID_TYPE_HINT, 3)),
+            ("F12 14532", (EXPECTED_EQUALS, 4)),
+            ("F12=;F7=1", (EXPECTED_VALUE, 4)),
+            ("F1=1;F3=\"open", (UNTERMINATED_STRING, 8)),
+            ("F23=[a,b", (UNBALANCED_BRACKET, 4)),
+            ("F1=\"a\"b", (UNEXPECTED_CHARACTER, 6)),
+            ("F1:q=1", (INVALID_TYPE_HINT, 3)),
+            ("F1:integer=1", (INVALID_TYPE_HINT, 3)),
+            ("F1=hello world", (UNEXPECTED_CHARACTER, 9)),
+            ("F1=[a b]", (UNEXPECTED_CHARACTER, 6)),
+            ("F1=a=b", (UNEXPECTED_CHARACTER, 4)),
+            ("F1:i=1.5", (TYPE_MISMATCH, 5)),
+        ];
+        for (text, expected) in cases {
+            assert_eq!(validate(text.as_bytes()), expected, "{}", text);
+        }
+    }
+
+    #[test]
+    fn rejects_unbalanced_nesting() {
+        assert_eq!(validate(b"F50={F1=1"), (UNBALANCED_BRACKET, 4));
+        assert_eq!(validate(b"F1=1]"), (UNEXPECTED_CHARACTER, 4));
+    }
+
+    #[test]
+    fn limits_depth() {
+        let text = "F1={".repeat(MAX_DEPTH + 1);
+        assert_eq!(validate(text.as_bytes()).0, TOO_DEEP);
+    }
+
+    #[test]
+    fn splits_top_level_fields() {
+        let text = "F12=14532;F3:s=\"a;b\" ;F50={F1=1;F2=[x,y]}\nF7=1#36AAE667";
+        let spans = split_fields(text.as_bytes()).unwrap();
+        let parts: Vec<(u16, &str, &str)> = spans
+            .iter()
+            .map(|span| {
+                (
+                    span.fid,
+                    &text[span.hint.clone()],
+                    &text[span.value.clone()],
+                )
+            })
+            .collect();
+        assert_eq!(
+            parts,
+            vec![
+                (12, "", "14532"),
+                (3, "s", "\"a;b\""),
+                (50, "", "{F1=1;F2=[x,y]}"),
+                (7, "", "1"),
+            ]
+        );
+        assert_eq!(split_fields(b"F1=1;X"), Err((EXPECTED_FIELD, 5)));
+    }
+
+    #[test]
+    fn checks_utf8() {
+        assert_eq!(validate_bytes(b"F1=\xff"), (INVALID_UTF8, 3));
+        assert_eq!(validate_bytes("F1=\"ü\"".as_bytes()), (OK, 0));
+    }
+}
@@ -0,0 +1,43 @@
+//! LEB128 varints shared by the binary frame formats.
+
+pub fn write(out: &mut Vec<u8>, mut value: u64) {
+    while value >= 0x80 {
+        out.push((value as u8) | 0x80);
+        value >>= 7;
+    }
+    out.push(value as u8);
+}
+
+/// Read a varint at `pos`, advancing it.
+pub fn read(data: &[u8], pos: &mut usize) -> Result<u64, String> {
+    let mut value = 0u64;
+    for shift in (0..64).step_by(7) {
+        let byte = *data
+            .get(*pos)
+            .ok_or_else(|| "Truncated varint".to_string())?;
+        *pos += 1;
+        value |= u64::from(byte & 0x7F) << shift;
+        if byte & 0x80 == 0 {
+            return Ok(value);
+        }
+    }
+    Err("Invalid varint".to_string())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn roundtrips_values() {
+        for value in [0, 1, 127, 128, 300, u64::from(u32::MAX), u64::MAX] {
+            let mut out = Vec::new();
+            write(&mut out, value);
+            let mut pos = 0;
+            assert_eq!(read(&out, &mut pos), Ok(value));
+            assert_eq!(pos, out.len());
+        }
+        assert!(read(&[0x80], &mut 0).is_err());
+        assert!(read(&[0xFF; 11], &mut 0).is_err());
+    }
+}
@@ -0,0 +1,11 @@
+"""Shared test helpers."""
+
+
+class FakeClock:
+    """Callable clock returning `now`, advanced by assigning to it."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
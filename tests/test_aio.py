@@ -0,0 +1,200 @@
+"""Unit tests for the lnmp.aio stream router."""
+
+import asyncio
+import time
+import unittest
+import lnmp
+from helpers import FakeClock
+from lnmp.aio import QueueClosed, RateLimitedQueue, StreamRouter, TokenBucket
+
+
+def envelope(value):
+    return lnmp.envelope.wrap(lnmp.core.parse(f"F1={value}"), source="test")
+
+
+def values(envelopes):
+    return [env.record.encode() for env in envelopes]
+
+
+async def stream(envelopes):
+    for env in envelopes:
+        yield env
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test the token bucket rate limiter."""
+
+    def test_burst_then_rate(self):
+        """Test that a full bucket allows a burst and then refills at the rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(10, burst=2, clock=clock)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        clock.now = 0.1
+        self.assertTrue(bucket.try_acquire())
+        clock.now = 10.0
+        self.assertEqual(bucket.tokens, 2)
+
+    def test_reserve_goes_into_debt(self):
+        """Test that reservations queue up behind each other."""
+        bucket = TokenBucket(10, burst=1, clock=FakeClock())
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1)
+        self.assertAlmostEqual(bucket.reserve(), 0.2)
+
+    def test_invalid_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+        with self.assertRaises(ValueError):
+            TokenBucket(5, burst=0.5)
+
+
+class TestRateLimitedQueue(unittest.TestCase):
+    """Test queue policies, rate limiting and closing."""
+
+    def fill(self, queue, count):
+        async def run():
+            dropped = [await queue.put(envelope(i), score=i / count) for i in range(count)]
+            queue.close()
+            return dropped, [env async for env in queue]
+
+        return asyncio.run(run())
+
+    def test_drop_policies(self):
+        """Test drop_newest, drop_oldest and shed on a full queue."""
+        queue = RateLimitedQueue(3, policy="drop_newest")
+        dropped, kept = self.fill(queue, 5)
+        self.assertEqual(values(kept), ["F1=0", "F1=1", "F1=2"])
+        self.assertEqual(values(d for d in dropped if d is not None), ["F1=3", "F1=4"])
+
+        queue = RateLimitedQueue(3, policy="drop_oldest")
+        _, kept = self.fill(queue, 5)
+        self.assertEqual(values(kept), ["F1=2", "F1=3", "F1=4"])
+
+        # Shedding keeps the highest scores and releases them best first
+        queue = RateLimitedQueue(3, policy="shed")
+        _, kept = self.fill(queue, 5)
+        self.assertEqual(values(kept), ["F1=4", "F1=3", "F1=2"])
+
+        stats = queue.stats()
+        self.assertEqual(
+            {k: stats[k] for k in ("depth", "high_water", "enqueued", "dequeued", "dropped")},
+            {"depth": 0, "high_water": 3, "enqueued": 5, "dequeued": 3, "dropped": 2},
+        )
+
+    def test_block_applies_backpressure(self):
+        """Test that put() waits for space on a full "block" queue."""
+        async def run():
+            queue = RateLimitedQueue(2)
+            await queue.put(envelope(1))
+            await queue.put(envelope(2))
+            blocked = asyncio.ensure_future(queue.put(envelope(3)))
+            await asyncio.sleep(0.01)
+            self.assertFalse(blocked.done())
+            self.assertEqual(values([await queue.get()]), ["F1=1"])
+            await blocked
+            self.assertEqual(len(queue), 2)
+            self.assertGreater(queue.stats()["blocked_s"], 0.0)
+
+        asyncio.run(run())
+
+    def test_rate_limit(self):
+        """Test that get() releases at most burst + rate * elapsed envelopes."""
+        async def run():
+            queue = RateLimitedQueue(100, rate=200, burst=5)
+            for i in range(25):
+                await queue.put(envelope(i))
+            started = time.monotonic()
+            for _ in range(25):
+                await queue.get()
+            return time.monotonic() - started, queue.stats()["throttled_s"]
+
+        elapsed, throttled = asyncio.run(run())
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertGreater(throttled, 0.05)
+
+    def test_close(self):
+        """Test that close() wakes waiting consumers and rejects producers."""
+        async def run():
+            queue = RateLimitedQueue(2)
+            waiting = asyncio.ensure_future(queue.get())
+            await asyncio.sleep(0)
+            queue.close()
+            with self.assertRaises(QueueClosed):
+                await waiting
+            with self.assertRaises(QueueClosed):
+                await queue.put(envelope(1))
+
+        asyncio.run(run())
+
+    def test_cancelled_getter_passes_wakeup(self):
+        """Test that a cancelled consumer does not swallow an envelope."""
+        async def run():
+            queue = RateLimitedQueue(2)
+            first = asyncio.ensure_future(queue.get())
+            second = asyncio.ensure_future(queue.get())
+            await asyncio.sleep(0)
+            await queue.put(envelope(1))
+            first.cancel()
+            self.assertEqual(values([await second]), ["F1=1"])
+
+        asyncio.run(run())
+
+    def test_invalid_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            RateLimitedQueue(0)
+        with self.assertRaises(ValueError):
+            RateLimitedQueue(policy="lifo")
+        with self.assertRaises(ValueError):
+            RateLimitedQueue(rate=-1)
+
+
+class TestStreamRouter(unittest.TestCase):
+    """Test routing a stream into per-decision queues."""
+
+    def route(self, envelopes, **kwargs):
+        queues = {
+            name: RateLimitedQueue(1000)
+            for name in ("SendToLLM", "ProcessLocally")
+        }
+        router = StreamRouter(queues, **kwargs)
+
+        async def drain(queue):
+            return [env async for env in queue]
+
+        async def run():
+            _, *drained = await asyncio.gather(router.run(stream(envelopes)), *(drain(q) for q in queues.values()))
+            return dict(zip(queues, drained))
+
+        return router, asyncio.run(run())
+
+    def test_routes_by_native_decision(self):
+        """Test that every envelope lands in the queue for its decision."""
+        envelopes = [envelope(i) for i in range(50)]
+        router, drained = self.route(envelopes)
+        for name, routed in drained.items():
+            for env in routed:
+                self.assertEqual(lnmp.net.routing_decide(env).name, name)
+        self.assertEqual(sum(map(len, drained.values())) + router.unrouted, 50)
+        stats = router.stats()
+        self.assertEqual(stats["received"], 50)
+        self.assertEqual(stats["queues"]["SendToLLM"]["dequeued"], len(drained["SendToLLM"]))
+
+    def test_cache_and_decision_keys(self):
+        """Test routing through a RoutingCache and RoutingDecision keys."""
+        cache = lnmp.net.RoutingCache()
+        router, drained = self.route([envelope(1)] * 10, cache=cache)
+        self.assertEqual(sum(map(len, drained.values())) + router.unrouted, 10)
+        self.assertGreaterEqual(cache.hits, 9)
+
+        router = StreamRouter({lnmp.net.RoutingDecision.SendToLLM: RateLimitedQueue()})
+        self.assertEqual(list(router.queues), ["SendToLLM"])
+        with self.assertRaises(ValueError):
+            StreamRouter({"Later": RateLimitedQueue()})
+
+
+if __name__ == '__main__':
+    unittest.main()
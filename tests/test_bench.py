@@ -0,0 +1,124 @@
+"""Unit tests for the lnmp.bench load-testing tools."""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from lnmp import core, llm
+from lnmp.bench import replay
+
+
+class TestReplay(unittest.TestCase):
+    """Test trace capture and replay."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = os.path.join(self.tmp.name, "traffic.lnmpr")
+        with replay.capture(self.archive) as recorder:
+            for i in range(20):
+                llm.normalize_and_route(f'F1={i};F2="event {i}"', "api", trace_id=f"t{i}", threshold=0.5)
+                time.sleep(0.001)
+        self.recorder = recorder
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_capture_roundtrip(self):
+        """Test that captured envelopes, thresholds and timings load back."""
+        self.assertIsNone(llm._recorder)
+        self.assertEqual(self.recorder.count, 20)
+        entries = replay.load(self.archive)
+        self.assertEqual(len(entries), 20)
+        self.assertEqual(entries[0].offset_ns, 0)
+        self.assertEqual(sorted(e.offset_ns for e in entries), [e.offset_ns for e in entries])
+        self.assertGreater(entries[-1].offset_ns, 19 * 1_000_000)
+        self.assertEqual(entries[3].threshold, 0.5)
+        self.assertEqual(entries[3].envelope.source, "api")
+        self.assertEqual(entries[3].envelope.trace_id, "t3")
+        self.assertEqual(entries[3].envelope.record.encode(), core.parse('F1=3;F2="event 3"').encode())
+
+        with open(self.archive, "rb") as f:
+            data = f.read()
+        with self.assertRaises(ValueError):
+            replay.load(io.BytesIO(data[:-3]))
+        with self.assertRaises(ValueError):
+            replay.load(io.BytesIO(b"nope" + data[4:]))
+
+    def test_threaded_capture(self):
+        """Test that envelopes routed from many threads keep ordered offsets."""
+        archive = os.path.join(self.tmp.name, "threaded.lnmpr")
+
+        def route(worker):
+            for i in range(50):
+                llm.normalize_and_route(f"F1={worker};F2={i}", "api", threshold=0.5)
+
+        with replay.capture(archive) as recorder:
+            threads = [threading.Thread(target=route, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(recorder.count, 400)
+        offsets = [e.offset_ns for e in replay.load(archive)]
+        self.assertEqual(len(offsets), 400)
+        self.assertEqual(offsets[0], 0)
+        self.assertEqual(sorted(offsets), offsets)
+
+    def test_replay_sdk(self):
+        """Test recorded-speed, accelerated and constant-rate replay."""
+        entries = replay.load(self.archive)
+        report = replay.replay(entries, speed=1.0)
+        self.assertEqual((report.requests, report.errors), (20, 0))
+        self.assertGreaterEqual(report.duration_s, entries[-1].offset_ns / 1e9)
+
+        report = replay.replay(entries, rate=2000, limit=50, concurrency=2)
+        self.assertEqual(report.requests, 50)
+        self.assertAlmostEqual(report.offered_rate, 2000 * 50 / 49, delta=1)
+        for name in ("p50", "p90", "p99", "p99.9", "max"):
+            self.assertGreaterEqual(report.response_us[name], report.service_us[name])
+        self.assertIn("CO-corrected", str(report))
+        self.assertEqual(json.loads(json.dumps(report.to_dict()))["requests"], 50)
+
+        with self.assertRaises(ValueError):
+            replay.replay(entries, rate=0)
+        with self.assertRaises(ValueError):
+            replay.replay([])
+
+    def test_coordinated_omission(self):
+        """Test that a stalled target inflates response time, not service time."""
+        entries = replay.load(self.archive)
+        calls = []
+
+        def target(envelope):
+            calls.append(envelope.trace_id)
+            if len(calls) == 1:
+                time.sleep(0.05)
+
+        report = replay.replay(entries, target, rate=1000)
+        self.assertEqual(calls, [f"t{i}" for i in range(20)])
+        # Every request queued behind the 50ms stall, but ran in microseconds
+        self.assertLess(report.service_us["p50"], 10_000)
+        self.assertGreater(report.response_us["p50"], 25_000)
+        self.assertGreater(report.max_lag_us, 40_000)
+
+    def test_stub_server(self):
+        """Test replay over HTTP against the stub endpoint."""
+        entries = replay.load(self.archive)
+        with replay.StubServer(route=True) as stub:
+            report = replay.replay(entries, stub.url, speed=float("inf"), concurrency=2)
+            self.assertEqual(stub.requests, 20)
+        self.assertEqual((report.requests, report.errors), (20, 0))
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            status = replay.main([self.archive, "--stub", "--rate", "5000", "--json"])
+        self.assertEqual(status, 0)
+        self.assertEqual(json.loads(out.getvalue())["errors"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
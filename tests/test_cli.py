@@ -0,0 +1,114 @@
+"""Unit tests for the lnmp command-line tool."""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import lnmp
+from lnmp import cli
+
+
+class TestCli(unittest.TestCase):
+    """Test python -m lnmp subcommands."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.text = self.path("in.lnmp")
+        with open(self.text, "w") as f:
+            for i in range(300):
+                f.write(f'F1={i};F2="name {i}"' + (";F3=[a,b]\n" if i % 3 == 0 else "\n"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            status = cli.main([*argv, "--chunk-size", "1000"])
+        return status, out.getvalue()
+
+    def test_convert_roundtrip(self):
+        """Test text -> binary -> text across chunks and processes."""
+        binary, text = self.path("out.lnmpb"), self.path("back.lnmp")
+        self.assertEqual(self.run_cli("convert", self.text, "-o", binary, "--to", "binary", "-j", "2")[0], 0)
+        self.assertEqual(cli.detect_format(binary), "binary")
+        self.assertGreater(len(list(cli.iter_chunks(binary, "binary", chunk_size=1000))), 1)
+        self.assertEqual(self.run_cli("convert", binary, "-o", text, "--to", "text", "-j", "1")[0], 0)
+        with open(self.text) as expected, open(text) as actual:
+            self.assertEqual(
+                [lnmp.core.parse(line).encode() for line in expected],
+                [lnmp.core.parse(line).encode() for line in actual],
+            )
+
+    def test_chunks_end_at_record_boundaries(self):
+        """Test that text chunks cover the file and end on newlines."""
+        chunks = list(cli.iter_chunks(self.text, "text", chunk_size=1000))
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], os.path.getsize(self.text))
+        with open(self.text, "rb") as f:
+            data = f.read()
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[end - 1:end], b"\n")
+
+    def test_validate(self):
+        """Test error reporting and the exit status."""
+        bad = self.path("bad.lnmp")
+        with open(bad, "w") as f:
+            f.write("F1=1\nF1 2\nF2=3\n")
+        status, out = self.run_cli("validate", self.text, bad, "--json")
+        self.assertEqual(status, 1)
+        summary = json.loads(out)
+        self.assertEqual((summary["records"], summary["invalid"]), (303, 1))
+        self.assertEqual(summary["errors"], [{"file": bad, "offset": 8, "status": "EXPECTED_EQUALS"}])
+        self.assertEqual(self.run_cli("validate", self.text)[0], 0)
+
+        status, _ = self.run_cli("convert", bad, "-o", self.path("x"), "--to", "text")
+        self.assertEqual(status, 1)
+        status, _ = self.run_cli("convert", bad, "-o", self.path("x"), "--to", "text", "--skip-invalid")
+        self.assertEqual(status, 0)
+
+    def test_newlines_inside_records(self):
+        """Test that newlines in strings and brackets neither cut chunks nor split records."""
+        multi = self.path("multi.lnmp")
+        with open(multi, "w") as f:
+            for i in range(100):
+                f.write(f'F1={i};F2="line one\nline two"\nF3={{F1=1\nF2=2}}\n')
+        with open(multi, "rb") as f:
+            data = f.read()
+        chunks = list(cli.iter_chunks(multi, "text", chunk_size=100))
+        self.assertGreater(len(chunks), 1)
+        for _, end in chunks:
+            self.assertIn(data[end - 2:end], (b'"\n', b"}\n"))
+
+        status, out = self.run_cli("validate", multi, "--json")
+        self.assertEqual(status, 0)
+        self.assertEqual((json.loads(out)["records"], json.loads(out)["invalid"]), (200, 0))
+        status, out = self.run_cli("stats", multi, "--json", "-j", "2")
+        self.assertEqual(json.loads(out)["records"], 200)
+
+    def test_stats_and_score(self):
+        """Test the stats and score summaries."""
+        status, out = self.run_cli("stats", self.text, "--json", "-j", "2")
+        self.assertEqual(status, 0)
+        stats = json.loads(out)
+        self.assertEqual(stats["records"], 300)
+        self.assertEqual(stats["fields_per_record"]["max"], 3)
+        self.assertEqual(stats["top_fields"][0]["count"], 300)
+        self.assertEqual(stats["top_fields"][2], {"fid": 3, "count": 100})
+
+        scores = self.path("scores.tsv")
+        status, out = self.run_cli("score", self.text, "--json", "-o", scores, "--timestamp-ms", "0")
+        self.assertEqual(status, 0)
+        self.assertEqual(sum(json.loads(out)["decisions"].values()), 300)
+        with open(scores) as f:
+            self.assertEqual(len(f.readlines()), 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Unit tests for lnmp.columnar module."""
+
+import io
+import os
+import tempfile
+import unittest
+
+import lnmp
+from lnmp import columnar
+
+
+def make_records(count):
+    return [
+        lnmp.core.parse(f'F1={1_700_000_000_000 + i * 250};F2={i % 7};F3="user_{i % 5}";F4={i / 8!r};F5=true')
+        for i in range(count)
+    ]
+
+
+class TestColumnar(unittest.TestCase):
+    """Test columnar block encoding and reading."""
+
+    def test_block_roundtrip(self):
+        """Test that records survive a block round trip."""
+        records = make_records(100)
+        block = columnar.decode_block(columnar.encode_block(records))
+
+        self.assertEqual(block.rows, 100)
+        self.assertEqual(block.fids, [1, 2, 3, 4, 5])
+        self.assertEqual([r.encode() for r in block.records()], [r.encode() for r in records])
+
+    def test_typed_columns(self):
+        """Test integer, float and text column decoding."""
+        block = columnar.decode_block(columnar.encode_block(make_records(10)))
+
+        self.assertEqual(block.column(1)[:2], [1_700_000_000_000, 1_700_000_000_250])
+        self.assertEqual(block.column(2)[:3], [0, 1, 2])
+        self.assertEqual(block.column(3)[:2], ["user_0", "user_1"])
+        self.assertEqual(block.column(3, raw=True)[0], '"user_0"')
+        self.assertEqual(block.column(4)[1], 0.125)
+        self.assertEqual(block.column(5)[0], "true")
+        kinds = {column.fid: column.kind for column in block.columns}
+        self.assertEqual(kinds[1], columnar.INT)
+        self.assertEqual(kinds[4], columnar.FLOAT)
+        self.assertEqual(kinds[3], columnar.TEXT)
+
+    def test_non_finite_tokens_stay_text(self):
+        """Test that bare inf and nan tokens are not read back as floats."""
+        records = [lnmp.core.parse(f"F1={token}") for token in ("inf", "nan", "inf")]
+        block = columnar.decode_block(columnar.encode_block(records))
+
+        self.assertEqual(block.columns[0].kind, columnar.TEXT)
+        self.assertEqual(block.column(1), ["inf", "nan", "inf"])
+        self.assertEqual([r.encode() for r in block.records()], [r.encode() for r in records])
+
+    def test_sparse_columns(self):
+        """Test fields missing from some records."""
+        records = [lnmp.core.parse("F1=1;F2=a"), lnmp.core.parse("F1=2"), lnmp.core.parse("F2=b;F9=3")]
+        block = columnar.decode_block(columnar.encode_block(records))
+
+        self.assertEqual(block.column(1), [1, 2, None])
+        self.assertEqual(block.column(2), ["a", None, "b"])
+        self.assertEqual(block.column(42), [None, None, None])
+        self.assertEqual([r.encode() for r in block.records()], [r.encode() for r in records])
+
+    def test_projection(self):
+        """Test rebuilding records from selected columns only."""
+        block = columnar.decode_block(columnar.encode_block(make_records(3)))
+        projected = block.records(fids=[2])
+        self.assertEqual([r.encode() for r in projected], ["F2=0", "F2=1", "F2=2"])
+
+    def test_codecs(self):
+        """Test every supported codec."""
+        records = make_records(50)
+        for codec in columnar.CODECS:
+            block = columnar.decode_block(columnar.encode_block(records, codec=codec))
+            self.assertEqual(block.codec, codec)
+            self.assertEqual(block.column(2), [i % 7 for i in range(50)])
+        with self.assertRaises(ValueError):
+            columnar.encode_block(records, codec="snappy")
+
+    def test_writer_and_reader(self):
+        """Test multi-block archives through a file."""
+        records = make_records(250)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "archive.lnmpc")
+            with open(path, "wb") as f, columnar.ColumnarWriter(f, block_size=100) as writer:
+                writer.write_many(records)
+
+            reader = columnar.ColumnarReader.open(path)
+            self.assertEqual([block.rows for block in reader.blocks], [100, 100, 50])
+            self.assertEqual(len(reader), 250)
+            self.assertEqual(list(reader.column(2)), [i % 7 for i in range(250)])
+            self.assertEqual(reader.columns([2, 3])[3][-1], "user_4")
+            self.assertEqual(sum(1 for _ in reader.records()), 250)
+
+    def test_smaller_than_binary(self):
+        """Test that repetitive records compress well."""
+        records = make_records(2000)
+        buf = io.BytesIO()
+        with columnar.ColumnarWriter(buf) as writer:
+            writer.write_many(records)
+        binary = sum(len(r.encode_binary()) for r in records)
+        self.assertLess(len(buf.getvalue()) * 5, binary)
+
+    def test_rejects_invalid_data(self):
+        """Test corrupt input handling."""
+        data = columnar.encode_block(make_records(5))
+        with self.assertRaises(ValueError):
+            columnar.decode_block(b"XXXX" + data[4:])
+        with self.assertRaises(ValueError):
+            columnar.decode_block(data[:-3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,16 @@
 """Unit tests for lnmp.core module."""
 
+import copy
+import pickle
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 import lnmp
 
+
+def encode_batch(data):
+    """Worker for the process pool test."""
+    return [record.encode() for record in lnmp.core.loads_many(data)]
+
 class TestCore(unittest.TestCase):
     """Test core parsing and encoding functionality."""
     
@@ -73,5 +81,272 @@ class TestCore(unittest.TestCase):
         with self.assertRaises(Exception):
             lnmp.core.parse("invalid format without equals")
 
+    def test_parse_lenient(self):
+        """Test fused sanitize-and-parse."""
+        record = lnmp.core.parse_lenient("F12= 14532 ; F7=1  ")
+        encoded = record.encode()
+        self.assertIn("F12=14532", encoded)
+        self.assertIn("F7=1", encoded)
+    
+    def test_parse_lenient_matches_sanitize_then_parse(self):
+        """Test parse_lenient agrees with the two-step path."""
+        raw = "F12=  14532  ;  F7=  1  "
+        expected = lnmp.core.parse(lnmp.utils.sanitize(raw)).encode()
+        self.assertEqual(lnmp.core.parse_lenient(raw).encode(), expected)
+    
+    def test_parse_lenient_with_config(self):
+        """Test parse_lenient with explicit sanitization options."""
+        config = lnmp.utils.SanitizationConfig(level="aggressive")
+        record = lnmp.core.parse_lenient("F12= 14532", config=config)
+        self.assertIn("F12=14532", record.encode())
+    
+    def test_sanitization_config_invalid_level(self):
+        """Test unknown sanitization levels are rejected."""
+        with self.assertRaises(ValueError):
+            lnmp.utils.SanitizationConfig(level="extreme")
+    
+    def test_parse_lenient_many(self):
+        """Test batch lenient parsing."""
+        records = lnmp.core.parse_lenient_many(["F1= 1", "F2 =2 ", "F3=3"])
+        self.assertEqual(len(records), 3)
+        self.assertIn("F2=2", records[1].encode())
+    
+    def test_parse_lenient_many_reports_index(self):
+        """Test batch errors name the failing record."""
+        with self.assertRaises(ValueError) as ctx:
+            lnmp.core.parse_lenient_many(["F1=1", "invalid format without equals"])
+        self.assertIn("1", str(ctx.exception))
+
+    def test_validate_many(self):
+        """Test bulk validation reports status codes and offsets."""
+        result = lnmp.core.validate_many(
+            ["F12=14532;F7=1", "F12 14532", b"F7=1", b"F1=\xff", bytearray(b"F3=test"), ""]
+        )
+        S = lnmp.core.ValidationStatus
+        
+        self.assertEqual(len(result), 6)
+        self.assertEqual(
+            list(result.status),
+            [S.OK, S.EXPECTED_EQUALS, S.OK, S.INVALID_UTF8, S.OK, S.EMPTY],
+        )
+        self.assertEqual(result.offset[1], 4)
+        self.assertEqual(result.offset[3], 3)
+        self.assertEqual(result.invalid(), [1, 3, 5])
+        self.assertFalse(result.all_valid)
+    
+    def test_validate_many_agrees_with_parse(self):
+        """Test inputs accepted by validation also parse."""
+        texts = ["F12=14532", "F3=\"hello world\"", "F23=[admin,developer]"]
+        result = lnmp.core.validate_many(texts, strict=True)
+        
+        self.assertTrue(result.all_valid)
+        for text in texts:
+            lnmp.core.parse(text)
+    
+    def test_scan_agrees_with_parse(self):
+        """Test that the grammar scan alone accepts exactly what parse() accepts."""
+        texts = [
+            "F1:i=7;F2:s=\"a b\";F3:sa=[a,b]",
+            "F1=1 ;F2=x",
+            "F1:q=1",
+            "F1:integer=1",
+            "F1=hello world",
+            "F1=[a b]",
+            "F1:i=1.5",
+        ]
+        S = lnmp.core.ValidationStatus
+        result = lnmp.core.validate_many(texts)
+        for text, status in zip(texts, result.status):
+            try:
+                lnmp.core.parse(text)
+                parsed = True
+            except ValueError:
+                parsed = False
+            self.assertEqual(status == S.OK, parsed, text)
+        self.assertEqual(
+            list(result.status)[2:],
+            [S.INVALID_TYPE_HINT, S.INVALID_TYPE_HINT, S.UNEXPECTED_CHARACTER, S.UNEXPECTED_CHARACTER, S.TYPE_MISMATCH],
+        )
+
+class TestDiffPatch(unittest.TestCase):
+    """Test field-level diff/patch and incremental sync."""
+    
+    def test_diff_patch_roundtrip(self):
+        """Test changed, added and removed fields."""
+        old = lnmp.core.parse('F1=1;F2="idle";F3=7')
+        new = lnmp.core.parse('F1=1;F2="busy";F4=9')
+        delta = lnmp.core.diff(old, new)
+        self.assertIsInstance(delta, bytes)
+        self.assertEqual(lnmp.core.patch(old, delta).encode(), new.encode())
+    
+    def test_unchanged_fields_are_not_sent(self):
+        """Test that a one-field change yields a patch smaller than the record."""
+        fields = ";".join(f"F{i}={i * 1000}" for i in range(1, 30))
+        old = lnmp.core.parse(fields)
+        new = lnmp.core.parse(fields.replace("F7=7000", "F7=7001"))
+        self.assertLess(len(lnmp.core.diff(old, new)), len(new.encode_binary()) // 4)
+        self.assertEqual(lnmp.core.patch(old, lnmp.core.diff(old, old)).encode(), old.encode())
+        
+        # Fields are matched by ID, so field order alone is no change
+        reordered = lnmp.core.parse(";".join(reversed(fields.split(";"))))
+        self.assertEqual(lnmp.core.diff(old, reordered), lnmp.core.diff(old, old))
+    
+    def test_patch_rejects_wrong_base(self):
+        """Test that patches only apply to their base record."""
+        old = lnmp.core.parse("F1=1")
+        delta = lnmp.core.diff(old, lnmp.core.parse("F1=2"))
+        with self.assertRaises(ValueError):
+            lnmp.core.patch(lnmp.core.parse("F1=3"), delta)
+        with self.assertRaises(ValueError):
+            lnmp.core.patch(old, b"garbage")
+    
+    def test_sync_encoder_chooses_smaller_frame(self):
+        """Test full frames first, then patches, per key."""
+        fields = ";".join(f"F{i}={i * 1000}" for i in range(1, 30))
+        encoder, decoder = lnmp.core.SyncEncoder(), lnmp.core.SyncDecoder()
+        for key in ("a", "b"):
+            for value in range(3):
+                record = lnmp.core.parse(f"{fields};F99={value}")
+                frame = encoder.encode(record, key=key)
+                self.assertEqual(decoder.decode(frame, key=key).encode(), record.encode())
+        self.assertEqual(encoder.full_frames, 2)
+        self.assertEqual(encoder.patch_frames, 4)
+        self.assertEqual(len(encoder), 2)
+    
+    def test_sync_full_every_and_reset(self):
+        """Test forced full frames and decoding without a base."""
+        encoder = lnmp.core.SyncEncoder(full_every=2)
+        fields = ";".join(f"F{i}={i * 1000}" for i in range(1, 30))
+        frames = [encoder.encode(lnmp.core.parse(f"{fields};F99={i}")) for i in range(5)]
+        self.assertEqual([frame[0] for frame in frames], [0, 1, 1, 0, 1])
+        
+        with self.assertRaises(ValueError):
+            lnmp.core.SyncDecoder().decode(frames[1])
+        encoder.reset()
+        self.assertEqual(encoder.encode(lnmp.core.parse("F1=1"))[0], 0)
+        with self.assertRaises(ValueError):
+            lnmp.core.SyncEncoder(full_every=0)
+
+class TestStreamParser(unittest.TestCase):
+    """Test incremental parsing of chunked input."""
+    
+    def test_any_chunking(self):
+        """Test that records come out the same however the input is split."""
+        texts = ["F1=1;F2=\"a;b\"", "F3={F1=1;F2=2}", "F4=[x,y];F5=3.5"]
+        data = ("\n".join(texts) + "\n").encode()
+        expected = [lnmp.core.parse(text).encode() for text in texts]
+        for size in (1, 2, 3, 7, len(data)):
+            parser = lnmp.core.StreamParser()
+            for i in range(0, len(data), size):
+                parser.feed(data[i:i + size])
+            self.assertEqual([record.encode() for record in parser], expected, f"chunk size {size}")
+            self.assertEqual(parser.pending, 0)
+    
+    def test_partial_records_stay_buffered(self):
+        """Test feed() return values, pending bytes and close()."""
+        parser = lnmp.core.StreamParser()
+        self.assertEqual(parser.feed(b"F1=1\n\n# comment\nF1="), 1)
+        self.assertEqual(parser.pending, 3)
+        self.assertEqual(parser.feed(bytearray(b"2")), 1)
+        self.assertEqual([r.encode() for r in parser], ["F1=1"])
+        self.assertEqual(parser.close(), 1)
+        self.assertEqual(next(parser).encode(), "F1=2")
+        self.assertEqual(parser.records, 2)
+        self.assertEqual(list(parser), [])
+    
+    def test_split_utf8(self):
+        """Test multi-byte characters split across chunks."""
+        data = 'F1="héllo"\n'.encode()
+        parser = lnmp.core.StreamParser()
+        parser.feed(data[:5])
+        parser.feed(data[5:])
+        self.assertEqual(next(parser).encode(), lnmp.core.parse('F1="héllo"').encode())
+    
+    def test_blank_line_delimiter(self):
+        """Test records spanning lines."""
+        parser = lnmp.core.StreamParser(delimiter="blank_line")
+        parser.feed(b"F1=1\nF2=2\n\nF1=3\n")
+        parser.close()
+        expected = [lnmp.core.parse("F1=1;F2=2").encode(), "F1=3"]
+        self.assertEqual([r.encode() for r in parser], expected)
+    
+    def test_invalid_records(self):
+        """Test raise and skip modes."""
+        parser = lnmp.core.StreamParser()
+        parser.feed(b"F1=1\nnot lnmp\nF1=2\n")
+        self.assertEqual(next(parser).encode(), "F1=1")
+        with self.assertRaises(ValueError):
+            next(parser)
+        self.assertEqual(next(parser).encode(), "F1=2")
+        
+        parser = lnmp.core.StreamParser(errors="skip")
+        parser.feed(b"F1=1\nnot lnmp\nF1=2\n")
+        self.assertEqual([r.encode() for r in parser], ["F1=1", "F1=2"])
+        self.assertEqual(parser.invalid, 1)
+    
+    def test_limits_and_truncation(self):
+        """Test max_record_size and input ending inside a string."""
+        parser = lnmp.core.StreamParser(max_record_size=8)
+        with self.assertRaises(ValueError):
+            parser.feed(b"F1=123456789")
+        parser.feed(b"\nF1=1\n")
+        self.assertEqual(parser.ready, 1)
+        
+        # A complete oversized record inside one chunk is dropped too, while
+        # the records around it are kept
+        with self.assertRaises(ValueError):
+            parser.feed(b"F1=2\nF1=123456789\nF1=3\n")
+        self.assertEqual([r.encode() for r in parser], ["F1=1", "F1=2", "F1=3"])
+        self.assertEqual((parser.records, parser.invalid), (5, 2))
+        
+        # The rest of an oversized record is dropped as it arrives; the
+        # newline and bracket inside its string must not end it early
+        parser = lnmp.core.StreamParser(max_record_size=8)
+        with self.assertRaises(ValueError):
+            parser.feed(b'F1=1\nF2="long text')
+        parser.feed(b' [\n" ;F3=[1,')
+        parser.feed(memoryview(b'2]\nF4=2\n'))
+        self.assertEqual([r.encode() for r in parser], ["F1=1", "F4=2"])
+        self.assertEqual((parser.records, parser.invalid), (3, 1))
+        
+        parser = lnmp.core.StreamParser()
+        parser.feed(b'F1="open')
+        with self.assertRaises(ValueError):
+            parser.close()
+        with self.assertRaises(ValueError):
+            lnmp.core.StreamParser(delimiter="tab")
+
+class TestPickle(unittest.TestCase):
+    """Test pickling and batch serialization of records."""
+    
+    def test_pickle_roundtrip(self):
+        """Test every pickle protocol and copy."""
+        record = lnmp.core.parse('F12=14532;F7=1;F3="hello world"')
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            restored = pickle.loads(pickle.dumps(record, protocol=protocol))
+            self.assertEqual(restored.encode(), record.encode())
+        self.assertEqual(copy.deepcopy(record).encode(), record.encode())
+        # The pickle carries the binary encoding, not the text
+        self.assertIn(record.encode_binary(), pickle.dumps(record))
+    
+    def test_dumps_many(self):
+        """Test one-buffer batch serialization."""
+        records = [lnmp.core.parse(f"F1={i};F2=x{i}") for i in range(100)]
+        data = lnmp.core.dumps_many(records)
+        self.assertIsInstance(data, bytes)
+        restored = lnmp.core.loads_many(bytearray(data))
+        self.assertEqual([r.encode() for r in restored], [r.encode() for r in records])
+        self.assertEqual(lnmp.core.loads_many(lnmp.core.dumps_many([])), [])
+        with self.assertRaises(ValueError):
+            lnmp.core.loads_many(data[:-2])
+    
+    def test_process_pool(self):
+        """Test sending records to worker processes."""
+        records = [lnmp.core.parse(f"F1={i}") for i in range(20)]
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(encode_batch, [lnmp.core.dumps_many(records[:10]), lnmp.core.dumps_many(records[10:])]))
+            self.assertEqual(results[0] + results[1], [r.encode() for r in records])
+            self.assertEqual(pool.submit(copy.copy, records[3]).result().encode(), records[3].encode())
+
 if __name__ == "__main__":
     unittest.main()
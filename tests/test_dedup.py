@@ -0,0 +1,111 @@
+"""Unit tests for record fingerprints and lnmp.dedup module."""
+
+import unittest
+import lnmp
+from helpers import FakeClock
+from lnmp.dedup import Deduplicator
+
+
+class TestFingerprint(unittest.TestCase):
+    """Test native record fingerprints."""
+
+    def test_fingerprint_is_canonical(self):
+        """Test that equal records share a fingerprint regardless of text layout."""
+        a = lnmp.core.parse("F12=14532;F7=1")
+        b = lnmp.core.parse("F12=14532\nF7=1")
+        c = lnmp.core.parse("F12=14533;F7=1")
+
+        self.assertIsInstance(a.fingerprint(), int)
+        self.assertEqual(a.fingerprint(), b.fingerprint())
+        self.assertNotEqual(a.fingerprint(), c.fingerprint())
+        self.assertLess(a.fingerprint(), 1 << 128)
+
+    def test_batch_fingerprints(self):
+        """Test that batch and binary fingerprints match Record.fingerprint()."""
+        records = [lnmp.core.parse(f"F1={i}") for i in range(5)]
+        expected = [record.fingerprint() for record in records]
+
+        self.assertEqual(lnmp.core.fingerprint_many(records), expected)
+        frames = [record.encode_binary() for record in records]
+        self.assertEqual(lnmp.core.fingerprint_binary(frames), expected)
+        self.assertEqual(lnmp.core.fingerprint_binary([bytearray(f) for f in frames]), expected)
+
+
+class TestDeduplicator(unittest.TestCase):
+    """Test exact and Bloom deduplication."""
+
+    def test_exact_filter(self):
+        """Test duplicates across and within batches."""
+        dedup = Deduplicator()
+        first = [lnmp.core.parse("F1=1"), lnmp.core.parse("F1=2"), lnmp.core.parse("F1=1")]
+
+        self.assertEqual(dedup.check(first), [False, False, True])
+        fresh = dedup.filter([lnmp.core.parse("F1=2"), lnmp.core.parse("F1=3")])
+        self.assertEqual([r.encode() for r in fresh], ["F1=3"])
+        self.assertEqual(len(dedup), 3)
+        self.assertIn(lnmp.core.parse("F1=3"), dedup)
+
+    def test_mixed_items(self):
+        """Test records, envelopes and binary frames deduplicate together."""
+        dedup = Deduplicator()
+        record = lnmp.core.parse("F12=14532")
+        envelope = lnmp.envelope.wrap(record, source="test")
+
+        self.assertFalse(dedup.seen(record))
+        self.assertTrue(dedup.seen(envelope))
+        self.assertTrue(dedup.seen(record.encode_binary()))
+        self.assertTrue(dedup.seen(record.fingerprint()))
+        with self.assertRaises(TypeError):
+            dedup.seen("F12=14532")
+
+    def test_exact_lru_capacity(self):
+        """Test that the least recently seen entry is evicted."""
+        dedup = Deduplicator(capacity=2)
+        dedup.check([1, 2])
+        dedup.check([1])  # refresh 1
+        dedup.check([3])  # evicts 2
+        self.assertEqual(dedup.check([1, 2]), [True, False])
+
+    def test_exact_ttl(self):
+        """Test that entries are forgotten after the TTL."""
+        clock = FakeClock()
+        dedup = Deduplicator(ttl=10.0, clock=clock)
+        dedup.check([1])
+        clock.now = 5.0
+        self.assertEqual(dedup.check([1, 2]), [True, False])
+        clock.now = 14.0
+        self.assertEqual(dedup.check([1]), [True])  # refreshed at 5.0
+        clock.now = 30.0
+        self.assertEqual(dedup.check([1]), [False])
+
+    def test_bloom_mode(self):
+        """Test Bloom mode catches duplicates with few false positives."""
+        dedup = Deduplicator(capacity=10_000, mode="bloom", false_positive_rate=0.01)
+        records = [lnmp.core.parse(f"F1={i}") for i in range(2_000)]
+
+        self.assertEqual(dedup.check(records[:1000]).count(True), 0)
+        self.assertEqual(dedup.check(records[:1000]), [True] * 1000)
+        false_positives = dedup.check(records[1000:]).count(True)
+        self.assertLess(false_positives, 50)
+
+    def test_bloom_rotation(self):
+        """Test that Bloom generations rotate and old items age out."""
+        dedup = Deduplicator(capacity=100, mode="bloom")
+        dedup.check(range(1, 101))
+        dedup.check(range(1001, 1101))  # rotates: 1..100 in the previous generation
+        self.assertIn(50, dedup)
+        dedup.check(range(2001, 2102))  # rotates again: 1..100 dropped
+        self.assertNotIn(50, dedup)
+
+    def test_invalid_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            Deduplicator(capacity=0)
+        with self.assertRaises(ValueError):
+            Deduplicator(mode="fuzzy")
+        with self.assertRaises(ValueError):
+            Deduplicator(mode="bloom", false_positive_rate=1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
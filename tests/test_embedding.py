@@ -1,5 +1,6 @@
 """Unit tests for lnmp.embedding module."""
 
+import math
 import unittest
 import lnmp
 
@@ -78,5 +79,79 @@ class TestEmbedding(unittest.TestCase):
         with self.assertRaises(Exception):
             lnmp.embedding.delta(base, updated)
 
+
+class TestUpdateEncoder(unittest.TestCase):
+    """Test adaptive embedding updates."""
+    
+    def setUp(self):
+        self.base = [math.sin(i * 0.37) for i in range(256)]
+    
+    def test_exact_update_roundtrip(self):
+        """Test that epsilon 0 reproduces float32 values exactly."""
+        data = lnmp.embedding.encode_update(self.base)
+        self.assertEqual(data[0], 0)
+        self.assertEqual(len(data), 1 + 2 + 4 * 256)
+        restored = lnmp.embedding.decode_update(data)
+        for r, v in zip(restored, self.base):
+            self.assertAlmostEqual(r, v, places=6)
+    
+    def test_sparse_update_is_delta(self):
+        """Test that a few changed dimensions produce a small delta."""
+        updated = list(self.base)
+        updated[3] += 0.5
+        updated[200] -= 0.25
+        updated[7] += 1e-5
+        data = lnmp.embedding.encode_update(updated, self.base, epsilon=1e-3)
+        self.assertEqual(data[0], 1)
+        self.assertLess(len(data), 20)
+        restored = lnmp.embedding.decode_update(data, self.base)
+        self.assertAlmostEqual(restored[3], updated[3], places=6)
+        self.assertAlmostEqual(restored[7], self.base[7], places=6)
+        with self.assertRaises(ValueError):
+            lnmp.embedding.decode_update(data)
+        with self.assertRaises(ValueError):
+            lnmp.embedding.decode_update(data, self.base[:10])
+    
+    def test_dense_update_within_tolerance(self):
+        """Test that a dense change is quantized when the tolerance allows."""
+        updated = [v + 0.1 for v in self.base]
+        data = lnmp.embedding.encode_update(updated, self.base, epsilon=0.01)
+        self.assertEqual(data[0], 2)
+        self.assertLess(len(data), 300)
+        restored = lnmp.embedding.decode_update(data, self.base)
+        self.assertLessEqual(max(abs(r - u) for r, u in zip(restored, updated)), 0.01)
+        # Too tight for 8 bits: falls back to the full vector
+        self.assertEqual(lnmp.embedding.encode_update(updated, self.base, epsilon=1e-5)[0], 0)
+    
+    def test_encoder_decoder(self):
+        """Test a keyed stream of updates, including top-k carry-over."""
+        encoder = lnmp.embedding.UpdateEncoder(epsilon=1e-4, top_k=2)
+        decoder = lnmp.embedding.UpdateDecoder()
+        vector = [0.0] * 64
+        decoder.decode(encoder.encode(vector, key="a"), key="a")
+        vector[5], vector[9], vector[40] = 0.3, 0.2, 0.1
+        first = decoder.decode(encoder.encode(vector, key="a"), key="a")
+        self.assertEqual(first[40], 0.0)
+        self.assertAlmostEqual(encoder.last_error, 0.1, places=6)
+        second = decoder.decode(encoder.encode(vector, key="a"), key="a")
+        self.assertAlmostEqual(second[40], 0.1, places=6)
+        self.assertEqual(encoder.last_error, 0.0)
+        # The all-zero first vector quantizes losslessly
+        self.assertEqual((encoder.quantized_frames, encoder.delta_frames), (1, 2))
+        self.assertEqual(len(encoder), 1)
+        
+        encoder.reset("a")
+        self.assertNotEqual(encoder.encode(vector, key="a")[0], 1)  # no delta without a base
+        with self.assertRaises(ValueError):
+            lnmp.embedding.UpdateEncoder(epsilon=-1)
+    
+    def test_malformed_updates(self):
+        """Test that corrupt data raises ValueError."""
+        data = lnmp.embedding.encode_update(self.base)
+        for bad in (b"", data[:-1], data + b"\x00", b"\x09\x00"):
+            with self.assertRaises(ValueError):
+                lnmp.embedding.decode_update(bad)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,6 @@
 """Unit tests for lnmp.envelope module."""
 
+import pickle
 import unittest
 import lnmp
 from datetime import datetime
@@ -66,5 +67,53 @@ class TestEnvelope(unittest.TestCase):
         self.assertIsInstance(envelope.trace_id, str)
         self.assertIsInstance(envelope.timestamp, int)
 
+    def test_envelope_record(self):
+        """Test access to the wrapped record."""
+        record = lnmp.core.parse("F12=14532")
+        envelope = lnmp.envelope.wrap(record, source="my-service")
+        
+        self.assertIn("F12=14532", envelope.record.encode())
+    
+    def test_wrappers_are_slotted(self):
+        """Test that Record and Envelope wrappers carry no instance dict."""
+        record = lnmp.core.parse("F12=14532")
+        envelope = lnmp.envelope.wrap(record, source="my-service")
+        
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertFalse(hasattr(envelope, "__dict__"))
+        with self.assertRaises(AttributeError):
+            envelope.extra = 1
+    
+    def test_pickle(self):
+        """Test that envelopes pickle with all metadata."""
+        record = lnmp.core.parse("F12=14532;F7=1")
+        envelope = lnmp.envelope.wrap(record, source="svc", timestamp_ms=1_700_000_000_000, trace_id="t-1")
+        
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            restored = pickle.loads(pickle.dumps(envelope, protocol=protocol))
+            self.assertEqual(restored.source, "svc")
+            self.assertEqual(restored.timestamp, 1_700_000_000_000)
+            self.assertEqual(restored.trace_id, "t-1")
+            self.assertEqual(restored.record.encode(), record.encode())
+        
+        frame = envelope.encode_binary()
+        self.assertEqual(lnmp.envelope.decode_binary(memoryview(frame)).trace_id, "t-1")
+        with self.assertRaises(ValueError):
+            lnmp.envelope.decode_binary(frame[:-1])
+    
+    def test_dumps_many(self):
+        """Test batch serialization of envelopes."""
+        envelopes = [
+            lnmp.envelope.wrap(lnmp.core.parse(f"F1={i}"), source=f"s{i}", timestamp_ms=i)
+            for i in range(50)
+        ]
+        restored = lnmp.envelope.loads_many(lnmp.envelope.dumps_many(envelopes))
+        self.assertEqual([e.source for e in restored], [f"s{i}" for i in range(50)])
+        self.assertEqual([e.timestamp for e in restored], list(range(50)))
+        self.assertIsNone(restored[0].trace_id)
+        self.assertEqual(lnmp.envelope.loads_many(lnmp.envelope.dumps_many([])), [])
+        with self.assertRaises(ValueError):
+            lnmp.envelope.loads_many(lnmp.core.dumps_many([]))
+
 if __name__ == "__main__":
     unittest.main()
@@ -65,12 +65,12 @@ class TestIntegration(unittest.TestCase):
         
         # 3. Score context
         score = lnmp.net.context_score(envelope)
-        self.assertIn("composite", score.__dict__)
+        self.assertIn("composite", score.to_dict())
         self.assertIsInstance(score.composite, float)
         
         # 4. Get routing decision
         decision = lnmp.net.routing_decide(envelope)
-        self.assertIsInstance(decision, str)
+        self.assertIsInstance(decision, lnmp.net.RoutingDecision)
 
     def test_embedding_delta_workflow(self):
         """Test embedding delta compression workflow."""
@@ -0,0 +1,137 @@
+"""Unit tests for lnmp.ipc module."""
+
+import multiprocessing
+import threading
+import unittest
+import lnmp
+from lnmp.ipc import Empty, Full, SharedRing
+
+
+def make_envelope(i):
+    return lnmp.envelope.wrap(lnmp.core.parse(f"F1={i};F2=\"payload-{i}\""), source=f"p{i % 3}", timestamp_ms=i)
+
+
+def produce(ring, start, count):
+    for i in range(start, start + count):
+        ring.put(make_envelope(i))
+    ring.close()
+
+
+def consume(ring, count, results):
+    values = [ring.get(timeout=10).timestamp for _ in range(count)]
+    results.put(values)
+    ring.close()
+
+
+class TestSharedRing(unittest.TestCase):
+    """Test the shared-memory envelope ring."""
+
+    def setUp(self):
+        self.ring = SharedRing(4096)
+
+    def tearDown(self):
+        self.ring.close()
+        self.ring.unlink()
+
+    def test_put_get_in_order(self):
+        """Test that envelopes come back in order with their metadata."""
+        for i in range(10):
+            self.ring.put(make_envelope(i))
+        for i in range(10):
+            envelope = self.ring.get(block=False)
+            self.assertEqual(envelope.record.encode(), make_envelope(i).record.encode())
+            self.assertEqual(envelope.source, f"p{i % 3}")
+            self.assertEqual(envelope.timestamp, i)
+        self.assertEqual(self.ring.used, 0)
+
+    def test_wraparound(self):
+        """Test many more frames than fit in the ring at once."""
+        for i in range(2000):
+            self.ring.put(make_envelope(i).encode_binary(), block=False)
+            self.assertEqual(self.ring.get(block=False).timestamp, i)
+
+    def test_large_frame_after_wraparound(self):
+        """Test that a frame up to the capacity fits once the ring drains."""
+        self.ring.put(b"x" * 2000)
+        with self.ring.read(block=False) as view:
+            self.assertEqual(len(view), 2000)
+        self.assertEqual(self.ring.used, 0)
+        self.ring.put(b"y" * 2500, timeout=1)
+        with self.ring.read(block=False) as view:
+            self.assertEqual(bytes(view), b"y" * 2500)
+        self.ring.put(b"z" * (self.ring.capacity - 8), block=False)
+        with self.ring.read(block=False) as view:
+            self.assertEqual(len(view), self.ring.capacity - 8)
+
+    def test_non_blocking(self):
+        """Test Empty and Full without blocking."""
+        with self.assertRaises(Empty):
+            self.ring.get(block=False)
+        with self.assertRaises(Empty):
+            self.ring.get(timeout=0.01)
+        frame = b"x" * 1000
+        with self.assertRaises(Full):
+            for _ in range(10):
+                self.ring.put(frame, block=False)
+        with self.assertRaises(Full):
+            self.ring.put(frame, timeout=0.01)
+        with self.assertRaises(ValueError):
+            self.ring.put(b"x" * 8192)
+
+    def test_read_view_holds_space(self):
+        """Test that a borrowed frame is not overwritten until released."""
+        frame = make_envelope(1).encode_binary()
+        self.ring.put(frame)
+        with self.ring.read() as view:
+            self.assertIsInstance(view, memoryview)
+            self.assertTrue(view.readonly)
+            self.assertEqual(bytes(view), frame)
+            self.assertGreater(self.ring.used, len(frame))
+            # Fill the rest of the ring; the borrowed frame keeps its space
+            with self.assertRaises(Full):
+                while True:
+                    self.ring.put(frame, block=False)
+            self.assertEqual(bytes(view), frame)
+        self.ring.put(frame, block=False)
+
+    def test_out_of_order_release(self):
+        """Test that space is freed once earlier frames are released too."""
+        for i in range(3):
+            self.ring.put(make_envelope(i))
+        first = self.ring.read()
+        view = first.__enter__()
+        self.assertEqual(self.ring.get().timestamp, 1)
+        used = self.ring.used
+        self.assertGreater(used, 0)
+        first.__exit__(None, None, None)
+        self.assertLess(self.ring.used, used)
+        self.assertEqual(self.ring.get().timestamp, 2)
+        self.assertEqual(self.ring.used, 0)
+        with self.assertRaises(ValueError):
+            view.tobytes()
+
+    def test_blocking_threads(self):
+        """Test blocking producers and consumers."""
+        received = []
+        consumer = threading.Thread(target=lambda: received.extend(self.ring.get(timeout=10).timestamp for _ in range(500)))
+        consumer.start()
+        for i in range(500):
+            self.ring.put(make_envelope(i), timeout=10)
+        consumer.join()
+        self.assertEqual(received, list(range(500)))
+
+    def test_multiple_processes(self):
+        """Test several producer and consumer processes."""
+        results = multiprocessing.Queue()
+        producers = [multiprocessing.Process(target=produce, args=(self.ring, p * 200, 200)) for p in range(3)]
+        consumers = [multiprocessing.Process(target=consume, args=(self.ring, 300, results)) for _ in range(2)]
+        for process in producers + consumers:
+            process.start()
+        values = results.get(timeout=30) + results.get(timeout=30)
+        for process in producers + consumers:
+            process.join(timeout=30)
+        self.assertEqual(sorted(values), list(range(600)))
+
+
+if __name__ == '__main__':
+    unittest.main()
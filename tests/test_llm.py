@@ -0,0 +1,65 @@
+"""Unit tests for lnmp.llm module."""
+
+import unittest
+import lnmp
+
+
+def candidate(text, composite):
+    env = lnmp.envelope.wrap(lnmp.core.parse(text), source="test")
+    return {"envelope": env, "score": lnmp.net.ContextScore(composite=composite)}
+
+
+class TestPackContext(unittest.TestCase):
+    """Test token-budgeted context packing."""
+
+    def test_pack_within_budget(self):
+        """Test that selected records fit the budget and keep candidate order."""
+        candidates = [candidate(f"F1={i}", 0.1 * (i + 1)) for i in range(5)]
+        # Every record costs 4 + 1 (newline) tokens
+        packed = lnmp.llm.pack_context(candidates, 10, estimator=lambda text: 4)
+        self.assertEqual(packed, "F1=3\nF1=4\n")
+        self.assertEqual(lnmp.llm.pack_context(candidates, 4, estimator=lambda text: 4), "")
+
+    def test_greedy_prefers_score_per_token(self):
+        """Test that cheap records can beat one expensive record."""
+        candidates = [candidate("F1=1", 0.9), candidate("F1=2", 0.5), candidate("F1=3", 0.5)]
+        costs = {"F1=1": 9, "F1=2": 3, "F1=3": 3}
+        selected = lnmp.llm.select_context(candidates, 10, estimator=costs.get)
+        self.assertEqual(selected, [1, 2])
+
+    def test_knapsack_is_exact(self):
+        """Test that the exact method beats greedy where greedy is suboptimal."""
+        candidates = [candidate("F1=1", 0.7), candidate("F1=2", 0.5), candidate("F1=3", 0.5)]
+        costs = {"F1=1": 5, "F1=2": 4, "F1=3": 4}
+        self.assertEqual(lnmp.llm.select_context(candidates, 10, estimator=costs.get), [0])
+        self.assertEqual(
+            lnmp.llm.select_context(candidates, 10, estimator=costs.get, method="knapsack"),
+            [1, 2],
+        )
+
+    def test_native_scores_and_estimates(self):
+        """Test plain envelopes scored and estimated natively."""
+        envelopes = [
+            lnmp.envelope.wrap(lnmp.core.parse(f"F12={i};F7=1"), source="test")
+            for i in range(1000)
+        ]
+        packed = lnmp.llm.pack_context(envelopes, 200)
+        lines = packed.splitlines()
+        self.assertGreater(len(lines), 0)
+        self.assertLess(len(lines), 1000)
+        self.assertTrue(all(line.startswith("F") for line in lines))
+        self.assertEqual(len(lnmp.llm.pack_context(envelopes, 10**6, estimator="chars").splitlines()), 1000)
+
+    def test_invalid_arguments(self):
+        """Test argument validation."""
+        candidates = [candidate("F1=1", 0.5)]
+        with self.assertRaises(ValueError):
+            lnmp.llm.pack_context(candidates, 10, method="random")
+        with self.assertRaises(ValueError):
+            lnmp.llm.pack_context(candidates, 10, estimator="words")
+        with self.assertRaises(ValueError):
+            lnmp.llm.pack_context(candidates, -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Unit tests for lnmp.metrics module."""
+
+import unittest
+import lnmp
+from lnmp import metrics
+
+
+class TestMetrics(unittest.TestCase):
+    """Test native counters, histograms and exporters."""
+
+    def setUp(self):
+        metrics.disable()
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def test_disabled_by_default(self):
+        """Test that nothing is recorded while metrics are disabled."""
+        lnmp.core.parse("F12=14532")
+        snap = metrics.snapshot()
+        self.assertFalse(snap["enabled"])
+        self.assertNotIn("parse", snap["operations"])
+
+    def test_counts_calls_and_errors(self):
+        """Test call/error counters and histogram totals."""
+        metrics.enable()
+        self.assertTrue(metrics.is_enabled())
+        lnmp.core.parse("F12=14532")
+        lnmp.core.parse("F7=1")
+        with self.assertRaises(ValueError):
+            lnmp.core.parse("invalid format without equals")
+
+        parse = metrics.snapshot()["operations"]["parse"]
+        self.assertEqual(parse["calls"], 3)
+        self.assertEqual(parse["errors"], 1)
+        self.assertGreaterEqual(parse["sum_seconds"], 0.0)
+        self.assertEqual(sum(count for _, count in parse["buckets"]), 3)
+        self.assertEqual(parse["buckets"][-1][0], float("inf"))
+
+    def test_counts_routing_decisions(self):
+        """Test per-decision counters."""
+        metrics.enable()
+        envelope = lnmp.envelope.wrap(lnmp.core.parse("F12=14532;F7=1"), source="test")
+        decision = lnmp.net.routing_decide(envelope)
+
+        decisions = metrics.snapshot()["decisions"]
+        self.assertEqual(sum(decisions.values()), 1)
+        if decision in decisions:
+            self.assertEqual(decisions[decision], 1)
+
+    def test_reset(self):
+        """Test that reset zeroes everything."""
+        metrics.enable()
+        lnmp.core.parse("F12=14532")
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()["operations"], {})
+
+    def test_prometheus_export(self):
+        """Test Prometheus text exposition output."""
+        metrics.enable()
+        lnmp.core.parse("F12=14532")
+        text = metrics.to_prometheus()
+
+        self.assertIn("# TYPE lnmp_calls_total counter", text)
+        self.assertIn('lnmp_calls_total{op="parse"} 1', text)
+        self.assertIn("# TYPE lnmp_latency_seconds histogram", text)
+        self.assertIn('lnmp_latency_seconds_bucket{op="parse",le="+Inf"} 1', text)
+        self.assertIn('lnmp_latency_seconds_count{op="parse"} 1', text)
+        self.assertIn("lnmp_routing_decisions_total", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_prometheus_prefix(self):
+        """Test custom metric prefix."""
+        metrics.enable()
+        lnmp.core.parse("F12=14532")
+        self.assertIn('myapp_calls_total{op="parse"} 1', metrics.to_prometheus(prefix="myapp"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 
 import unittest
 import lnmp
+from helpers import FakeClock
 
 class TestNet(unittest.TestCase):
     """Test network routing and scoring functionality."""
@@ -41,8 +42,37 @@ class TestNet(unittest.TestCase):
         
         decision = lnmp.net.routing_decide(envelope)
         
-        self.assertIsInstance(decision, str)
-        self.assertGreater(len(decision), 0)
+        self.assertIsInstance(decision, lnmp.net.RoutingDecision)
+        self.assertIn(str(decision), ("SendToLLM", "ProcessLocally", "Drop"))
+        self.assertEqual(decision.name, str(decision))
+    
+    def test_routing_decision_hashable(self):
+        """Test that decisions can be used as dict keys."""
+        record = lnmp.core.parse("F12=14532;F7=1")
+        envelope = lnmp.envelope.wrap(record, source="test-service")
+        
+        decision = lnmp.net.routing_decide(envelope)
+        counts = {decision: 1}
+        self.assertEqual(counts[lnmp.net.routing_decide(envelope)], 1)
+        self.assertEqual(decision, getattr(lnmp.net.RoutingDecision, decision.name))
+        
+        # Members still compare and hash equal to their names
+        self.assertEqual(decision, decision.name)
+        self.assertNotEqual(decision, "Unknown")
+        self.assertEqual({decision.name: 1}[decision], 1)
+    
+    def test_context_score_native(self):
+        """Test the native score type: immutable, hashable, comparable."""
+        score = lnmp.net.ContextScore(composite=0.5, freshness=0.9, importance=0.2)
+        
+        self.assertEqual(score.composite, 0.5)
+        self.assertEqual(score.risk, 0.0)
+        self.assertEqual(score, lnmp.net.ContextScore(composite=0.5, freshness=0.9, importance=0.2))
+        self.assertEqual(len({score, lnmp.net.ContextScore(composite=0.5, freshness=0.9, importance=0.2)}), 1)
+        self.assertEqual(score.to_dict()["freshness"], 0.9)
+        self.assertTrue(repr(score).startswith("ContextScore(composite=0.500"))
+        with self.assertRaises(AttributeError):
+            score.composite = 1.0
     
     def test_should_send_to_llm_high_threshold(self):
         """Test LLM routing with high threshold."""
@@ -66,5 +96,174 @@ class TestNet(unittest.TestCase):
         """Helper to assert object has attribute."""
         self.assertTrue(hasattr(obj, attr), f"Object missing attribute: {attr}")
 
+
+class TestPriorityDispatchQueue(unittest.TestCase):
+    """Test the score-ordered bounded dispatch queue."""
+    
+    def setUp(self):
+        self.clock = FakeClock(1_700_000_000.0)
+    
+    def _envelope(self, value):
+        record = lnmp.core.parse(f"F1={value}")
+        return lnmp.envelope.wrap(record, source="test", timestamp_ms=int(self.clock.now * 1000))
+    
+    def _value(self, envelope):
+        return envelope.record.encode()
+    
+    def test_pops_highest_score_first(self):
+        """Test score ordering and FIFO among equal scores."""
+        queue = lnmp.net.PriorityDispatchQueue(clock=self.clock)
+        for value, score in [(1, 0.2), (2, 0.9), (3, 0.5), (4, 0.9)]:
+            queue.push(self._envelope(value), score)
+        
+        self.assertEqual(len(queue), 4)
+        self.assertEqual(
+            [self._value(e) for e in queue.pop_batch(10)],
+            ["F1=2", "F1=4", "F1=3", "F1=1"],
+        )
+        self.assertEqual(len(queue), 0)
+        with self.assertRaises(IndexError):
+            queue.pop()
+    
+    def test_accepts_context_score(self):
+        """Test that the native score (or none) can be passed."""
+        queue = lnmp.net.PriorityDispatchQueue(clock=self.clock)
+        envelope = self._envelope(1)
+        queue.push(envelope, lnmp.net.context_score(envelope))
+        queue.push(self._envelope(2))
+        self.assertEqual(len(queue.pop_batch(2)), 2)
+    
+    def test_freshness_decay(self):
+        """Test that waiting entries lose value with the half-life."""
+        queue = lnmp.net.PriorityDispatchQueue(half_life=10.0, clock=self.clock)
+        queue.push(self._envelope(1), 0.8)
+        self.clock.now += 10.0
+        self.assertAlmostEqual(queue.peek_score(), 0.4)
+        
+        # A newer entry at 0.5 now outranks the decayed 0.8
+        queue.push(self._envelope(2), 0.5)
+        self.assertEqual(self._value(queue.pop()), "F1=2")
+    
+    def test_evicts_lowest_when_full(self):
+        """Test eviction of the lowest-value entry and rejection of worse ones."""
+        queue = lnmp.net.PriorityDispatchQueue(maxsize=2, clock=self.clock)
+        self.assertIsNone(queue.push(self._envelope(1), 0.3))
+        self.assertIsNone(queue.push(self._envelope(2), 0.6))
+        
+        evicted = queue.push(self._envelope(3), 0.9)
+        self.assertEqual(self._value(evicted), "F1=1")
+        rejected = queue.push(self._envelope(4), 0.1)
+        self.assertEqual(self._value(rejected), "F1=4")
+        
+        self.assertEqual(queue.evicted, 2)
+        self.assertEqual([self._value(e) for e in queue.pop_batch(5)], ["F1=3", "F1=2"])
+    
+    def test_expires_old_entries(self):
+        """Test that entries past max_age are dropped before eviction."""
+        queue = lnmp.net.PriorityDispatchQueue(maxsize=2, max_age=5.0, clock=self.clock)
+        queue.push(self._envelope(1), 0.9)
+        self.clock.now += 3.0
+        queue.push(self._envelope(2), 0.1)
+        self.clock.now += 3.0
+        
+        # The 0.9 entry has expired, so nothing needs to be evicted
+        self.assertIsNone(queue.push(self._envelope(3), 0.2))
+        self.assertEqual(queue.expired, 1)
+        self.assertEqual(queue.evicted, 0)
+        self.assertEqual([self._value(e) for e in queue.pop_batch(5)], ["F1=3", "F1=2"])
+    
+    def test_many_entries(self):
+        """Test bounded size and ordering under heavy churn."""
+        queue = lnmp.net.PriorityDispatchQueue(maxsize=1000, half_life=None, clock=self.clock)
+        envelope = self._envelope(0)
+        for i in range(20_000):
+            queue.push(envelope, (i * 7919 % 10_007) / 10_007)
+        self.assertEqual(len(queue), 1000)
+        scores = []
+        while queue:
+            scores.append(queue.peek_score())
+            queue.pop()
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertGreater(scores[-1], 0.89)
+    
+    def test_invalid_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            lnmp.net.PriorityDispatchQueue(maxsize=0)
+        with self.assertRaises(ValueError):
+            lnmp.net.PriorityDispatchQueue(half_life=0)
+
+
+class TestRoutingCache(unittest.TestCase):
+    """Test memoized scoring and routing."""
+
+    def wrap(self, text, source="svc", age_ms=0):
+        timestamp = lnmp.envelope.wrap(lnmp.core.parse("F1=0"), source).timestamp
+        return lnmp.envelope.wrap(lnmp.core.parse(text), source, timestamp_ms=timestamp - age_ms)
+
+    def test_matches_uncached_routing(self):
+        """Test that cached results equal native scoring and routing."""
+        cache = lnmp.net.RoutingCache()
+        for _ in range(3):
+            for text in ("F12=14532;F7=1", "F1=1", "F1=1;F2=2;F3=3"):
+                env = self.wrap(text)
+                score, decision = cache.route(env)
+                self.assertEqual(score, lnmp.net.context_score(env))
+                self.assertEqual(decision, lnmp.net.routing_decide(env))
+                self.assertEqual(cache.should_send_to_llm(env, threshold=0.0), True)
+        self.assertEqual((cache.misses, cache.hits, len(cache)), (3, 15, 3))
+
+    def test_key_parts(self):
+        """Test keying by source, record, age bucket and shape."""
+        cache = lnmp.net.RoutingCache(bucket_ms=60_000)
+        cache.route(self.wrap("F1=1"))
+        cache.route(self.wrap("F1=2"))
+        cache.route(self.wrap("F1=1", source="other"))
+        cache.route(self.wrap("F1=1", age_ms=120_000))
+        self.assertEqual((cache.misses, cache.hits), (4, 0))
+        cache.route(self.wrap("F1=1", age_ms=5))
+        self.assertEqual(cache.hits, 1)
+
+        shape = lnmp.net.RoutingCache(key="shape")
+        shape.route(self.wrap("F1=1"))
+        shape.route(self.wrap("F1=2"))
+        shape.route(self.wrap('F1="x"'))
+        self.assertEqual((shape.misses, shape.hits), (2, 1))
+
+    def test_lru_eviction_and_invalidation(self):
+        """Test LRU eviction and per-source and full invalidation."""
+        cache = lnmp.net.RoutingCache(maxsize=2)
+        cache.route(self.wrap("F1=1", source="a"))
+        cache.route(self.wrap("F1=2", source="b"))
+        cache.route(self.wrap("F1=1", source="a"))
+        cache.route(self.wrap("F1=3", source="c"))
+        self.assertEqual((len(cache), cache.evictions), (2, 1))
+        cache.route(self.wrap("F1=1", source="a"))
+        self.assertEqual(cache.hits, 2)
+
+        self.assertEqual(cache.invalidate("a"), 1)
+        self.assertEqual(cache.invalidate("missing"), 0)
+        self.assertEqual(cache.invalidate(), 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_normalize_and_route(self):
+        """Test the cache option of lnmp.llm.normalize_and_route()."""
+        cache = lnmp.net.RoutingCache()
+        first = lnmp.llm.normalize_and_route("F12=14532;F7=1", "svc", cache=cache)
+        second = lnmp.llm.normalize_and_route("F12=14532;F7=1", "svc", cache=cache)
+        self.assertEqual(first["score"], second["score"])
+        self.assertEqual(first["decision"], second["decision"])
+        self.assertEqual(cache.hits, 1)
+
+    def test_invalid_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            lnmp.net.RoutingCache(maxsize=0)
+        with self.assertRaises(ValueError):
+            lnmp.net.RoutingCache(bucket_ms=0)
+        with self.assertRaises(ValueError):
+            lnmp.net.RoutingCache(key="fingerprint")
+
+
 if __name__ == "__main__":
     unittest.main()
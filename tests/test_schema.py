@@ -0,0 +1,90 @@
+"""Unit tests for lnmp.schema module."""
+
+import re
+import unittest
+from array import array
+import lnmp
+from lnmp.schema import Field, Schema
+
+
+class TestSchema(unittest.TestCase):
+    """Test schema-driven typed decoding."""
+
+    def setUp(self):
+        self.schema = Schema([
+            (12, "user_id", int),
+            (7, "active", bool),
+            Field(3, "name", str, required=False, default=""),
+            (5, "scores", "float[]", False),
+            (23, "roles", "str[]", False),
+        ])
+
+    def test_decode_text(self):
+        """Test decoding text into a typed tuple."""
+        row = self.schema.decode('F12=14532;F7=1;F3="Ada \\"L\\"";F5=[1,2.5];F23=[admin, "a,b"];F99=skipped')
+        self.assertEqual(row, (14532, True, 'Ada "L"', [1.0, 2.5], ["admin", "a,b"]))
+        self.assertEqual(self.schema.decode("F7=0\nF12=-3"), (-3, False, "", None, None))
+
+    def test_decode_records_and_binary(self):
+        """Test that records and binary frames decode like text."""
+        record = lnmp.core.parse('F12=1;F7=0;F3="x"')
+        expected = (1, False, "x", None, None)
+        self.assertEqual(self.schema.decode(record), expected)
+        self.assertEqual(self.schema.decode(record.encode_binary()), expected)
+        self.assertEqual(self.schema.decode(bytearray(record.encode_binary())), expected)
+
+    def test_named_rows(self):
+        """Test namedtuple rows."""
+        rows = self.schema.decode_many(["F12=1;F7=1", "F12=2;F7=0"], named=True)
+        self.assertIsInstance(rows[0], self.schema.row_type)
+        self.assertEqual([row.user_id for row in rows], [1, 2])
+        self.assertEqual(self.schema.names, ("user_id", "active", "name", "scores", "roles"))
+
+    def test_columns(self):
+        """Test column buffers for numeric fields and lists otherwise."""
+        columns = self.schema.columns(["F12=1;F7=1;F3=a", "F12=2;F7=0;F23=[x]"])
+        self.assertEqual(columns["user_id"], array("q", [1, 2]))
+        self.assertEqual(columns["active"], array("B", [1, 0]))
+        self.assertEqual(columns["name"], ["a", ""])
+        self.assertEqual(columns["roles"], [None, ["x"]])
+
+        optional = Schema([(1, "count", int, False, 0), (2, "ratio", float, False)])
+        columns = optional.columns(["F1=5;F2=0.5", "F9=1"])
+        self.assertEqual(columns["count"], array("q", [5, 0]))
+        self.assertEqual(columns["ratio"], [0.5, None])
+
+    def test_type_errors(self):
+        """Test that type mismatches and missing fields raise ValueError."""
+        for text, message in [
+            ("F12=1.5;F7=1", "'user_id' (F12): expected int"),
+            ("F12=1", "missing required field 'active'"),
+            ("F12=1;F7=2", "expected bool"),
+            ("F12=1;F7=1;F5=[1,x]", "expected float[]"),
+            ("F12=1;F7=1;F3=[a]", "expected str"),
+        ]:
+            with self.assertRaisesRegex(ValueError, re.escape(message)):
+                self.schema.decode(text)
+        with self.assertRaisesRegex(ValueError, "record 1"):
+            self.schema.decode_many(["F12=1;F7=1", "F12=x;F7=1"])
+        with self.assertRaises(ValueError):
+            self.schema.decode(b"\xff not binary")
+
+    def test_invalid_schema(self):
+        """Test schema validation."""
+        with self.assertRaises(ValueError):
+            Schema([(1, "a", "list")])
+        with self.assertRaises(ValueError):
+            Schema([(1, "a", int), (1, "b", int)])
+        with self.assertRaises(ValueError):
+            Schema([(1, "a", int), (2, "a", int)])
+
+    def test_describe(self):
+        """Test the schema description."""
+        lines = self.schema.describe().splitlines()
+        self.assertEqual(lines[0], "F12 user_id: int")
+        self.assertEqual(lines[2], "F3 name: str?")
+        self.assertEqual(len(self.schema), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Unit tests for lnmp.tracing module."""
+
+import unittest
+from contextlib import contextmanager
+
+import lnmp
+from lnmp import tracing
+
+
+class RecordingSpan(tracing.Span):
+    __slots__ = ("name", "trace_id", "attributes", "error")
+
+    def __init__(self, name, trace_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.attributes = dict(attributes)
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class RecordingTracer(tracing.Tracer):
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def start_span(self, name, trace_id, attributes):
+        span = RecordingSpan(name, trace_id, attributes)
+        self.spans.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = e
+            raise
+
+
+class TestTracing(unittest.TestCase):
+    """Test tracer registration, sampling and SDK spans."""
+
+    def setUp(self):
+        self.tracer = RecordingTracer()
+        tracing.set_tracer(self.tracer)
+
+    def tearDown(self):
+        tracing.set_tracer(None)
+
+    def _envelope(self, trace_id="trace-123"):
+        record = lnmp.core.parse("F12=14532;F7=1")
+        return lnmp.envelope.wrap(record, source="test-service", trace_id=trace_id)
+
+    def test_no_tracer_is_noop(self):
+        """Test that nothing is traced without a registered tracer."""
+        tracing.set_tracer(None)
+        self.assertIsNone(tracing.get_tracer())
+        lnmp.net.routing_decide(self._envelope())
+        self.assertEqual(self.tracer.spans, [])
+
+    def test_tracer_is_abstract(self):
+        """Test that a tracer must implement start_span."""
+        with self.assertRaises(TypeError):
+            tracing.Tracer()
+
+    def test_spans_parented_on_trace_id(self):
+        """Test wrap/score/route spans carry the envelope trace ID."""
+        envelope = self._envelope()
+        score = lnmp.net.context_score(envelope)
+        decision = lnmp.net.routing_decide(envelope)
+
+        names = [span.name for span in self.tracer.spans]
+        self.assertEqual(
+            names,
+            ["lnmp.envelope.wrap", "lnmp.net.context_score", "lnmp.net.routing_decide"],
+        )
+        for span in self.tracer.spans:
+            self.assertEqual(span.trace_id, "trace-123")
+            self.assertEqual(span.attributes["lnmp.trace_id"], "trace-123")
+            self.assertEqual(span.attributes["lnmp.source"], "test-service")
+        self.assertEqual(self.tracer.spans[1].attributes["lnmp.score.composite"], score.composite)
+        self.assertEqual(self.tracer.spans[2].attributes["lnmp.decision"], decision.name)
+
+    def test_transport_spans(self):
+        """Test spans around HTTP header conversions."""
+        envelope = self._envelope()
+        headers = lnmp.transport.to_http_headers(envelope)
+        lnmp.transport.from_http_headers(headers)
+
+        names = [span.name for span in self.tracer.spans]
+        self.assertIn("lnmp.transport.to_http_headers", names)
+        self.assertIn("lnmp.transport.from_http_headers", names)
+        self.assertEqual(self.tracer.spans[-1].trace_id, "trace-123")
+
+    def test_trace_id_from_traceparent(self):
+        """Test that a W3C traceparent header parents incoming spans."""
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        headers = {"x-lnmp-source": "svc", "traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+        self.assertEqual(lnmp.transport._header_trace_id(headers), trace_id)
+
+    def test_errors_propagate_through_span(self):
+        """Test that exceptions reach the tracer and the caller."""
+        with self.assertRaises(ValueError):
+            with tracing.span("lnmp.test", "trace-123"):
+                raise ValueError("boom")
+        self.assertIsInstance(self.tracer.spans[0].error, ValueError)
+
+    def test_sampling_is_per_trace(self):
+        """Test that sampling keeps or drops whole traces."""
+        tracing.set_tracer(self.tracer, sample_rate=0.5)
+        trace_ids = [f"trace-{i}" for i in range(200)]
+        for trace_id in trace_ids:
+            self._envelope(trace_id)
+        sampled = {span.trace_id for span in self.tracer.spans}
+        self.assertGreater(len(sampled), 0)
+        self.assertLess(len(sampled), len(trace_ids))
+
+        self.tracer.spans.clear()
+        for trace_id in trace_ids:
+            self._envelope(trace_id)
+        self.assertEqual({span.trace_id for span in self.tracer.spans}, sampled)
+
+    def test_sample_rate_zero(self):
+        """Test that a zero sample rate records nothing."""
+        tracing.set_tracer(self.tracer, sample_rate=0.0)
+        lnmp.net.routing_decide(self._envelope())
+        self.assertEqual(self.tracer.spans, [])
+
+    def test_invalid_sample_rate(self):
+        """Test sample rate validation."""
+        with self.assertRaises(ValueError):
+            tracing.set_tracer(self.tracer, sample_rate=1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,12 @@
 """Tests for Transport and Embedding Delta features."""
 
+import asyncio
+import io
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import lnmp
+from lnmp.transport import asgi, wsgi
 from lnmp.envelope import wrap
 from lnmp.core import parse
 
@@ -21,6 +26,289 @@ class TestTransport(unittest.TestCase):
         self.assertEqual(new_envelope.source, "test-service")
         self.assertEqual(new_envelope.trace_id, "trace-123")
 
+class TestFromHttpRequest(unittest.TestCase):
+    def test_text_body(self):
+        headers = {"x-lnmp-source": "test-service", "x-lnmp-trace-id": "trace-1"}
+        envelope = lnmp.transport.from_http_request(
+            headers, b"F12=14532;F7=1", content_type="application/lnmp"
+        )
+        self.assertEqual(envelope.source, "test-service")
+        self.assertEqual(envelope.trace_id, "trace-1")
+
+    def test_binary_body(self):
+        body = parse("F12=14532").encode_binary()
+        headers = {
+            "content-type": "application/lnmp-binary",
+            "x-lnmp-source": "test-service",
+        }
+        envelope = lnmp.transport.from_http_request(headers, body)
+        self.assertEqual(envelope.source, "test-service")
+
+    def test_chunked_feed(self):
+        decoder = lnmp.transport.BodyDecoder("application/lnmp")
+        for chunk in (b"F12=", b"145", b"32;F7=1"):
+            decoder.feed(chunk)
+        self.assertEqual(decoder.body(), b"F12=14532;F7=1")
+        envelope = decoder.finish({"x-lnmp-source": "chunked"})
+        self.assertEqual(envelope.source, "chunked")
+
+    def test_multiline_body_across_chunks(self):
+        decoder = lnmp.transport.BodyDecoder("application/lnmp")
+        for chunk in (b"F12=1", b"4532\nF7=", b"1\n"):
+            decoder.feed(chunk)
+        envelope = decoder.finish({})
+        self.assertEqual(envelope.record.encode(), parse("F12=14532;F7=1").encode())
+
+        decoder = lnmp.transport.BodyDecoder("application/lnmp")
+        decoder.feed(b"not lnmp\n\n")
+        decoder.feed(b"F1=1")
+        with self.assertRaises(ValueError):
+            decoder.finish({})
+
+    def test_max_size(self):
+        decoder = lnmp.transport.BodyDecoder("application/lnmp", max_size=4)
+        with self.assertRaises(ValueError):
+            decoder.feed(b"F12=14532")
+
+    def test_invalid_body(self):
+        with self.assertRaises(ValueError):
+            lnmp.transport.from_http_request(
+                {}, b"invalid format without equals", content_type="application/lnmp"
+            )
+
+
+def _run_asgi(app, headers, chunks):
+    """Drive an ASGI app in-process and return (scope, status, body seen by app)."""
+    seen = {}
+    sent = []
+
+    async def inner(scope, receive, send):
+        seen["scope"] = scope
+        seen["body"] = (await receive())["body"]
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    messages = [
+        {"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+        for i, c in enumerate(chunks)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers}
+    asyncio.run(app(inner)(scope, receive, send))
+    return seen, sent[0]["status"]
+
+
+class TestASGIMiddleware(unittest.TestCase):
+    headers = [
+        (b"content-type", b"application/lnmp"),
+        (b"x-lnmp-source", b"asgi-service"),
+    ]
+
+    def test_decodes_and_replays_body(self):
+        seen, status = _run_asgi(asgi.LNMPMiddleware, self.headers, [b"F12=14532;", b"F7=1"])
+        self.assertEqual(status, 200)
+        self.assertEqual(seen["scope"]["lnmp.envelope"].source, "asgi-service")
+        self.assertEqual(seen["body"], b"F12=14532;F7=1")
+        self.assertNotIn("lnmp.score", seen["scope"])
+
+    def test_score_and_route(self):
+        app = lambda inner: asgi.LNMPMiddleware(inner, score=True, route=True)
+        seen, _ = _run_asgi(app, self.headers, [b"F12=14532"])
+        self.assertIsInstance(seen["scope"]["lnmp.score"].composite, float)
+        self.assertIn("lnmp.decision", seen["scope"])
+
+    def test_passthrough(self):
+        seen, status = _run_asgi(asgi.LNMPMiddleware, [(b"content-type", b"text/plain")], [b"hi"])
+        self.assertEqual(status, 200)
+        self.assertNotIn("lnmp.envelope", seen["scope"])
+
+    def test_rejects_invalid(self):
+        seen, status = _run_asgi(asgi.LNMPMiddleware, self.headers, [b"not lnmp"])
+        self.assertEqual(status, 400)
+        self.assertNotIn("scope", seen)
+
+    def test_rejects_oversized(self):
+        app = lambda inner: asgi.LNMPMiddleware(inner, max_body_size=4)
+        _, status = _run_asgi(app, self.headers, [b"F12=14532"])
+        self.assertEqual(status, 413)
+
+
+class TestWSGIMiddleware(unittest.TestCase):
+    def _call(self, body, content_type="application/lnmp", environ=None, **options):
+        seen = {}
+
+        def inner(environ, start_response):
+            seen["environ"] = environ
+            seen["body"] = environ["wsgi.input"].read()
+            start_response("200 OK", [])
+            return [b"ok"]
+
+        statuses = []
+        environ = {
+            "REQUEST_METHOD": "POST",
+            "CONTENT_TYPE": content_type,
+            "CONTENT_LENGTH": str(len(body)),
+            "HTTP_X_LNMP_SOURCE": "wsgi-service",
+            "wsgi.input": io.BytesIO(body),
+            **(environ or {}),
+        }
+        app = wsgi.LNMPMiddleware(inner, chunk_size=4, **options)
+        app(environ, lambda status, headers: statuses.append(status))
+        return seen, statuses[0]
+
+    def test_decodes_and_replays_body(self):
+        seen, status = self._call(b"F12=14532;F7=1", route=True)
+        self.assertTrue(status.startswith("200"))
+        self.assertEqual(seen["environ"]["lnmp.envelope"].source, "wsgi-service")
+        self.assertIn("lnmp.decision", seen["environ"])
+        self.assertEqual(seen["body"], b"F12=14532;F7=1")
+
+    def test_reads_terminated_input_to_eof(self):
+        terminated = {"CONTENT_LENGTH": "", "wsgi.input_terminated": True}
+        seen, status = self._call(b"F12=14532;F7=1", environ=terminated)
+        self.assertTrue(status.startswith("200"))
+        self.assertEqual(seen["body"], b"F12=14532;F7=1")
+        self.assertEqual(seen["environ"]["lnmp.envelope"].source, "wsgi-service")
+
+        _, status = self._call(b"F12=14532;F7=1", environ=terminated, max_body_size=8)
+        self.assertTrue(status.startswith("413"))
+
+    def test_missing_length_means_empty_body(self):
+        # Without wsgi.input_terminated the input may be the raw socket, so
+        # nothing may be read from it
+        stream = io.BytesIO(b"F12=14532")
+        stream.read = lambda *args: self.fail("wsgi.input was read")
+        seen, _ = self._call(b"", environ={"CONTENT_LENGTH": "", "wsgi.input": stream}, reject_invalid=False)
+        self.assertEqual(seen["body"], b"")
+
+    def test_passthrough(self):
+        seen, _ = self._call(b"hello", content_type="text/plain")
+        self.assertNotIn("lnmp.envelope", seen["environ"])
+
+    def test_rejects_invalid(self):
+        seen, status = self._call(b"not lnmp")
+        self.assertTrue(status.startswith("400"))
+        self.assertEqual(seen, {})
+
+    def test_keeps_invalid_when_not_rejecting(self):
+        seen, _ = self._call(b"not lnmp", reject_invalid=False)
+        self.assertIsNone(seen["environ"]["lnmp.envelope"])
+
+
+class TestBatchFraming(unittest.TestCase):
+    def test_roundtrip(self):
+        envelopes = [
+            wrap(parse("F12=14532"), source="svc-a", trace_id="trace-a"),
+            wrap(parse("F7=1"), source="svc-b"),
+        ]
+        decoded = lnmp.transport.decode_batch(lnmp.transport.encode_batch(envelopes))
+        self.assertEqual([e.source for e in decoded], ["svc-a", "svc-b"])
+        self.assertEqual(decoded[0].trace_id, "trace-a")
+        self.assertIn("F7=1", decoded[1].record.encode())
+
+    def test_truncated(self):
+        data = lnmp.transport.encode_batch([wrap(parse("F1=1"), source="svc")])
+        with self.assertRaises(ValueError):
+            lnmp.transport.decode_batch(data[:-1])
+
+
+class _StubServer:
+    """Local HTTP/1.1 server recording requests and replaying canned statuses."""
+
+    def __init__(self, statuses=()):
+        self.requests = []
+        self.statuses = list(statuses)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stub.requests.append((dict(self.headers.items()), body))
+                status = stub.statuses.pop(0) if stub.statuses else 200
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/ingest"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.envelopes = [
+            wrap(parse(f"F1={i}"), source="dispatch-test", trace_id=f"trace-{i}")
+            for i in range(10)
+        ]
+
+    def _stub(self, statuses=()):
+        stub = _StubServer(statuses)
+        self.addCleanup(stub.close)
+        return stub
+
+    def test_batches(self):
+        stub = self._stub()
+        with lnmp.transport.Dispatcher(stub.url, max_batch_size=4, max_linger_ms=50) as dispatcher:
+            futures = [dispatcher.submit(e) for e in self.envelopes]
+            self.assertTrue(dispatcher.flush(timeout=5))
+        self.assertEqual([f.result() for f in futures], [200] * 10)
+
+        received = []
+        for headers, body in stub.requests:
+            if headers["content-type"] == lnmp.transport.BATCH_CONTENT_TYPE:
+                batch = lnmp.transport.decode_batch(body)
+                self.assertLessEqual(len(batch), 4)
+                self.assertEqual(headers["x-lnmp-batch-count"], str(len(batch)))
+                received.extend(e.trace_id for e in batch)
+            else:
+                self.assertEqual(headers["content-type"], lnmp.transport.BINARY_CONTENT_TYPE)
+                received.append(headers["x-lnmp-trace-id"])
+        self.assertEqual(sorted(received), sorted(e.trace_id for e in self.envelopes))
+
+    def test_single_envelope_uses_plain_request(self):
+        stub = self._stub()
+        with lnmp.transport.Dispatcher(stub.url, max_linger_ms=0) as dispatcher:
+            dispatcher.submit(self.envelopes[0]).result(timeout=5)
+        headers, _ = stub.requests[0]
+        self.assertEqual(headers["x-lnmp-source"], "dispatch-test")
+
+    def test_retries(self):
+        stub = self._stub([503, 503])
+        with lnmp.transport.Dispatcher(stub.url, backoff_base=0.001) as dispatcher:
+            self.assertEqual(dispatcher.submit(self.envelopes[0]).result(timeout=5), 200)
+        self.assertEqual(len(stub.requests), 3)
+
+    def test_client_error_not_retried(self):
+        stub = self._stub([400])
+        with lnmp.transport.Dispatcher(stub.url, backoff_base=0.001) as dispatcher:
+            future = dispatcher.submit(self.envelopes[0])
+            with self.assertRaises(lnmp.transport.DispatchError) as ctx:
+                future.result(timeout=5)
+        self.assertEqual(ctx.exception.status, 400)
+        self.assertEqual(len(stub.requests), 1)
+
+    def test_submit_after_close(self):
+        dispatcher = lnmp.transport.Dispatcher("http://127.0.0.1:1/")
+        dispatcher.close()
+        with self.assertRaises(RuntimeError):
+            dispatcher.submit(self.envelopes[0])
+
+
 class TestEmbeddingDelta(unittest.TestCase):
     def test_delta_apply(self):
         base = [1.0, 2.0, 3.0, 4.0]
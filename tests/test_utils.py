@@ -1,5 +1,8 @@
 """Unit tests for lnmp.utils module."""
 
+import json
+import os
+import tempfile
 import unittest
 import lnmp
 
@@ -85,5 +88,54 @@ class TestUtils(unittest.TestCase):
         # Should be informative
         self.assertGreater(len(explanation), 5)
 
+    def _dictionary_file(self, data):
+        """Write a semantic dictionary to a temporary JSON file."""
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        self.addCleanup(os.remove, path)
+        return path
+    
+    def test_explainer_record(self):
+        """Test explaining a Record with field names."""
+        explainer = lnmp.utils.Explainer({12: "user_id", 7: "is_active"})
+        record = lnmp.core.parse("F12=14532;F7=1")
+        
+        explanation = explainer.explain(record)
+        
+        self.assertIn("F12", explanation)
+        self.assertIn("user_id", explanation)
+    
+    def test_explainer_text(self):
+        """Test explaining LNMP text matches explaining the parsed record."""
+        explainer = lnmp.utils.Explainer({12: "user_id"})
+        record = lnmp.core.parse("F12=14532")
+        
+        self.assertEqual(explainer.explain("F12=14532"), explainer.explain(record))
+    
+    def test_explainer_from_file(self):
+        """Test loading a semantic dictionary from a file."""
+        path = self._dictionary_file({"fields": {"F12": "user_id", "7": "is_active"}})
+        
+        explainer = lnmp.utils.Explainer.from_file(path)
+        
+        self.assertEqual(explainer.field_names, {12: "user_id", 7: "is_active"})
+    
+    def test_explainer_from_file_invalid(self):
+        """Test invalid dictionary files are rejected."""
+        path = self._dictionary_file({"user": "user_id"})
+        
+        with self.assertRaises(ValueError):
+            lnmp.utils.Explainer.from_file(path)
+    
+    def test_explainer_many(self):
+        """Test batch explanation."""
+        explainer = lnmp.utils.Explainer({12: "user_id"})
+        records = [lnmp.core.parse("F12=1"), lnmp.core.parse("F12=2")]
+        
+        explanations = explainer.explain_many(records)
+        
+        self.assertEqual(explanations, [explainer.explain(r) for r in records])
+
 if __name__ == "__main__":
     unittest.main()